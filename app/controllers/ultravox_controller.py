@@ -2,6 +2,8 @@ import httpx
 from fastapi import HTTPException
 from typing import Dict, Any, Optional
 
+from app.utils.upstream_scheduler import upstream_scheduler
+
 async def join_ultravox_call(api_key: str, call_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Creates a new Ultravox call and returns the join URL.
@@ -12,7 +14,7 @@ async def join_ultravox_call(api_key: str, call_config: Dict[str, Any]) -> Dict[
     """
     try:
         # Create the Ultravox call
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.post(
                 "https://api.ultravox.ai/api/calls",
                 headers={
@@ -56,7 +58,7 @@ async def get_call_details(api_key: str, call_id: str) -> Dict[str, Any]:
     """
     try:
         # Fetch the call details
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.get(
                 f"https://api.ultravox.ai/api/calls/{call_id}",
                 headers={
@@ -95,7 +97,7 @@ async def create_ultravox_call(api_key: str, call_config: Dict[str, Any]) -> Dic
     """
     try:
         # Create the Ultravox call
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.post(
                 "https://api.ultravox.ai/api/calls",
                 headers={
@@ -125,6 +127,74 @@ async def create_ultravox_call(api_key: str, call_config: Dict[str, Any]) -> Dic
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+async def delete_ultravox_call(api_key: str, call_id: str) -> None:
+    """
+    Deletes an Ultravox call, such as a pre-created call nobody will join.
+    
+    Parameters:
+    - api_key: Ultravox API key for authentication
+    - call_id: Unique identifier of the call to delete
+    """
+    try:
+        # Delete the Ultravox call
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
+            response = await client.delete(
+                f"https://api.ultravox.ai/api/calls/{call_id}",
+                headers={
+                    "X-API-Key": api_key,
+                },
+                timeout=30.0  # Set an appropriate timeout
+            )
+            
+            # Check if the response is successful
+            if response.status_code not in [200, 204, 404]:
+                error_text = response.text
+                raise HTTPException(
+                    status_code=response.status_code, 
+                    detail=f"Failed to delete Ultravox call: {error_text}"
+                )
+            
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"Network error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+async def get_account_info(api_key: str) -> Dict[str, Any]:
+    """
+    Retrieves the Ultravox account of an API key, including its active and
+    allowed concurrent calls.
+    
+    Parameters:
+    - api_key: Ultravox API key for authentication
+    """
+    try:
+        # Fetch the account
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
+            response = await client.get(
+                "https://api.ultravox.ai/api/accounts/me",
+                headers={
+                    "Content-Type": "application/json",
+                    "X-API-Key": api_key,
+                },
+                timeout=10.0  # Set an appropriate timeout
+            )
+            
+            # Check if the response is successful
+            if response.status_code != 200:
+                error_text = response.text
+                raise HTTPException(
+                    status_code=response.status_code, 
+                    detail=f"Failed to retrieve Ultravox account: {error_text}"
+                )
+            
+            # Return the account info
+            return response.json()
+            
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"Network error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
 async def list_ultravox_calls(api_key: str, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Retrieves a list of all Ultravox calls associated with the API key.
@@ -141,7 +211,7 @@ async def list_ultravox_calls(api_key: str, cursor: Optional[str] = None) -> Dic
             params["cursor"] = cursor
             
         # Fetch the list of calls
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.get(
                 url,
                 params=params,
@@ -188,7 +258,7 @@ async def list_call_messages(api_key: str, call_id: str, cursor: Optional[str] =
             params["cursor"] = cursor
             
         # Fetch the list of call messages
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.get(
                 url,
                 params=params,
@@ -235,7 +305,7 @@ async def list_call_stages(api_key: str, call_id: str, cursor: Optional[str] = N
             params["cursor"] = cursor
             
         # Fetch the list of call stages
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.get(
                 url,
                 params=params,
@@ -283,7 +353,7 @@ async def get_call_stage_details(api_key: str, call_id: str, call_stage_id: str)
         }
             
         # Fetch the call stage details
-        async with httpx.AsyncClient() as client:
+        async with upstream_scheduler.slot(), httpx.AsyncClient() as client:
             response = await client.post(
                 "https://prod-voice-pgaenaxiea-uc.a.run.app/ultravox/call-stage-details",
                 headers={"Content-Type": "application/json"},
@@ -39,6 +39,37 @@ from app.controllers import ultravox_controller
 app.include_router(ultravox.router, prefix="/api/ultravox", tags=["ultravox"])
 app.include_router(tezhire.router, prefix="/api/tezhire", tags=["tezhire"])
 
+# Background jobs
+import asyncio
+from app.utils.transcript_segments import transcript_segments, run_compaction
+from app.utils.scoring import answer_scorer
+from app.utils.recordings import recording_proxy
+from app.utils.audio_analysis import audio_analyzer
+from app.utils.interview_scheduler import interview_scheduler
+from app.utils.admission import admission_controller
+from app.utils.call_reaper import call_reaper
+from app.utils.upstream_scheduler import upstream_context, BACKGROUND
+
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    background_tasks.append(asyncio.create_task(run_compaction(transcript_segments)))
+    background_tasks.append(asyncio.create_task(interview_scheduler.run()))
+    # Account syncs and reaper sweeps yield upstream slots to interactive requests
+    with upstream_context(priority=BACKGROUND):
+        background_tasks.append(asyncio.create_task(admission_controller.run()))
+        background_tasks.append(asyncio.create_task(call_reaper.run()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    answer_scorer.shutdown()
+    audio_analyzer.shutdown()
+    await recording_proxy.aclose()
+
 # Run the application
 if __name__ == "__main__":
     import uvicorn
@@ -99,6 +99,24 @@ class SessionResponse(BaseModel):
     status: str
 
 
+class ScheduledSessionRequest(SessionRequest):
+    scheduled_at: str = Field(..., alias="scheduledAt")
+
+
+class ScheduledSessionResponse(BaseModel):
+    success: bool
+    session_id: str = Field(..., alias="sessionId")
+    scheduled_at: str = Field(..., alias="scheduledAt")
+    call_created_at: str = Field(..., alias="callCreatedAt")
+    status: str
+
+
+class JoinSessionResponse(BaseModel):
+    session_id: str = Field(..., alias="sessionId")
+    join_url: str = Field(..., alias="joinUrl")
+    status: str
+
+
 class SessionStatusResponse(BaseModel):
     session_id: str = Field(..., alias="sessionId")
     status: str
@@ -109,6 +127,7 @@ class SessionStatusResponse(BaseModel):
     duration: int
     progress: int
     questions_asked: int = Field(..., alias="questionsAsked")
+    phase: Optional[str] = None
 
 
 class EndSessionRequest(BaseModel):
@@ -155,6 +174,28 @@ class Transcript(BaseModel):
 class Audio(BaseModel):
     url: str
     duration: int
+    talk_time: Optional[float] = Field(None, alias="talkTime")
+    silence: Optional[float] = None
+    longest_silence: Optional[float] = Field(None, alias="longestSilence")
+    candidate_talk_time: Optional[float] = Field(None, alias="candidateTalkTime")
+    interviewer_talk_time: Optional[float] = Field(None, alias="interviewerTalkTime")
+
+
+class CustomQuestionCoverage(BaseModel):
+    question: str
+    asked: bool
+    similarity: float
+    asked_at: Optional[str] = Field(None, alias="askedAt")
+    ordinal: Optional[int] = None
+    matched_text: Optional[str] = Field(None, alias="matchedText")
+
+
+class SimilarAnswer(BaseModel):
+    question_id: str = Field(..., alias="questionId")
+    other_session_id: str = Field(..., alias="otherSessionId")
+    other_candidate_id: str = Field(..., alias="otherCandidateId")
+    other_question_id: str = Field(..., alias="otherQuestionId")
+    similarity: float
 
 
 class InterviewResultsResponse(BaseModel):
@@ -167,6 +208,68 @@ class InterviewResultsResponse(BaseModel):
     questions: List[Question]
     transcript: Transcript
     audio: Audio
+    complete: bool = True
+    custom_questions: List[CustomQuestionCoverage] = Field(default_factory=list, alias="customQuestions")
+    similar_answers: List[SimilarAnswer] = Field(default_factory=list, alias="similarAnswers")
+    call_stage_ids: List[str] = Field(default_factory=list, alias="callStageIds")
+
+
+class SearchMatch(BaseModel):
+    question_id: str = Field(..., alias="questionId")
+    snippet: str
+
+
+class SearchHit(BaseModel):
+    session_id: str = Field(..., alias="sessionId")
+    company_id: str = Field(..., alias="companyId")
+    job_id: str = Field(..., alias="jobId")
+    score: int
+    matches: List[SearchMatch]
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchHit]
+
+
+class RankedCandidate(BaseModel):
+    rank: int
+    session_id: str = Field(..., alias="sessionId")
+    candidate_id: str = Field(..., alias="candidateId")
+    company_id: str = Field(..., alias="companyId")
+    overall_score: int = Field(..., alias="overallScore")
+    fit_score: int = Field(..., alias="fitScore")
+    recommendation: str
+
+
+class RankingResponse(BaseModel):
+    job_id: str = Field(..., alias="jobId")
+    sort_by: str = Field(..., alias="sortBy")
+    total: int
+    results: List[RankedCandidate]
+
+
+class FlaggedAnswer(BaseModel):
+    session_id: str = Field(..., alias="sessionId")
+    candidate_id: str = Field(..., alias="candidateId")
+    question_id: str = Field(..., alias="questionId")
+    question: str
+    answer_transcript: str = Field(..., alias="answerTranscript")
+
+
+class SimilarAnswerPair(BaseModel):
+    similarity: float
+    answers: List[FlaggedAnswer]
+
+
+class SimilarAnswersResponse(BaseModel):
+    job_id: str = Field(..., alias="jobId")
+    results: List[SimilarAnswerPair]
+
+
+class ResumeMatchRequest(BaseModel):
+    job: Job
+    candidates: List[Candidate]
 
 
 class WebhookRequest(BaseModel):
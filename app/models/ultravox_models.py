@@ -381,4 +381,32 @@ class GetCallStageRequest(BaseModel):
     def validate_api_key(cls, v):
         if not v or len(v.strip()) == 0:
             raise ValueError("API key must not be empty")
-        return v
\ No newline at end of file
+        return v
+
+
+class CallMessagesSinceRequest(BaseModel):
+    apiKey: str = Field(
+        description="Ultravox API key for authentication"
+    )
+    callId: str = Field(
+        description="Unique identifier of the call to retrieve messages for"
+    )
+    sinceOrdinal: int = Field(
+        default=-1,
+        ge=-1,
+        description="Ordinal of the last message already seen (-1 for all messages)"
+    )
+
+    @validator('apiKey')
+    def validate_api_key(cls, v):
+        if not v or len(v.strip()) == 0:
+            raise ValueError("API key must not be empty")
+        return v
+
+class OrdinalCallMessage(CallMessage):
+    ordinal: int
+
+class CallMessagesSinceResponse(BaseModel):
+    results: List[OrdinalCallMessage]
+    lastOrdinal: int
+    ended: bool = False
@@ -1,19 +1,51 @@
 import os
 import json
+import math
+import time
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import traceback
+from itertools import islice
+from typing import Dict, Any, List, Optional, AsyncIterator
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Request, HTTPException, status, Path
-from fastapi.responses import JSONResponse
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import APIRouter, Request, HTTPException, status, Path, Query
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 import httpx
 
 from app.models.tezhire import (
     SessionRequest, SessionResponse, SessionStatusResponse,
+    ScheduledSessionRequest, ScheduledSessionResponse, JoinSessionResponse,
     EndSessionRequest, EndSessionResponse, InterviewResultsResponse,
-    WebhookRequest, ErrorResponse
+    WebhookRequest, ErrorResponse, SearchResponse, RankingResponse,
+    ResumeMatchRequest, SimilarAnswersResponse
+)
+from app.utils.api import get_api_key, select_api_key, validate_session_id, handle_api_error
+from app.utils.session_store import (
+    session_store, get_session, sessions_for_job,
+    build_status_snapshot, elapsed_seconds, TERMINAL_STATUSES
+)
+from app.utils.results_builder import results_builder
+from app.utils.search_index import search_index
+from app.utils.recordings import recording_proxy
+from app.utils.candidate_ranking import ranking_index
+from app.utils.answer_similarity import similarity_index
+from app.utils.resume_matcher import resume_matcher, RESUME_MATCH_BATCH_SIZE
+from app.utils.interview_tools import (
+    tool_plans, TOOL_INSTRUCTIONS, TOOL_TOKEN_HEADER, NEXT_QUESTION, SWITCH_TOPIC, TIME_CHECK
+)
+from app.utils.interview_state import advance, current_phase, debug_view, INTRO
+from app.utils.interview_stages import (
+    StagePlan, stage_context, INTERVIEW_STAGES_ENABLED, STAGE_RESPONSE_HEADER, NEW_STAGE
+)
+from app.utils.interview_scheduler import interview_scheduler, SessionAlreadyJoined
+from app.utils.admission import admission_controller, AdmissionTimeout
+from app.utils.key_pool import key_pool
+from app.utils.call_reaper import call_reaper
+from app.utils.upstream_scheduler import upstream_scheduler, upstream_context, INTERACTIVE, BACKGROUND
+from app.utils.status_hub import (
+    status_hub, Subscription, STATUS_HEARTBEAT_INTERVAL
 )
-from app.models.ultravox import CallConfig
-from app.utils.api import get_api_key, validate_session_id, handle_api_error
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +54,14 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Keep derived indexes up to date as results are materialized
+results_builder.on_materialized(search_index.index_results)
+results_builder.on_materialized(ranking_index.index_results)
+results_builder.on_materialized(similarity_index.index_results)
+results_builder.on_materialized(tool_plans.remove_results)
+results_builder.on_materialized(interview_scheduler.remove_results)
+results_builder.on_materialized(admission_controller.release_results)
+
 
 def validate_session_request(request: SessionRequest) -> Dict[str, Any]:
     """
@@ -107,6 +147,85 @@ Remember to maintain a professional and supportive tone throughout the interview
 """
 
 
+def build_call_config(session_request: SessionRequest) -> Dict[str, Any]:
+    """
+    Build the Ultravox call configuration of a session, registering its
+    question plan when in-call tools are enabled.
+    
+    Args:
+        session_request: The session request
+        
+    Returns:
+        Dict[str, Any]: The call configuration
+    """
+    # Plan the questions served by the in-call tools
+    session_id = session_request.session.session_id
+    plan = None
+    selected_tools = []
+    if tool_plans.enabled:
+        plan = tool_plans.create(
+            session_id,
+            session_request.interview.custom_questions,
+            session_request.interview.topics_to_focus,
+            session_request.job.requirements,
+            session_request.interview.duration,
+        )
+        selected_tools = tool_plans.selected_tools(plan)
+    
+    # Generate system prompt; staged sessions start with the intro stage
+    # and get the prompt of each later phase from the tool endpoint
+    if plan is not None and INTERVIEW_STAGES_ENABLED:
+        plan.stages = StagePlan(stage_context(session_request), selected_tools, TOOL_INSTRUCTIONS)
+        system_prompt = plan.stages.initial_prompt
+    else:
+        system_prompt = generate_system_prompt(session_request)
+        if plan is not None:
+            system_prompt += TOOL_INSTRUCTIONS
+    
+    # Create call configuration for Ultravox
+    call_config = {
+        "systemPrompt": system_prompt,
+        "model": "fixie-ai/ultravox-70B",
+        "voice": session_request.configuration.voice_id,
+        "languageHint": session_request.configuration.language or "en-US",
+        "maxDuration": f"{session_request.interview.duration * 60}s",  # Convert minutes to seconds
+        "recordingEnabled": True,
+        "selectedTools": selected_tools,
+        "initialState": {"phase": INTRO},
+    }
+    return call_config
+
+
+def build_session_record(session_request: SessionRequest, api_key: str, created_at: datetime) -> Dict[str, Any]:
+    """
+    Build the stored record of a new session, before its call exists.
+    
+    Args:
+        session_request: The session request
+        api_key: Ultravox API key for authentication
+        created_at: Creation time of the session
+        
+    Returns:
+        Dict[str, Any]: The session record
+    """
+    return {
+        "call_id": None,
+        "join_url": None,
+        "created_at": created_at.isoformat(),
+        "status": "created",
+        "candidate_id": session_request.candidate.candidate_id,
+        "job_id": session_request.job.job_id,
+        "company_id": session_request.job.company_id,
+        "interview_duration": session_request.interview.duration,
+        "requirements": session_request.job.requirements,
+        "topics_to_focus": session_request.interview.topics_to_focus,
+        "custom_questions": session_request.interview.custom_questions,
+        "skills": session_request.candidate.resume_data.skills,
+        "expiry": (created_at + timedelta(days=1)).isoformat(),  # 24 hours from now
+        "api_key": api_key,
+    }
+
+
 @router.post("/interview-sessions", response_model=SessionResponse)
 async def create_interview_session(request: Request, session_request: SessionRequest):
     """
@@ -125,8 +244,8 @@ async def create_interview_session(request: Request, session_request: SessionReq
         )
     
     try:
-        # Get API key
-        api_key = get_api_key(request)
+        # Get API key, spreading new calls across the key pool
+        api_key = select_api_key(request)
         
         # Validate request
         validation = validate_session_request(session_request)
@@ -136,31 +255,36 @@ async def create_interview_session(request: Request, session_request: SessionReq
                 status_code=400
             )
         
-        # Generate system prompt
-        system_prompt = generate_system_prompt(session_request)
+        session_id = session_request.session.session_id
+        call_config = build_call_config(session_request)
         
-        # Create call configuration for Ultravox
-        call_config = {
-            "systemPrompt": system_prompt,
-            "model": "fixie-ai/ultravox-70B",
-            "voice": session_request.configuration.voice_id,
-            "languageHint": session_request.configuration.language or "en-US",
-            "maxDuration": f"{session_request.interview.duration * 60}s",  # Convert minutes to seconds
-            "recordingEnabled": True,
-            "selectedTools": [],
-        }
-        
-        # Call Ultravox API to create a session
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                'https://api.ultravox.ai/api/calls',
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-API-Key': api_key,
-                    'Accept': 'application/json',
+        # Call Ultravox API to create a session, once the account has capacity
+        try:
+            async with admission_controller.reserve(api_key) as reservation:
+                async with upstream_scheduler.slot(session_request.job.company_id, INTERACTIVE), httpx.AsyncClient() as client:
+                    response = await client.post(
+                        'https://api.ultravox.ai/api/calls',
+                        headers={
+                            'Content-Type': 'application/json',
+                            'X-API-Key': api_key,
+                            'Accept': 'application/json',
+                        },
+                        json=call_config,
+                        timeout=30.0
+                    )
+                key_pool.report_status(api_key, response.status_code)
+                if response.is_success:
+                    reservation.bind(response.json().get("callId"))
+        except AdmissionTimeout as e:
+            tool_plans.remove(session_id)
+            return JSONResponse(
+                content={
+                    "error": "Call capacity reached",
+                    "details": str(e),
+                    "estimatedWaitSeconds": round(e.estimated_wait, 1)
                 },
-                json=call_config,
-                timeout=30.0
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(e.estimated_wait)))}
             )
         
         if not response.is_success:
@@ -173,6 +297,7 @@ async def create_interview_session(request: Request, session_request: SessionReq
                 # Use raw error text if parsing fails
                 error_message = error_text
             
+            tool_plans.remove(session_id)
             return JSONResponse(
                 content={"error": "Failed to create interview session", "details": error_message},
                 status_code=response.status_code
@@ -181,16 +306,18 @@ async def create_interview_session(request: Request, session_request: SessionReq
         # Parse Ultravox response
         ultravox_response = response.json()
         
-        # Store session data in database or cache for later retrieval
-        # This would typically involve saving the mapping between session_request.session.session_id
-        # and ultravox_response.callId, along with other relevant data
+        # Store the mapping between the Tezhire session and the Ultravox call
+        record = build_session_record(session_request, api_key, datetime.now())
+        record["call_id"] = ultravox_response.get("callId")
+        record["join_url"] = ultravox_response["joinUrl"]
+        session_store[session_id] = record
+        status_hub.session_created(session_id)
         
-        # For now, we'll just return the response
         session_response = {
             "success": True,
-            "sessionId": session_request.session.session_id,
+            "sessionId": session_id,
             "joinUrl": ultravox_response["joinUrl"],
-            "expiry": (datetime.now() + timedelta(days=1)).isoformat(),  # 24 hours from now
+            "expiry": record["expiry"],
             "status": "created"
         }
         
@@ -201,6 +328,184 @@ async def create_interview_session(request: Request, session_request: SessionReq
         raise e
     except Exception as e:
         logger.error(f"Error creating interview session: {str(e)}")
+        tool_plans.remove(session_request.session.session_id)
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+def parse_slot_time(scheduled_at: str, time_zone: str) -> datetime:
+    """
+    Parse the start of an interview slot.
+    
+    Args:
+        scheduled_at: ISO 8601 start time; times without an offset are local to time_zone
+        time_zone: IANA time zone of the session configuration
+        
+    Returns:
+        datetime: The timezone-aware slot start
+        
+    Raises:
+        ValueError: If the time or time zone is invalid
+    """
+    slot = datetime.fromisoformat(scheduled_at.replace("Z", "+00:00"))
+    if slot.tzinfo is None:
+        try:
+            slot = slot.replace(tzinfo=ZoneInfo(time_zone or "UTC"))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {time_zone}")
+    return slot
+
+
+@router.post("/interview-sessions/scheduled", response_model=ScheduledSessionResponse)
+async def schedule_interview_session(request: Request, session_request: ScheduledSessionRequest):
+    """
+    Schedule an interview session whose call is created shortly before its slot.
+    """
+    try:
+        # Get API key, spreading new calls across the key pool
+        api_key = select_api_key(request)
+        
+        # Validate request
+        validation = validate_session_request(session_request)
+        if not validation["is_valid"]:
+            return JSONResponse(
+                content={"error": "Invalid request", "details": validation["error"]},
+                status_code=400
+            )
+        try:
+            slot = parse_slot_time(session_request.scheduled_at, session_request.configuration.time_zone)
+        except ValueError as e:
+            return JSONResponse(
+                content={"error": "Invalid scheduledAt", "details": str(e)},
+                status_code=400
+            )
+        
+        session_id = session_request.session.session_id
+        call_config = build_call_config(session_request)
+        record = build_session_record(session_request, api_key, datetime.now())
+        record["status"] = "scheduled"
+        record["scheduled_at"] = slot.isoformat()
+        session_store[session_id] = record
+        status_hub.session_created(session_id)
+        
+        create_at = interview_scheduler.schedule(session_id, api_key, call_config, slot.timestamp())
+        
+        return {
+            "success": True,
+            "sessionId": session_id,
+            "scheduledAt": slot.isoformat(),
+            "callCreatedAt": datetime.fromtimestamp(create_at, tz=slot.tzinfo).isoformat(),
+            "status": "scheduled"
+        }
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error scheduling interview session: {str(e)}")
+        tool_plans.remove(session_request.session.session_id)
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.get("/interview-sessions/{session_id}/join", response_model=JoinSessionResponse)
+async def join_interview_session(
+    session_id: str = Path(..., description="The ID of the interview session")
+):
+    """
+    Get the join URL of an interview session; scheduled sessions whose call
+    was not pre-created get one now.
+    """
+    try:
+        record = get_session(session_id)
+        if record is None or record.get("status") == "cancelled":
+            return JSONResponse(content={"error": "Session not found"}, status_code=404)
+        if record.get("status") in TERMINAL_STATUSES and record.get("start_time"):
+            return JSONResponse(content={"error": "Interview has already ended"}, status_code=409)
+        
+        try:
+            join_url = await interview_scheduler.join(session_id)
+        except Exception as e:
+            return JSONResponse(
+                content={"error": "Failed to create interview call", "details": str(e)},
+                status_code=502
+            )
+        
+        join_url = join_url or record.get("join_url")
+        if not join_url:
+            return JSONResponse(content={"error": "Session has no call yet"}, status_code=409)
+        return {"sessionId": session_id, "joinUrl": join_url, "status": record.get("status", "created")}
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error joining session: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.delete("/interview-sessions/{session_id}/schedule")
+async def cancel_scheduled_session(
+    request: Request,
+    session_id: str = Path(..., description="The ID of the scheduled interview session")
+):
+    """
+    Cancel a scheduled interview session and clean up its pre-created call.
+    """
+    try:
+        validate_session_id(session_id)
+        api_key = get_api_key(request)
+        
+        record = get_session(session_id)
+        if (record is None or session_id not in interview_scheduler.entries
+                or not key_pool.owns(api_key, record.get("api_key"))):
+            return JSONResponse(content={"error": "Scheduled session not found"}, status_code=404)
+        if record.get("status") not in ("scheduled", "created"):
+            return JSONResponse(
+                content={"error": "Session already started", "details": record.get("status")},
+                status_code=409
+            )
+        
+        try:
+            await interview_scheduler.cancel(session_id)
+        except SessionAlreadyJoined:
+            status_hub.publish(session_id)
+            return JSONResponse(
+                content={"error": "Session already started", "details": record.get("status")},
+                status_code=409
+            )
+        except RuntimeError as e:
+            return JSONResponse(
+                content={"error": "Failed to check the interview call", "details": str(e)},
+                status_code=502
+            )
+        tool_plans.remove(session_id)
+        record["status"] = "cancelled"
+        record["end_time"] = datetime.now().isoformat()
+        status_hub.publish(session_id)
+        return {"success": True, "sessionId": session_id, "status": "cancelled"}
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error cancelling scheduled session: {str(e)}")
         return JSONResponse(
             content={
                 "error": "Internal server error",
@@ -222,31 +527,20 @@ async def get_session_status(
         validate_session_id(session_id)
         
         # Get API key
-        api_key = get_api_key(request)
+        get_api_key(request)
         
-        # In a real implementation, we would:
-        # 1. Retrieve the mapping between Tezhire sessionId and Ultravox callId from database
-        # 2. Call Ultravox API to get the call status
-        # 3. Transform the response to match our API format
-        
-        # For now, we'll simulate this process with mock data
-        # In a production environment, you would replace this with actual database lookups
-        # and API calls to Ultravox
+        record = get_session(session_id)
+        if record is None:
+            return JSONResponse(
+                content={"error": "Session not found"},
+                status_code=404
+            )
         
-        # Mock data for demonstration
-        mock_status = {
-            "sessionId": session_id,
-            "status": "in_progress",  # Possible values: created, waiting, in_progress, completed, cancelled, error
-            "candidateId": "candidate-123",
-            "jobId": "job-456",
-            "startTime": datetime.now().isoformat(),
-            "endTime": None,
-            "duration": 300,  # seconds
-            "progress": 45,  # percentage
-            "questionsAsked": 5
-        }
+        # The snapshot comes from the record; live sessions without a status
+        # watcher are refreshed from Ultravox in the background for later polls
+        status_hub.refresh(session_id)
         
-        return mock_status
+        return build_status_snapshot(session_id, record)
         
     except HTTPException as e:
         # Re-raise HTTP exceptions
@@ -262,6 +556,150 @@ async def get_session_status(
         )
 
 
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format a Server-Sent Events message.
+
+    Args:
+        event: The event name
+        data: The JSON payload
+
+    Returns:
+        str: The encoded SSE message
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_status_events(
+    request: Request,
+    subscription: Subscription,
+    initial: List[Dict[str, Any]],
+    close_when_ended: bool = False
+) -> AsyncIterator[str]:
+    """
+    Stream status events from a hub subscription, with heartbeats while idle.
+
+    Args:
+        request: The FastAPI request object, used to detect disconnects
+        subscription: The hub subscription to stream from
+        initial: Snapshots to send before any live update
+        close_when_ended: Whether to close the stream after a terminal snapshot,
+            for streams that follow a single session
+
+    Yields:
+        str: Encoded SSE messages
+    """
+    try:
+        for snapshot in initial:
+            yield format_sse_event("status", snapshot)
+            if close_when_ended and snapshot["status"] in TERMINAL_STATUSES:
+                # Nothing changes after the end, including for late clients
+                yield format_sse_event("close", {"reason": "session ended"})
+                return
+
+        while not await request.is_disconnected():
+            try:
+                snapshot = await subscription.get(STATUS_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+
+            if snapshot is None:
+                # Closed by the hub, e.g. because the client fell too far behind
+                yield format_sse_event("close", {"reason": "subscription closed"})
+                break
+            yield format_sse_event("status", snapshot)
+            if close_when_ended and snapshot["status"] in TERMINAL_STATUSES:
+                yield format_sse_event("close", {"reason": "session ended"})
+                break
+    finally:
+        status_hub.unsubscribe(subscription)
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+@router.get("/interview-sessions/{session_id}/events")
+async def stream_session_status(
+    request: Request,
+    session_id: str = Path(..., description="The ID of the interview session")
+):
+    """
+    Stream live status updates of an interview session as Server-Sent Events.
+    """
+    try:
+        validate_session_id(session_id)
+        get_api_key(request)
+
+        record = get_session(session_id)
+        if record is None:
+            return JSONResponse(
+                content={"error": "Session not found"},
+                status_code=404
+            )
+
+        initial = [build_status_snapshot(session_id, record)]
+        subscription = status_hub.subscribe_session(session_id)
+        return StreamingResponse(
+            stream_status_events(request, subscription, initial, close_when_ended=True),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error streaming session status: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_status(
+    request: Request,
+    job_id: str = Path(..., description="The ID of the job")
+):
+    """
+    Stream live status updates of every interview session of a job as
+    Server-Sent Events.
+    """
+    try:
+        get_api_key(request)
+
+        initial = [
+            build_status_snapshot(session_id, record)
+            for session_id, record in sessions_for_job(job_id).items()
+        ]
+        subscription = status_hub.subscribe_job(job_id)
+        return StreamingResponse(
+            stream_status_events(request, subscription, initial),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error streaming job status: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
 @router.post("/interview-sessions/{session_id}/end", response_model=EndSessionResponse)
 async def end_session(
     request: Request,
@@ -275,23 +713,33 @@ async def end_session(
         validate_session_id(session_id)
         
         # Get API key
-        api_key = get_api_key(request)
+        get_api_key(request)
         
-        # In a real implementation, we would:
-        # 1. Retrieve the mapping between Tezhire sessionId and Ultravox callId from database
-        # 2. Call Ultravox API to end the call
-        # 3. Transform the response to match our API format
+        record = get_session(session_id)
+        if record is None:
+            return JSONResponse(
+                content={"error": "Session not found"},
+                status_code=404
+            )
         
-        # For now, we'll simulate this process with mock data
-        # In a production environment, you would replace this with actual database lookups
-        # and API calls to Ultravox
+        if record.get("status") not in TERMINAL_STATUSES:
+            # A scheduled session whose call was not created yet has nothing to end upstream
+            if not record.get("call_id"):
+                await interview_scheduler.cancel(session_id)
+            reason = (end_request.reason if end_request else None) or "ended_by_api"
+            try:
+                await call_reaper.end(session_id, record, reason)
+            except HTTPException as e:
+                return JSONResponse(
+                    content={"error": "Failed to end interview session", "details": e.detail},
+                    status_code=502
+                )
         
-        # Mock response for demonstration
         end_response = {
             "success": True,
             "sessionId": session_id,
-            "status": "ended",
-            "duration": 720  # seconds
+            "status": record["status"],
+            "duration": elapsed_seconds(record)
         }
         
         return end_response
@@ -324,82 +772,352 @@ async def get_interview_results(
         # Get API key
         api_key = get_api_key(request)
         
-        # In a real implementation, we would:
-        # 1. Retrieve the mapping between Tezhire sessionId and Ultravox callId from database
-        # 2. Call Ultravox API to get the call messages and details
-        # 3. Process the messages to generate an analysis
-        # 4. Transform the response to match our API format
+        record = get_session(session_id)
+        if record is None:
+            return JSONResponse(
+                content={"error": "Session not found"},
+                status_code=404
+            )
         
-        # For now, we'll simulate this process with mock data
-        # In a production environment, you would replace this with actual database lookups
-        # and API calls to Ultravox
+        if not record.get("call_id"):
+            return JSONResponse(content={"error": "Session has no call yet"}, status_code=409)
         
-        # Mock response for demonstration
-        results_response = {
-            "sessionId": session_id,
-            "candidateId": "candidate-123",
-            "jobId": "job-456",
-            "companyId": "company-789",
-            "overallScore": 78,
-            "feedback": {
-                "summary": "The candidate demonstrated strong technical knowledge and problem-solving skills. Communication was clear and professional.",
-                "strengths": [
-                    "Strong understanding of core programming concepts",
-                    "Excellent problem-solving approach",
-                    "Clear communication of technical ideas"
-                ],
-                "areasForImprovement": [
-                    "Could improve knowledge of advanced algorithms",
-                    "More experience with distributed systems would be beneficial"
-                ],
-                "technicalAssessment": "The candidate showed proficiency in most technical areas relevant to the position.",
-                "communicationAssessment": "Communication was clear, concise, and professional throughout the interview.",
-                "fitScore": 82,
-                "recommendation": "Hire"
+        # Ended sessions are served straight from the results store, running
+        # sessions get partial results marked as incomplete
+        with upstream_context(record.get("company_id"), BACKGROUND):
+            results = await results_builder.get_results(session_id, record, record.get("api_key") or api_key)
+        
+        # Later interviews can flag this one, so flags are looked up on read
+        return dict(results, similarAnswers=similarity_index.flags_for(session_id))
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error retrieving interview results: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
             },
-            "questions": [
-                {
-                    "questionId": "q1",
-                    "question": "Can you explain your approach to solving complex technical problems?",
-                    "timestamp": (datetime.now() - timedelta(minutes=30)).isoformat(),
-                    "answerTranscript": "I typically start by breaking down the problem into smaller components...",
-                    "answerDuration": 45,
-                    "evaluation": {
-                        "score": 85,
-                        "feedback": "Excellent problem decomposition approach",
-                        "keyInsights": ["Methodical", "Structured thinking", "Clear communication"]
-                    }
-                },
-                {
-                    "questionId": "q2",
-                    "question": "Describe your experience with distributed systems.",
-                    "timestamp": (datetime.now() - timedelta(minutes=25)).isoformat(),
-                    "answerTranscript": "I have worked on several projects involving distributed architectures...",
-                    "answerDuration": 60,
-                    "evaluation": {
-                        "score": 70,
-                        "feedback": "Good understanding but limited practical experience",
-                        "keyInsights": ["Theoretical knowledge", "Limited hands-on experience"]
-                    }
-                }
-            ],
-            "transcript": {
-                "full": "Full interview transcript would be here...",
-                "url": "https://api.example.com/transcripts/interview-123.txt"
+            status_code=500
+        )
+
+
+@router.get("/interview-sessions/{session_id}/recording")
+async def get_interview_recording(
+    request: Request,
+    session_id: str = Path(..., description="The ID of the interview session")
+):
+    """
+    Play back the recording of an interview session. Supports Range requests.
+    """
+    try:
+        validate_session_id(session_id)
+        
+        # Get API key
+        api_key = get_api_key(request)
+        
+        record = get_session(session_id)
+        if record is None:
+            return JSONResponse(
+                content={"error": "Session not found"},
+                status_code=404
+            )
+        
+        if not record.get("call_id"):
+            return JSONResponse(content={"error": "Session has no call yet"}, status_code=409)
+        
+        return await recording_proxy.open(
+            record.get("api_key") or api_key,
+            record["call_id"],
+            request.headers.get("range")
+        )
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except httpx.RequestError as e:
+        logger.error(f"Error fetching interview recording: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Failed to fetch recording",
+                "details": str(e)
+            },
+            status_code=502
+        )
+
+
+@router.post("/interview-sessions/{session_id}/tools/{tool_name}")
+async def call_interview_tool(
+    request: Request,
+    session_id: str = Path(..., description="The ID of the interview session"),
+    tool_name: str = Path(..., description="The tool the interview agent called")
+):
+    """
+    Serve a tool call of the interview agent from the session's question plan.
+    """
+    try:
+        started = time.perf_counter()
+        plan = tool_plans.get(session_id)
+        if plan is None:
+            return JSONResponse(content={"error": "Session not found"}, status_code=404)
+        if not plan.authorize(request.headers.get(TOOL_TOKEN_HEADER)):
+            return JSONResponse(content={"error": "Invalid tool token"}, status_code=401)
+        
+        if tool_name == NEXT_QUESTION:
+            body = plan.next_question()
+        elif tool_name == SWITCH_TOPIC:
+            topic = None
+            payload = await request.body()
+            if payload:
+                try:
+                    topic = json.loads(payload).get("topic")
+                except (ValueError, AttributeError):
+                    topic = None
+            body = plan.switch_topic(topic if isinstance(topic, str) else None)
+        elif tool_name == TIME_CHECK:
+            body = plan.time_check()
+        else:
+            return JSONResponse(content={"error": "Unknown tool", "details": tool_name}, status_code=404)
+        
+        headers = {}
+        record = get_session(session_id)
+        if record is not None:
+            advanced = plan.event is not None and advance(record, plan.event) is not None
+            if advanced:
+                status_hub.publish(session_id)
+            phase = current_phase(record)
+            # Staged sessions move on to the call stage of the session's phase,
+            # which new call messages may have advanced since the last tool call
+            stage = None
+            if plan.stages is not None and phase != plan.stages.phase:
+                stage = plan.stages.new_stage(phase, body)
+            if stage is not None:
+                body = stage
+                headers[STAGE_RESPONSE_HEADER] = NEW_STAGE
+            if advanced or stage is not None:
+                # Mirror the phase into the Ultravox call state
+                headers["X-Ultravox-Update-Call-State"] = json.dumps({"phase": phase})
+        
+        headers["Server-Timing"] = f"tool;dur={1000 * (time.perf_counter() - started):.3f}"
+        return Response(content=body, media_type="application/json", headers=headers)
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error serving interview tool call: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.get("/interview-sessions/{session_id}/state")
+async def get_session_state(
+    request: Request,
+    session_id: str = Path(..., description="The ID of the interview session")
+):
+    """
+    Get the interview state machine of a session for debugging.
+    """
+    try:
+        validate_session_id(session_id)
+        get_api_key(request)
+        
+        record = get_session(session_id)
+        if record is None:
+            return JSONResponse(content={"error": "Session not found"}, status_code=404)
+        return debug_view(session_id, record)
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error retrieving session state: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
             },
-            "audio": {
-                "url": "https://api.example.com/recordings/interview-123.mp3",
-                "duration": 1800
-            }
+            status_code=500
+        )
+
+
+@router.get("/admission")
+async def get_admission_status(request: Request):
+    """
+    Get the call capacity, live calls and creation queue of each account,
+    the load and health of each key of the key pool, the calls the
+    abandoned call reaper watches and has ended, and the upstream request
+    queue depth and wait time of each tenant.
+    """
+    try:
+        get_api_key(request)
+        return {
+            "accounts": admission_controller.snapshot(),
+            "keys": key_pool.snapshot(),
+            "reaper": call_reaper.snapshot(),
+            "upstream": upstream_scheduler.snapshot(),
         }
         
-        return results_response
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error retrieving admission status: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_transcripts(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Terms and quoted phrases that must all match"),
+    company_id: Optional[str] = Query(None, alias="companyId", description="Only search sessions of this company"),
+    job_id: Optional[str] = Query(None, alias="jobId", description="Only search sessions of this job"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of sessions to return")
+):
+    """
+    Search the transcripts and answers of completed interview sessions.
+    """
+    try:
+        get_api_key(request)
+        
+        return {
+            "query": q,
+            "results": search_index.search(q, company_id=company_id, job_id=job_id, limit=limit)
+        }
         
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise e
     except Exception as e:
-        logger.error(f"Error retrieving interview results: {str(e)}")
+        logger.error(f"Error searching transcripts: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.get("/jobs/{job_id}/rankings", response_model=RankingResponse)
+async def rank_candidates(
+    request: Request,
+    job_id: str = Path(..., description="The ID of the job"),
+    sort_by: str = Query("overallScore", alias="sortBy", pattern="^(overallScore|fitScore)$", description="The score to rank by"),
+    min_overall_score: Optional[int] = Query(None, alias="minOverallScore", ge=0, le=100, description="Minimum overall score"),
+    min_fit_score: Optional[int] = Query(None, alias="minFitScore", ge=0, le=100, description="Minimum fit score"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of candidates to return")
+):
+    """
+    Rank the candidates of a job by the scores of their completed interviews.
+    """
+    try:
+        get_api_key(request)
+        
+        return {
+            "jobId": job_id,
+            "sortBy": sort_by,
+            "total": ranking_index.count(job_id),
+            "results": ranking_index.top(
+                job_id,
+                limit=limit,
+                sort_by=sort_by,
+                min_overall_score=min_overall_score,
+                min_fit_score=min_fit_score
+            )
+        }
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error ranking candidates: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.get("/jobs/{job_id}/similar-answers", response_model=SimilarAnswersResponse)
+async def review_similar_answers(
+    request: Request,
+    job_id: str = Path(..., description="The ID of the job"),
+    min_similarity: float = Query(0.0, alias="minSimilarity", ge=0, le=1, description="Minimum estimated similarity")
+):
+    """
+    List near-identical answers given by different candidates of a job.
+    """
+    try:
+        get_api_key(request)
+        
+        return {
+            "jobId": job_id,
+            "results": similarity_index.pairs_for_job(job_id, min_similarity=min_similarity)
+        }
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error listing similar answers: {str(e)}")
+        return JSONResponse(
+            content={
+                "error": "Internal server error",
+                "details": str(e)
+            },
+            status_code=500
+        )
+
+
+@router.post("/resume-matches")
+async def match_resumes(
+    request: Request,
+    match_request: ResumeMatchRequest,
+    min_score: int = Query(0, alias="minScore", ge=0, le=100, description="Minimum match score"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of candidates to return")
+):
+    """
+    Screen a job's candidate pool against the job requirements.
+    
+    Matches are streamed as newline-delimited JSON, best match first.
+    """
+    try:
+        get_api_key(request)
+        
+        job = match_request.job
+        pool = await asyncio.to_thread(resume_matcher.pool, job.job_id, match_request.candidates)
+        matches = pool.matches(job.requirements, limit=limit, min_score=min_score)
+        
+        async def stream_matches() -> AsyncIterator[str]:
+            while True:
+                batch = list(islice(matches, RESUME_MATCH_BATCH_SIZE))
+                if not batch:
+                    break
+                yield "".join(json.dumps(match) + "\n" for match in batch)
+        
+        return StreamingResponse(stream_matches(), media_type="application/x-ndjson")
+        
+    except HTTPException as e:
+        # Re-raise HTTP exceptions
+        raise e
+    except Exception as e:
+        logger.error(f"Error matching resumes: {str(e)}")
         return JSONResponse(
             content={
                 "error": "Internal server error",
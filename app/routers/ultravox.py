@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException
+import math
+import asyncio
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
 from app.models.ultravox_models import (
     UltravoxCallConfig, UltravoxResponse, CallDetailsRequest, 
     CallDetailsResponse, CreateUltravoxCallRequest, ListCallsRequest, 
     ListCallsResponse, ListCallMessagesRequest, ListCallMessagesResponse,
-    ListCallStagesRequest, ListCallStagesResponse, GetCallStageRequest, CallStage
+    ListCallStagesRequest, ListCallStagesResponse, GetCallStageRequest, CallStage,
+    CallMessagesSinceRequest, CallMessagesSinceResponse
 )
 from app.controllers.ultravox_controller import (
     join_ultravox_call as controller_join_ultravox_call,
@@ -14,9 +17,28 @@ from app.controllers.ultravox_controller import (
     list_call_stages as controller_list_call_stages,
     get_call_stage_details as controller_get_call_stage_details
 )
+from app.utils.message_cache import message_cache
+from app.utils.transcript_relay import transcript_relay
+from app.utils.audio_bridge import AudioBridge, ClientAudioSocket, audio_bridges, ENCODING_SAMPLE_BYTES
+from app.utils.admission import admission_controller, AdmissionTimeout
+from app.utils.key_pool import key_pool
+from app.utils.upstream_scheduler import upstream_context, BACKGROUND
 
 router = APIRouter(prefix="/ultravox", tags=["Ultravox"])
 
+async def admit_call(api_key, create):
+    """
+    Creates a call through admission control, turning a full account into a 503.
+    """
+    try:
+        return await admission_controller.admit_call(api_key, create)
+    except AdmissionTimeout as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{str(e)}; estimated wait {e.estimated_wait:.0f}s",
+            headers={"Retry-After": str(max(1, math.ceil(e.estimated_wait)))}
+        )
+
 @router.post("/join", response_model=UltravoxResponse)
 async def join_ultravox_call(config: UltravoxCallConfig):
     """
@@ -30,14 +52,14 @@ async def join_ultravox_call(config: UltravoxCallConfig):
     - voice: Voice to use for the assistant
     - temperature: Temperature parameter for model responses
     """
-    # Extract API key from request
-    api_key = config.apiKey
+    # Extract API key from request; pool keys go to the least-loaded key
+    api_key = key_pool.route_new(config.apiKey)
     
     # Remove API key from config before sending to Ultravox
     call_config = config.dict(exclude={'apiKey'})
     
-    # Call the controller function
-    return await controller_join_ultravox_call(api_key, call_config)
+    # Call the controller function once the account has capacity
+    return await admit_call(api_key, lambda: controller_join_ultravox_call(api_key, call_config))
 
 @router.post("/call-details", response_model=CallDetailsResponse)
 async def get_call_details(request: CallDetailsRequest):
@@ -48,12 +70,16 @@ async def get_call_details(request: CallDetailsRequest):
     - apiKey: Ultravox API key for authentication
     - callId: Unique identifier of the call to retrieve
     """
-    # Extract API key and call ID from request
-    api_key = request.apiKey
+    # Extract API key and call ID from request; pool keys go to the key that created the call
     call_id = request.callId
+    api_key = key_pool.route_call(request.apiKey, call_id)
     
-    # Call the controller function
-    return await controller_get_call_details(api_key, call_id)
+    # Call the controller function; calls created here have no session, so
+    # their admission slot is released once the details show they ended
+    call_details = await controller_get_call_details(api_key, call_id)
+    if call_details.get("ended"):
+        admission_controller.release(call_id)
+    return call_details
 
 @router.post("/create-call", response_model=CallDetailsResponse)
 async def create_ultravox_call(request: CreateUltravoxCallRequest):
@@ -64,14 +90,14 @@ async def create_ultravox_call(request: CreateUltravoxCallRequest):
     - Comprehensive call configuration parameters
     - apiKey: Ultravox API key for authentication
     """
-    # Extract API key from request
-    api_key = request.apiKey
+    # Extract API key from request; pool keys go to the least-loaded key
+    api_key = key_pool.route_new(request.apiKey)
     
     # Remove API key from config before sending to Ultravox
     call_config = request.dict(exclude={'apiKey'})
     
-    # Call the controller function
-    return await controller_create_ultravox_call(api_key, call_config)
+    # Call the controller function once the account has capacity
+    return await admit_call(api_key, lambda: controller_create_ultravox_call(api_key, call_config))
 
 @router.post("/list-calls", response_model=ListCallsResponse)
 async def list_ultravox_calls(request: ListCallsRequest):
@@ -99,14 +125,38 @@ async def list_call_messages(request: ListCallMessagesRequest):
     - callId: Unique identifier of the call to retrieve messages for
     - cursor: Optional pagination cursor for fetching next page of results
     """
-    # Extract API key, call ID, and cursor from request
-    api_key = request.apiKey
+    # Extract API key, call ID, and cursor from request; pool keys go to the key that created the call
     call_id = request.callId
+    api_key = key_pool.route_call(request.apiKey, call_id)
     cursor = request.cursor
     
     # Call the controller function
     return await controller_list_call_messages(api_key, call_id, cursor)
 
+@router.post("/call-messages/since", response_model=CallMessagesSinceResponse)
+async def list_call_messages_since(request: CallMessagesSinceRequest):
+    """
+    Retrieves only the messages of an Ultravox call after a given ordinal.
+    
+    Messages are served from a per-call cache that resumes from the last
+    upstream cursor, so each poll only fetches what is new.
+    
+    Parameters:
+    - apiKey: Ultravox API key for authentication
+    - callId: Unique identifier of the call to retrieve messages for
+    - sinceOrdinal: Ordinal of the last message already seen (-1 for all messages)
+    """
+    api_key = key_pool.route_call(request.apiKey, request.callId)
+    with upstream_context(priority=BACKGROUND):
+        messages = await message_cache.since(api_key, request.callId, request.sinceOrdinal)
+    entry = message_cache.get(request.callId)
+    
+    return {
+        "results": messages,
+        "lastOrdinal": entry.last_ordinal,
+        "ended": entry.ended
+    }
+
 @router.post("/call-stages", response_model=ListCallStagesResponse)
 async def list_call_stages(request: ListCallStagesRequest):
     """
@@ -117,9 +167,9 @@ async def list_call_stages(request: ListCallStagesRequest):
     - callId: Unique identifier of the call to retrieve stages for
     - cursor: Optional pagination cursor for fetching next page of results
     """
-    # Extract API key, call ID, and cursor from request
-    api_key = request.apiKey
+    # Extract API key, call ID, and cursor from request; pool keys go to the key that created the call
     call_id = request.callId
+    api_key = key_pool.route_call(request.apiKey, call_id)
     cursor = request.cursor
     
     # Call the controller function
@@ -135,10 +185,147 @@ async def get_call_stage_details(request: GetCallStageRequest):
     - callId: Unique identifier of the call
     - callStageId: Unique identifier of the call stage to retrieve
     """
-    # Extract API key, call ID, and call stage ID from request
-    api_key = request.apiKey
+    # Extract API key, call ID, and call stage ID from request; pool keys go to the key that created the call
     call_id = request.callId
+    api_key = key_pool.route_call(request.apiKey, call_id)
     call_stage_id = request.callStageId
     
     # Call the controller function
-    return await controller_get_call_stage_details(api_key, call_id, call_stage_id)
\ No newline at end of file
+    return await controller_get_call_stage_details(api_key, call_id, call_stage_id)
+
+@router.websocket("/call-messages/{call_id}/live")
+async def relay_call_messages(websocket: WebSocket, call_id: str):
+    """
+    Relays new messages of an Ultravox call to the connected observer as
+    they happen.
+    
+    Parameters:
+    - apiKey: Ultravox API key for authentication (query parameter)
+    - call_id: Unique identifier of the call to watch
+    
+    Events sent to the observer:
+    - messages: a delta of new messages with their ordinals
+    - resync: the observer fell behind and older messages were dropped
+    - ended: the call has ended and no further messages will follow
+    """
+    api_key = websocket.query_params.get("apiKey", "").strip()
+    if not api_key:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="API key must not be empty")
+        return
+    
+    try:
+        observer = await transcript_relay.subscribe(call_id, api_key)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail)[:120])
+        return
+    
+    async def send_events():
+        while True:
+            event = await observer.next_event()
+            if event is None:
+                return
+            await websocket.send_json(event)
+    
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            return
+    
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(send_events())
+        receiver = asyncio.create_task(wait_for_disconnect())
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if sender in done and sender.exception() is None:
+            await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        # The observer went away while we were closing the socket
+        pass
+    finally:
+        transcript_relay.unsubscribe(observer)
+
+@router.websocket("/calls/{call_id}/audio")
+async def bridge_call_audio(websocket: WebSocket, call_id: str):
+    """
+    Bridges audio between the connected client, such as a SIP or PSTN
+    gateway, and an Ultravox call created with the serverWebSocket medium.
+    
+    Parameters:
+    - apiKey: Ultravox API key for authentication (query parameter)
+    - encoding: Audio encoding of the client, pcm16 (default) or mulaw (query parameter)
+    - sampleRate: Sample rate of the client's audio; defaults to the call's (query parameter)
+    - call_id: Unique identifier of the call to join
+    
+    Binary messages carry audio in the client's encoding and sample rate in
+    both directions; without them, PCM16 at the call's input sample rate
+    towards Ultravox and at its output sample rate towards the client. Text
+    messages are forwarded in both directions unchanged.
+    """
+    api_key = websocket.query_params.get("apiKey", "").strip()
+    if not api_key:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="API key must not be empty")
+        return
+    encoding = websocket.query_params.get("encoding", "pcm16")
+    sample_rate = websocket.query_params.get("sampleRate", "")
+    if encoding not in ENCODING_SAMPLE_BYTES or (sample_rate and not (sample_rate.isdigit() and int(sample_rate) > 0)):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unsupported audio encoding or sample rate")
+        return
+    
+    try:
+        # Ultravox only returns the call to a key of the account that owns it
+        call_details = await controller_get_call_details(key_pool.route_call(api_key, call_id), call_id)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail)[:120])
+        return
+    
+    settings = (call_details.get("medium") or {}).get("serverWebSocket")
+    if settings is None or not call_details.get("joinUrl"):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Call does not use the serverWebSocket medium")
+        return
+    if call_details.get("ended"):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Call has ended")
+        return
+    
+    try:
+        upstream = await audio_bridges.connect(call_details["joinUrl"])
+    except Exception as e:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason=f"Could not join the call: {str(e)}"[:120])
+        return
+    
+    await websocket.accept()
+    input_sample_rate = settings.get("inputSampleRate") or 8000
+    bridge = AudioBridge(
+        call_id,
+        ClientAudioSocket(websocket),
+        upstream,
+        input_sample_rate=input_sample_rate,
+        output_sample_rate=settings.get("outputSampleRate") or input_sample_rate,
+        client_sample_rate=int(sample_rate) if sample_rate else None,
+        client_encoding=encoding,
+    )
+    await audio_bridges.run(bridge)
+
+@router.get("/calls/{call_id}/audio/metrics")
+async def get_audio_bridge_metrics(call_id: str, apiKey: str = ""):
+    """
+    Returns frame counts, losses and playout latency of the audio bridges
+    currently running for a call.
+    
+    Parameters:
+    - apiKey: Ultravox API key for authentication (query parameter)
+    - call_id: Unique identifier of the call
+    """
+    if not apiKey.strip():
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="API key must not be empty")
+    # Calls created here are checked against the key that created them,
+    # other calls with Ultravox
+    owner_key = key_pool.key_for_call(call_id)
+    if owner_key is None:
+        await controller_get_call_details(apiKey, call_id)
+    elif not key_pool.owns(apiKey, owner_key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Call not found")
+    return {"callId": call_id, "bridges": audio_bridges.metrics(call_id)}
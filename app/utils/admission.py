@@ -0,0 +1,362 @@
+"""
+Admission control for call creation.
+
+Every Ultravox account may only run so many calls at once. Instead of
+sending creations upstream until they fail, each account's live calls are
+counted locally: a creation reserves a slot, the slot becomes a live call
+once the call exists, and it is released when the call ends. The count is
+periodically reset from the account endpoint, which also brings the
+account's allowed concurrency; calls tracked here are reconciled with it,
+so calls nobody releases do not pile up and a call the upstream count has
+already dropped is not released twice. Creations over capacity wait in a FIFO queue
+per account, with a timeout, and are admitted in order as slots free up.
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Deque, List, Set, Optional, Callable, Awaitable
+
+from app.controllers.ultravox_controller import get_account_info
+from app.utils.session_store import get_session
+
+logger = logging.getLogger(__name__)
+
+# Seconds a creation may wait for a free slot
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# Maximum number of creations waiting per account
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "500"))
+
+# Seconds between background syncs with the account endpoint
+ADMISSION_SYNC_INTERVAL_SECONDS = float(os.getenv("ADMISSION_SYNC_INTERVAL_SECONDS", "15"))
+
+# Seconds a sync stays fresh when a creation finds the account full
+ADMISSION_MIN_SYNC_SECONDS = float(os.getenv("ADMISSION_MIN_SYNC_SECONDS", "2"))
+
+# Assumed call length for wait estimates until calls were seen ending
+ADMISSION_DEFAULT_CALL_SECONDS = float(os.getenv("ADMISSION_DEFAULT_CALL_SECONDS", "900"))
+
+# Weight of each ended call in the running average call length
+CALL_DURATION_SMOOTHING = 0.2
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a creation cannot be admitted in time."""
+
+    def __init__(self, message: str, estimated_wait: float):
+        super().__init__(message)
+        self.estimated_wait = estimated_wait
+
+
+class AccountCapacity:
+    """Concurrency state of one Ultravox account."""
+
+    def __init__(self):
+        # Allowed concurrent calls; unlimited until the account was synced
+        self.allowed: Optional[int] = None
+        self.active = 0
+        # Slots reserved by creations still in flight
+        self.reserved = 0
+        # Live calls created here -> creation time
+        self.calls: Dict[str, float] = {}
+        # Calls the last sync's active count includes
+        self.synced_calls: Set[str] = set()
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.synced_at: Optional[float] = None
+        self.sync_task: Optional[asyncio.Task] = None
+        self.average_duration = ADMISSION_DEFAULT_CALL_SECONDS
+
+    def has_capacity(self) -> bool:
+        return self.allowed is None or self.active + self.reserved < self.allowed
+
+
+class Reservation:
+    """A slot held while a call is being created."""
+
+    def __init__(self, controller: "AdmissionController", api_key: str, timeout: Optional[float]):
+        self.controller = controller
+        self.api_key = api_key
+        self.timeout = timeout
+        self.bound = False
+
+    def bind(self, call_id: Optional[str]) -> None:
+        """Turn the reservation into a live call once the call exists."""
+        self.controller._bind(self, call_id)
+
+    async def __aenter__(self) -> "Reservation":
+        await self.controller._acquire(self)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if not self.bound:
+            self.controller._unreserve(self.api_key)
+
+
+class AdmissionController:
+    """Admits call creations within each account's concurrency limit."""
+
+    def __init__(
+        self,
+        fetch_account: Callable[[str], Awaitable[Dict[str, Any]]] = get_account_info,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.fetch_account = fetch_account
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.clock = clock
+        self.accounts: Dict[str, AccountCapacity] = {}
+        # Call ID -> API key of the account running it
+        self.call_accounts: Dict[str, str] = {}
+
+    def track(self, api_key: str) -> None:
+        """Start tracking an account, so it is synced before its first call."""
+        self._account(api_key)
+
+    def reserve(self, api_key: str, timeout: Optional[float] = None) -> Reservation:
+        """
+        Reserve a slot for a call creation, waiting in line if the account
+        is at capacity. Use as an async context manager and bind the
+        reservation to the created call; an unbound reservation is returned
+        on exit.
+
+        Args:
+            api_key: Ultravox API key of the account
+            timeout: Seconds to wait for a slot; the controller default if not given
+
+        Returns:
+            Reservation: The reservation
+
+        Raises:
+            AdmissionTimeout: On entry, if no slot frees up in time or the queue is full
+        """
+        return Reservation(self, api_key, self.queue_timeout if timeout is None else timeout)
+
+    async def admit_call(self, api_key: str, create: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Create a call within the account's capacity.
+
+        Args:
+            api_key: Ultravox API key of the account
+            create: Creates the call and returns a payload with its callId
+
+        Returns:
+            Dict[str, Any]: The payload returned by create
+        """
+        async with self.reserve(api_key) as reservation:
+            call = await create()
+            reservation.bind(call.get("callId"))
+            return call
+
+    def release(self, call_id: Optional[str]) -> bool:
+        """
+        Release the slot of a call that ended.
+
+        Args:
+            call_id: The Ultravox call ID
+
+        Returns:
+            bool: True if the call held a slot here
+        """
+        api_key = self.call_accounts.pop(call_id, None) if call_id else None
+        if api_key is None:
+            return False
+        account = self.accounts[api_key]
+        started = account.calls.pop(call_id, None)
+        if started is not None:
+            duration = self.clock() - started
+            account.average_duration += CALL_DURATION_SMOOTHING * (duration - account.average_duration)
+        if call_id in account.synced_calls:
+            # The upstream count may already have dropped the call, so let a
+            # fresh count free the slot instead of decrementing twice
+            account.synced_calls.discard(call_id)
+            self._resync(api_key, account)
+        else:
+            account.active = max(0, account.active - 1)
+            self._dispatch(account)
+        return True
+
+    def release_results(self, results: Dict[str, Any]) -> None:
+        """Release the slot of a session whose results were materialized."""
+        record = get_session(results["sessionId"])
+        if record is not None:
+            self.release(record.get("call_id"))
+
+    async def sync(self, api_key: str) -> None:
+        """
+        Reset an account's counts from the account endpoint. Concurrent
+        syncs of one account share a single request.
+
+        Args:
+            api_key: Ultravox API key of the account
+        """
+        account = self._account(api_key)
+        if account.sync_task is None:
+            account.sync_task = asyncio.create_task(self._sync(api_key, account))
+        await asyncio.shield(account.sync_task)
+
+    def estimated_wait(self, api_key: str, position: Optional[int] = None) -> float:
+        """
+        Estimate how long a creation waits for a slot.
+
+        Args:
+            api_key: Ultravox API key of the account
+            position: Place in the queue, from 1; the end of the queue if not given
+
+        Returns:
+            float: Estimated seconds until a slot frees up
+        """
+        account = self._account(api_key)
+        if position is None:
+            position = len(account.waiters) + 1
+        if account.has_capacity() and not account.waiters:
+            return 0.0
+
+        now = self.clock()
+        remaining = sorted(max(0.0, account.average_duration - (now - started)) for started in account.calls.values())
+        if position <= len(remaining):
+            return remaining[position - 1]
+        # Calls not created here, or further waves of calls
+        waves = math.ceil((position - len(remaining)) / max(account.allowed or 1, 1))
+        return (remaining[-1] if remaining else 0.0) + waves * account.average_duration
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get the capacity and queue of each account, with masked keys."""
+        return [
+            {
+                "account": f"...{api_key[-4:]}",
+                "allowedConcurrentCalls": account.allowed,
+                "activeCalls": account.active,
+                "reservedCalls": account.reserved,
+                "queued": len(account.waiters),
+                "estimatedWaitSeconds": round(self.estimated_wait(api_key), 1),
+            }
+            for api_key, account in self.accounts.items()
+        ]
+
+    async def run(self, interval: float = ADMISSION_SYNC_INTERVAL_SECONDS) -> None:
+        """Sync every known account periodically until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            for api_key in list(self.accounts):
+                try:
+                    await self.sync(api_key)
+                except Exception as e:
+                    logger.warning(f"Error syncing account capacity: {str(e)}")
+
+    def _account(self, api_key: str) -> AccountCapacity:
+        account = self.accounts.get(api_key)
+        if account is None:
+            account = self.accounts[api_key] = AccountCapacity()
+        return account
+
+    async def _acquire(self, reservation: Reservation) -> None:
+        account = self._account(reservation.api_key)
+        if not account.waiters and account.has_capacity():
+            account.reserved += 1
+            return
+
+        # The local count may be stale; look upstream before queueing
+        if account.synced_at is None or self.clock() - account.synced_at >= ADMISSION_MIN_SYNC_SECONDS:
+            try:
+                await self.sync(reservation.api_key)
+            except Exception as e:
+                logger.warning(f"Error syncing account capacity: {str(e)}")
+            if not account.waiters and account.has_capacity():
+                account.reserved += 1
+                return
+
+        estimated = self.estimated_wait(reservation.api_key)
+        if len(account.waiters) >= self.max_queue:
+            raise AdmissionTimeout("Call creation queue is full", estimated)
+
+        waiter = asyncio.get_running_loop().create_future()
+        account.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), reservation.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Admitted just as the wait ran out
+                return
+            waiter.cancel()
+            account.waiters.remove(waiter)
+            raise AdmissionTimeout(
+                f"No call capacity within {reservation.timeout:g}s", self.estimated_wait(reservation.api_key)
+            )
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._unreserve(reservation.api_key)
+            else:
+                waiter.cancel()
+                account.waiters.remove(waiter)
+            raise
+
+    def _bind(self, reservation: Reservation, call_id: Optional[str]) -> None:
+        if reservation.bound:
+            return
+        reservation.bound = True
+        account = self._account(reservation.api_key)
+        account.reserved -= 1
+        account.active += 1
+        if call_id:
+            account.calls[call_id] = self.clock()
+            self.call_accounts[call_id] = reservation.api_key
+
+    def _unreserve(self, api_key: str) -> None:
+        account = self._account(api_key)
+        account.reserved -= 1
+        self._dispatch(account)
+
+    def _dispatch(self, account: AccountCapacity) -> None:
+        """Admit waiters in order while there is capacity."""
+        while account.waiters and account.has_capacity():
+            waiter = account.waiters.popleft()
+            if not waiter.done():
+                account.reserved += 1
+                waiter.set_result(None)
+
+    def _resync(self, api_key: str, account: AccountCapacity) -> None:
+        """Sync in the background when creations are waiting for a slot."""
+        if not account.waiters or account.sync_task is not None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        asyncio.ensure_future(self._sync_quietly(api_key))
+
+    async def _sync_quietly(self, api_key: str) -> None:
+        try:
+            await self.sync(api_key)
+        except Exception as e:
+            logger.warning(f"Error syncing account capacity: {str(e)}")
+
+    async def _sync(self, api_key: str, account: AccountCapacity) -> None:
+        try:
+            requested_at = self.clock()
+            info = await self.fetch_account(api_key)
+            account.allowed = int(info["allowedConcurrentCalls"])
+            account.active = int(info["activeCalls"])
+            account.synced_at = self.clock()
+
+            # Calls created before the request are in the upstream count if
+            # they are still live. When there are more of them than the count,
+            # the surplus ended without being released; drop the oldest.
+            counted = sorted((started, call_id) for call_id, started in account.calls.items() if started <= requested_at)
+            surplus = max(0, len(counted) - account.active)
+            for _, call_id in counted[:surplus]:
+                del account.calls[call_id]
+                self.call_accounts.pop(call_id, None)
+            account.synced_calls = {call_id for _, call_id in counted[surplus:]}
+
+            self._dispatch(account)
+        finally:
+            account.sync_task = None
+
+
+# Shared controller instance
+admission_controller = AdmissionController()
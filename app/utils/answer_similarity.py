@@ -0,0 +1,242 @@
+"""
+Answer similarity index.
+
+This module looks for near-identical answers given by different candidates
+for the same job. Each answer is reduced to a MinHash signature over word
+shingles, and the signatures are split into bands that are hashed into
+locality-sensitive buckets. A new answer is only compared with the answers
+it shares a bucket with, so checking it does not scan the whole job.
+"""
+import os
+import zlib
+import logging
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.utils.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Number of words per shingle
+SIMILARITY_SHINGLE_SIZE = int(os.getenv("SIMILARITY_SHINGLE_SIZE", "3"))
+
+# Number of MinHash permutations, and the number of LSH bands they are split into
+SIMILARITY_PERMUTATIONS = int(os.getenv("SIMILARITY_PERMUTATIONS", "128"))
+SIMILARITY_BANDS = int(os.getenv("SIMILARITY_BANDS", "32"))
+
+# Estimated Jaccard similarity at which two answers are flagged
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+
+# Answers shorter than this many words are too generic to compare
+SIMILARITY_MIN_WORDS = int(os.getenv("SIMILARITY_MIN_WORDS", "12"))
+
+# Prime modulus of the permutation hash functions
+MERSENNE_PRIME = (1 << 31) - 1
+
+# An answer is identified by its session ID and question ID
+AnswerKey = Tuple[str, str]
+
+
+class MinHasher:
+    """MinHash signatures over word shingles."""
+
+    def __init__(self, permutations: int = SIMILARITY_PERMUTATIONS, shingle_size: int = SIMILARITY_SHINGLE_SIZE, seed: int = 1):
+        generator = np.random.default_rng(seed)
+        self.shingle_size = shingle_size
+        self.a = generator.integers(1, MERSENNE_PRIME, size=(permutations, 1), dtype=np.uint64)
+        self.b = generator.integers(0, MERSENNE_PRIME, size=(permutations, 1), dtype=np.uint64)
+
+    def signature(self, words: List[str]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            words: The tokens of the text
+
+        Returns:
+            np.ndarray: One minimum hash per permutation
+        """
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) & MERSENNE_PRIME for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        return ((self.a * hashes + self.b) % MERSENNE_PRIME).min(axis=1)
+
+
+class IndexedAnswer:
+    """An indexed answer and its signature."""
+
+    __slots__ = ("session_id", "candidate_id", "job_id", "question_id", "question", "answer", "signature")
+
+    def __init__(self, session_id: str, candidate_id: str, job_id: str, question: Dict[str, Any], signature: np.ndarray):
+        self.session_id = session_id
+        self.candidate_id = candidate_id
+        self.job_id = job_id
+        self.question_id = question.get("questionId", "")
+        self.question = question.get("question", "")
+        self.answer = question.get("answerTranscript", "")
+        self.signature = signature
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "sessionId": self.session_id,
+            "candidateId": self.candidate_id,
+            "questionId": self.question_id,
+            "question": self.question,
+            "answerTranscript": self.answer,
+        }
+
+
+class AnswerSimilarityIndex:
+    """LSH index of answer signatures, grouped by job."""
+
+    def __init__(
+        self,
+        hasher: Optional[MinHasher] = None,
+        bands: int = SIMILARITY_BANDS,
+        threshold: float = SIMILARITY_THRESHOLD,
+        min_words: int = SIMILARITY_MIN_WORDS
+    ):
+        self.hasher = hasher or MinHasher()
+        self.bands = bands
+        self.threshold = threshold
+        self.min_words = min_words
+        self.answers: Dict[AnswerKey, IndexedAnswer] = {}
+        self.session_answers: Dict[str, List[AnswerKey]] = {}
+        # (job ID, band, band bytes) -> answers in the bucket
+        self.buckets: Dict[Tuple[str, int, bytes], Set[AnswerKey]] = {}
+        # Flagged pairs, each stored under both answers' sessions
+        self.pairs: Dict[Tuple[AnswerKey, AnswerKey], float] = {}
+        self.session_pairs: Dict[str, Set[Tuple[AnswerKey, AnswerKey]]] = {}
+
+    def index_results(self, results: Dict[str, Any]) -> None:
+        """
+        Index the answers of a results payload and flag near-duplicates from
+        other candidates of the same job.
+
+        Args:
+            results: A payload matching InterviewResultsResponse
+        """
+        session_id = results["sessionId"]
+        self.remove_session(session_id)
+
+        candidate_id = results.get("candidateId", "")
+        job_id = results.get("jobId", "")
+        keys = []
+        for question in results.get("questions", []):
+            words = tokenize(question.get("answerTranscript", ""))
+            if len(words) < self.min_words:
+                continue
+            answer = IndexedAnswer(session_id, candidate_id, job_id, question, self.hasher.signature(words))
+            key = (session_id, answer.question_id)
+            band_keys = self._band_keys(job_id, answer.signature)
+
+            # Only answers sharing at least one bucket are compared
+            seen: Set[AnswerKey] = set()
+            for band_key in band_keys:
+                for other_key in self.buckets.get(band_key, ()):
+                    if other_key in seen:
+                        continue
+                    seen.add(other_key)
+                    other = self.answers[other_key]
+                    if other.session_id == session_id or other.candidate_id == candidate_id:
+                        continue
+                    similarity = float(np.mean(answer.signature == other.signature))
+                    if similarity >= self.threshold:
+                        self._flag(key, other_key, similarity)
+
+            for band_key in band_keys:
+                self.buckets.setdefault(band_key, set()).add(key)
+            self.answers[key] = answer
+            keys.append(key)
+
+        self.session_answers[session_id] = keys
+
+    def remove_session(self, session_id: str) -> None:
+        """
+        Remove the answers and flagged pairs of a session.
+
+        Args:
+            session_id: The Tezhire session ID
+        """
+        for key in self.session_answers.pop(session_id, []):
+            answer = self.answers.pop(key)
+            for band_key in self._band_keys(answer.job_id, answer.signature):
+                bucket = self.buckets.get(band_key)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self.buckets[band_key]
+
+        for pair in self.session_pairs.pop(session_id, set()):
+            self.pairs.pop(pair, None)
+            for key in pair:
+                if key[0] != session_id:
+                    self.session_pairs.get(key[0], set()).discard(pair)
+
+    def flags_for(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the answers of a session that resemble another candidate's answers.
+
+        Args:
+            session_id: The Tezhire session ID
+
+        Returns:
+            List[Dict[str, Any]]: Flags matching SimilarAnswer, most similar first
+        """
+        flags = []
+        for pair in self.session_pairs.get(session_id, ()):
+            own, other = pair if pair[0][0] == session_id else (pair[1], pair[0])
+            other_answer = self.answers[other]
+            flags.append({
+                "questionId": own[1],
+                "otherSessionId": other_answer.session_id,
+                "otherCandidateId": other_answer.candidate_id,
+                "otherQuestionId": other_answer.question_id,
+                "similarity": round(self.pairs[pair], 3),
+            })
+        flags.sort(key=lambda flag: (-flag["similarity"], flag["questionId"], flag["otherSessionId"]))
+        return flags
+
+    def pairs_for_job(self, job_id: str, min_similarity: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Get the flagged answer pairs of a job for review.
+
+        Args:
+            job_id: The job ID
+            min_similarity: Only return pairs at least this similar
+
+        Returns:
+            List[Dict[str, Any]]: Pairs matching SimilarAnswerPair, most similar first
+        """
+        pairs = [
+            {
+                "similarity": round(similarity, 3),
+                "answers": [self.answers[first].describe(), self.answers[second].describe()],
+            }
+            for (first, second), similarity in self.pairs.items()
+            if similarity >= min_similarity and self.answers[first].job_id == job_id
+        ]
+        pairs.sort(key=lambda pair: -pair["similarity"])
+        return pairs
+
+    def _flag(self, key: AnswerKey, other_key: AnswerKey, similarity: float) -> None:
+        pair = (min(key, other_key), max(key, other_key))
+        self.pairs[pair] = similarity
+        self.session_pairs.setdefault(key[0], set()).add(pair)
+        self.session_pairs.setdefault(other_key[0], set()).add(pair)
+        logger.info(f"Flagged similar answers {key} and {other_key} ({similarity:.2f})")
+
+    def _band_keys(self, job_id: str, signature: np.ndarray) -> List[Tuple[str, int, bytes]]:
+        return [
+            (job_id, band, rows.tobytes())
+            for band, rows in enumerate(np.array_split(signature, self.bands))
+        ]
+
+
+# Shared similarity index instance
+similarity_index = AnswerSimilarityIndex()
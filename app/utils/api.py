@@ -2,6 +2,8 @@ import os
 from typing import Optional
 from fastapi import Request, HTTPException, status
 
+from app.utils.key_pool import key_pool
+
 def get_api_key(request: Request) -> str:
     """
     Get the API key from the request header or environment variable.
@@ -30,6 +32,24 @@ def get_api_key(request: Request) -> str:
     return api_key
 
 
+def select_api_key(request: Request) -> str:
+    """
+    Get the API key for creating a new call: requests made with a key of
+    the key pool go to its least-loaded healthy key, other keys are used
+    as given.
+    
+    Args:
+        request: The FastAPI request object
+        
+    Returns:
+        str: The API key
+        
+    Raises:
+        HTTPException: If no API key is available
+    """
+    return key_pool.route_new(get_api_key(request))
+
+
 def validate_session_id(session_id: Optional[str]) -> None:
     """
     Validate that a session ID is provided.
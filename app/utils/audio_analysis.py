@@ -0,0 +1,365 @@
+"""
+Recording analysis.
+
+This module derives talk time, silences and per-answer durations from an
+interview recording. The WAV file is decoded in fixed-size chunks and every
+chunk runs through a frame-energy voice activity detector in NumPy, so memory
+use does not grow with the length of the recording. Analysis runs in a
+process pool so the event loop stays free.
+
+In stereo recordings each channel carries one speaker, which gives talk time
+per speaker and lets answers be cut at the turns between them. Mono
+recordings only yield overall talk time and silences.
+
+Recordings may not be available right after a call ends, so results are
+stored first and enriched in the background, retrying with backoff.
+"""
+import os
+import wave
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.recordings import RecordingProxy, recording_proxy
+
+logger = logging.getLogger(__name__)
+
+# Number of analysis worker processes
+AUDIO_ANALYSIS_WORKERS = int(os.getenv("AUDIO_ANALYSIS_WORKERS", "1"))
+
+# Channel that carries the candidate in stereo recordings
+RECORDING_CANDIDATE_CHANNEL = int(os.getenv("RECORDING_CANDIDATE_CHANNEL", "0"))
+
+# Frame length and energy threshold of the voice activity detector
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))
+VAD_THRESHOLD_DBFS = float(os.getenv("VAD_THRESHOLD_DBFS", "-45"))
+
+# Pauses shorter than this are part of the surrounding speech, and speech
+# shorter than this is treated as noise
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "400"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "120"))
+
+# Seconds of audio decoded per chunk
+AUDIO_CHUNK_SECONDS = int(os.getenv("AUDIO_CHUNK_SECONDS", "10"))
+
+# Attempts at analyzing a recording before giving up
+AUDIO_ANALYSIS_ATTEMPTS = int(os.getenv("AUDIO_ANALYSIS_ATTEMPTS", "5"))
+
+# Seconds before the first retry of an analysis, doubling after each
+AUDIO_ANALYSIS_RETRY_SECONDS = float(os.getenv("AUDIO_ANALYSIS_RETRY_SECONDS", "30"))
+
+SAMPLE_TYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+Segment = Tuple[float, float]
+
+
+class SpeechTracker:
+    """Streaming speech segmentation of one channel."""
+
+    def __init__(self, frame_seconds: float, min_silence_frames: int, min_speech_frames: int):
+        self.frame_seconds = frame_seconds
+        self.min_silence_frames = min_silence_frames
+        self.min_speech_frames = min_speech_frames
+        self.segments: List[Segment] = []
+        # Open segment as [first frame, frame after the last active one]
+        self.current: Optional[List[int]] = None
+
+    def feed(self, active: np.ndarray, first_frame: int) -> None:
+        """
+        Feed the activity flags of consecutive frames.
+
+        Args:
+            active: One boolean per frame
+            first_frame: Index of the first frame in the whole recording
+        """
+        if not active.any():
+            return
+        # Runs of active frames, found without a Python loop over frames
+        padded = np.concatenate(([False], active, [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        for start, end in zip(edges[::2] + first_frame, edges[1::2] + first_frame):
+            if self.current is not None and start - self.current[1] < self.min_silence_frames:
+                self.current[1] = int(end)
+                continue
+            self._close()
+            self.current = [int(start), int(end)]
+
+    def finish(self) -> List[Segment]:
+        """Close the open segment and get all speech segments in seconds."""
+        self._close()
+        return self.segments
+
+    def _close(self) -> None:
+        if self.current is None:
+            return
+        start, end = self.current
+        if end - start >= self.min_speech_frames:
+            self.segments.append((start * self.frame_seconds, end * self.frame_seconds))
+        self.current = None
+
+
+def frame_levels(samples: np.ndarray, frame_length: int, full_scale: float) -> np.ndarray:
+    """
+    Get the energy of each frame in dBFS.
+
+    Args:
+        samples: A frames x channels block of samples, as float
+        frame_length: Samples per frame
+        full_scale: Amplitude of a full-scale sample
+
+    Returns:
+        np.ndarray: frames x channels levels
+    """
+    frames = samples.reshape(-1, frame_length, samples.shape[1])
+    power = np.einsum("fsc,fsc->fc", frames, frames) / frame_length
+    return 10 * np.log10(power / (full_scale * full_scale) + 1e-12)
+
+
+def merge_segments(segments: List[Segment]) -> List[Segment]:
+    """Merge overlapping segments."""
+    merged: List[List[float]] = []
+    for start, end in sorted(segments):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def answer_durations(candidate: List[Segment], interviewer: List[Segment]) -> List[Tuple[int, float]]:
+    """
+    Get the duration of each answer from the turns of both speakers.
+
+    Consecutive speech of one speaker forms a turn, and every candidate turn
+    that follows an interviewer turn is an answer, matching how the results
+    builder pairs questions with answers. Each answer is keyed by the index
+    of the interviewer turn it answers, so unanswered turns do not shift
+    later answers.
+
+    Args:
+        candidate: Speech segments of the candidate
+        interviewer: Speech segments of the interviewer
+
+    Returns:
+        List[Tuple[int, float]]: Interviewer turn index and answer duration in seconds, in order
+    """
+    timeline = sorted([(start, end, True) for start, end in candidate] + [(start, end, False) for start, end in interviewer])
+    durations: List[Tuple[int, float]] = []
+    turn = -1
+    after_candidate = True
+    answer: Optional[List[float]] = None
+    for start, end, is_candidate in timeline:
+        if is_candidate:
+            if answer is not None:
+                answer[1] = max(answer[1], end)
+            elif turn >= 0:
+                answer = [start, end]
+        else:
+            if answer is not None:
+                durations.append((turn, round(answer[1] - answer[0], 2)))
+                answer = None
+            if after_candidate:
+                turn += 1
+        after_candidate = is_candidate
+    if answer is not None:
+        durations.append((turn, round(answer[1] - answer[0], 2)))
+    return durations
+
+
+def analyze_recording(
+    path: str,
+    candidate_channel: int = RECORDING_CANDIDATE_CHANNEL,
+    frame_ms: int = VAD_FRAME_MS,
+    threshold_dbfs: float = VAD_THRESHOLD_DBFS,
+    chunk_seconds: int = AUDIO_CHUNK_SECONDS
+) -> Dict[str, Any]:
+    """
+    Analyze a WAV recording chunk by chunk.
+
+    Args:
+        path: The WAV file
+        candidate_channel: Channel that carries the candidate in stereo recordings
+        frame_ms: Frame length of the voice activity detector
+        threshold_dbfs: Frame level above which a frame counts as speech
+        chunk_seconds: Seconds of audio decoded per chunk
+
+    Returns:
+        Dict[str, Any]: Duration, talk time per speaker, silence and answer durations
+    """
+    with wave.open(path, "rb") as recording:
+        channels = recording.getnchannels()
+        width = recording.getsampwidth()
+        rate = recording.getframerate()
+        if width not in SAMPLE_TYPES:
+            raise ValueError(f"Unsupported sample width: {width}")
+
+        frame_length = max(1, rate * frame_ms // 1000)
+        frame_seconds = frame_length / rate
+        chunk_frames = max(1, chunk_seconds * rate // frame_length) * frame_length
+        full_scale = float(1 << (8 * width - 1))
+        trackers = [
+            SpeechTracker(
+                frame_seconds,
+                max(1, round(VAD_MIN_SILENCE_MS / 1000 / frame_seconds)),
+                max(1, round(VAD_MIN_SPEECH_MS / 1000 / frame_seconds)),
+            )
+            for _ in range(channels)
+        ]
+
+        first_frame = 0
+        total_samples = 0
+        while True:
+            data = recording.readframes(chunk_frames)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype=SAMPLE_TYPES[width]).reshape(-1, channels)
+            total_samples += samples.shape[0]
+            usable = samples.shape[0] - samples.shape[0] % frame_length
+            if usable == 0:
+                break
+            block = samples[:usable].astype(np.float32)
+            if width == 1:
+                block -= 128
+            active = frame_levels(block, frame_length, full_scale) > threshold_dbfs
+            for channel, tracker in enumerate(trackers):
+                tracker.feed(active[:, channel], first_frame)
+            first_frame += usable // frame_length
+
+    segments = [tracker.finish() for tracker in trackers]
+    duration = total_samples / rate
+    speech = merge_segments([segment for channel in segments for segment in channel])
+    gaps = [start - end for (_, end), (start, _) in zip([(0.0, 0.0)] + speech, speech + [(duration, duration)])]
+
+    result = {
+        "duration": round(duration, 2),
+        "talkTime": round(sum(end - start for start, end in speech), 2),
+        "silence": round(sum(gaps), 2),
+        "longestSilence": round(max(gaps), 2),
+        "candidateTalkTime": None,
+        "interviewerTalkTime": None,
+        "answerDurations": [],
+    }
+    if channels >= 2:
+        candidate = segments[candidate_channel]
+        interviewer = merge_segments([
+            segment for channel, channel_segments in enumerate(segments)
+            if channel != candidate_channel for segment in channel_segments
+        ])
+        result["candidateTalkTime"] = round(sum(end - start for start, end in candidate), 2)
+        result["interviewerTalkTime"] = round(sum(end - start for start, end in interviewer), 2)
+        result["answerDurations"] = answer_durations(candidate, interviewer)
+    return result
+
+
+def apply_analysis(results: Dict[str, Any], analysis: Dict[str, Any]) -> None:
+    """
+    Write a recording analysis into a results payload.
+
+    Args:
+        results: A payload matching InterviewResultsResponse, updated in place
+        analysis: The output of analyze_recording
+    """
+    audio = results["audio"]
+    audio["duration"] = int(round(analysis["duration"]))
+    audio["talkTime"] = analysis["talkTime"]
+    audio["silence"] = analysis["silence"]
+    audio["longestSilence"] = analysis["longestSilence"]
+    audio["candidateTalkTime"] = analysis["candidateTalkTime"]
+    audio["interviewerTalkTime"] = analysis["interviewerTalkTime"]
+    durations = dict(analysis["answerDurations"])
+    for question in results["questions"]:
+        duration = durations.get(question.get("interviewerTurn"))
+        if duration is not None:
+            question["answerDuration"] = int(round(duration))
+
+
+class AudioAnalyzer:
+    """Analyzes interview recordings in a process pool."""
+
+    def __init__(
+        self,
+        recordings: RecordingProxy = recording_proxy,
+        workers: int = AUDIO_ANALYSIS_WORKERS,
+        attempts: int = AUDIO_ANALYSIS_ATTEMPTS,
+        retry_seconds: float = AUDIO_ANALYSIS_RETRY_SECONDS
+    ):
+        self.recordings = recordings
+        self.workers = workers
+        self.attempts = max(1, attempts)
+        self.retry_seconds = retry_seconds
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    async def analyze(self, api_key: str, record: Dict[str, Any], results: Dict[str, Any]) -> bool:
+        """
+        Analyze the recording of an interview and fill in the results.
+
+        Results are left unchanged if the recording is not available or
+        could not be analyzed.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            record: The session record
+            results: A payload matching InterviewResultsResponse, updated in place
+
+        Returns:
+            bool: True if the results were filled in
+        """
+        call_id = record["call_id"]
+        # Analyzed recordings are read once, so they stay out of the playback cache
+        async with self.recordings.local_copy(api_key, call_id) as path:
+            if path is None:
+                return False
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+            loop = asyncio.get_running_loop()
+            try:
+                analysis = await loop.run_in_executor(self.executor, analyze_recording, path)
+            except BrokenProcessPool as e:
+                # A worker died; the next attempt starts a fresh pool
+                self.executor = None
+                logger.warning(f"Could not analyze recording of call {call_id}: {str(e)}")
+                return False
+            except Exception as e:
+                logger.warning(f"Could not analyze recording of call {call_id}: {str(e)}")
+                return False
+        apply_analysis(results, analysis)
+        return True
+
+    async def enrich(self, api_key: str, record: Dict[str, Any], results: Dict[str, Any]) -> bool:
+        """
+        Analyze the recording of an interview in the background, retrying
+        with backoff while the recording is not available yet.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            record: The session record
+            results: Stored results of the interview, updated in place
+
+        Returns:
+            bool: True if the results were filled in
+        """
+        for attempt in range(self.attempts):
+            if attempt:
+                await asyncio.sleep(self.retry_seconds * 2 ** (attempt - 1))
+            try:
+                if await self.analyze(api_key, record, results):
+                    return True
+            except Exception as e:
+                logger.warning(f"Error fetching recording of call {record.get('call_id')}: {str(e)}")
+        logger.warning(f"Gave up analyzing recording of call {record.get('call_id')} after {self.attempts} attempts")
+        return False
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+# Shared analyzer instance
+audio_analyzer = AudioAnalyzer()
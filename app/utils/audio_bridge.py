@@ -0,0 +1,539 @@
+"""
+Server-side audio bridge.
+
+This module relays PCM16 audio between a client socket, such as a SIP or PSTN
+gateway, and an Ultravox call that uses the serverWebSocket medium. Each
+direction reframes incoming audio into fixed-size frames inside a
+preallocated ring buffer, so audio is written once into place and handed on
+as memoryview slices without per-frame allocations. A jitter buffer plays the
+frames out at the frame cadence, and every bridge keeps latency and loss
+metrics per direction. Text messages are forwarded as they are.
+
+Clients may send and receive 8-bit μ-law or PCM16 at a sample rate of their
+own, such as 8 kHz telephony audio. Each played-out frame is then converted
+between the client leg and the call's sample rates with the vectorized
+helpers of the audio DSP module.
+"""
+import os
+import abc
+import json
+import uuid
+import asyncio
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Union, Callable, Awaitable
+
+from app.utils.audio_dsp import Resampler, ulaw_to_pcm16, pcm16_to_ulaw
+
+logger = logging.getLogger(__name__)
+
+# Length of a bridged audio frame in milliseconds
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "20"))
+
+# Frames buffered before playout starts, trading latency for smoothness
+AUDIO_JITTER_FRAMES = int(os.getenv("AUDIO_JITTER_FRAMES", "3"))
+
+# Frames a direction can hold; older frames are dropped beyond this
+AUDIO_RING_FRAMES = int(os.getenv("AUDIO_RING_FRAMES", "50"))
+
+# Bytes per PCM16 sample
+SAMPLE_BYTES = 2
+
+# Audio encodings of the client leg, with their bytes per sample
+PCM16 = "pcm16"
+MULAW = "mulaw"
+ENCODING_SAMPLE_BYTES = {PCM16: SAMPLE_BYTES, MULAW: 1}
+
+# Latency histogram resolution and range
+LATENCY_BUCKET_MS = 1
+LATENCY_BUCKETS = 1000
+
+# Ultravox asks clients to drop buffered output when the user interrupts
+CLEAR_BUFFER_MESSAGE = "playback_clear_buffer"
+
+Message = Union[bytes, str]
+
+
+class AudioSocket(abc.ABC):
+    """A socket that carries binary audio frames and text messages."""
+
+    @abc.abstractmethod
+    async def receive(self) -> Optional[Message]:
+        """Get the next message, or None once the socket is closed."""
+
+    @abc.abstractmethod
+    async def send_bytes(self, data: memoryview) -> None:
+        """Send an audio frame."""
+
+    @abc.abstractmethod
+    async def send_text(self, text: str) -> None:
+        """Send a text message."""
+
+    @abc.abstractmethod
+    async def close(self) -> None:
+        """Close the socket."""
+
+
+class ClientAudioSocket(AudioSocket):
+    """An accepted Starlette WebSocket."""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+
+    async def receive(self) -> Optional[Message]:
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        if message.get("bytes") is not None:
+            return message["bytes"]
+        return message.get("text") or ""
+
+    async def send_bytes(self, data: memoryview) -> None:
+        # ASGI messages carry bytes, so this is the one copy on the client side
+        await self.websocket.send_bytes(bytes(data))
+
+    async def send_text(self, text: str) -> None:
+        await self.websocket.send_text(text)
+
+    async def close(self) -> None:
+        try:
+            await self.websocket.close()
+        except RuntimeError:
+            # Already closed by the client
+            pass
+
+
+class UltravoxAudioSocket(AudioSocket):
+    """A client connection to an Ultravox serverWebSocket join URL."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def receive(self) -> Optional[Message]:
+        from websockets.exceptions import ConnectionClosed
+        try:
+            return await self.connection.recv()
+        except ConnectionClosed:
+            return None
+
+    async def send_bytes(self, data: memoryview) -> None:
+        await self.connection.send(data)
+
+    async def send_text(self, text: str) -> None:
+        await self.connection.send(text)
+
+    async def close(self) -> None:
+        await self.connection.close()
+
+
+async def connect_ultravox(join_url: str) -> AudioSocket:
+    """
+    Join an Ultravox call over its serverWebSocket join URL.
+
+    Args:
+        join_url: The joinUrl of a call created with the serverWebSocket medium
+
+    Returns:
+        AudioSocket: The connected socket
+    """
+    # Imported here so the rest of the app does not need the client library
+    import websockets
+    connection = await websockets.connect(join_url, max_size=None)
+    return UltravoxAudioSocket(connection)
+
+
+class LatencyStats:
+    """Running latency statistics with a fixed-size histogram."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = array("I", bytes(4 * (LATENCY_BUCKETS + 1)))
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[min(int(ms / LATENCY_BUCKET_MS), LATENCY_BUCKETS)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return float((bucket + 1) * LATENCY_BUCKET_MS)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "meanMs": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50Ms": self.percentile(0.5),
+            "p95Ms": self.percentile(0.95),
+            "maxMs": round(self.max, 2),
+        }
+
+
+class DirectionMetrics:
+    """Counters of one bridge direction."""
+
+    def __init__(self):
+        self.frames_in = 0
+        self.frames_out = 0
+        self.dropped = 0
+        self.underruns = 0
+        self.late = 0
+        self.latency = LatencyStats()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "framesIn": self.frames_in,
+            "framesOut": self.frames_out,
+            "dropped": self.dropped,
+            "underruns": self.underruns,
+            "late": self.late,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class FrameRing:
+    """
+    Preallocated ring of fixed-size audio frames.
+
+    Writes copy incoming audio straight into its slot, reframing audio that
+    arrives in arbitrary chunk sizes. Reads return memoryview slices of the
+    ring; the frame handed out last stays untouched until the next read, so
+    it can be sent without copying. When the ring is full the oldest frame
+    is dropped, or the new frame if the oldest slot is still being sent.
+    """
+
+    def __init__(self, frame_bytes: int, capacity: int = AUDIO_RING_FRAMES):
+        if capacity < 2:
+            raise ValueError("A frame ring needs at least two slots")
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity
+        self.buffer = bytearray(frame_bytes * capacity)
+        self.view = memoryview(self.buffer)
+        self.arrivals = array("d", bytes(8 * capacity))
+        # Frames read and frames completed so far
+        self.head = 0
+        self.tail = 0
+        # Frame handed out by the last read, if any
+        self.held: Optional[int] = None
+        # Bytes written into the frame being filled
+        self.fill = 0
+        self.discarding = False
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def write(self, data: Union[bytes, memoryview], now: float) -> Tuple[int, int]:
+        """
+        Append audio, completing as many frames as it fills.
+
+        Args:
+            data: Audio of any length
+            now: Arrival time of the audio
+
+        Returns:
+            Tuple[int, int]: Number of completed and of dropped frames
+        """
+        source = memoryview(data).cast("B")
+        completed = dropped = 0
+        offset = 0
+        while offset < len(source):
+            if self.fill == 0:
+                self.discarding = self.held is not None and self.tail - self.held >= self.capacity
+                if not self.discarding and self.tail - self.head >= self.capacity:
+                    self.head += 1
+                    dropped += 1
+            count = min(self.frame_bytes - self.fill, len(source) - offset)
+            if not self.discarding:
+                slot = (self.tail % self.capacity) * self.frame_bytes + self.fill
+                self.view[slot:slot + count] = source[offset:offset + count]
+            offset += count
+            self.fill += count
+            if self.fill == self.frame_bytes:
+                self.fill = 0
+                if self.discarding:
+                    dropped += 1
+                    continue
+                self.arrivals[self.tail % self.capacity] = now
+                self.tail += 1
+                completed += 1
+        return completed, dropped
+
+    def pop(self) -> Optional[Tuple[memoryview, float]]:
+        """
+        Take the oldest complete frame, releasing the frame handed out before.
+
+        Returns:
+            Optional[Tuple[memoryview, float]]: The frame and its arrival time, or None if empty
+        """
+        self.held = None
+        if self.head == self.tail:
+            return None
+        self.held = self.head
+        index = self.head % self.capacity
+        self.head += 1
+        start = index * self.frame_bytes
+        return self.view[start:start + self.frame_bytes], self.arrivals[index]
+
+    def clear(self) -> int:
+        """Drop all buffered audio and get the number of dropped frames."""
+        dropped = self.tail - self.head
+        self.head = self.tail
+        self.fill = 0
+        self.discarding = False
+        return dropped
+
+
+class JitterBuffer:
+    """Plays out the frames of a ring at a steady cadence."""
+
+    def __init__(
+        self,
+        ring: FrameRing,
+        frame_seconds: float,
+        metrics: DirectionMetrics,
+        target_frames: int = AUDIO_JITTER_FRAMES
+    ):
+        self.ring = ring
+        self.frame_seconds = frame_seconds
+        self.metrics = metrics
+        self.target_frames = max(1, min(target_frames, ring.capacity))
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def push(self, data: Union[bytes, memoryview]) -> None:
+        """Buffer arriving audio."""
+        completed, dropped = self.ring.write(data, asyncio.get_running_loop().time())
+        self.metrics.frames_in += completed
+        self.metrics.dropped += dropped
+        if len(self.ring) >= self.target_frames:
+            self._ready.set()
+
+    def clear(self) -> None:
+        """Drop all buffered audio."""
+        self.metrics.dropped += self.ring.clear()
+        self._ready.clear()
+
+    def close(self) -> None:
+        """Stop playout once the remaining frames are sent."""
+        self.closed = True
+        self._ready.set()
+
+    async def play(self, send: Callable[[memoryview], Awaitable[None]]) -> None:
+        """
+        Send frames at the frame cadence until closed.
+
+        Playout starts once the target depth is buffered. When the buffer runs
+        dry, playout pauses and waits for the target depth again.
+
+        Args:
+            send: Sends one frame
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            while len(self.ring) < self.target_frames and not self.closed:
+                self._ready.clear()
+                await self._ready.wait()
+            if self.closed and len(self.ring) == 0:
+                return
+
+            deadline = loop.time()
+            while True:
+                frame = self.ring.pop()
+                if frame is None:
+                    if not self.closed:
+                        self.metrics.underruns += 1
+                    break
+                view, arrival = frame
+                await send(view)
+                now = loop.time()
+                self.metrics.frames_out += 1
+                self.metrics.latency.record(now - arrival)
+
+                deadline += self.frame_seconds
+                delay = deadline - now
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -self.frame_seconds:
+                    # Fell behind by more than a frame; restart the cadence
+                    self.metrics.late += 1
+                    deadline = now
+
+
+class AudioConverter:
+    """
+    Converts fixed-size frames from one leg's encoding and sample rate to
+    another's. Frames that need no conversion are passed through untouched.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, decode_ulaw: bool = False, encode_ulaw: bool = False):
+        self.decode_ulaw = decode_ulaw
+        self.encode_ulaw = encode_ulaw
+        self.resampler = Resampler(from_rate, to_rate) if from_rate != to_rate else None
+
+    @property
+    def passthrough(self) -> bool:
+        """Whether frames are forwarded as they are."""
+        return self.resampler is None and not self.decode_ulaw and not self.encode_ulaw
+
+    def convert(self, frame: memoryview) -> memoryview:
+        """
+        Convert the next frame.
+
+        Args:
+            frame: A frame in the source encoding and sample rate
+
+        Returns:
+            memoryview: The frame in the target encoding and sample rate
+        """
+        if self.passthrough:
+            return frame
+        samples = ulaw_to_pcm16(frame) if self.decode_ulaw else frame
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        if self.encode_ulaw:
+            samples = pcm16_to_ulaw(samples)
+        return memoryview(samples).cast("B")
+
+
+class AudioBridge:
+    """Relays audio between a client socket and an Ultravox call."""
+
+    def __init__(
+        self,
+        call_id: str,
+        client: AudioSocket,
+        upstream: AudioSocket,
+        input_sample_rate: int,
+        output_sample_rate: int,
+        frame_ms: int = AUDIO_FRAME_MS,
+        jitter_frames: int = AUDIO_JITTER_FRAMES,
+        ring_frames: int = AUDIO_RING_FRAMES,
+        client_sample_rate: Optional[int] = None,
+        client_encoding: str = PCM16
+    ):
+        self.bridge_id = str(uuid.uuid4())
+        self.call_id = call_id
+        self.client = client
+        self.upstream = upstream
+        self.started_at = datetime.now().isoformat()
+        self.inbound_metrics = DirectionMetrics()
+        self.outbound_metrics = DirectionMetrics()
+        # Client audio towards Ultravox, and Ultravox audio towards the client;
+        # client frames are buffered as they arrive and converted on playout
+        client_sample_rate = client_sample_rate or input_sample_rate
+        client_frame_bytes = client_sample_rate * frame_ms // 1000 * ENCODING_SAMPLE_BYTES[client_encoding]
+        self.inbound = JitterBuffer(
+            FrameRing(client_frame_bytes, ring_frames),
+            frame_ms / 1000, self.inbound_metrics, jitter_frames,
+        )
+        self.outbound = JitterBuffer(
+            FrameRing(output_sample_rate * frame_ms // 1000 * SAMPLE_BYTES, ring_frames),
+            frame_ms / 1000, self.outbound_metrics, jitter_frames,
+        )
+        self.inbound_converter = AudioConverter(
+            client_sample_rate, input_sample_rate, decode_ulaw=client_encoding == MULAW
+        )
+        self.outbound_converter = AudioConverter(
+            output_sample_rate, client_sample_rate, encode_ulaw=client_encoding == MULAW
+        )
+
+    async def run(self) -> None:
+        """
+        Relay until either side closes, then close both. When the call ends
+        first, audio still buffered for the client is played out before the
+        client is disconnected.
+        """
+        client_pump = asyncio.create_task(self._pump(self.client, self.inbound, self.upstream))
+        upstream_pump = asyncio.create_task(self._pump(self.upstream, self.outbound, self.client))
+        outbound_play = asyncio.create_task(self.outbound.play(self._send_client))
+        tasks = [client_pump, upstream_pump, outbound_play, asyncio.create_task(self.inbound.play(self._send_upstream))]
+        try:
+            done, _ = await asyncio.wait([client_pump, upstream_pump], return_when=asyncio.FIRST_COMPLETED)
+            if client_pump not in done:
+                self.outbound.close()
+                await asyncio.wait([outbound_play, client_pump], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for socket in (self.upstream, self.client):
+                try:
+                    await socket.close()
+                except Exception as e:
+                    logger.debug(f"Error closing audio socket of call {self.call_id}: {str(e)}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get a snapshot of the bridge's metrics."""
+        return {
+            "bridgeId": self.bridge_id,
+            "callId": self.call_id,
+            "startedAt": self.started_at,
+            "inbound": self.inbound_metrics.snapshot(),
+            "outbound": self.outbound_metrics.snapshot(),
+        }
+
+    async def _send_upstream(self, frame: memoryview) -> None:
+        await self.upstream.send_bytes(self.inbound_converter.convert(frame))
+
+    async def _send_client(self, frame: memoryview) -> None:
+        await self.client.send_bytes(self.outbound_converter.convert(frame))
+
+    async def _pump(self, source: AudioSocket, buffer: JitterBuffer, target: AudioSocket) -> None:
+        """Buffer audio from one side and forward its text messages to the other."""
+        while True:
+            message = await source.receive()
+            if message is None:
+                return
+            if isinstance(message, str):
+                if source is self.upstream and is_clear_buffer(message):
+                    self.outbound.clear()
+                await target.send_text(message)
+            else:
+                buffer.push(message)
+
+
+def is_clear_buffer(text: str) -> bool:
+    """Check whether an Ultravox data message asks to drop buffered output."""
+    try:
+        return json.loads(text).get("type") == CLEAR_BUFFER_MESSAGE
+    except (ValueError, AttributeError):
+        return False
+
+
+class AudioBridgeRegistry:
+    """Tracks running bridges for metrics."""
+
+    def __init__(self, connect: Callable[[str], Awaitable[AudioSocket]] = connect_ultravox):
+        self.connect = connect
+        self.bridges: Dict[str, AudioBridge] = {}
+
+    async def run(self, bridge: AudioBridge) -> None:
+        """Run a bridge while it is registered."""
+        self.bridges[bridge.bridge_id] = bridge
+        try:
+            await bridge.run()
+        finally:
+            self.bridges.pop(bridge.bridge_id, None)
+            logger.info(f"Audio bridge {bridge.bridge_id} of call {bridge.call_id} closed: {bridge.metrics()}")
+
+    def metrics(self, call_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the metrics of all running bridges, optionally of one call."""
+        return [
+            bridge.metrics() for bridge in self.bridges.values()
+            if call_id is None or bridge.call_id == call_id
+        ]
+
+
+# Shared registry instance
+audio_bridges = AudioBridgeRegistry()
@@ -0,0 +1,229 @@
+"""
+Audio signal processing for the bridged audio path.
+
+Telephony legs carry 8 kHz G.711 μ-law while Ultravox calls run at other
+PCM16 sample rates, and prompts or hold audio have to be mixed in. Every
+function here works on whole frames as NumPy arrays: μ-law conversion goes
+through lookup tables, resampling through a streaming polyphase filter, and
+gain and mixing through saturating vector arithmetic. Arrays may carry a
+leading batch axis, so one call processes the frames of many calls at once.
+"""
+from math import gcd
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.signal import firwin
+
+# Filter taps per polyphase branch; more taps give a sharper anti-aliasing filter
+RESAMPLER_TAPS = 16
+
+# Kaiser window shape of the resampling filter
+RESAMPLER_KAISER_BETA = 8.0
+
+ULAW_BIAS = 0x84
+ULAW_CLIP = 32635
+
+AudioData = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+def _ulaw_decode_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.uint8)
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = ((mantissa.astype(np.int32) << 3) + ULAW_BIAS) << exponent
+    return np.where(sign != 0, ULAW_BIAS - magnitude, magnitude - ULAW_BIAS).astype(np.int16)
+
+
+def _ulaw_encode_table() -> np.ndarray:
+    # Encodes on 14 bits like the reference G.711 coder, so the codes match
+    # those of other telephony stacks bit for bit
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), ULAW_CLIP >> 2) + (ULAW_BIAS >> 2)
+    # Position of the highest set bit above bit 5 gives the segment
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 5, 0, 7)
+    mantissa = (magnitude >> (exponent + 1)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa)).astype(np.uint8)
+
+
+# μ-law code -> PCM16 sample, and PCM16 sample (as uint16) -> μ-law code
+ULAW_TO_PCM16 = _ulaw_decode_table()
+PCM16_TO_ULAW = _ulaw_encode_table()
+
+
+def as_pcm16(data: AudioData) -> np.ndarray:
+    """Get PCM16 audio as an int16 array without copying raw bytes."""
+    if isinstance(data, np.ndarray):
+        return data.astype(np.int16, copy=False)
+    return np.frombuffer(data, dtype=np.int16)
+
+
+def ulaw_to_pcm16(data: AudioData) -> np.ndarray:
+    """
+    Decode G.711 μ-law audio.
+
+    Args:
+        data: μ-law codes as raw bytes or a uint8 array of any shape
+
+    Returns:
+        np.ndarray: int16 samples of the same shape
+    """
+    codes = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+    return ULAW_TO_PCM16[codes]
+
+
+def pcm16_to_ulaw(data: AudioData) -> np.ndarray:
+    """
+    Encode PCM16 audio as G.711 μ-law.
+
+    Args:
+        data: PCM16 samples as raw bytes or an int16 array of any shape
+
+    Returns:
+        np.ndarray: uint8 μ-law codes of the same shape
+    """
+    return PCM16_TO_ULAW[as_pcm16(data).view(np.uint16)]
+
+
+def saturate(samples: np.ndarray) -> np.ndarray:
+    """Round and clip float samples to the PCM16 range."""
+    rounded = np.rint(samples)
+    np.minimum(rounded, 32767, out=rounded)
+    np.maximum(rounded, -32768, out=rounded)
+    return rounded.astype(np.int16)
+
+
+def db_to_gain(gain_db: float) -> float:
+    """Convert a gain in decibels to a linear factor."""
+    return float(10 ** (gain_db / 20))
+
+
+def apply_gain(data: AudioData, gain_db: float) -> np.ndarray:
+    """
+    Amplify or attenuate PCM16 audio, saturating instead of wrapping.
+
+    Args:
+        data: PCM16 samples of any shape
+        gain_db: Gain in decibels
+
+    Returns:
+        np.ndarray: int16 samples
+    """
+    return saturate(as_pcm16(data) * np.float32(db_to_gain(gain_db)))
+
+
+def mix(frames: Sequence[AudioData], gains_db: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Mix PCM16 frames of equal shape, such as a call leg with a prompt or
+    hold audio.
+
+    Args:
+        frames: The frames to mix
+        gains_db: Gain of each frame in decibels; unity by default
+
+    Returns:
+        np.ndarray: The saturated int16 mix
+    """
+    if not frames:
+        raise ValueError("Nothing to mix")
+    if gains_db is None:
+        total = np.zeros(as_pcm16(frames[0]).shape, dtype=np.int32)
+        for frame in frames:
+            total += as_pcm16(frame)
+        return np.clip(total, -32768, 32767).astype(np.int16)
+
+    if len(gains_db) != len(frames):
+        raise ValueError("Need one gain per frame")
+    total = np.zeros(as_pcm16(frames[0]).shape, dtype=np.float32)
+    for frame, gain_db in zip(frames, gains_db):
+        total += as_pcm16(frame) * np.float32(db_to_gain(gain_db))
+    return saturate(total)
+
+
+class Resampler:
+    """
+    Streaming polyphase resampler.
+
+    Converts by the rational factor up/down with a windowed-sinc filter split
+    into `up` branches, evaluating only the branch each output sample needs.
+    Filter history and the fractional position carry over between frames,
+    so consecutive frames resample as one continuous signal. Frames may have
+    a leading batch axis, one row per call.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, taps: int = RESAMPLER_TAPS):
+        divisor = gcd(from_rate, to_rate)
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+        self.taps = taps
+
+        prototype = firwin(
+            self.up * taps,
+            1.0 / max(self.up, self.down),
+            window=("kaiser", RESAMPLER_KAISER_BETA),
+        ) * self.up
+        # Branch p holds the taps h[p + k*up], ordered oldest input sample first
+        self.bank = prototype.reshape(taps, self.up).T[:, ::-1].astype(np.float32)
+
+        self.history: Optional[np.ndarray] = None
+        # Position of the next output sample, in 1/up input samples from the frame start
+        self.position = 0
+        self.plans: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, int]] = {}
+
+    def reset(self) -> None:
+        """Forget the filter history, e.g. when a new call takes the slot."""
+        self.history = None
+        self.position = 0
+
+    def process(self, data: AudioData) -> np.ndarray:
+        """
+        Resample the next frame.
+
+        Args:
+            data: PCM16 samples, shaped (samples,) or (batch, samples)
+
+        Returns:
+            np.ndarray: int16 samples at the target rate, with the same leading shape
+        """
+        frame = as_pcm16(data)
+        if self.up == self.down:
+            return frame
+
+        length = frame.shape[-1]
+        if self.history is None:
+            self.history = np.zeros(frame.shape[:-1] + (self.taps - 1,), dtype=np.float32)
+        elif self.history.shape[:-1] != frame.shape[:-1]:
+            raise ValueError("Frame batch shape changed")
+
+        extended = np.concatenate((self.history, frame.astype(np.float32)), axis=-1)
+        windows, filters, next_position = self._plan(length)
+        output = np.einsum("...nt,nt->...n", extended[..., windows], filters)
+
+        self.history = extended[..., length:]
+        self.position = next_position
+        return saturate(output)
+
+    def output_length(self, length: int) -> int:
+        """Get the number of samples the next frame of `length` samples produces."""
+        return len(self._plan(length)[0])
+
+    def _plan(self, length: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Get the input window and filter branch taps of each output sample.
+
+        With fixed frame sizes the position cycles through a few values, so
+        plans are computed once per (frame length, position) and reused.
+        """
+        key = (length, self.position)
+        plan = self.plans.get(key)
+        if plan is None:
+            end = length * self.up
+            positions = np.arange(self.position, end, self.down)
+            next_position = int(positions[-1]) + self.down - end if len(positions) else self.position - end
+            windows = (positions // self.up)[:, None] + np.arange(self.taps)
+            plan = (windows, self.bank[positions % self.up], next_position)
+            self.plans[key] = plan
+        return plan
@@ -0,0 +1,222 @@
+"""
+Abandoned call reaper.
+
+Candidates often never join, or close the tab halfway through. Their calls
+keep holding account capacity until maxDuration runs out, so a background
+sweep ends calls that were never joined by their join deadline, and calls
+that have gone without new messages for an idle period. Calls are checked
+and ended upstream in batches, and each ended call's slot goes straight
+back to admission control.
+
+Ultravox can only end a call early by deleting it, which also deletes its
+messages and recording. Only calls nobody joined are deleted; joined calls
+are ended locally and left to finish upstream, so their transcript and
+recording stay available.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+
+from app.controllers.ultravox_controller import get_call_details, delete_ultravox_call
+from app.utils.session_store import (
+    session_store, apply_call_details, elapsed_seconds, TERMINAL_STATUSES
+)
+from app.utils.message_cache import MessageCache, message_cache
+from app.utils.admission import AdmissionController, admission_controller
+from app.utils.interview_state import advance, CALL_ENDED
+from app.utils.status_hub import status_hub
+from app.utils.upstream_scheduler import upstream_context
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reaper sweeps
+REAPER_INTERVAL_SECONDS = float(os.getenv("REAPER_INTERVAL_SECONDS", "30"))
+
+# Seconds without new messages after which a joined call counts as abandoned
+REAPER_IDLE_SECONDS = float(os.getenv("REAPER_IDLE_SECONDS", "300"))
+
+# Seconds a call may wait for its candidate when it set no join deadline,
+# matching the Ultravox default joinTimeout
+REAPER_JOIN_TIMEOUT_SECONDS = float(os.getenv("REAPER_JOIN_TIMEOUT_SECONDS", "30"))
+
+# Calls checked or ended upstream at once
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "20"))
+
+# End reasons recorded on reaped sessions
+UNJOINED = "unjoined"
+IDLE = "idle"
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert a locally stored ISO timestamp to seconds since the epoch."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+class CallReaper:
+    """Ends abandoned calls and returns their slots to admission control."""
+
+    def __init__(
+        self,
+        fetch_call_details: Callable[[str, str], Awaitable[Dict[str, Any]]] = get_call_details,
+        delete_call: Callable[[str, str], Awaitable[None]] = delete_ultravox_call,
+        cache: MessageCache = message_cache,
+        admission: AdmissionController = admission_controller,
+        idle_seconds: float = REAPER_IDLE_SECONDS,
+        batch_size: int = REAPER_BATCH_SIZE,
+        clock: Callable[[], float] = time.time
+    ):
+        self.fetch_call_details = fetch_call_details
+        self.delete_call = delete_call
+        self.cache = cache
+        self.admission = admission
+        self.idle_seconds = idle_seconds
+        self.batch_size = max(1, batch_size)
+        self.clock = clock
+        # Call ID -> (newest message ordinal, time it was first seen)
+        self.activity: Dict[str, Tuple[int, float]] = {}
+        self.reaped = 0
+
+    async def sweep(self) -> List[str]:
+        """
+        Check every live call once and end the abandoned ones.
+
+        Returns:
+            List[str]: Session IDs whose calls were ended
+        """
+        live = [
+            (session_id, record)
+            for session_id, record in list(session_store.items())
+            if record.get("call_id") and record.get("status") not in TERMINAL_STATUSES
+        ]
+        live_calls = {record["call_id"] for _, record in live}
+        for call_id in list(self.activity):
+            if call_id not in live_calls:
+                del self.activity[call_id]
+
+        ended = []
+        for start in range(0, len(live), self.batch_size):
+            batch = live[start:start + self.batch_size]
+            reasons = await asyncio.gather(*(self._check(session_id, record) for session_id, record in batch))
+            abandoned = [(session_id, record, reason) for (session_id, record), reason in zip(batch, reasons) if reason]
+            results = await asyncio.gather(
+                *(self.end(session_id, record, reason) for session_id, record, reason in abandoned),
+                return_exceptions=True
+            )
+            for (session_id, _, reason), result in zip(abandoned, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Could not end abandoned call of session {session_id}: {str(result)}")
+                else:
+                    logger.info(f"Ended {reason} call of session {session_id}")
+                    ended.append(session_id)
+        return ended
+
+    async def end(self, session_id: str, record: Dict[str, Any], reason: str) -> None:
+        """
+        End a session's call and release its slot.
+
+        A call nobody joined is deleted upstream. A joined call is only
+        ended locally: deleting it would also delete its messages and
+        recording, so it keeps running upstream until the candidate leaves
+        or maxDuration runs out, and its results and recording are served
+        once it has ended there. Its slot is freed by the first account sync
+        after that. A call that ended on its own is left alone.
+
+        Args:
+            session_id: The Tezhire session ID
+            record: The session record to update in place
+            reason: End reason to record on the session
+
+        Raises:
+            HTTPException: If the call could not be ended upstream
+        """
+        call_id = record.get("call_id")
+        if call_id:
+            api_key = record.get("api_key", "")
+            with upstream_context(record.get("company_id")):
+                apply_call_details(record, await self.fetch_call_details(api_key, call_id))
+                joined = bool(record.get("start_time"))
+                if record.get("status") not in TERMINAL_STATUSES:
+                    if not joined:
+                        await self.delete_call(api_key, call_id)
+                    self.reaped += 1
+            if not joined or record.get("status") in TERMINAL_STATUSES:
+                self.admission.release(call_id)
+                self.cache.mark_ended(call_id)
+            self.activity.pop(call_id, None)
+
+        if record.get("status") in TERMINAL_STATUSES:
+            # Ended upstream on its own
+            status_hub.publish(session_id)
+            return
+
+        record["status"] = "ended"
+        record["end_reason"] = reason
+        record["end_time"] = datetime.now().isoformat()
+        record["duration"] = elapsed_seconds(record)
+        advance(record, CALL_ENDED)
+        status_hub.publish(session_id)
+
+    async def run(self, interval: float = REAPER_INTERVAL_SECONDS) -> None:
+        """Sweep periodically until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error reaping abandoned calls: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the number of watched and reaped calls."""
+        return {"watchedCalls": len(self.activity), "reapedCalls": self.reaped}
+
+    async def _check(self, session_id: str, record: Dict[str, Any]) -> Optional[str]:
+        """Get the reason a live call is abandoned, or None if it is not."""
+        with upstream_context(record.get("company_id")):
+            return await self._classify(session_id, record)
+
+    async def _classify(self, session_id: str, record: Dict[str, Any]) -> Optional[str]:
+        now = self.clock()
+        api_key = record.get("api_key", "")
+        call_id = record["call_id"]
+        try:
+            if not record.get("start_time"):
+                join_deadline = _timestamp(record.get("join_expires_at"))
+                if join_deadline is None:
+                    created_at = _timestamp(record.get("created_at"))
+                    join_deadline = (created_at or now) + REAPER_JOIN_TIMEOUT_SECONDS
+                if now < join_deadline:
+                    return None
+
+                # The record may only be stale; ask upstream before ending it
+                apply_call_details(record, await self.fetch_call_details(api_key, call_id))
+                if record.get("status") in TERMINAL_STATUSES:
+                    # Ended upstream on its own
+                    self.admission.release(call_id)
+                    self.cache.mark_ended(call_id)
+                    status_hub.publish(session_id)
+                    return None
+                if not record.get("start_time"):
+                    return UNJOINED
+
+            await self.cache.refresh(api_key, call_id)
+            ordinal = self.cache.get(call_id).last_ordinal
+            seen = self.activity.get(call_id)
+            if seen is None or seen[0] != ordinal:
+                self.activity[call_id] = (ordinal, now)
+                return None
+            return IDLE if now - seen[1] >= self.idle_seconds else None
+        except Exception as e:
+            logger.warning(f"Error checking call of session {session_id}: {str(e)}")
+            return None
+
+
+# Shared reaper instance
+call_reaper = CallReaper()
@@ -0,0 +1,123 @@
+"""
+Candidate ranking index.
+
+This module keeps the scores of every materialized interview, grouped by job,
+so the best candidates of a job are found with a heap over the job's score
+entries instead of reloading and sorting every result document.
+"""
+import heapq
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Scores a ranking can be ordered by, each with its tie-breaker
+RANKING_KEYS = {
+    "overallScore": "fitScore",
+    "fitScore": "overallScore",
+}
+
+
+class CandidateRankingIndex:
+    """Per-job index of interview scores."""
+
+    def __init__(self):
+        # job ID -> candidate ID -> score entry
+        self.jobs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # session ID -> (job ID, candidate ID)
+        self.sessions: Dict[str, Tuple[str, str]] = {}
+
+    def index_results(self, results: Dict[str, Any]) -> None:
+        """
+        Add (or replace) the scores of a results payload.
+
+        A candidate interviewed several times for the same job is ranked by
+        their most recently materialized interview.
+
+        Args:
+            results: A payload matching InterviewResultsResponse
+        """
+        session_id = results["sessionId"]
+        job_id = results.get("jobId", "")
+        candidate_id = results.get("candidateId", "")
+        self.remove_session(session_id)
+
+        candidates = self.jobs.setdefault(job_id, {})
+        previous = candidates.get(candidate_id)
+        if previous is not None:
+            self.sessions.pop(previous["sessionId"], None)
+
+        candidates[candidate_id] = {
+            "sessionId": session_id,
+            "candidateId": candidate_id,
+            "companyId": results.get("companyId", ""),
+            "overallScore": results.get("overallScore", 0),
+            "fitScore": results.get("feedback", {}).get("fitScore", 0),
+            "recommendation": results.get("feedback", {}).get("recommendation", ""),
+        }
+        self.sessions[session_id] = (job_id, candidate_id)
+
+    def remove_session(self, session_id: str) -> None:
+        """
+        Remove the scores of a session from the index.
+
+        Args:
+            session_id: The Tezhire session ID
+        """
+        location = self.sessions.pop(session_id, None)
+        if location is None:
+            return
+        job_id, candidate_id = location
+        candidates = self.jobs.get(job_id, {})
+        entry = candidates.get(candidate_id)
+        if entry is not None and entry["sessionId"] == session_id:
+            del candidates[candidate_id]
+        if not candidates:
+            self.jobs.pop(job_id, None)
+
+    def count(self, job_id: str) -> int:
+        """Get the number of ranked candidates of a job."""
+        return len(self.jobs.get(job_id, {}))
+
+    def top(
+        self,
+        job_id: str,
+        limit: int = 20,
+        sort_by: str = "overallScore",
+        min_overall_score: Optional[int] = None,
+        min_fit_score: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the best candidates of a job.
+
+        Args:
+            job_id: The job ID
+            limit: Maximum number of candidates to return
+            sort_by: The score to order by (overallScore or fitScore)
+            min_overall_score: Only return candidates with at least this overall score
+            min_fit_score: Only return candidates with at least this fit score
+
+        Returns:
+            List[Dict[str, Any]]: Score entries, best first, each with its rank
+        """
+        if sort_by not in RANKING_KEYS:
+            raise ValueError(f"Cannot rank by {sort_by}")
+        tie_breaker = RANKING_KEYS[sort_by]
+
+        entries = self.jobs.get(job_id, {}).values()
+        if min_overall_score is not None:
+            entries = [entry for entry in entries if entry["overallScore"] >= min_overall_score]
+        if min_fit_score is not None:
+            entries = [entry for entry in entries if entry["fitScore"] >= min_fit_score]
+
+        # Ties are broken by the other score, then by session ID for a stable order
+        top = heapq.nsmallest(
+            limit,
+            entries,
+            key=lambda entry: (-entry[sort_by], -entry[tie_breaker], entry["sessionId"])
+        )
+        return [dict(entry, rank=rank) for rank, entry in enumerate(top, start=1)]
+
+
+# Shared ranking index instance
+ranking_index = CandidateRankingIndex()
@@ -0,0 +1,329 @@
+"""
+Interview scheduling.
+
+Scheduled interviews get their Ultravox call created a lead time before
+their slot, so the candidate's join link returns a ready joinUrl instead of
+waiting on call creation. Pending creations sit in a hashed timer wheel:
+scheduling and cancelling are dictionary operations, and each tick only
+looks at the timers hashed to one slot. A candidate who joins before the
+call was pre-created, or after it expired unjoined, gets one created on
+demand.
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from app.controllers.ultravox_controller import join_ultravox_call, delete_ultravox_call, get_call_details
+from app.utils.session_store import get_session, apply_call_details
+from app.utils.admission import AdmissionController, admission_controller
+from app.utils.upstream_scheduler import upstream_context, INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a slot at which its call is created
+SCHEDULE_LEAD_SECONDS = float(os.getenv("SCHEDULE_LEAD_SECONDS", "120"))
+
+# Seconds after the slot start a candidate may still join the pre-created call
+SCHEDULE_JOIN_GRACE_SECONDS = float(os.getenv("SCHEDULE_JOIN_GRACE_SECONDS", "600"))
+
+# Longest joinTimeout a pre-created call may ask Ultravox for
+SCHEDULE_MAX_JOIN_TIMEOUT_SECONDS = float(os.getenv("SCHEDULE_MAX_JOIN_TIMEOUT_SECONDS", "3600"))
+
+# Seconds per timer wheel tick
+SCHEDULE_TICK_SECONDS = float(os.getenv("SCHEDULE_TICK_SECONDS", "1"))
+
+# Number of timer wheel slots; timers further out than one turn wait for later turns
+SCHEDULE_WHEEL_SLOTS = int(os.getenv("SCHEDULE_WHEEL_SLOTS", "4096"))
+
+
+class SessionAlreadyJoined(Exception):
+    """Raised when cancelling a scheduled interview whose call was joined."""
+
+
+class TimerWheel:
+    """Hashed timer wheel keyed by timer name."""
+
+    def __init__(self, tick: float = SCHEDULE_TICK_SECONDS, size: int = SCHEDULE_WHEEL_SLOTS, now: float = 0.0):
+        self.tick = tick
+        # Slot -> timer key -> deadline tick
+        self.slots: List[Dict[str, int]] = [{} for _ in range(size)]
+        # Timer key -> slot
+        self.timers: Dict[str, int] = {}
+        self.current = int(now // tick)
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.timers
+
+    def schedule(self, key: str, when: float) -> None:
+        """
+        Add or move a timer.
+
+        Args:
+            key: The timer key
+            when: Time the timer is due, in seconds since the epoch
+        """
+        self.cancel(key)
+        deadline = max(math.ceil(when / self.tick), self.current + 1)
+        slot = deadline % len(self.slots)
+        self.slots[slot][key] = deadline
+        self.timers[key] = slot
+
+    def cancel(self, key: str) -> bool:
+        """Remove a timer; returns whether it was pending."""
+        slot = self.timers.pop(key, None)
+        if slot is None:
+            return False
+        del self.slots[slot][key]
+        return True
+
+    def advance(self, now: float) -> List[str]:
+        """
+        Move the wheel to a point in time.
+
+        Args:
+            now: The current time in seconds since the epoch
+
+        Returns:
+            List[str]: Keys of the timers that became due
+        """
+        target = int(now // self.tick)
+        # After a long pause every slot is due for a look, but only once
+        steps = min(target - self.current, len(self.slots))
+        due = []
+        for step in range(1, steps + 1):
+            bucket = self.slots[(self.current + step) % len(self.slots)]
+            expired = [key for key, deadline in bucket.items() if deadline <= target]
+            for key in expired:
+                del bucket[key]
+                del self.timers[key]
+            due.extend(expired)
+        self.current = max(self.current, target)
+        return due
+
+
+class InterviewScheduler:
+    """Pre-creates the Ultravox calls of scheduled interviews."""
+
+    def __init__(
+        self,
+        create_call: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]] = join_ultravox_call,
+        delete_call: Callable[[str, str], Awaitable[None]] = delete_ultravox_call,
+        fetch_call_details: Callable[[str, str], Awaitable[Dict[str, Any]]] = get_call_details,
+        lead_seconds: float = SCHEDULE_LEAD_SECONDS,
+        grace_seconds: float = SCHEDULE_JOIN_GRACE_SECONDS,
+        clock: Callable[[], float] = time.time,
+        admission: AdmissionController = admission_controller
+    ):
+        self.create_call = create_call
+        self.delete_call = delete_call
+        self.fetch_call_details = fetch_call_details
+        self.admission = admission
+        self.clock = clock
+        # Keep lead time plus grace within the joinTimeout Ultravox accepts
+        self.lead_seconds = max(0.0, min(lead_seconds, SCHEDULE_MAX_JOIN_TIMEOUT_SECONDS - grace_seconds))
+        self.grace_seconds = grace_seconds
+        self.wheel = TimerWheel(now=clock())
+        # Session ID -> pending or pre-created call
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def schedule(self, session_id: str, api_key: str, call_config: Dict[str, Any], start_at: float) -> float:
+        """
+        Schedule the call of an interview.
+
+        Args:
+            session_id: The Tezhire session ID
+            api_key: Ultravox API key for authentication
+            call_config: Configuration of the call to create
+            start_at: Slot start in seconds since the epoch
+
+        Returns:
+            float: Time the call will be created, in seconds since the epoch
+        """
+        create_at = max(self.clock(), start_at - self.lead_seconds)
+        self.entries[session_id] = {
+            "api_key": api_key,
+            "call_config": call_config,
+            "start_at": start_at,
+            "task": None,
+            "expires_at": None,
+            "error": None,
+        }
+        self.wheel.schedule(session_id, create_at)
+        return create_at
+
+    async def join(self, session_id: str) -> Optional[str]:
+        """
+        Get the join URL of a scheduled interview, creating its call now if
+        it was not pre-created or expired unjoined. A candidate who rejoins
+        after the join deadline gets the call they already joined.
+
+        Args:
+            session_id: The Tezhire session ID
+
+        Returns:
+            Optional[str]: The join URL, or None if the session is not scheduled here
+
+        Raises:
+            RuntimeError: If the call could not be created, or it is not
+                known whether the expired call was joined
+        """
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return None
+
+        expires_at = entry["expires_at"]
+        if entry["task"] is None or (expires_at is not None and self.clock() >= expires_at):
+            if expires_at is not None:
+                record = get_session(session_id)
+                if await self._was_joined(entry, record):
+                    return record.get("join_url")
+                await self._discard(session_id, entry, record.get("call_id") if record else None)
+            self.wheel.cancel(session_id)
+            self._start(session_id, entry, self.clock())
+        await asyncio.shield(entry["task"])
+        if entry["expires_at"] is None:
+            raise RuntimeError(entry["error"] or "Call was not created")
+
+        record = get_session(session_id)
+        return record.get("join_url") if record else None
+
+    async def cancel(self, session_id: str) -> bool:
+        """
+        Cancel a scheduled interview and delete its call if it was already
+        created, unless the candidate has joined it.
+
+        Args:
+            session_id: The Tezhire session ID
+
+        Returns:
+            bool: True if the session was scheduled here
+
+        Raises:
+            SessionAlreadyJoined: If the candidate joined the call
+            RuntimeError: If it is not known whether the call was joined
+        """
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return False
+        task = entry["task"]
+        if task is not None and task.done() and await self._was_joined(entry, get_session(session_id)):
+            raise SessionAlreadyJoined(f"Session {session_id} has already been joined")
+        if self.entries.pop(session_id, None) is not entry:
+            # Cancelled concurrently
+            return False
+        self.wheel.cancel(session_id)
+
+        if task is not None:
+            # A call still being created is deleted once it exists
+            await asyncio.shield(task)
+            record = get_session(session_id)
+            await self._discard(session_id, entry, record.get("call_id") if record else None)
+        return True
+
+    def remove_results(self, results: Dict[str, Any]) -> None:
+        """Forget a session whose results were materialized."""
+        entry = self.entries.pop(results["sessionId"], None)
+        if entry is not None:
+            self.wheel.cancel(results["sessionId"])
+
+    def fire_due(self, now: Optional[float] = None) -> List[str]:
+        """
+        Start creating the calls that became due.
+
+        Args:
+            now: The current time; the clock's time if not given
+
+        Returns:
+            List[str]: Session IDs whose calls are being created
+        """
+        now = self.clock() if now is None else now
+        due = self.wheel.advance(now)
+        for session_id in due:
+            entry = self.entries.get(session_id)
+            if entry is not None:
+                self._start(session_id, entry, now)
+        return due
+
+    async def run(self) -> None:
+        """Advance the timer wheel every tick until cancelled."""
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            try:
+                self.fire_due()
+            except Exception as e:
+                logger.error(f"Error firing scheduled interviews: {str(e)}")
+
+    async def _was_joined(self, entry: Dict[str, Any], record: Optional[Dict[str, Any]]) -> bool:
+        """Check upstream whether the candidate joined a pre-created call."""
+        if record is None or not record.get("call_id"):
+            return False
+        if not record.get("start_time"):
+            try:
+                apply_call_details(record, await self.fetch_call_details(entry["api_key"], record["call_id"]))
+            except Exception as e:
+                raise RuntimeError(f"Could not check the expired call: {str(e)}")
+        return bool(record.get("start_time"))
+
+    async def _discard(self, session_id: str, entry: Dict[str, Any], call_id: Optional[str]) -> None:
+        """Delete an unused pre-created call and release its slot."""
+        if not call_id:
+            return
+        try:
+            await self.delete_call(entry["api_key"], call_id)
+        except Exception as e:
+            logger.warning(f"Could not delete unused call of session {session_id}: {str(e)}")
+        self.admission.release(call_id)
+
+    def _start(self, session_id: str, entry: Dict[str, Any], now: float) -> None:
+        # The call stays joinable until the end of the grace period after
+        # the slot start, or for the grace period when created late
+        join_timeout = int(min(
+            max(entry["start_at"] - now, 0) + self.grace_seconds,
+            SCHEDULE_MAX_JOIN_TIMEOUT_SECONDS,
+        ))
+        entry["expires_at"] = None
+        entry["error"] = None
+        # Creations are interactive requests of the session's company
+        record = get_session(session_id)
+        with upstream_context(record.get("company_id") if record else None, INTERACTIVE):
+            entry["task"] = asyncio.create_task(self._create(session_id, entry, join_timeout, now + join_timeout))
+
+    async def _create(self, session_id: str, entry: Dict[str, Any], join_timeout: int, expires_at: float) -> None:
+        try:
+            call_config = dict(entry["call_config"], joinTimeout=f"{join_timeout}s")
+            call = await self.admission.admit_call(
+                entry["api_key"], lambda: self.create_call(entry["api_key"], call_config)
+            )
+        except Exception as e:
+            logger.error(f"Error pre-creating call for session {session_id}: {str(e)}")
+            # The next join attempt creates the call on demand
+            entry["task"] = None
+            entry["error"] = str(e)
+            return
+
+        record = get_session(session_id)
+        if record is None or self.entries.get(session_id) is not entry:
+            # Cancelled while the call was being created
+            try:
+                await self.delete_call(entry["api_key"], call["callId"])
+            except Exception as e:
+                logger.warning(f"Could not delete call of cancelled session {session_id}: {str(e)}")
+            self.admission.release(call["callId"])
+            return
+
+        record["call_id"] = call.get("callId")
+        record["join_url"] = call.get("joinUrl")
+        record["status"] = "created"
+        record["join_expires_at"] = datetime.fromtimestamp(expires_at).isoformat()
+        entry["expires_at"] = expires_at
+
+
+# Shared scheduler instance
+interview_scheduler = InterviewScheduler()
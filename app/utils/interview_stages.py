@@ -0,0 +1,158 @@
+"""
+Staged interview prompts.
+
+A staged session runs one Ultravox call stage per interview phase instead of
+a single system prompt covering the whole interview. Each stage prompt only
+carries what its phase needs, so the model processes a fraction of the
+prompt on every turn. Stage prompts are rendered from per-phase templates
+and cached on the template fields they use, which lets the sessions of one
+job share most of them. When a tool call moves a session to another phase,
+the tool endpoint answers with the pre-encoded configuration of the next
+stage.
+"""
+import os
+import json
+import string
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.models.tezhire import SessionRequest
+from app.utils.interview_state import INTRO, TECHNICAL, BEHAVIORAL, WRAP_UP
+
+# Whether sessions with in-call tools run one call stage per interview phase
+INTERVIEW_STAGES_ENABLED = os.getenv("INTERVIEW_STAGES_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Maximum number of rendered stage prompts kept in memory
+STAGE_PROMPT_CACHE_SIZE = int(os.getenv("STAGE_PROMPT_CACHE_SIZE", "1024"))
+
+# Tool response header that makes Ultravox start a new call stage
+STAGE_RESPONSE_HEADER = "X-Ultravox-Response-Type"
+NEW_STAGE = "new-stage"
+
+STAGE_HEADER = """# INTERVIEW
+You are interviewing a candidate for the {title} position ({experience_level}, {department}).
+Style: {interview_style}. Difficulty: {difficulty_level}. Ask one question at a time and keep your turns short.
+"""
+
+STAGE_TEMPLATES = {
+    INTRO: STAGE_HEADER + """
+## INTRODUCTION
+- Greet {candidate_name}, introduce yourself and explain that the interview takes about {duration} minutes
+- Put the candidate at ease with a short question about their background
+- Then call nextQuestion to start the interview
+""",
+    TECHNICAL: STAGE_HEADER + """
+## TECHNICAL QUESTIONS
+- Role requirements: {requirements}
+- Focus areas: {topics_to_focus}
+- Do not discuss: {topics_to_avoid}
+- Probe for specifics, trade-offs and how the candidate would approach concrete problems
+- Assess technical knowledge and problem-solving
+""",
+    BEHAVIORAL: STAGE_HEADER + """
+## BEHAVIORAL QUESTIONS
+- Responsibilities of the role: {responsibilities}
+- Ask about concrete past situations, what the candidate did and how it turned out
+- Assess communication, ownership and teamwork
+""",
+    WRAP_UP: STAGE_HEADER + """
+## WRAP-UP
+- Let the candidate finish their current answer
+- Invite their questions about the role and answer briefly
+- Explain that the hiring team will follow up, thank them and end the interview
+""",
+}
+
+# Template fields of each stage, so the cache key only holds what a stage uses
+STAGE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    phase: tuple(sorted({field for _, field, _, _ in string.Formatter().parse(template) if field}))
+    for phase, template in STAGE_TEMPLATES.items()
+}
+
+
+def stage_context(request: SessionRequest) -> Dict[str, str]:
+    """
+    Get the template fields of a session request.
+
+    Args:
+        request: The session request
+
+    Returns:
+        Dict[str, str]: Field name -> value
+    """
+    job = request.job
+    interview = request.interview
+    return {
+        "title": job.title,
+        "department": job.department,
+        "experience_level": job.experience_level,
+        "requirements": ", ".join(job.requirements),
+        "responsibilities": ", ".join(job.responsibilities),
+        "candidate_name": request.candidate.name,
+        "duration": str(interview.duration),
+        "difficulty_level": interview.difficulty_level,
+        "interview_style": interview.interview_style,
+        "topics_to_focus": ", ".join(interview.topics_to_focus),
+        "topics_to_avoid": ", ".join(interview.topics_to_avoid) or "nothing in particular",
+    }
+
+
+@lru_cache(maxsize=STAGE_PROMPT_CACHE_SIZE)
+def render_stage_prompt(phase: str, fields: Tuple[Tuple[str, str], ...]) -> str:
+    """Render the prompt of a stage from its template fields."""
+    return STAGE_TEMPLATES[phase].format(**dict(fields))
+
+
+def stage_prompt(phase: str, context: Dict[str, str], suffix: str = "") -> str:
+    """
+    Get the prompt of a stage.
+
+    Args:
+        phase: The interview phase of the stage
+        context: Template fields of the session
+        suffix: Text appended to the prompt, such as the tool instructions
+
+    Returns:
+        str: The stage prompt
+    """
+    fields = tuple((name, context[name]) for name in STAGE_FIELDS[phase])
+    return render_stage_prompt(phase, fields) + suffix
+
+
+class StagePlan:
+    """The precomputed call stages of one session."""
+
+    def __init__(self, context: Dict[str, str], selected_tools: List[Dict[str, Any]], suffix: str = ""):
+        self.prompts = {phase: stage_prompt(phase, context, suffix) for phase in STAGE_TEMPLATES}
+        # Stage configuration of each phase, encoded without its closing
+        # brace so the tool result can be appended
+        self.prefixes = {
+            phase: json.dumps(
+                {"systemPrompt": prompt, "selectedTools": selected_tools}, separators=(",", ":")
+            ).encode()[:-1]
+            for phase, prompt in self.prompts.items()
+        }
+        # Phase of the stage the call is on
+        self.phase = INTRO
+
+    @property
+    def initial_prompt(self) -> str:
+        """Get the system prompt the call starts with."""
+        return self.prompts[INTRO]
+
+    def new_stage(self, phase: str, tool_result: bytes) -> Optional[bytes]:
+        """
+        Get the new-stage response that moves the call to a phase.
+
+        Args:
+            phase: The phase to move to
+            tool_result: The tool response the agent sees in the new stage
+
+        Returns:
+            Optional[bytes]: The stage configuration, or None if the phase has no stage
+        """
+        prefix = self.prefixes.get(phase)
+        if prefix is None:
+            return None
+        self.phase = phase
+        return prefix + b',"toolResultText":' + json.dumps(tool_result.decode()).encode() + b"}"
@@ -0,0 +1,150 @@
+"""
+Interview state machine.
+
+This module tracks which phase each interview is in: intro, technical,
+behavioral, wrap-up and ended. The phase lives on the session record, and
+every transition is a single lookup in a transition table keyed by
+(phase, event). Events come from the agent's tool calls, from new call
+messages and from the call ending. The phase drives the status snapshot,
+the progress estimate and the prompt fragment that applies next.
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+INTRO = "intro"
+TECHNICAL = "technical"
+BEHAVIORAL = "behavioral"
+WRAP_UP = "wrap_up"
+ENDED = "ended"
+
+PHASES = (INTRO, TECHNICAL, BEHAVIORAL, WRAP_UP, ENDED)
+
+# Events that advance the state machine
+QUESTION_ASKED = "question_asked"
+TECHNICAL_QUESTION = "technical_question"
+BEHAVIORAL_QUESTION = "behavioral_question"
+WRAP_UP_CUE = "wrap_up_cue"
+PLAN_EXHAUSTED = "plan_exhausted"
+TIME_LOW = "time_low"
+CALL_ENDED = "call_ended"
+
+TRANSITIONS: Dict[Tuple[str, str], str] = {
+    (INTRO, QUESTION_ASKED): TECHNICAL,
+    (INTRO, TECHNICAL_QUESTION): TECHNICAL,
+    (INTRO, BEHAVIORAL_QUESTION): BEHAVIORAL,
+    (TECHNICAL, BEHAVIORAL_QUESTION): BEHAVIORAL,
+    (BEHAVIORAL, TECHNICAL_QUESTION): TECHNICAL,
+}
+for _phase in (INTRO, TECHNICAL, BEHAVIORAL):
+    for _event in (WRAP_UP_CUE, PLAN_EXHAUSTED, TIME_LOW):
+        TRANSITIONS[(_phase, _event)] = WRAP_UP
+for _phase in (INTRO, TECHNICAL, BEHAVIORAL, WRAP_UP):
+    TRANSITIONS[(_phase, CALL_ENDED)] = ENDED
+
+# Lowest progress each phase stands for
+PHASE_PROGRESS = {INTRO: 0, TECHNICAL: 10, BEHAVIORAL: 60, WRAP_UP: 90, ENDED: 100}
+
+# Prompt fragment the agent follows in each phase
+PHASE_PROMPTS = {
+    INTRO: "Introduce yourself, explain the format of the interview and put the candidate at ease.",
+    TECHNICAL: "Probe technical depth: ask for specifics, trade-offs and how the candidate would approach a concrete problem.",
+    BEHAVIORAL: "Ask about concrete past situations and what the candidate did, and follow up on the outcome.",
+    WRAP_UP: "Invite the candidate's questions, explain the next steps and thank them for their time.",
+    ENDED: "",
+}
+
+# Agent phrases that signal a phase, checked in order
+MESSAGE_CUES = (
+    (WRAP_UP_CUE, ("questions for me", "questions for us", "thank you for your time", "next steps")),
+    (BEHAVIORAL_QUESTION, ("tell me about a time", "describe a situation", "give me an example of a time", "how did you handle")),
+)
+
+# Maximum number of transitions kept for the debug view
+PHASE_HISTORY_SIZE = 16
+
+
+def current_phase(record: Dict[str, Any]) -> str:
+    """Get the phase of a session."""
+    return record.get("phase", INTRO)
+
+
+def advance(record: Dict[str, Any], event: str, now: Optional[str] = None) -> Optional[str]:
+    """
+    Apply an event to a session's state machine.
+
+    Args:
+        record: The session record to update in place
+        event: The event that happened
+        now: Timestamp of the transition; the current time if not given
+
+    Returns:
+        Optional[str]: The new phase, or None if the event changes nothing
+    """
+    phase = current_phase(record)
+    target = TRANSITIONS.get((phase, event))
+    if target is None:
+        return None
+
+    now = now or datetime.now().isoformat()
+    record["phase"] = target
+    record["phase_started_at"] = now
+    history = record.setdefault("phase_history", [])
+    history.append({"from": phase, "to": target, "event": event, "at": now})
+    if len(history) > PHASE_HISTORY_SIZE:
+        del history[0]
+    return target
+
+
+def message_event(text: str) -> Optional[str]:
+    """
+    Get the event an agent message signals, if any.
+
+    Args:
+        text: Text of an agent message
+
+    Returns:
+        Optional[str]: The event, or None
+    """
+    text = text.lower()
+    for event, cues in MESSAGE_CUES:
+        if any(cue in text for cue in cues):
+            return event
+    return QUESTION_ASKED if "?" in text else None
+
+
+def phase_progress(record: Dict[str, Any]) -> int:
+    """Get the lowest progress the session's phase stands for."""
+    return PHASE_PROGRESS[current_phase(record)]
+
+
+def next_prompt(record: Dict[str, Any]) -> str:
+    """Get the prompt fragment that applies to the session next."""
+    return PHASE_PROMPTS[current_phase(record)]
+
+
+def debug_view(session_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the state machine of a session for debugging.
+
+    Args:
+        session_id: The Tezhire session ID
+        record: The session record
+
+    Returns:
+        Dict[str, Any]: Phase, history, next prompt and accepted events
+    """
+    phase = current_phase(record)
+    accepted: List[Dict[str, str]] = [
+        {"event": event, "to": target}
+        for (source, event), target in TRANSITIONS.items()
+        if source == phase
+    ]
+    return {
+        "sessionId": session_id,
+        "phase": phase,
+        "phaseStartedAt": record.get("phase_started_at") or record.get("created_at"),
+        "status": record.get("status"),
+        "history": list(record.get("phase_history", [])),
+        "nextPrompt": next_prompt(record),
+        "acceptedEvents": accepted,
+    }
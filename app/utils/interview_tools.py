@@ -0,0 +1,294 @@
+"""
+In-call interview tools.
+
+The interview agent calls back into the server during a call to get the next
+question, switch topics and check the time. Each session gets a question plan
+that is built once when the session is created, with every question response
+already serialized, so a tool call is a dictionary lookup and a cursor move.
+Each tool call adds to the silence the candidate hears, so nothing on this
+path touches the network or the transcript. Every tool call also leaves the
+state machine event it stands for, such as a behavioral question or the plan
+running out, for the caller to apply to the session.
+"""
+import os
+import hmac
+import json
+import time
+import secrets
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.utils.interview_stages import StagePlan
+from app.utils.interview_state import (
+    message_event, BEHAVIORAL_QUESTION, TECHNICAL_QUESTION, PLAN_EXHAUSTED, TIME_LOW, PHASE_PROMPTS,
+    BEHAVIORAL, TECHNICAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Public base URL Ultravox uses to reach the tool endpoints; tools are
+# disabled when it is not set
+TOOLS_BASE_URL = os.getenv("TOOLS_BASE_URL", "").rstrip("/")
+
+# Minutes left at which the agent is told to wrap up
+TOOLS_WRAP_UP_MINUTES = float(os.getenv("TOOLS_WRAP_UP_MINUTES", "3"))
+
+# Header carrying the per-session tool token
+TOOL_TOKEN_HEADER = "X-Tool-Token"
+
+NEXT_QUESTION = "nextQuestion"
+SWITCH_TOPIC = "switchTopic"
+TIME_CHECK = "timeCheck"
+
+CUSTOM_TOPIC = "Custom questions"
+
+TOPIC_TEMPLATES = (
+    "Can you walk me through how you have used {topic} in a recent project?",
+    "What trade-offs or pitfalls have you run into with {topic}, and how did you handle them?",
+)
+REQUIREMENT_TEMPLATE = "This role asks for {requirement}. How does your experience match that?"
+
+TOOL_INSTRUCTIONS = """
+## INTERVIEW TOOLS
+- Call nextQuestion whenever you are ready for the next question, and ask it in your own words
+- Call switchTopic to move on when a topic is exhausted, optionally naming the topic
+- Call timeCheck now and then to pace the interview, and wrap up when it says so
+"""
+
+
+def encode(payload: Dict[str, Any]) -> bytes:
+    """Serialize a tool response."""
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+class QuestionPlan:
+    """The precomputed question plan of one session."""
+
+    def __init__(
+        self,
+        session_id: str,
+        custom_questions: List[str],
+        topics: List[str],
+        requirements: List[str],
+        duration_minutes: int,
+        token: Optional[str] = None
+    ):
+        self.session_id = session_id
+        self.token = token or secrets.token_urlsafe(24)
+        self.duration = duration_minutes * 60
+
+        planned: List[Tuple[str, str]] = [(CUSTOM_TOPIC, question) for question in custom_questions if question.strip()]
+        planned += [(topic, template.format(topic=topic)) for topic in topics for template in TOPIC_TEMPLATES]
+        planned += [("Requirements", REQUIREMENT_TEMPLATE.format(requirement=requirement)) for requirement in requirements]
+
+        self.topics: List[str] = []
+        # Topic name (lowercase) -> index of its first question
+        self.topic_starts: Dict[str, int] = {}
+        # Question index -> index of its topic in self.topics
+        self.question_topics: List[int] = []
+        topic_indexes: Dict[str, int] = {}
+        for index, (topic, _) in enumerate(planned):
+            key = topic.lower()
+            if key not in topic_indexes:
+                topic_indexes[key] = len(self.topics)
+                self.topic_starts[key] = index
+                self.topics.append(topic)
+            self.question_topics.append(topic_indexes[key])
+
+        # Custom questions phrased like a behavioral question belong to the
+        # behavioral phase, everything else to the technical phase
+        phases = [
+            BEHAVIORAL if topic == CUSTOM_TOPIC and message_event(text) == BEHAVIORAL_QUESTION else TECHNICAL
+            for topic, text in planned
+        ]
+        # State machine event of each question
+        self.question_events = [
+            BEHAVIORAL_QUESTION if phase == BEHAVIORAL else TECHNICAL_QUESTION
+            for phase in phases
+        ]
+        self.responses = [
+            encode({
+                "question": text,
+                "topic": topic,
+                "phase": phase,
+                "questionNumber": index + 1,
+                "questionsRemaining": len(planned) - index - 1,
+                "instructions": f"Ask this question in your own words, then listen to the answer. {PHASE_PROMPTS[phase]}",
+            })
+            for index, ((topic, text), phase) in enumerate(zip(planned, phases))
+        ]
+        self.done_response = encode({
+            "question": None,
+            "questionsRemaining": 0,
+            "instructions": "All planned questions have been asked. Ask follow-up questions or wrap up the interview.",
+        })
+        self.cursor = 0
+        self.started: Optional[float] = None
+        # State machine event of the last tool call, if any
+        self.event: Optional[str] = None
+        # Call stages of a staged session
+        self.stages: Optional[StagePlan] = None
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def authorize(self, token: Optional[str]) -> bool:
+        """Check the tool token sent with a tool call."""
+        # Compared as bytes, since compare_digest rejects non-ASCII strings
+        return token is not None and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def next_question(self) -> bytes:
+        """Get the next planned question and move past it."""
+        self._start()
+        if self.cursor >= len(self.responses):
+            self.event = PLAN_EXHAUSTED
+            return self.done_response
+        response = self.responses[self.cursor]
+        self.event = self.question_events[self.cursor]
+        self.cursor += 1
+        return response
+
+    def switch_topic(self, topic: Optional[str] = None) -> bytes:
+        """
+        Skip to the first question of another topic.
+
+        Args:
+            topic: The topic to switch to; the next planned topic if not given or unknown
+
+        Returns:
+            bytes: The first question of the topic
+        """
+        self._start()
+        start = self.topic_starts.get(topic.strip().lower()) if topic else None
+        if start is None:
+            current = self.question_topics[self.cursor - 1] if 0 < self.cursor <= len(self.question_topics) else -1
+            following = current + 1
+            if following >= len(self.topics):
+                self.cursor = len(self.responses)
+                self.event = PLAN_EXHAUSTED
+                return self.done_response
+            start = self.topic_starts[self.topics[following].lower()]
+        self.cursor = start
+        return self.next_question()
+
+    def time_check(self, now: Optional[float] = None) -> bytes:
+        """Get the elapsed and remaining interview time."""
+        self._start(now)
+        elapsed = (now if now is not None else time.monotonic()) - self.started
+        remaining = max(0.0, self.duration - elapsed)
+        self.event = None
+        if remaining <= TOOLS_WRAP_UP_MINUTES * 60:
+            self.event = TIME_LOW
+            advice = "Time is nearly up. Let the candidate finish, invite their questions and close the interview."
+        elif self.cursor >= len(self.responses):
+            advice = "All planned questions are asked. Use the remaining time for follow-ups."
+        else:
+            advice = "Continue with the planned questions."
+        return encode({
+            "elapsedMinutes": round(elapsed / 60, 1),
+            "remainingMinutes": round(remaining / 60, 1),
+            "questionsRemaining": len(self.responses) - min(self.cursor, len(self.responses)),
+            "instructions": advice,
+        })
+
+    def _start(self, now: Optional[float] = None) -> None:
+        # The interview clock starts with the agent's first tool call
+        if self.started is None:
+            self.started = now if now is not None else time.monotonic()
+
+
+class ToolPlanRegistry:
+    """Question plans of the sessions with in-call tools."""
+
+    def __init__(self, base_url: str = TOOLS_BASE_URL):
+        self.base_url = base_url
+        self.plans: Dict[str, QuestionPlan] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether Ultravox can reach the tool endpoints."""
+        return bool(self.base_url)
+
+    def create(
+        self,
+        session_id: str,
+        custom_questions: List[str],
+        topics: List[str],
+        requirements: List[str],
+        duration_minutes: int
+    ) -> QuestionPlan:
+        """
+        Build the question plan of a session.
+
+        Args:
+            session_id: The Tezhire session ID
+            custom_questions: Questions that must be asked, first
+            topics: Topics to focus on
+            requirements: Job requirements to probe
+            duration_minutes: Planned interview length
+
+        Returns:
+            QuestionPlan: The new plan
+        """
+        plan = QuestionPlan(session_id, custom_questions, topics, requirements, duration_minutes)
+        self.plans[session_id] = plan
+        return plan
+
+    def get(self, session_id: str) -> Optional[QuestionPlan]:
+        """Get the plan of a session."""
+        return self.plans.get(session_id)
+
+    def remove(self, session_id: str) -> None:
+        """Drop the plan of a session."""
+        self.plans.pop(session_id, None)
+
+    def remove_results(self, results: Dict[str, Any]) -> None:
+        """Drop the plan of a session whose results were materialized."""
+        self.remove(results["sessionId"])
+
+    def selected_tools(self, plan: QuestionPlan) -> List[Dict[str, Any]]:
+        """
+        Get the temporary HTTP tool definitions of a session for the
+        Ultravox call configuration.
+
+        Args:
+            plan: The session's question plan
+
+        Returns:
+            List[Dict[str, Any]]: selectedTools entries
+        """
+        token_parameter = {
+            "name": TOOL_TOKEN_HEADER,
+            "location": "PARAMETER_LOCATION_HEADER",
+            "value": plan.token,
+        }
+        definitions = [
+            (NEXT_QUESTION, "Get the next planned interview question.", []),
+            (SWITCH_TOPIC, "Move on to another interview topic and get its first question.", [{
+                "name": "topic",
+                "location": "PARAMETER_LOCATION_BODY",
+                "schema": {"type": "string", "description": "Topic to switch to; the next topic if empty"},
+                "required": False,
+            }]),
+            (TIME_CHECK, "Get the elapsed and remaining interview time.", []),
+        ]
+        return [
+            {
+                "temporaryTool": {
+                    "modelToolName": name,
+                    "description": description,
+                    "dynamicParameters": parameters,
+                    "staticParameters": [token_parameter],
+                    "timeout": "2s",
+                    "http": {
+                        "baseUrlPattern": f"{self.base_url}/api/tezhire/interview-sessions/{plan.session_id}/tools/{name}",
+                        "httpMethod": "POST",
+                    },
+                }
+            }
+            for name, description, parameters in definitions
+        ]
+
+
+# Shared registry instance
+tool_plans = ToolPlanRegistry()
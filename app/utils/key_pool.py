@@ -0,0 +1,184 @@
+"""
+Ultravox API key pool.
+
+A deployment may hold keys for several Ultravox accounts, so that one
+account's concurrency limit does not cap every interview. Each new call goes
+to the least-loaded healthy key, judged by the live, reserved and queued
+calls the admission controller counts per account. Keys that keep failing
+are benched for a while. Reads about an existing call must use the key
+that created it, which the session store records with each session.
+"""
+import os
+import hmac
+import time
+import logging
+from typing import Dict, Any, List, Optional, Callable
+
+from app.utils.admission import AdmissionController, admission_controller
+from app.utils.session_store import session_store
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated Ultravox API keys of the pool
+ULTRAVOX_API_KEYS = [key.strip() for key in os.getenv("ULTRAVOX_API_KEYS", "").split(",") if key.strip()]
+
+# Consecutive failures after which a key is benched
+KEY_POOL_FAILURE_THRESHOLD = int(os.getenv("KEY_POOL_FAILURE_THRESHOLD", "3"))
+
+# Seconds a failing key stays benched
+KEY_POOL_COOLDOWN_SECONDS = float(os.getenv("KEY_POOL_COOLDOWN_SECONDS", "60"))
+
+# Concurrency assumed for keys whose account was not synced yet
+KEY_POOL_ASSUMED_CAPACITY = int(os.getenv("KEY_POOL_ASSUMED_CAPACITY", "10"))
+
+# Upstream statuses that count against a key besides server errors
+KEY_FAILURE_STATUSES = {401, 403, 429}
+
+
+class KeyHealth:
+    """Failure tracking of one key."""
+
+    def __init__(self):
+        self.failures = 0
+        self.benched_until = 0.0
+
+
+class KeyPool:
+    """Spreads new calls across several Ultravox API keys."""
+
+    def __init__(
+        self,
+        keys: List[str],
+        admission: AdmissionController = admission_controller,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        # Keep the configured order for ties, without duplicates
+        self.keys = list(dict.fromkeys(keys))
+        self.admission = admission
+        self.clock = clock
+        self.health: Dict[str, KeyHealth] = {key: KeyHealth() for key in self.keys}
+        for key in self.keys:
+            admission.track(key)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def load(self, key: str) -> float:
+        """
+        Get the share of a key's concurrency that is in use or asked for.
+
+        Args:
+            key: The API key
+
+        Returns:
+            float: Live, reserved and queued calls over allowed calls
+        """
+        account = self.admission.accounts.get(key)
+        if account is None:
+            return 0.0
+        demand = account.active + account.reserved + len(account.waiters)
+        allowed = KEY_POOL_ASSUMED_CAPACITY if account.allowed is None else account.allowed
+        return demand / allowed if allowed > 0 else float("inf")
+
+    def healthy(self, key: str) -> bool:
+        """Check whether a key is not benched."""
+        return self.health[key].benched_until <= self.clock()
+
+    def pick(self) -> Optional[str]:
+        """
+        Get the key for a new call.
+
+        Returns:
+            Optional[str]: The least-loaded healthy key; the least-loaded key
+            if all are benched; None if the pool is empty
+        """
+        if not self.keys:
+            return None
+        candidates = [key for key in self.keys if self.healthy(key)] or self.keys
+        return min(candidates, key=self.load)
+
+    def report_success(self, key: str) -> None:
+        """Record that a request with a key succeeded."""
+        health = self.health.get(key)
+        if health is not None:
+            health.failures = 0
+
+    def report_failure(self, key: str) -> None:
+        """Record that a request with a key failed, benching it after repeated failures."""
+        health = self.health.get(key)
+        if health is None:
+            return
+        health.failures += 1
+        if health.failures >= KEY_POOL_FAILURE_THRESHOLD:
+            health.benched_until = self.clock() + KEY_POOL_COOLDOWN_SECONDS
+            health.failures = 0
+            logger.warning(f"Benching Ultravox key ...{key[-4:]} for {KEY_POOL_COOLDOWN_SECONDS:g}s")
+
+    def report_status(self, key: str, status_code: int) -> None:
+        """Record the outcome of a request with a key from its response status."""
+        if status_code in KEY_FAILURE_STATUSES or status_code >= 500:
+            self.report_failure(key)
+        elif status_code < 400:
+            self.report_success(key)
+
+    def key_for_call(self, call_id: str) -> Optional[str]:
+        """
+        Get the key that created a call.
+
+        Args:
+            call_id: The Ultravox call ID
+
+        Returns:
+            Optional[str]: The key, or None if the call is unknown here
+        """
+        key = self.admission.call_accounts.get(call_id)
+        if key is not None:
+            return key
+        for record in session_store.values():
+            if record.get("call_id") == call_id:
+                return record.get("api_key")
+        return None
+
+    def owns(self, api_key: str, owner_key: Optional[str]) -> bool:
+        """
+        Check whether a request key may act on a session created with a key:
+        the same key, or any pool key for a session created with a pool key.
+        """
+        if not owner_key:
+            return False
+        if hmac.compare_digest(api_key.encode(), owner_key.encode()):
+            return True
+        return api_key in self.health and owner_key in self.health
+
+    def route_new(self, api_key: str) -> str:
+        """
+        Get the key for a new call requested with a key; requests made with
+        a pool key go to the least-loaded key of the pool.
+        """
+        if api_key in self.health:
+            return self.pick() or api_key
+        return api_key
+
+    def route_call(self, api_key: str, call_id: str) -> str:
+        """
+        Get the key for a read about a call; requests made with a pool key
+        go to the key that created the call.
+        """
+        if api_key in self.health:
+            return self.key_for_call(call_id) or api_key
+        return api_key
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get the load and health of each key, with masked keys."""
+        return [
+            {
+                "account": f"...{key[-4:]}",
+                "load": round(self.load(key), 3),
+                "healthy": self.healthy(key),
+            }
+            for key in self.keys
+        ]
+
+
+# Shared pool instance
+key_pool = KeyPool(ULTRAVOX_API_KEYS)
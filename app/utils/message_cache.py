@@ -0,0 +1,200 @@
+"""
+Call message cache.
+
+This module keeps an append-only copy of the messages of each Ultravox call
+together with the upstream cursor checkpoint of the newest page. Refreshing
+a call only fetches the pages at or after the checkpoint, so the cost of a
+poll grows with the number of new messages instead of the transcript length.
+"""
+import os
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Set, Optional, Callable, Awaitable
+from urllib.parse import urlparse, parse_qs
+
+from app.controllers.ultravox_controller import list_call_messages
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of calls whose messages are kept in memory
+MESSAGE_CACHE_MAX_CALLS = int(os.getenv("MESSAGE_CACHE_MAX_CALLS", "1000"))
+
+
+def is_assistant_message(message: Dict[str, Any]) -> bool:
+    """Check whether a message was spoken by the interview agent."""
+    return message.get("role") in ("ASSISTANT", "MESSAGE_ROLE_AGENT")
+
+
+def is_user_message(message: Dict[str, Any]) -> bool:
+    """Check whether a message was spoken by the candidate."""
+    return message.get("role") in ("USER", "MESSAGE_ROLE_USER")
+
+
+def extract_cursor(next_url: Optional[str]) -> Optional[str]:
+    """
+    Extract the pagination cursor from an Ultravox `next` link.
+
+    Args:
+        next_url: The `next` value of a paginated response
+
+    Returns:
+        Optional[str]: The cursor, or None if there is no next page
+    """
+    if not next_url:
+        return None
+    values = parse_qs(urlparse(next_url).query).get("cursor")
+    if values:
+        return values[0]
+    # Some responses return the bare cursor instead of a link
+    return next_url if "://" not in next_url else None
+
+
+class CallMessages:
+    """Cached messages and upstream cursor checkpoint of one call."""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.messages: List[Dict[str, Any]] = []
+        # Cursor of the page that holds the newest messages, and how many
+        # of that page's messages have been seen already
+        self.page_cursor: Optional[str] = None
+        self.page_seen = 0
+        self.ended = False
+        # API keys that Ultravox has let read this call
+        self.api_keys: Set[str] = set()
+        self.lock = asyncio.Lock()
+
+    @property
+    def last_ordinal(self) -> int:
+        """Get the ordinal of the newest cached message, or -1 if empty."""
+        return self.messages[-1]["ordinal"] if self.messages else -1
+
+    def since(self, ordinal: int) -> List[Dict[str, Any]]:
+        """
+        Get the cached messages after an ordinal.
+
+        Args:
+            ordinal: The last ordinal the caller has seen (-1 for all)
+
+        Returns:
+            List[Dict[str, Any]]: Messages with a greater ordinal
+        """
+        # Ordinals are dense and start at zero, so they double as indexes
+        return self.messages[max(0, ordinal + 1):]
+
+
+class MessageCache:
+    """Append-only per-call message cache with cursor checkpoints."""
+
+    def __init__(
+        self,
+        fetch_messages: Callable[..., Awaitable[Dict[str, Any]]] = list_call_messages,
+        max_calls: int = MESSAGE_CACHE_MAX_CALLS,
+    ):
+        self.fetch_messages = fetch_messages
+        self.max_calls = max_calls
+        self.calls: "OrderedDict[str, CallMessages]" = OrderedDict()
+
+    def get(self, call_id: str) -> CallMessages:
+        """
+        Get the cache entry of a call, creating it if needed.
+
+        Args:
+            call_id: The Ultravox call ID
+
+        Returns:
+            CallMessages: The cache entry
+        """
+        entry = self.calls.get(call_id)
+        if entry is None:
+            entry = self.calls[call_id] = CallMessages(call_id)
+            while len(self.calls) > self.max_calls:
+                self.calls.popitem(last=False)
+        else:
+            self.calls.move_to_end(call_id)
+        return entry
+
+    async def refresh(self, api_key: str, call_id: str) -> List[Dict[str, Any]]:
+        """
+        Fetch the messages added upstream since the last checkpoint.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            call_id: The Ultravox call ID
+
+        Returns:
+            List[Dict[str, Any]]: New messages, with ordinals assigned
+        """
+        entry = self.get(call_id)
+        if entry.ended:
+            await self.authorize(api_key, call_id)
+            return []
+
+        async with entry.lock:
+            new_messages: List[Dict[str, Any]] = []
+            while True:
+                page = await self.fetch_messages(api_key, call_id, entry.page_cursor)
+                entry.api_keys.add(api_key)
+                results = page.get("results", [])
+                for message in results[entry.page_seen:]:
+                    message = dict(message)
+                    # Ordinals are positions in the transcript
+                    message["ordinal"] = len(entry.messages)
+                    entry.messages.append(message)
+                    new_messages.append(message)
+
+                next_cursor = extract_cursor(page.get("next"))
+                if next_cursor is None:
+                    entry.page_seen = len(results)
+                    return new_messages
+                entry.page_cursor = next_cursor
+                entry.page_seen = 0
+
+    async def authorize(self, api_key: str, call_id: str) -> None:
+        """
+        Check that an API key may read a call before its cached messages are
+        served. A key is checked upstream once; keys that have refreshed
+        the call are already known.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            call_id: The Ultravox call ID
+
+        Raises:
+            HTTPException: If Ultravox rejects the key for the call
+        """
+        entry = self.get(call_id)
+        if api_key in entry.api_keys:
+            return
+        await self.fetch_messages(api_key, call_id, None)
+        entry.api_keys.add(api_key)
+
+    async def since(self, api_key: str, call_id: str, ordinal: int) -> List[Dict[str, Any]]:
+        """
+        Refresh a call and get the messages after an ordinal.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            call_id: The Ultravox call ID
+            ordinal: The last ordinal the caller has seen (-1 for all)
+
+        Returns:
+            List[Dict[str, Any]]: Messages with a greater ordinal
+        """
+        await self.refresh(api_key, call_id)
+        return self.get(call_id).since(ordinal)
+
+    def mark_ended(self, call_id: str) -> None:
+        """
+        Mark a call as ended. Its cached messages are final and later
+        refreshes no longer go upstream, except to check unknown keys.
+
+        Args:
+            call_id: The Ultravox call ID
+        """
+        self.get(call_id).ended = True
+
+
+# Shared cache instance
+message_cache = MessageCache()
@@ -0,0 +1,163 @@
+"""
+Custom question coverage.
+
+This module checks whether the interview agent actually asked the custom
+questions of an interview. Every sentence the agent speaks is compared with
+every custom question by the cosine similarity of their character trigram
+vectors, computed for a whole message batch with one sparse matrix product.
+Coverage is folded in incrementally, so each update only costs the new
+messages.
+"""
+import os
+import re
+import zlib
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from app.utils.message_cache import is_assistant_message
+
+logger = logging.getLogger(__name__)
+
+# Similarity at which a spoken sentence counts as asking a custom question
+CUSTOM_QUESTION_MATCH_THRESHOLD = float(os.getenv("CUSTOM_QUESTION_MATCH_THRESHOLD", "0.6"))
+
+# Number of hashed trigram features
+TRIGRAM_FEATURES = 1 << 18
+
+SENTENCE_PATTERN = re.compile(r"[^.?!]+[.?!]*")
+NORMALIZE_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split spoken text into sentences.
+
+    Args:
+        text: The text of a message
+
+    Returns:
+        List[str]: Non-empty sentences in order
+    """
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.findall(text) if sentence.strip()]
+
+
+def trigram_matrix(texts: List[str]) -> sparse.csr_matrix:
+    """
+    Turn texts into unit-length hashed character trigram vectors.
+
+    Args:
+        texts: The texts to vectorize
+
+    Returns:
+        sparse.csr_matrix: One row per text
+    """
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for text in texts:
+        normalized = f" {NORMALIZE_PATTERN.sub(' ', text.lower()).strip()} "
+        trigrams = Counter(normalized[i:i + 3] for i in range(len(normalized) - 2))
+        for trigram, count in trigrams.items():
+            indices.append(zlib.crc32(trigram.encode("utf-8")) % TRIGRAM_FEATURES)
+            counts.append(count)
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(texts), TRIGRAM_FEATURES)
+    )
+    # Hash collisions inside one text are summed
+    matrix.sum_duplicates()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+
+class QuestionCoverage:
+    """Incremental coverage of the custom questions of one interview."""
+
+    def __init__(self, questions: List[str], threshold: float = CUSTOM_QUESTION_MATCH_THRESHOLD):
+        self.questions = [question for question in questions if question and question.strip()]
+        self.threshold = threshold
+        self.matrix = trigram_matrix(self.questions)
+        # Best match per question so far
+        self.similarity = np.zeros(len(self.questions))
+        self.asked_ordinal: List[Optional[int]] = [None] * len(self.questions)
+        self.asked_at: List[Optional[str]] = [None] * len(self.questions)
+        self.matched_text: List[Optional[str]] = [None] * len(self.questions)
+        self.asked_count = 0
+        self.last_ordinal = -1
+
+    def fold(self, messages: List[Dict[str, Any]], timestamp: str) -> List[int]:
+        """
+        Fold new messages into the coverage state.
+
+        Args:
+            messages: New call messages in ordinal order
+            timestamp: Timestamp reported for questions first asked in this batch
+
+        Returns:
+            List[int]: Indexes of the custom questions first asked in this batch
+        """
+        sentences: List[str] = []
+        ordinals: List[Optional[int]] = []
+        for message in messages:
+            ordinal = message.get("ordinal")
+            if ordinal is not None:
+                if ordinal <= self.last_ordinal:
+                    continue
+                self.last_ordinal = ordinal
+            if not is_assistant_message(message):
+                continue
+            # Compare single sentences, and the whole turn for questions
+            # that span several sentences
+            turn = split_sentences(message.get("text") or "")
+            if len(turn) > 1:
+                turn.append(" ".join(turn))
+            sentences.extend(turn)
+            ordinals.extend([ordinal] * len(turn))
+
+        if not sentences or not self.questions:
+            return []
+
+        # questions x sentences cosine similarity
+        similarity = (self.matrix @ trigram_matrix(sentences).T).toarray()
+        best_sentence = similarity.argmax(axis=1)
+        best = similarity[np.arange(len(self.questions)), best_sentence]
+
+        newly_asked = []
+        for index in np.flatnonzero(best > self.similarity):
+            # An asked question keeps the match it was asked with, so its
+            # similarity, text and ordinal always describe the same sentence
+            if self.similarity[index] >= self.threshold:
+                continue
+            self.similarity[index] = best[index]
+            self.matched_text[index] = sentences[best_sentence[index]]
+            if best[index] >= self.threshold:
+                self.asked_ordinal[index] = ordinals[best_sentence[index]]
+                self.asked_at[index] = timestamp
+                self.asked_count += 1
+                newly_asked.append(int(index))
+        return newly_asked
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Get the coverage of every custom question.
+
+        Returns:
+            List[Dict[str, Any]]: Payloads matching CustomQuestionCoverage
+        """
+        return [
+            {
+                "question": question,
+                "asked": bool(self.similarity[index] >= self.threshold),
+                "similarity": round(float(self.similarity[index]), 3),
+                "askedAt": self.asked_at[index],
+                "ordinal": self.asked_ordinal[index],
+                "matchedText": self.matched_text[index],
+            }
+            for index, question in enumerate(self.questions)
+        ]
@@ -0,0 +1,457 @@
+"""
+Interview recording proxy.
+
+Recordings are streamed from Ultravox through a pooled HTTP client in fixed
+size chunks, so a recording is never held in memory, and Range requests are
+forwarded upstream so players can seek. Recordings that are played often are
+downloaded once into a bounded on-disk LRU cache and served from there,
+with zero-copy sends when the server supports them.
+"""
+import os
+import re
+import asyncio
+import logging
+import tempfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple, AsyncIterator, BinaryIO
+
+import httpx
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Scope, Receive, Send
+
+logger = logging.getLogger(__name__)
+
+# Directory of the on-disk recording cache
+RECORDING_CACHE_DIR = os.getenv("RECORDING_CACHE_DIR", "data/recordings")
+
+# Maximum total size of cached recordings in bytes
+RECORDING_CACHE_MAX_BYTES = int(os.getenv("RECORDING_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Number of plays after which a recording is cached on disk
+RECORDING_CACHE_AFTER_PLAYS = int(os.getenv("RECORDING_CACHE_AFTER_PLAYS", "2"))
+
+# Bytes per streamed chunk
+RECORDING_CHUNK_SIZE = int(os.getenv("RECORDING_CHUNK_SIZE", str(64 * 1024)))
+
+# Maximum number of pooled upstream connections
+RECORDING_MAX_CONNECTIONS = int(os.getenv("RECORDING_MAX_CONNECTIONS", "50"))
+
+# Maximum number of uncached recordings whose plays are counted
+RECORDING_MAX_TRACKED_PLAYS = int(os.getenv("RECORDING_MAX_TRACKED_PLAYS", "10000"))
+
+# Maximum number of redirects followed to the recording's storage
+RECORDING_MAX_REDIRECTS = 5
+
+ULTRAVOX_RECORDING_URL = "https://api.ultravox.ai/api/calls/{call_id}/recording"
+RECORDING_MEDIA_TYPE = "audio/wav"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Upstream headers passed through to the client
+FORWARDED_HEADERS = ("content-type", "content-length", "content-range", "accept-ranges", "etag", "last-modified")
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header does not overlap the recording."""
+
+
+def recording_url(session_id: str) -> str:
+    """
+    Get the playback URL of a session's recording.
+
+    Args:
+        session_id: The Tezhire session ID
+
+    Returns:
+        str: The path of the recording endpoint
+    """
+    return f"/api/tezhire/interview-sessions/{session_id}/recording"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range.
+
+    Multiple ranges are not supported and are answered with the whole file,
+    as RFC 9110 allows.
+
+    Args:
+        header: The Range header value
+        size: The size of the file
+
+    Returns:
+        Optional[Tuple[int, int]]: Inclusive first and last byte, or None for the whole file
+
+    Raises:
+        RangeNotSatisfiable: If the range lies outside the file
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """
+    Sends a byte range of an open file, and closes it once sent. Uses the
+    ASGI zero-copy send extension (sendfile) when the server offers it, and
+    chunked reads otherwise. The file is opened before the response is
+    returned, so it stays readable even if the cache evicts it meanwhile.
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: str = RECORDING_MEDIA_TYPE,
+        chunk_size: int = RECORDING_CHUNK_SIZE
+    ):
+        self.file = file
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        headers = dict(headers or {})
+        headers["content-length"] = str(end - start + 1)
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        with self.file as recording_file:
+            await self._send_range(scope, send, recording_file)
+
+    async def _send_range(self, scope: Scope, send: Send, recording_file: BinaryIO) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        count = self.end - self.start + 1
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": recording_file,
+                "offset": self.start,
+                "count": count,
+                "more_body": False,
+            })
+            return
+
+        offset = self.start
+        remaining = count
+        while remaining > 0:
+            chunk = await asyncio.to_thread(
+                os.pread, recording_file.fileno(), min(self.chunk_size, remaining), offset
+            )
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class RecordingCache:
+    """Bounded on-disk LRU cache of recordings."""
+
+    def __init__(self, directory: str = RECORDING_CACHE_DIR, max_bytes: int = RECORDING_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # call ID -> file size, least recently used first
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.loaded = False
+
+    def get(self, call_id: str) -> Optional[str]:
+        """
+        Get the cached file of a recording and mark it as recently used.
+
+        Args:
+            call_id: The Ultravox call ID
+
+        Returns:
+            Optional[str]: The file path, or None if not cached
+        """
+        self._ensure_loaded()
+        if call_id not in self.entries:
+            return None
+        self.entries.move_to_end(call_id)
+        return self._path(call_id)
+
+    def temporary_path(self, call_id: str) -> str:
+        """Get the path a recording is downloaded to before it is admitted."""
+        self._ensure_loaded()
+        return self._path(call_id) + ".part"
+
+    def admit(self, call_id: str, temporary_path: str) -> None:
+        """
+        Move a downloaded recording into the cache and evict the least
+        recently used recordings beyond the size budget.
+
+        Args:
+            call_id: The Ultravox call ID
+            temporary_path: The downloaded file
+        """
+        self._ensure_loaded()
+        size = os.path.getsize(temporary_path)
+        if size > self.max_bytes:
+            os.remove(temporary_path)
+            return
+        os.replace(temporary_path, self._path(call_id))
+        self.total_bytes += size - self.entries.pop(call_id, 0)
+        self.entries[call_id] = size
+
+        while self.total_bytes > self.max_bytes:
+            evicted, evicted_size = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            try:
+                os.remove(self._path(evicted))
+            except FileNotFoundError:
+                pass
+            logger.info(f"Evicted cached recording of call {evicted}")
+
+    def _ensure_loaded(self) -> None:
+        if self.loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)
+            elif name.endswith(".wav"):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-len(".wav")], stat.st_size))
+        for _, call_id, size in sorted(files):
+            self.entries[call_id] = size
+            self.total_bytes += size
+        self.loaded = True
+
+    def _path(self, call_id: str) -> str:
+        return os.path.join(self.directory, f"{call_id}.wav")
+
+
+class RecordingProxy:
+    """Streams recordings from Ultravox and caches popular ones."""
+
+    def __init__(
+        self,
+        cache: Optional[RecordingCache] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        cache_after_plays: int = RECORDING_CACHE_AFTER_PLAYS,
+        chunk_size: int = RECORDING_CHUNK_SIZE,
+        max_tracked_plays: int = RECORDING_MAX_TRACKED_PLAYS
+    ):
+        self.cache = cache or RecordingCache()
+        self.client = client
+        self.cache_after_plays = cache_after_plays
+        self.chunk_size = chunk_size
+        self.max_tracked_plays = max_tracked_plays
+        # call ID -> plays of uncached recordings, least recently played first
+        self.plays: "OrderedDict[str, int]" = OrderedDict()
+        self.downloads: Dict[str, asyncio.Task] = {}
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Get the pooled upstream client, creating it on first use.
+
+        Redirects are followed by _send rather than the client, so the API
+        key is never sent to the storage host.
+        """
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=RECORDING_MAX_CONNECTIONS),
+                timeout=httpx.Timeout(30.0, read=None),
+            )
+        return self.client
+
+    async def open(self, api_key: str, call_id: str, range_header: Optional[str] = None) -> Response:
+        """
+        Get a response that plays back a recording.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            call_id: The Ultravox call ID
+            range_header: The Range header of the request
+
+        Returns:
+            Response: A file response for cached recordings, otherwise a
+            streaming response relayed from Ultravox
+        """
+        cached = self.cache.get(call_id)
+        if cached is not None:
+            return self._serve_file(cached, range_header)
+
+        self.plays[call_id] = self.plays.pop(call_id, 0) + 1
+        while len(self.plays) > self.max_tracked_plays:
+            self.plays.popitem(last=False)
+        if self.plays[call_id] >= self.cache_after_plays and call_id not in self.downloads:
+            task = asyncio.create_task(self._download(api_key, call_id))
+            self.downloads[call_id] = task
+            task.add_done_callback(lambda _: self.downloads.pop(call_id, None))
+
+        return await self._relay(api_key, call_id, range_header)
+
+    @asynccontextmanager
+    async def local_copy(self, api_key: str, call_id: str) -> AsyncIterator[Optional[str]]:
+        """
+        Get a recording as a local file for as long as the context is open.
+        A cached recording is used as it is; any other recording is streamed
+        to a temporary file that is removed afterwards, so reading a recording
+        does not admit it into the cache or count as a play.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            call_id: The Ultravox call ID
+
+        Yields:
+            Optional[str]: The file, or None if the recording could not be downloaded
+        """
+        cached = self.cache.get(call_id)
+        if cached is not None:
+            yield cached
+            return
+
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        try:
+            try:
+                await self._write(api_key, call_id, path)
+            except Exception as e:
+                logger.warning(f"Could not download recording of call {call_id}: {str(e)}")
+                yield None
+            else:
+                yield path
+        finally:
+            os.remove(path)
+
+    async def aclose(self) -> None:
+        """Cancel downloads and close the pooled client."""
+        for task in list(self.downloads.values()):
+            task.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _serve_file(self, path: str, range_header: Optional[str]) -> Response:
+        # Opened here, so an eviction before or while it is sent cannot break it
+        recording_file = open(path, "rb")
+        size = os.fstat(recording_file.fileno()).st_size
+        headers = {"accept-ranges": "bytes"}
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            recording_file.close()
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+        if byte_range is None:
+            return RangeFileResponse(recording_file, 0, size - 1, headers=headers)
+        start, end = byte_range
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        return RangeFileResponse(recording_file, start, end, status_code=206, headers=headers)
+
+    async def _send(self, api_key: str, call_id: str, range_header: Optional[str] = None) -> httpx.Response:
+        """
+        Request a recording from Ultravox, following redirects to the storage
+        host. The API key is dropped as soon as a redirect leaves the origin
+        of the Ultravox API.
+
+        Args:
+            api_key: Ultravox API key for authentication
+            call_id: The Ultravox call ID
+            range_header: The Range header of the request
+
+        Returns:
+            httpx.Response: The streamed upstream response, to be closed by the caller
+
+        Raises:
+            httpx.TooManyRedirects: If the redirects do not end
+        """
+        client = self.get_client()
+        url = httpx.URL(ULTRAVOX_RECORDING_URL.format(call_id=call_id))
+        origin = (url.scheme, url.host, url.port)
+        headers = {"X-API-Key": api_key}
+        if range_header:
+            headers["Range"] = range_header
+        for _ in range(RECORDING_MAX_REDIRECTS + 1):
+            request = client.build_request("GET", url, headers=headers)
+            upstream = await client.send(request, stream=True)
+            if not upstream.is_redirect:
+                return upstream
+            await upstream.aclose()
+            url = url.join(upstream.headers["location"])
+            if (url.scheme, url.host, url.port) != origin:
+                headers.pop("X-API-Key", None)
+        raise httpx.TooManyRedirects(f"Too many redirects fetching recording of call {call_id}", request=request)
+
+    async def _relay(self, api_key: str, call_id: str, range_header: Optional[str]) -> Response:
+        upstream = await self._send(api_key, call_id, range_header)
+
+        if upstream.status_code not in (200, 206):
+            body = await upstream.aread()
+            await upstream.aclose()
+            return Response(content=body, status_code=upstream.status_code, headers={
+                key: value for key, value in upstream.headers.items()
+                if key.lower() in ("content-type", "content-range")
+            })
+
+        async def relay_chunks() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in upstream.aiter_raw(self.chunk_size):
+                    yield chunk
+            finally:
+                await upstream.aclose()
+
+        forwarded = {
+            key: value for key, value in upstream.headers.items()
+            if key.lower() in FORWARDED_HEADERS
+        }
+        forwarded.setdefault("accept-ranges", "bytes")
+        return StreamingResponse(
+            relay_chunks(),
+            status_code=upstream.status_code,
+            headers=forwarded,
+            media_type=upstream.headers.get("content-type", RECORDING_MEDIA_TYPE)
+        )
+
+    async def _write(self, api_key: str, call_id: str, path: str) -> None:
+        """Stream a recording from Ultravox into a file."""
+        upstream = await self._send(api_key, call_id)
+        try:
+            upstream.raise_for_status()
+            with open(path, "wb") as recording_file:
+                async for chunk in upstream.aiter_raw(self.chunk_size):
+                    await asyncio.to_thread(recording_file.write, chunk)
+        finally:
+            await upstream.aclose()
+
+    async def _download(self, api_key: str, call_id: str) -> None:
+        temporary_path = self.cache.temporary_path(call_id)
+        try:
+            await self._write(api_key, call_id, temporary_path)
+            self.cache.admit(call_id, temporary_path)
+            self.plays.pop(call_id, None)
+            logger.info(f"Cached recording of call {call_id}")
+        except Exception as e:
+            logger.warning(f"Could not cache recording of call {call_id}: {str(e)}")
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+# Shared proxy instance
+recording_proxy = RecordingProxy()
@@ -0,0 +1,362 @@
+"""
+Interview results builder.
+
+This module turns the messages, stages and details of an Ultravox call into
+an InterviewResultsResponse payload. While a call is running, segmentation
+state is kept per session and only new messages are folded in, and partial
+results are marked as incomplete. Results of ended calls are materialized
+once into the results store, so later reads do not go upstream.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Set, Optional, Callable, Awaitable
+
+from app.controllers.ultravox_controller import get_call_details, list_call_stages
+from app.utils.message_cache import (
+    MessageCache, message_cache, extract_cursor, is_assistant_message, is_user_message
+)
+from app.utils.session_store import elapsed_seconds
+from app.utils.question_coverage import QuestionCoverage
+from app.utils.recordings import recording_url
+from app.utils.scoring import AnswerScorer, answer_scorer
+from app.utils.audio_analysis import AudioAnalyzer, audio_analyzer
+from app.utils.transcript_segments import TranscriptSegmentStore, transcript_segments
+
+logger = logging.getLogger(__name__)
+
+# Materialized results keyed by Tezhire session ID
+results_store: Dict[str, Dict[str, Any]] = {}
+
+# Transcript speaker labels
+INTERVIEWER_LABEL = "Interviewer"
+CANDIDATE_LABEL = "Candidate"
+
+
+class TranscriptSegmenter:
+    """
+    Incremental question and answer segmentation of one transcript.
+
+    Consecutive assistant turns form a question and the user turns that
+    follow them form its answer. Messages are folded in as they arrive, so
+    each update only costs the new messages. Assistant turns that are never
+    answered (for example closing remarks) are not reported as questions.
+    """
+
+    def __init__(self):
+        self.questions: List[Dict[str, Any]] = []
+        self.transcript_lines: List[str] = []
+        self.question_parts: List[str] = []
+        self.answer_parts: List[str] = []
+        self.question_timestamp = ""
+        self.last_ordinal = -1
+        # Interviewer turns seen so far, and the turn the open question started in
+        self.interviewer_turns = 0
+        self.question_turn = 0
+        self.after_candidate = True
+
+    def fold(self, messages: List[Dict[str, Any]], timestamp: str) -> None:
+        """
+        Fold new messages into the segmentation state.
+
+        Args:
+            messages: New call messages in ordinal order
+            timestamp: Timestamp reported for questions that start in this batch
+        """
+        for message in messages:
+            ordinal = message.get("ordinal")
+            if ordinal is not None:
+                if ordinal <= self.last_ordinal:
+                    continue
+                self.last_ordinal = ordinal
+
+            text = (message.get("text") or "").strip()
+            if not text:
+                continue
+            if is_assistant_message(message):
+                self.transcript_lines.append(f"{INTERVIEWER_LABEL}: {text}")
+                if self.after_candidate:
+                    self.interviewer_turns += 1
+                    self.after_candidate = False
+                if self.answer_parts:
+                    self.questions.append(self._open_question())
+                    self.question_parts, self.answer_parts = [], []
+                if not self.question_parts:
+                    self.question_timestamp = timestamp
+                    self.question_turn = self.interviewer_turns - 1
+                self.question_parts.append(text)
+            elif is_user_message(message):
+                self.transcript_lines.append(f"{CANDIDATE_LABEL}: {text}")
+                self.after_candidate = True
+                if self.question_parts:
+                    self.answer_parts.append(text)
+
+    def current_questions(self) -> List[Dict[str, Any]]:
+        """
+        Get the questions segmented so far, including the one being answered.
+
+        Returns:
+            List[Dict[str, Any]]: Question payloads matching the Question model
+        """
+        if self.question_parts and self.answer_parts:
+            return self.questions + [self._open_question()]
+        return list(self.questions)
+
+    def transcript(self) -> str:
+        """Get the plain-text transcript folded so far."""
+        return "\n".join(self.transcript_lines)
+
+    def _open_question(self) -> Dict[str, Any]:
+        return {
+            "questionId": f"q{len(self.questions) + 1}",
+            "question": " ".join(self.question_parts),
+            "timestamp": self.question_timestamp,
+            "answerTranscript": " ".join(self.answer_parts),
+            "answerDuration": 0,
+            "evaluation": {"score": 0, "feedback": "", "keyInsights": []},
+            # Pairs the question with its answer in the recording
+            "interviewerTurn": self.question_turn,
+        }
+
+
+def segment_questions(messages: List[Dict[str, Any]], timestamp: str) -> List[Dict[str, Any]]:
+    """
+    Segment a complete transcript into questions and answers.
+
+    Args:
+        messages: Call messages in ordinal order
+        timestamp: Timestamp reported for the questions
+
+    Returns:
+        List[Dict[str, Any]]: Question payloads matching the Question model
+    """
+    segmenter = TranscriptSegmenter()
+    segmenter.fold(messages, timestamp)
+    return segmenter.current_questions()
+
+
+def format_transcript(messages: List[Dict[str, Any]]) -> str:
+    """
+    Format call messages as a plain-text transcript.
+
+    Args:
+        messages: Call messages in ordinal order
+
+    Returns:
+        str: One line per spoken turn
+    """
+    segmenter = TranscriptSegmenter()
+    segmenter.fold(messages, "")
+    return segmenter.transcript()
+
+
+async def fetch_all_stages(
+    api_key: str,
+    call_id: str,
+    fetch_stages: Callable[..., Awaitable[Dict[str, Any]]] = list_call_stages
+) -> List[Dict[str, Any]]:
+    """
+    Fetch every page of the stages of a call.
+
+    Args:
+        api_key: Ultravox API key for authentication
+        call_id: The Ultravox call ID
+        fetch_stages: The stage listing function
+
+    Returns:
+        List[Dict[str, Any]]: All call stages
+    """
+    stages: List[Dict[str, Any]] = []
+    cursor: Optional[str] = None
+    while True:
+        page = await fetch_stages(api_key, call_id, cursor)
+        stages.extend(page.get("results", []))
+        cursor = extract_cursor(page.get("next"))
+        if cursor is None:
+            return stages
+
+
+class ResultsBuilder:
+    """Builds and materializes interview results."""
+
+    def __init__(
+        self,
+        cache: MessageCache = message_cache,
+        fetch_call_details: Callable[[str, str], Awaitable[Dict[str, Any]]] = get_call_details,
+        fetch_stages: Callable[..., Awaitable[Dict[str, Any]]] = list_call_stages,
+        store: Optional[Dict[str, Dict[str, Any]]] = None,
+        transcripts: Optional[TranscriptSegmentStore] = None,
+        scorer: Optional[AnswerScorer] = None,
+        analyzer: Optional[AudioAnalyzer] = None,
+    ):
+        self.cache = cache
+        self.fetch_call_details = fetch_call_details
+        self.fetch_stages = fetch_stages
+        self.store = results_store if store is None else store
+        # When set, full transcripts live in segment storage instead of the store
+        self.transcripts = transcripts
+        self.scorer = scorer
+        self.analyzer = analyzer
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.segmenters: Dict[str, TranscriptSegmenter] = {}
+        self.coverage: Dict[str, QuestionCoverage] = {}
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Running background recording analyses
+        self.enrichments: Set[asyncio.Task] = set()
+
+    def on_materialized(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Register a callback that receives every newly materialized result.
+
+        Args:
+            listener: The callback to register
+        """
+        self.listeners.append(listener)
+
+    async def get_results(self, session_id: str, record: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+        """
+        Get the results of a session. Results of ended calls are materialized
+        once; running calls get partial results with `complete` set to False.
+
+        Concurrent requests for the same session share one build.
+
+        Args:
+            session_id: The Tezhire session ID
+            record: The session record
+            api_key: Ultravox API key for authentication
+
+        Returns:
+            Dict[str, Any]: The results payload
+        """
+        stored = self.store.get(session_id)
+        if stored is not None:
+            return await self._hydrate(session_id, stored)
+
+        pending = self.in_flight.get(session_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._build(session_id, record, api_key))
+            self.in_flight[session_id] = pending
+            pending.add_done_callback(lambda _: self.in_flight.pop(session_id, None))
+        return await asyncio.shield(pending)
+
+    async def _build(self, session_id: str, record: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+        call_id = record["call_id"]
+        call_details, _, stages = await asyncio.gather(
+            self.fetch_call_details(api_key, call_id),
+            self.cache.refresh(api_key, call_id),
+            fetch_all_stages(api_key, call_id, self.fetch_stages),
+        )
+
+        complete = bool(call_details.get("ended"))
+        if complete:
+            # Pick up messages written before the end, then freeze the cache
+            await self.cache.refresh(api_key, call_id)
+            self.cache.mark_ended(call_id)
+
+        segmenter = self.segmenters.get(session_id)
+        if segmenter is None:
+            segmenter = self.segmenters[session_id] = TranscriptSegmenter()
+        new_messages = self.cache.get(call_id).since(segmenter.last_ordinal)
+        if complete:
+            timestamp = call_details.get("joined") or call_details.get("created") or record.get("created_at", "")
+        else:
+            timestamp = datetime.now().isoformat()
+        segmenter.fold(new_messages, timestamp)
+        coverage = self.coverage.get(session_id)
+        if coverage is None:
+            coverage = self.coverage[session_id] = QuestionCoverage(record.get("custom_questions", []))
+        coverage.fold(new_messages, timestamp)
+
+        results = self.assemble(session_id, record, call_details, segmenter, stages, complete, coverage)
+        if complete:
+            if self.scorer is not None:
+                await self.scorer.score(record, results)
+            stored = self.store[session_id] = await self._dehydrate(session_id, results)
+            if self.analyzer is not None:
+                # Recordings can take a while to become available, so they are
+                # analyzed after the results are stored and fill them in later
+                task = asyncio.ensure_future(self.analyzer.enrich(api_key, record, stored))
+                self.enrichments.add(task)
+                task.add_done_callback(self.enrichments.discard)
+            self.segmenters.pop(session_id, None)
+            self.coverage.pop(session_id, None)
+            for listener in self.listeners:
+                try:
+                    listener(results)
+                except Exception as e:
+                    logger.error(f"Error processing materialized results for session {session_id}: {str(e)}")
+        return results
+
+    async def _dehydrate(self, session_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Move the full transcript of materialized results to segment storage."""
+        if self.transcripts is None:
+            return results
+        await asyncio.to_thread(self.transcripts.append, session_id, results["transcript"]["full"])
+        return dict(results, transcript=dict(results["transcript"], full=None))
+
+    async def _hydrate(self, session_id: str, stored: Dict[str, Any]) -> Dict[str, Any]:
+        """Load the full transcript of stored results from segment storage."""
+        if stored["transcript"]["full"] is not None or self.transcripts is None:
+            return stored
+        full = await asyncio.to_thread(self.transcripts.read, session_id)
+        return dict(stored, transcript=dict(stored["transcript"], full=full or ""))
+
+    def assemble(
+        self,
+        session_id: str,
+        record: Dict[str, Any],
+        call_details: Dict[str, Any],
+        segmenter: TranscriptSegmenter,
+        stages: List[Dict[str, Any]],
+        complete: bool,
+        coverage: Optional[QuestionCoverage] = None
+    ) -> Dict[str, Any]:
+        """
+        Assemble the results payload of a session.
+
+        Args:
+            session_id: The Tezhire session ID
+            record: The session record
+            call_details: The Ultravox call details
+            segmenter: The session's segmentation state
+            stages: All call stages so far
+            complete: Whether the call has ended
+            coverage: The session's custom question coverage
+
+        Returns:
+            Dict[str, Any]: A payload matching InterviewResultsResponse
+        """
+        timed_record = dict(record, start_time=call_details.get("joined"), end_time=call_details.get("ended"))
+
+        return {
+            "sessionId": session_id,
+            "candidateId": record.get("candidate_id", ""),
+            "jobId": record.get("job_id", ""),
+            "companyId": record.get("company_id", ""),
+            "overallScore": 0,
+            "feedback": {
+                "summary": call_details.get("summary") or call_details.get("shortSummary") or "",
+                "strengths": [],
+                "areasForImprovement": [],
+                "technicalAssessment": "",
+                "communicationAssessment": "",
+                "fitScore": 0,
+                "recommendation": "Pending review",
+            },
+            "questions": segmenter.current_questions(),
+            "transcript": {
+                "full": segmenter.transcript(),
+                "url": "",
+            },
+            "audio": {
+                "url": recording_url(session_id) if complete else "",
+                "duration": elapsed_seconds(timed_record) if call_details.get("joined") else 0,
+            },
+            "complete": complete,
+            "customQuestions": coverage.report() if coverage is not None else [],
+            "callStageIds": [stage.get("callStageId") for stage in stages],
+        }
+
+
+# Shared builder instance
+results_builder = ResultsBuilder(transcripts=transcript_segments, scorer=answer_scorer, analyzer=audio_analyzer)
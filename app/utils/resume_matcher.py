@@ -0,0 +1,230 @@
+"""
+Resume-to-job matcher.
+
+This module screens a job's candidate pool before interviews are scheduled.
+The resumes of the pool are turned into one TF-IDF sparse matrix, which is
+built once and cached, and every candidate is scored against the job
+requirements with a single sparse matrix-vector product.
+"""
+import os
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Iterator, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.models.tezhire import Candidate
+from app.utils.scoring import content_terms, is_content_term
+from app.utils.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Number of times a listed skill or project technology counts compared to
+# a term of the resume text
+RESUME_SKILL_WEIGHT = int(os.getenv("RESUME_SKILL_WEIGHT", "3"))
+
+# Maximum number of candidate pools whose matrices are kept in memory
+RESUME_POOL_CACHE_SIZE = int(os.getenv("RESUME_POOL_CACHE_SIZE", "16"))
+
+# Number of matches written per chunk of a streamed response
+RESUME_MATCH_BATCH_SIZE = int(os.getenv("RESUME_MATCH_BATCH_SIZE", "500"))
+
+
+def resume_token_counts(candidate: Candidate) -> Counter:
+    """
+    Count the tokens of a candidate's resume.
+
+    Args:
+        candidate: The candidate
+
+    Returns:
+        Counter: Token counts, with skills and project technologies weighted up
+    """
+    resume = candidate.resume_data
+    counts = Counter(tokenize(resume.raw_text))
+    listed = list(resume.skills)
+    for project in resume.projects:
+        listed.extend(project.technologies)
+    for token in tokenize(" ".join(listed)):
+        counts[token] += RESUME_SKILL_WEIGHT
+    return counts
+
+
+def pool_fingerprint(candidates: List[Candidate]) -> str:
+    """
+    Fingerprint the resumes of a candidate pool.
+
+    Args:
+        candidates: The candidates of the pool
+
+    Returns:
+        str: A digest that changes whenever a resume of the pool changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for candidate in candidates:
+        resume = candidate.resume_data
+        digest.update(candidate.candidate_id.encode("utf-8"))
+        digest.update("\x1f".join(resume.skills).encode("utf-8"))
+        for project in resume.projects:
+            digest.update("\x1f".join(project.technologies).encode("utf-8"))
+        digest.update(resume.raw_text.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class CandidatePool:
+    """TF-IDF matrix over the resumes of a candidate pool."""
+
+    def __init__(self, candidates: List[Candidate]):
+        self.candidate_ids = [candidate.candidate_id for candidate in candidates]
+        self.names = [candidate.name for candidate in candidates]
+        self.skills = [candidate.resume_data.skills for candidate in candidates]
+
+        # Build the term-count matrix row by row in CSR form
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[int] = []
+        tokens: Dict[str, int] = {}
+        for candidate in candidates:
+            for token, count in resume_token_counts(candidate).items():
+                indices.append(tokens.setdefault(token, len(tokens)))
+                counts.append(count)
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(candidates), len(tokens))
+        )
+
+        # Drop stopword columns once instead of filtering every resume
+        columns = [column for token, column in tokens.items() if is_content_term(token)]
+        terms = [token for token in tokens if is_content_term(token)]
+        matrix = matrix[:, columns]
+        self.vocabulary: Dict[str, int] = {term: column for column, term in enumerate(terms)}
+        shape = matrix.shape
+
+        # Sublinear term frequency, smoothed idf, unit-length rows
+        document_frequency = np.bincount(matrix.indices, minlength=shape[1])
+        self.idf = np.log((1 + shape[0]) / (1 + document_frequency)) + 1
+        matrix.data = 1 + np.log(matrix.data)
+        matrix = matrix @ sparse.diags(self.idf)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix = sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+    def __len__(self) -> int:
+        return len(self.candidate_ids)
+
+    def query_vector(self, requirements: List[str]) -> np.ndarray:
+        """
+        Turn job requirements into a unit-length TF-IDF vector.
+
+        Args:
+            requirements: The job requirements
+
+        Returns:
+            np.ndarray: A dense vector over the pool vocabulary
+        """
+        vector = np.zeros(len(self.vocabulary))
+        counts = Counter(term for text in requirements for term in content_terms(text))
+        for term, count in counts.items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = (1 + np.log(count)) * self.idf[column]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def scores(self, requirements: List[str]) -> np.ndarray:
+        """
+        Score every candidate of the pool against job requirements.
+
+        Args:
+            requirements: The job requirements
+
+        Returns:
+            np.ndarray: Cosine similarity of each candidate, in pool order
+        """
+        return self.matrix @ self.query_vector(requirements)
+
+    def matches(
+        self,
+        requirements: List[str],
+        limit: Optional[int] = None,
+        min_score: int = 0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the candidates of the pool ordered by match score.
+
+        Args:
+            requirements: The job requirements
+            limit: Maximum number of candidates to yield
+            min_score: Only yield candidates with at least this score (0-100)
+
+        Yields:
+            Dict[str, Any]: Candidate ID, name, score and matched skills
+        """
+        scores = np.rint(100 * self.scores(requirements)).astype(int)
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        requirement_terms = {term for text in requirements for term in content_terms(text)}
+
+        for rank, row in enumerate(order, start=1):
+            score = int(scores[row])
+            if score < min_score:
+                break
+            yield {
+                "rank": rank,
+                "candidateId": self.candidate_ids[row],
+                "name": self.names[row],
+                "score": score,
+                "matchedSkills": [
+                    skill for skill in self.skills[row]
+                    if requirement_terms.intersection(content_terms(skill))
+                ],
+            }
+
+
+class ResumeMatcher:
+    """Builds and caches the candidate pools of jobs."""
+
+    def __init__(self, max_pools: int = RESUME_POOL_CACHE_SIZE):
+        self.max_pools = max_pools
+        # (job ID, pool fingerprint) -> pool, least recently used first
+        self.pools: "OrderedDict[Tuple[str, str], CandidatePool]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def pool(self, job_id: str, candidates: List[Candidate]) -> CandidatePool:
+        """
+        Get the matrix of a job's candidate pool, building it if needed.
+
+        Args:
+            job_id: The job ID
+            candidates: The candidates of the pool
+
+        Returns:
+            CandidatePool: The cached or newly built pool
+        """
+        key = (job_id, pool_fingerprint(candidates))
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is not None:
+                self.pools.move_to_end(key)
+                return pool
+
+        pool = CandidatePool(candidates)
+        with self.lock:
+            # A job only keeps the matrix of its latest pool
+            for stale in [other for other in self.pools if other[0] == job_id]:
+                del self.pools[stale]
+            self.pools[key] = pool
+            while len(self.pools) > self.max_pools:
+                self.pools.popitem(last=False)
+        logger.info(f"Built resume matrix for job {job_id}: {pool.matrix.shape[0]} x {pool.matrix.shape[1]}")
+        return pool
+
+
+# Shared matcher instance
+resume_matcher = ResumeMatcher()
@@ -0,0 +1,230 @@
+"""
+Answer scoring engine.
+
+This module scores interview answers by how well they cover the job
+requirements, the topics to focus on and the candidate's claimed skills.
+Each profile item and each answer is turned into a sparse term vector, and
+all questions of an interview are scored with one sparse matrix product.
+Scoring runs in a process pool so the event loop stays free.
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.utils.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Number of scoring worker processes
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "2"))
+
+# Weight of each kind of profile item in the overall score
+ITEM_WEIGHTS = {
+    "requirement": 1.0,
+    "topic": 0.75,
+    "skill": 0.5,
+}
+
+# Number of best-covered items that make up a question score
+QUESTION_TOP_ITEMS = 3
+
+# Coverage above which an item counts as a strength, and below which it
+# counts as an area for improvement
+STRENGTH_COVERAGE = 0.6
+WEAK_COVERAGE = 0.2
+
+# Words that carry no signal about requirement coverage
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our the to we
+with you your years year experience knowledge understanding strong good
+ability able working work skills skill familiarity plus etc
+""".split())
+
+
+def profile_items(record: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Get the profile items answers are scored against.
+
+    Args:
+        record: The session record
+
+    Returns:
+        List[Tuple[str, str]]: (kind, text) pairs
+    """
+    items = [("requirement", text) for text in record.get("requirements", [])]
+    items.extend(("topic", text) for text in record.get("topics_to_focus", []))
+    items.extend(("skill", text) for text in record.get("skills", []))
+    return [(kind, text) for kind, text in items if text and text.strip()]
+
+
+def is_content_term(token: str) -> bool:
+    """
+    Check whether a token carries meaning for matching.
+
+    Args:
+        token: A token produced by tokenize
+
+    Returns:
+        bool: False for stopwords and bare numbers
+    """
+    return token not in STOPWORDS and not token.rstrip("+").isdigit()
+
+
+def content_terms(text: str) -> List[str]:
+    """
+    Split text into the tokens that carry meaning for matching.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        List[str]: Tokens in order, without stopwords and bare numbers
+    """
+    return [token for token in tokenize(text) if is_content_term(token)]
+
+
+def score_interview(answers: List[str], items: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Score every answer of an interview against the profile items.
+
+    Each item becomes a row of term weights (inverse item frequency,
+    normalized to sum to one) and each answer a row of binary term presence.
+    Their product is the share of each item's weight that an answer covers.
+
+    Args:
+        answers: Answer transcripts in question order
+        items: (kind, text) profile items
+
+    Returns:
+        Dict[str, Any]: Per-question scores and covered items, overall
+        score, fit score, strengths and areas for improvement
+    """
+    item_terms = [sorted(set(content_terms(text))) for _, text in items]
+    keep = [index for index, terms in enumerate(item_terms) if terms]
+    items = [items[index] for index in keep]
+    item_terms = [item_terms[index] for index in keep]
+    if not items or not answers:
+        return {
+            "questions": [{"score": 0, "covered": []} for _ in answers],
+            "overallScore": 0,
+            "fitScore": 0,
+            "strengths": [],
+            "areasForImprovement": [],
+        }
+
+    vocabulary: Dict[str, int] = {}
+    for terms in item_terms:
+        for term in terms:
+            vocabulary.setdefault(term, len(vocabulary))
+
+    # Profile matrix: items x vocabulary, idf-weighted rows summing to one
+    rows, columns = [], []
+    for row, terms in enumerate(item_terms):
+        rows.extend([row] * len(terms))
+        columns.extend(vocabulary[term] for term in terms)
+    document_frequency = np.bincount(columns, minlength=len(vocabulary))
+    idf = np.log1p(len(items) / document_frequency)
+    weights = idf[columns]
+    profile = sparse.csr_matrix((weights, (rows, columns)), shape=(len(items), len(vocabulary)))
+    row_sums = np.asarray(profile.sum(axis=1)).ravel()
+    profile = sparse.diags(1.0 / row_sums) @ profile
+
+    # Answer matrix: answers x vocabulary, binary term presence
+    rows, columns = [], []
+    for row, answer in enumerate(answers):
+        present = {vocabulary[term] for term in content_terms(answer) if term in vocabulary}
+        rows.extend([row] * len(present))
+        columns.extend(present)
+    presence = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)), shape=(len(answers), len(vocabulary))
+    )
+
+    # Coverage: answers x items, in [0, 1]
+    coverage = (presence @ profile.T).toarray()
+
+    top = min(QUESTION_TOP_ITEMS, coverage.shape[1])
+    top_coverage = -np.sort(-coverage, axis=1)[:, :top]
+    question_scores = np.rint(100 * top_coverage.mean(axis=1)).astype(int)
+
+    interview_coverage = coverage.max(axis=0)
+    kinds = np.array([kind for kind, _ in items])
+    item_weights = np.array([ITEM_WEIGHTS[kind] for kind in kinds])
+    overall = float(interview_coverage @ item_weights / item_weights.sum())
+    requirement_mask = kinds == "requirement"
+    fit = float(interview_coverage[requirement_mask].mean()) if requirement_mask.any() else overall
+
+    questions = []
+    for row in range(len(answers)):
+        order = np.argsort(-coverage[row])[:top]
+        covered = [items[index][1] for index in order if coverage[row, index] >= 0.5]
+        questions.append({"score": int(question_scores[row]), "covered": covered})
+
+    return {
+        "questions": questions,
+        "overallScore": int(round(100 * overall)),
+        "fitScore": int(round(100 * fit)),
+        "strengths": [items[i][1] for i in np.flatnonzero(interview_coverage >= STRENGTH_COVERAGE)],
+        "areasForImprovement": [
+            items[i][1] for i in np.flatnonzero((interview_coverage < WEAK_COVERAGE) & requirement_mask)
+        ],
+    }
+
+
+def apply_scores(results: Dict[str, Any], scores: Dict[str, Any]) -> None:
+    """
+    Write scores into a results payload.
+
+    Args:
+        results: A payload matching InterviewResultsResponse, updated in place
+        scores: The output of score_interview
+    """
+    for question, question_score in zip(results["questions"], scores["questions"]):
+        covered = question_score["covered"]
+        question["evaluation"] = {
+            "score": question_score["score"],
+            "feedback": f"Covers {', '.join(covered)}" if covered else "Did not clearly address the job profile",
+            "keyInsights": covered,
+        }
+    results["overallScore"] = scores["overallScore"]
+    results["feedback"]["fitScore"] = scores["fitScore"]
+    results["feedback"]["strengths"] = scores["strengths"]
+    results["feedback"]["areasForImprovement"] = scores["areasForImprovement"]
+
+
+class AnswerScorer:
+    """Scores interview results in a process pool."""
+
+    def __init__(self, workers: int = SCORING_WORKERS):
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    async def score(self, record: Dict[str, Any], results: Dict[str, Any]) -> None:
+        """
+        Score every question of an interview in one batch.
+
+        Args:
+            record: The session record holding the job profile
+            results: A payload matching InterviewResultsResponse, updated in place
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        answers = [question["answerTranscript"] for question in results["questions"]]
+        loop = asyncio.get_running_loop()
+        scores = await loop.run_in_executor(self.executor, score_interview, answers, profile_items(record))
+        apply_scores(results, scores)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+# Shared scorer instance
+answer_scorer = AnswerScorer()
@@ -0,0 +1,248 @@
+"""
+Transcript search index.
+
+This module keeps an in-memory positional inverted index over materialized
+interview transcripts and per-question answers. Queries support phrases,
+can be filtered by company and job, and the index is updated incrementally
+whenever results are materialized.
+"""
+import re
+import heapq
+import logging
+from typing import Dict, Any, List, Optional, Set, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Token pattern used for both documents and queries
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.+#][a-z0-9]+)*[+#]*")
+
+# Characters of context shown on each side of a match
+SNIPPET_CONTEXT = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index tokens.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        List[str]: Tokens in order
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _token_spans(text: str) -> Iterator[Tuple[int, int]]:
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        yield match.start(), match.end()
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """
+    Parse a search query into phrases.
+
+    Quoted text is a phrase, and so is every unquoted word that tokenizes into
+    several tokens (for example "exactly-once"). All phrases must match.
+
+    Args:
+        query: The raw query
+
+    Returns:
+        List[List[str]]: Phrases as token lists
+    """
+    phrases: List[List[str]] = []
+    for quoted, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        tokens = tokenize(quoted or word)
+        if tokens:
+            phrases.append(tokens)
+    return phrases
+
+
+class IndexedDocument:
+    """An indexed transcript or answer."""
+
+    __slots__ = ("session_id", "company_id", "job_id", "question_id", "terms")
+
+    def __init__(self, session_id: str, company_id: str, job_id: str, question_id: Optional[str], terms: Set[str]):
+        self.session_id = session_id
+        self.company_id = company_id
+        self.job_id = job_id
+        self.question_id = question_id
+        self.terms = terms
+
+
+class TranscriptSearchIndex:
+    """Positional inverted index over interview results."""
+
+    def __init__(self):
+        # term -> document ID -> token positions
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.documents: Dict[int, IndexedDocument] = {}
+        self.session_documents: Dict[str, List[int]] = {}
+        self.company_documents: Dict[str, Set[int]] = {}
+        self.job_documents: Dict[str, Set[int]] = {}
+        # Answer text by document ID, for snippets; full transcripts are
+        # only counted and never shown, so their text is not kept
+        self.texts: Dict[int, str] = {}
+        self.next_document_id = 0
+
+    def index_results(self, results: Dict[str, Any]) -> None:
+        """
+        Index (or re-index) the transcript and answers of a results payload.
+
+        Args:
+            results: A payload matching InterviewResultsResponse
+        """
+        session_id = results["sessionId"]
+        self.remove_session(session_id)
+
+        company_id = results.get("companyId", "")
+        job_id = results.get("jobId", "")
+        document_ids = []
+        fields = [(None, results.get("transcript", {}).get("full", ""))]
+        fields.extend(
+            (question.get("questionId"), question.get("answerTranscript", ""))
+            for question in results.get("questions", [])
+        )
+
+        for question_id, text in fields:
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+
+            document_id = self.next_document_id
+            self.next_document_id += 1
+            positions: Dict[str, List[int]] = {}
+            for position, token in enumerate(tokens):
+                positions.setdefault(token, []).append(position)
+            for term, term_positions in positions.items():
+                self.postings.setdefault(term, {})[document_id] = term_positions
+
+            self.documents[document_id] = IndexedDocument(session_id, company_id, job_id, question_id, set(positions))
+            if question_id is not None:
+                self.texts[document_id] = text
+            self.company_documents.setdefault(company_id, set()).add(document_id)
+            self.job_documents.setdefault(job_id, set()).add(document_id)
+            document_ids.append(document_id)
+
+        self.session_documents[session_id] = document_ids
+
+    def remove_session(self, session_id: str) -> None:
+        """
+        Remove every document of a session from the index.
+
+        Args:
+            session_id: The Tezhire session ID
+        """
+        for document_id in self.session_documents.pop(session_id, []):
+            document = self.documents.pop(document_id)
+            self.texts.pop(document_id, None)
+            for term in document.terms:
+                term_postings = self.postings.get(term)
+                if term_postings is None:
+                    continue
+                term_postings.pop(document_id, None)
+                if not term_postings:
+                    del self.postings[term]
+            self.company_documents.get(document.company_id, set()).discard(document_id)
+            self.job_documents.get(document.job_id, set()).discard(document_id)
+
+    def search(
+        self,
+        query: str,
+        company_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the sessions whose transcript or answers match a query.
+
+        Args:
+            query: Terms and quoted phrases that must all match
+            company_id: Only return sessions of this company
+            job_id: Only return sessions of this job
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List[Dict[str, Any]]: Sessions ordered by number of matches, each
+            with the questions whose answers matched
+        """
+        phrases = parse_query(query)
+        if not phrases:
+            return []
+
+        # Start from the smallest candidate set
+        candidate_sets: List[Set[int]] = []
+        if company_id is not None:
+            candidate_sets.append(self.company_documents.get(company_id, set()))
+        if job_id is not None:
+            candidate_sets.append(self.job_documents.get(job_id, set()))
+        for phrase in phrases:
+            for term in phrase:
+                candidate_sets.append(self.postings.get(term, {}).keys())
+        candidate_sets.sort(key=len)
+        if not candidate_sets[0]:
+            return []
+        candidates = set(candidate_sets[0])
+        for other in candidate_sets[1:]:
+            candidates.intersection_update(other)
+            if not candidates:
+                return []
+
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for document_id in candidates:
+            match_positions = self._match_positions(document_id, phrases)
+            if not match_positions:
+                continue
+            document = self.documents[document_id]
+            hit = sessions.get(document.session_id)
+            if hit is None:
+                hit = sessions[document.session_id] = {
+                    "sessionId": document.session_id,
+                    "companyId": document.company_id,
+                    "jobId": document.job_id,
+                    "score": 0,
+                    "matches": [],
+                }
+            if document.question_id is None:
+                hit["score"] += len(match_positions)
+            else:
+                hit["matches"].append({
+                    "questionId": document.question_id,
+                    "snippet": self._snippet(document_id, match_positions[0], len(phrases[0])),
+                })
+
+        top = heapq.nlargest(limit, sessions.values(), key=lambda hit: (hit["score"], len(hit["matches"])))
+        for hit in top:
+            hit["matches"].sort(key=lambda match: match["questionId"])
+        return top
+
+    def _match_positions(self, document_id: int, phrases: List[List[str]]) -> List[int]:
+        """
+        Get the positions where the first phrase starts, if every phrase of
+        the query occurs in the document.
+        """
+        first_positions: List[int] = []
+        for index, phrase in enumerate(phrases):
+            starts = set(self.postings[phrase[0]][document_id])
+            for offset, term in enumerate(phrase[1:], start=1):
+                starts.intersection_update(position - offset for position in self.postings[term][document_id])
+                if not starts:
+                    return []
+            if index == 0:
+                first_positions = sorted(starts)
+        return first_positions
+
+    def _snippet(self, document_id: int, position: int, length: int) -> str:
+        text = self.texts[document_id]
+        spans = list(_token_spans(text))
+        start = spans[position][0]
+        end = spans[min(position + length, len(spans)) - 1][1]
+        prefix = "..." if start > SNIPPET_CONTEXT else ""
+        suffix = "..." if end + SNIPPET_CONTEXT < len(text) else ""
+        return f"{prefix}{text[max(0, start - SNIPPET_CONTEXT):end + SNIPPET_CONTEXT].strip()}{suffix}"
+
+
+# Shared index instance
+search_index = TranscriptSearchIndex()
@@ -0,0 +1,148 @@
+"""
+Live session progress.
+
+This module keeps running counters of how far a live interview has got:
+how many questions the agent has asked, which planned topics have come up
+and which custom questions were asked. Counters are folded in from new call
+messages only and written to the session record, so building a status
+snapshot never rescans the transcript. The same pass picks up the agent's
+phrasing that moves the interview state machine to another phase.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Set
+
+from app.utils.message_cache import MessageCache, message_cache, is_assistant_message, is_user_message
+from app.utils.question_coverage import QuestionCoverage
+from app.utils.scoring import content_terms
+from app.utils.session_store import TERMINAL_STATUSES
+from app.utils.interview_state import advance, message_event, QUESTION_ASKED, CALL_ENDED
+
+logger = logging.getLogger(__name__)
+
+
+class SessionProgress:
+    """Running progress counters of one interview."""
+
+    def __init__(self, topics: List[str], custom_questions: List[str]):
+        # Terms still missing from each planned topic
+        self.missing_terms: List[Set[str]] = [terms for terms in (set(content_terms(topic)) for topic in topics) if terms]
+        self.topics_covered = 0
+        self.coverage = QuestionCoverage(custom_questions)
+        self.questions_asked = 0
+        self.turn_has_question = False
+        self.last_ordinal = -1
+        # State machine events seen since the last apply
+        self.events: List[str] = []
+
+    def fold(self, messages: List[Dict[str, Any]], timestamp: str) -> None:
+        """
+        Fold new messages into the counters.
+
+        Args:
+            messages: New call messages in ordinal order
+            timestamp: Timestamp reported for custom questions asked in this batch
+        """
+        self.coverage.fold(messages, timestamp)
+        for message in messages:
+            ordinal = message.get("ordinal")
+            if ordinal is not None:
+                if ordinal <= self.last_ordinal:
+                    continue
+                self.last_ordinal = ordinal
+
+            text = message.get("text") or ""
+            if is_assistant_message(message):
+                # Consecutive agent messages form one turn, which counts as
+                # one question as soon as it asks something
+                if "?" in text and not self.turn_has_question:
+                    self.turn_has_question = True
+                    self.questions_asked += 1
+                event = message_event(text)
+                # The agent's first question is the greeting, not the interview
+                if event is not None and (event != QUESTION_ASKED or self.questions_asked > 1):
+                    self.events.append(event)
+            elif is_user_message(message):
+                self.turn_has_question = False
+            else:
+                continue
+
+            if self.topics_covered < len(self.missing_terms):
+                self._cover_topics(set(content_terms(text)))
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """
+        Write the counters to a session record and advance its state
+        machine by the events seen since the last apply.
+
+        Args:
+            record: The session record to update in place
+        """
+        record["questions_asked"] = self.questions_asked
+        record["topics_covered"] = self.topics_covered
+        record["planned_topics"] = len(self.missing_terms)
+        record["custom_questions_asked"] = self.coverage.asked_count
+        record["planned_custom_questions"] = len(self.coverage.questions)
+        for event in self.events:
+            advance(record, event)
+        self.events.clear()
+
+    def _cover_topics(self, terms: Set[str]) -> None:
+        for missing in self.missing_terms:
+            if missing:
+                missing.difference_update(terms)
+                if not missing:
+                    self.topics_covered += 1
+
+
+class ProgressTracker:
+    """Keeps the progress counters of live sessions up to date."""
+
+    def __init__(self, cache: MessageCache = message_cache):
+        self.cache = cache
+        self.sessions: Dict[str, SessionProgress] = {}
+
+    async def refresh(self, session_id: str, record: Dict[str, Any], api_key: str) -> None:
+        """
+        Fold the messages added since the last refresh into a session's
+        counters and write them to its record.
+
+        Args:
+            session_id: The Tezhire session ID
+            record: The session record to update in place
+            api_key: Ultravox API key for authentication
+        """
+        progress = self.sessions.get(session_id)
+        if progress is None:
+            progress = self.sessions[session_id] = SessionProgress(
+                record.get("topics_to_focus", []),
+                record.get("custom_questions", []),
+            )
+
+        new_messages = await self.cache.since(api_key, record["call_id"], progress.last_ordinal)
+        progress.fold(new_messages, datetime.now().isoformat())
+        progress.apply(record)
+
+    async def update(self, session_id: str, record: Dict[str, Any], api_key: str) -> None:
+        """
+        Refresh the counters of a session after its status was updated.
+
+        Running sessions are refreshed; a session that just ended gets one
+        last refresh, after which its state is dropped and its counters stay
+        on the record.
+
+        Args:
+            session_id: The Tezhire session ID
+            record: The session record to update in place
+            api_key: Ultravox API key for authentication
+        """
+        status = record.get("status")
+        if status == "in_progress" or (status in TERMINAL_STATUSES and session_id in self.sessions):
+            await self.refresh(session_id, record, api_key)
+        if status in TERMINAL_STATUSES:
+            advance(record, CALL_ENDED)
+            self.sessions.pop(session_id, None)
+
+
+# Shared tracker instance
+progress_tracker = ProgressTracker()
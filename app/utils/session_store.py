@@ -0,0 +1,181 @@
+"""
+Interview session store.
+
+This module holds the in-process mapping between Tezhire session IDs and
+Ultravox calls, together with the helpers used to turn a stored session
+record into the public session status payload.
+"""
+import os
+from typing import Dict, Any, Optional
+from datetime import datetime
+
+from app.utils.interview_state import current_phase, phase_progress
+
+# Session records keyed by Tezhire session ID
+session_store: Dict[str, Dict[str, Any]] = {}
+
+# Session statuses after which nothing changes upstream any more
+TERMINAL_STATUSES = {"completed", "ended", "cancelled", "error"}
+
+# Share of live progress that comes from covering the planned topics and
+# custom questions; the rest comes from elapsed time
+PROGRESS_COVERAGE_WEIGHT = float(os.getenv("PROGRESS_COVERAGE_WEIGHT", "0.5"))
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a session record from the store.
+
+    Args:
+        session_id: The Tezhire session ID
+
+    Returns:
+        Optional[Dict[str, Any]]: The session record, or None if unknown
+    """
+    return session_store.get(session_id)
+
+
+def sessions_for_job(job_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Get all session records that belong to a job.
+
+    Args:
+        job_id: The Tezhire job ID
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Session records keyed by session ID
+    """
+    return {
+        session_id: record
+        for session_id, record in session_store.items()
+        if record.get("job_id") == job_id
+    }
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 timestamp as returned by Ultravox or stored locally.
+
+    Args:
+        value: The timestamp string
+
+    Returns:
+        Optional[datetime]: A naive local datetime, or None if not parseable
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def apply_call_details(record: Dict[str, Any], call_details: Dict[str, Any]) -> None:
+    """
+    Update a session record from Ultravox call details.
+
+    Locally terminal statuses (for example a session ended through our API)
+    are never overwritten by the upstream view.
+
+    Args:
+        record: The session record to update in place
+        call_details: The call details returned by Ultravox
+    """
+    if call_details.get("joined"):
+        record["start_time"] = call_details["joined"]
+    if call_details.get("ended"):
+        record["end_time"] = call_details["ended"]
+        record["end_reason"] = call_details.get("endReason")
+
+    if record.get("status") in TERMINAL_STATUSES:
+        return
+
+    if call_details.get("ended"):
+        record["status"] = "completed"
+    elif call_details.get("joined"):
+        record["status"] = "in_progress"
+
+
+def elapsed_seconds(record: Dict[str, Any], now: Optional[datetime] = None) -> int:
+    """
+    Get the number of seconds the interview has been running.
+
+    Args:
+        record: The session record
+        now: The reference time (defaults to the current time)
+
+    Returns:
+        int: Elapsed seconds, or the stored duration for finished sessions
+    """
+    if record.get("duration") is not None and record.get("status") in TERMINAL_STATUSES:
+        return int(record["duration"])
+
+    start = _parse_time(record.get("start_time")) or _parse_time(record.get("created_at"))
+    if start is None:
+        return 0
+    end = _parse_time(record.get("end_time")) or now or datetime.now()
+    return max(0, int((end - start).total_seconds()))
+
+
+def live_progress(record: Dict[str, Any], duration: int) -> int:
+    """
+    Estimate the progress of a running interview from its running counters,
+    never below the floor of its current phase.
+
+    Args:
+        record: The session record
+        duration: Elapsed seconds
+
+    Returns:
+        int: Progress between 0 and 99
+    """
+    planned_seconds = int(record.get("interview_duration", 0)) * 60
+    planned_items = int(record.get("planned_topics", 0)) + int(record.get("planned_custom_questions", 0))
+    covered_items = int(record.get("topics_covered", 0)) + int(record.get("custom_questions_asked", 0))
+
+    shares = []
+    if planned_seconds > 0:
+        shares.append((1 - PROGRESS_COVERAGE_WEIGHT, min(1.0, duration / planned_seconds)))
+    if planned_items > 0:
+        shares.append((PROGRESS_COVERAGE_WEIGHT, covered_items / planned_items))
+    total_weight = sum(weight for weight, _ in shares)
+    estimate = int(100 * sum(weight * share for weight, share in shares) / total_weight) if total_weight else 0
+    return min(99, max(estimate, phase_progress(record)))
+
+
+def build_status_snapshot(session_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the session status payload for a stored session.
+
+    Args:
+        session_id: The Tezhire session ID
+        record: The session record
+
+    Returns:
+        Dict[str, Any]: A payload matching SessionStatusResponse
+    """
+    status = record.get("status", "created")
+    duration = elapsed_seconds(record)
+
+    if status in TERMINAL_STATUSES:
+        progress = 100
+    elif status == "in_progress":
+        progress = live_progress(record, duration)
+    else:
+        progress = 0
+
+    return {
+        "sessionId": session_id,
+        "status": status,
+        "candidateId": record.get("candidate_id", ""),
+        "jobId": record.get("job_id", ""),
+        "startTime": record.get("start_time") or record.get("created_at"),
+        "endTime": record.get("end_time"),
+        "duration": duration,
+        "progress": progress,
+        "questionsAsked": int(record.get("questions_asked", 0)),
+        "phase": current_phase(record),
+    }
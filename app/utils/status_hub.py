@@ -0,0 +1,309 @@
+"""
+Session status pub/sub hub.
+
+This module fans out live session status updates to any number of
+subscribers (for example Server-Sent Events streams). Each session has at
+most one upstream watcher no matter how many subscribers follow it, either
+directly or through a job-wide subscription. Sessions nobody follows are
+refreshed in the background when their status is read, at most once per
+poll interval.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Set, Callable, Awaitable
+
+from app.controllers.ultravox_controller import get_call_details
+from app.utils.session_store import (
+    get_session, sessions_for_job, apply_call_details,
+    build_status_snapshot, TERMINAL_STATUSES
+)
+from app.utils.session_progress import ProgressTracker, progress_tracker
+from app.utils.upstream_scheduler import upstream_context, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Seconds between upstream polls of a watched call
+STATUS_POLL_INTERVAL = float(os.getenv("STATUS_POLL_INTERVAL", "3"))
+
+# Seconds of silence before an idle stream receives a heartbeat
+STATUS_HEARTBEAT_INTERVAL = float(os.getenv("STATUS_HEARTBEAT_INTERVAL", "15"))
+
+# Maximum number of undelivered events buffered per subscriber
+STATUS_QUEUE_SIZE = int(os.getenv("STATUS_QUEUE_SIZE", "16"))
+
+# Number of dropped events after which a slow subscriber is disconnected
+STATUS_MAX_DROPPED = int(os.getenv("STATUS_MAX_DROPPED", "256"))
+
+
+def session_topic(session_id: str) -> str:
+    """Get the topic name for a single session."""
+    return f"session:{session_id}"
+
+
+def job_topic(job_id: str) -> str:
+    """Get the topic name for all sessions of a job."""
+    return f"job:{job_id}"
+
+
+class Subscription:
+    """
+    A single subscriber to a hub topic.
+
+    Events are buffered in a bounded queue. When the queue is full the oldest
+    event is dropped, since status events supersede each other; a subscriber
+    that keeps falling behind is closed.
+    """
+
+    def __init__(self, topic: str, queue_size: int = STATUS_QUEUE_SIZE):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """
+        Enqueue an event without blocking the publisher.
+
+        Args:
+            event: The event to deliver
+        """
+        if self.closed:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped > STATUS_MAX_DROPPED:
+                self.close()
+                return
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Close the subscription and wake up its consumer."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            Optional[Dict[str, Any]]: The next event, or None if the
+            subscription was closed
+
+        Raises:
+            asyncio.TimeoutError: If no event arrived within the timeout
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class StatusHub:
+    """In-process pub/sub hub for live session status."""
+
+    def __init__(
+        self,
+        fetch_call_details: Callable[[str, str], Awaitable[Dict[str, Any]]] = get_call_details,
+        poll_interval: float = STATUS_POLL_INTERVAL,
+        progress: Optional[ProgressTracker] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.fetch_call_details = fetch_call_details
+        self.poll_interval = poll_interval
+        self.clock = clock
+        # When set, live sessions also get their progress counters refreshed
+        self.progress = progress
+        self.topics: Dict[str, Set[Subscription]] = {}
+        self.watchers: Dict[str, asyncio.Task] = {}
+        self.last_snapshots: Dict[str, Dict[str, Any]] = {}
+        # Background refreshes of sessions without a watcher, and when they last started
+        self.refreshes: Dict[str, asyncio.Task] = {}
+        self.refreshed_at: Dict[str, float] = {}
+
+    def subscribe_session(self, session_id: str) -> Subscription:
+        """
+        Subscribe to status updates of a single session.
+
+        Args:
+            session_id: The Tezhire session ID
+
+        Returns:
+            Subscription: The new subscription
+        """
+        subscription = self._add_subscription(session_topic(session_id))
+        self._ensure_watcher(session_id)
+        return subscription
+
+    def subscribe_job(self, job_id: str) -> Subscription:
+        """
+        Subscribe to status updates of every session of a job.
+
+        Args:
+            job_id: The Tezhire job ID
+
+        Returns:
+            Subscription: The new subscription
+        """
+        subscription = self._add_subscription(job_topic(job_id))
+        for session_id in sessions_for_job(job_id):
+            self._ensure_watcher(session_id)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove a subscription. Watchers that lose their last subscriber stop
+        on their next poll.
+
+        Args:
+            subscription: The subscription to remove
+        """
+        subscription.close()
+        subscribers = self.topics.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self.topics[subscription.topic]
+
+    def session_created(self, session_id: str) -> None:
+        """
+        Notify the hub about a new session, so that existing job-wide
+        subscribers start receiving its updates.
+
+        Args:
+            session_id: The Tezhire session ID
+        """
+        self.publish(session_id)
+        record = get_session(session_id)
+        if record and job_topic(record.get("job_id", "")) in self.topics:
+            self._ensure_watcher(session_id)
+
+    def publish(self, session_id: str) -> None:
+        """
+        Publish the current stored status of a session if it changed.
+
+        Args:
+            session_id: The Tezhire session ID
+        """
+        record = get_session(session_id)
+        if record is None or not self.has_subscribers(session_id):
+            # Nothing to deliver, and nothing to remember for sessions nobody follows
+            self.last_snapshots.pop(session_id, None)
+            return
+
+        snapshot = build_status_snapshot(session_id, record)
+        if self.last_snapshots.get(session_id) == snapshot:
+            return
+        self.last_snapshots[session_id] = snapshot
+
+        for topic in (session_topic(session_id), job_topic(record.get("job_id", ""))):
+            for subscription in list(self.topics.get(topic, ())):
+                subscription.offer(snapshot)
+                if subscription.closed:
+                    self.unsubscribe(subscription)
+
+    def refresh(self, session_id: str) -> None:
+        """
+        Refresh a live session from Ultravox in the background, unless a
+        watcher already polls it or it was refreshed within the poll interval.
+
+        Args:
+            session_id: The Tezhire session ID
+        """
+        record = get_session(session_id)
+        if record is None or not record.get("call_id") or record.get("status") in TERMINAL_STATUSES:
+            self.refreshed_at.pop(session_id, None)
+            return
+        if session_id in self.watchers or session_id in self.refreshes:
+            return
+        now = self.clock()
+        if now - self.refreshed_at.get(session_id, float("-inf")) < self.poll_interval:
+            return
+        self.refreshed_at[session_id] = now
+        with upstream_context(record.get("company_id"), BACKGROUND):
+            task = asyncio.create_task(self._poll(session_id, record))
+        self.refreshes[session_id] = task
+        task.add_done_callback(lambda _: self._refreshed(session_id))
+
+    def has_subscribers(self, session_id: str) -> bool:
+        """
+        Check whether anyone is listening to a session.
+
+        Args:
+            session_id: The Tezhire session ID
+
+        Returns:
+            bool: True if a session or job subscription covers the session
+        """
+        if self.topics.get(session_topic(session_id)):
+            return True
+        record = get_session(session_id)
+        return bool(record and self.topics.get(job_topic(record.get("job_id", ""))))
+
+    def _add_subscription(self, topic: str) -> Subscription:
+        subscription = Subscription(topic)
+        self.topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def _ensure_watcher(self, session_id: str) -> None:
+        watcher = self.watchers.get(session_id)
+        if watcher is not None and not watcher.done():
+            return
+        record = get_session(session_id)
+        if record is None or record.get("status") in TERMINAL_STATUSES:
+            return
+        # Polls run as background requests of the session's company
+        with upstream_context(record.get("company_id"), BACKGROUND):
+            self.watchers[session_id] = asyncio.create_task(self._watch(session_id))
+
+    async def _watch(self, session_id: str) -> None:
+        """
+        Poll Ultravox for one session and publish changes until the session
+        ends or nobody is subscribed any more.
+        """
+        try:
+            while self.has_subscribers(session_id):
+                record = get_session(session_id)
+                if record is None:
+                    break
+
+                # Scheduled sessions have no call to poll until it is pre-created
+                if record.get("call_id"):
+                    await self._poll(session_id, record)
+                else:
+                    self.publish(session_id)
+                if record.get("status") in TERMINAL_STATUSES:
+                    break
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self.watchers.pop(session_id, None)
+            self.last_snapshots.pop(session_id, None)
+
+    async def _poll(self, session_id: str, record: Dict[str, Any]) -> None:
+        """Update a session from its call details and progress, and publish it."""
+        try:
+            call_details = await self.fetch_call_details(record.get("api_key", ""), record["call_id"])
+            apply_call_details(record, call_details)
+            if self.progress is not None:
+                await self.progress.update(session_id, record, record.get("api_key", ""))
+        except Exception as e:
+            logger.warning(f"Error polling status for session {session_id}: {str(e)}")
+        self.publish(session_id)
+
+    def _refreshed(self, session_id: str) -> None:
+        self.refreshes.pop(session_id, None)
+        record = get_session(session_id)
+        if record is None or record.get("status") in TERMINAL_STATUSES:
+            self.refreshed_at.pop(session_id, None)
+
+
+# Shared hub instance
+status_hub = StatusHub(progress=progress_tracker)
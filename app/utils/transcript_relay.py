@@ -0,0 +1,216 @@
+"""
+Live transcript relay.
+
+This module tails the messages of an Ultravox call with a single upstream
+cursor watcher per call and broadcasts new messages to every connected
+observer. Messages are read through the shared call message cache. Each
+observer has a bounded queue; when an observer falls behind, its oldest
+pending messages are dropped and it receives a resync marker instead.
+"""
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Callable, Awaitable
+
+from app.controllers.ultravox_controller import get_call_details
+from app.utils.message_cache import MessageCache, message_cache
+from app.utils.upstream_scheduler import upstream_context, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Seconds between upstream polls for new messages
+TRANSCRIPT_POLL_INTERVAL = float(os.getenv("TRANSCRIPT_POLL_INTERVAL", "1.5"))
+
+# Maximum number of undelivered messages buffered per observer
+TRANSCRIPT_QUEUE_SIZE = int(os.getenv("TRANSCRIPT_QUEUE_SIZE", "200"))
+
+# Number of idle polls between checks whether the call has ended
+TRANSCRIPT_END_CHECK_EVERY = int(os.getenv("TRANSCRIPT_END_CHECK_EVERY", "10"))
+
+
+class TranscriptObserver:
+    """A single observer of a call transcript."""
+
+    def __init__(self, call_id: str, queue_size: int = TRANSCRIPT_QUEUE_SIZE):
+        self.call_id = call_id
+        self.pending: deque = deque()
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Enqueue new messages, dropping the oldest ones if the observer is
+        too far behind.
+
+        Args:
+            messages: New messages in ordinal order
+        """
+        if self.closed:
+            return
+        self.pending.extend(messages)
+        overflow = len(self.pending) - self.queue_size
+        if overflow > 0:
+            for _ in range(overflow):
+                self.pending.popleft()
+            self.dropped += overflow
+        self._ready.set()
+
+    def end(self) -> None:
+        """Mark the transcript as finished."""
+        self.closed = True
+        self._ready.set()
+
+    async def next_event(self) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event to send to the observer.
+
+        Returns:
+            Optional[Dict[str, Any]]: A resync marker, a message delta, or an
+            end marker; None once the end marker has been delivered
+        """
+        while not self.pending and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            next_ordinal = self.pending[0]["ordinal"] if self.pending else None
+            return {"type": "resync", "dropped": dropped, "nextOrdinal": next_ordinal}
+
+        if self.pending:
+            messages = list(self.pending)
+            self.pending.clear()
+            return {"type": "messages", "messages": messages, "lastOrdinal": messages[-1]["ordinal"]}
+
+        if self.closed and self._ready.is_set():
+            self._ready.clear()
+            return {"type": "ended"}
+        return None
+
+
+class TranscriptRelay:
+    """Fan-out relay of live call transcripts."""
+
+    def __init__(
+        self,
+        cache: MessageCache = message_cache,
+        fetch_call_details: Callable[[str, str], Awaitable[Dict[str, Any]]] = get_call_details,
+        poll_interval: float = TRANSCRIPT_POLL_INTERVAL,
+    ):
+        self.cache = cache
+        self.fetch_call_details = fetch_call_details
+        self.poll_interval = poll_interval
+        self.observers: Dict[str, Set[TranscriptObserver]] = {}
+        self.watchers: Dict[str, asyncio.Task] = {}
+        # Key each running watcher tails its call with
+        self.watcher_keys: Dict[str, str] = {}
+
+    async def subscribe(self, call_id: str, api_key: str) -> TranscriptObserver:
+        """
+        Add an observer to a call. The observer first receives the messages
+        that are already known, then live deltas.
+
+        Args:
+            call_id: The Ultravox call ID
+            api_key: The observer's API key, checked against the call
+
+        Returns:
+            TranscriptObserver: The new observer
+
+        Raises:
+            HTTPException: If Ultravox rejects the key for the call
+        """
+        entry = self.cache.get(call_id)
+        if api_key not in entry.api_keys:
+            # Unknown keys are checked upstream, which also brings the cache
+            # up to date for the observers already following the call
+            self.broadcast(call_id, await self.cache.refresh(api_key, call_id))
+
+        observer = TranscriptObserver(call_id)
+        if entry.messages:
+            observer.offer(entry.messages)
+        if entry.ended:
+            observer.end()
+            return observer
+
+        self.observers.setdefault(call_id, set()).add(observer)
+        watcher = self.watchers.get(call_id)
+        if watcher is None or watcher.done():
+            # Tailing is polling, so it yields upstream slots to interactive requests
+            self.watcher_keys[call_id] = api_key
+            with upstream_context(priority=BACKGROUND):
+                self.watchers[call_id] = asyncio.create_task(self._watch(call_id))
+        return observer
+
+    def unsubscribe(self, observer: TranscriptObserver) -> None:
+        """
+        Remove an observer. The call's watcher stops on its next poll once it
+        has no observers left.
+
+        Args:
+            observer: The observer to remove
+        """
+        observer.end()
+        observers = self.observers.get(observer.call_id)
+        if observers is None:
+            return
+        observers.discard(observer)
+        if not observers:
+            del self.observers[observer.call_id]
+
+    def broadcast(self, call_id: str, messages: List[Dict[str, Any]]) -> None:
+        """
+        Deliver new messages to every observer of a call.
+
+        Args:
+            call_id: The Ultravox call ID
+            messages: New messages in ordinal order
+        """
+        for observer in list(self.observers.get(call_id, ())):
+            observer.offer(messages)
+
+    async def _watch(self, call_id: str) -> None:
+        """Tail one call until it ends or has no observers left."""
+        idle_polls = 0
+        try:
+            while self.observers.get(call_id):
+                api_key = self.watcher_keys[call_id]
+                try:
+                    new_messages = await self.cache.refresh(api_key, call_id)
+                except Exception as e:
+                    logger.warning(f"Error tailing messages for call {call_id}: {str(e)}")
+                    new_messages = []
+
+                if new_messages:
+                    idle_polls = 0
+                    self.broadcast(call_id, new_messages)
+                else:
+                    idle_polls += 1
+                    if idle_polls % TRANSCRIPT_END_CHECK_EVERY == 0 and await self._call_ended(call_id, api_key):
+                        # Pick up anything written between the last poll and the end
+                        self.broadcast(call_id, await self.cache.refresh(api_key, call_id))
+                        self.cache.mark_ended(call_id)
+                        for observer in list(self.observers.get(call_id, ())):
+                            observer.end()
+                        self.observers.pop(call_id, None)
+                        break
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self.watchers.pop(call_id, None)
+            self.watcher_keys.pop(call_id, None)
+
+    async def _call_ended(self, call_id: str, api_key: str) -> bool:
+        try:
+            call_details = await self.fetch_call_details(api_key, call_id)
+        except Exception as e:
+            logger.warning(f"Error checking call {call_id}: {str(e)}")
+            return False
+        return bool(call_details.get("ended"))
+
+
+# Shared relay instance
+transcript_relay = TranscriptRelay()
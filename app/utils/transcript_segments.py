@@ -0,0 +1,232 @@
+"""
+Transcript segment storage.
+
+Materialized transcripts are appended as zstd-compressed blocks to one
+segment file per day. An offset index next to each segment maps session IDs
+to their block, so a single transcript is read through mmap without loading
+the rest of the segment. Rewriting a transcript appends a new block; the
+superseded blocks are dropped by a background compaction job.
+"""
+import os
+import json
+import mmap
+import zlib
+import struct
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import zstandard as zstd
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the segment and index files
+TRANSCRIPT_SEGMENT_DIR = os.getenv("TRANSCRIPT_SEGMENT_DIR", "data/transcripts")
+
+# zstd compression level of transcript blocks
+TRANSCRIPT_COMPRESSION_LEVEL = int(os.getenv("TRANSCRIPT_COMPRESSION_LEVEL", "9"))
+
+# Seconds between background compaction runs
+TRANSCRIPT_COMPACTION_INTERVAL = float(os.getenv("TRANSCRIPT_COMPACTION_INTERVAL", "3600"))
+
+# Minimum share of superseded bytes before a segment is compacted
+TRANSCRIPT_COMPACTION_MIN_DEAD_RATIO = float(os.getenv("TRANSCRIPT_COMPACTION_MIN_DEAD_RATIO", "0.3"))
+
+# Block header: magic, compressed payload length, CRC32 of the payload
+BLOCK_MAGIC = b"TZT1"
+BLOCK_HEADER = struct.Struct(">4sII")
+
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+
+class TranscriptSegmentStore:
+    """Append-only, compressed, memory-mapped transcript storage."""
+
+    def __init__(self, directory: str = TRANSCRIPT_SEGMENT_DIR, level: int = TRANSCRIPT_COMPRESSION_LEVEL):
+        self.directory = directory
+        self.level = level
+        # session ID -> (segment name, block offset, block length)
+        self.locations: Dict[str, Tuple[str, int, int]] = {}
+        self.maps: Dict[str, mmap.mmap] = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def append(self, session_id: str, transcript: str, day: Optional[str] = None) -> None:
+        """
+        Append a transcript to the segment of the day.
+
+        Args:
+            session_id: The Tezhire session ID
+            transcript: The full transcript text
+            day: Segment name override (defaults to the current UTC date)
+        """
+        self._ensure_loaded()
+        segment = day or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        payload = zstd.ZstdCompressor(level=self.level).compress(
+            json.dumps({"sessionId": session_id, "full": transcript}).encode("utf-8")
+        )
+        block = BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+        with self.lock:
+            with open(self._path(segment, SEGMENT_SUFFIX), "ab") as segment_file:
+                offset = segment_file.tell()
+                segment_file.write(block)
+            with open(self._path(segment, INDEX_SUFFIX), "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps({"s": session_id, "o": offset, "n": len(block)}) + "\n")
+            self.locations[session_id] = (segment, offset, len(block))
+
+    def read(self, session_id: str) -> Optional[str]:
+        """
+        Read one transcript through a memory map of its segment.
+
+        Args:
+            session_id: The Tezhire session ID
+
+        Returns:
+            Optional[str]: The transcript text, or None if it is not stored
+        """
+        self._ensure_loaded()
+        with self.lock:
+            location = self.locations.get(session_id)
+            if location is None:
+                return None
+            segment, offset, length = location
+            block = self._map(segment, offset + length)[offset:offset + length]
+
+        return self._decode(block)["full"]
+
+    def __contains__(self, session_id: str) -> bool:
+        self._ensure_loaded()
+        return session_id in self.locations
+
+    def segments(self) -> List[str]:
+        """Get the names of all segments, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[:-len(SEGMENT_SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def compact(self, segment: str) -> bool:
+        """
+        Rewrite a segment without its superseded blocks.
+
+        Args:
+            segment: The segment name
+
+        Returns:
+            bool: True if the segment was rewritten
+        """
+        self._ensure_loaded()
+        segment_path = self._path(segment, SEGMENT_SUFFIX)
+        with self.lock:
+            live = sorted(
+                (offset, length, session_id)
+                for session_id, (name, offset, length) in self.locations.items()
+                if name == segment
+            )
+        total = os.path.getsize(segment_path)
+        live_bytes = sum(length for _, length, _ in live)
+        if total == 0 or (total - live_bytes) / total < TRANSCRIPT_COMPACTION_MIN_DEAD_RATIO:
+            return False
+
+        # Write the live blocks to a new segment, then swap it in
+        new_locations: Dict[str, Tuple[str, int, int]] = {}
+        with open(segment_path, "rb") as source, \
+                open(segment_path + ".compact", "wb") as target, \
+                open(self._path(segment, INDEX_SUFFIX) + ".compact", "w", encoding="utf-8") as index_file:
+            for offset, length, session_id in live:
+                source.seek(offset)
+                block = source.read(length)
+                new_offset = target.tell()
+                target.write(block)
+                index_file.write(json.dumps({"s": session_id, "o": new_offset, "n": length}) + "\n")
+                new_locations[session_id] = (segment, new_offset, length)
+
+        with self.lock:
+            # Sessions rewritten while compacting keep their newer block
+            for offset, length, session_id in live:
+                if self.locations.get(session_id) == (segment, offset, length):
+                    self.locations[session_id] = new_locations[session_id]
+            os.replace(segment_path + ".compact", segment_path)
+            os.replace(self._path(segment, INDEX_SUFFIX) + ".compact", self._path(segment, INDEX_SUFFIX))
+            stale_map = self.maps.pop(segment, None)
+        if stale_map is not None:
+            stale_map.close()
+
+        logger.info(f"Compacted transcript segment {segment}: {total} -> {live_bytes} bytes")
+        return True
+
+    def compact_closed_segments(self) -> int:
+        """
+        Compact every segment except the one currently appended to.
+
+        Returns:
+            int: The number of segments rewritten
+        """
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return sum(1 for segment in self.segments() if segment != today and self.compact(segment))
+
+    def _ensure_loaded(self) -> None:
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            for segment in self.segments():
+                index_path = self._path(segment, INDEX_SUFFIX)
+                if not os.path.exists(index_path):
+                    continue
+                with open(index_path, encoding="utf-8") as index_file:
+                    for line in index_file:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self.locations[entry["s"]] = (segment, entry["o"], entry["n"])
+            self.loaded = True
+
+    def _map(self, segment: str, min_size: int) -> mmap.mmap:
+        # Must be called with the lock held; remaps segments that grew
+        segment_map = self.maps.get(segment)
+        if segment_map is None or len(segment_map) < min_size:
+            if segment_map is not None:
+                segment_map.close()
+            with open(self._path(segment, SEGMENT_SUFFIX), "rb") as segment_file:
+                segment_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment] = segment_map
+        return segment_map
+
+    def _decode(self, block: bytes) -> Dict[str, Any]:
+        magic, length, checksum = BLOCK_HEADER.unpack_from(block)
+        payload = block[BLOCK_HEADER.size:BLOCK_HEADER.size + length]
+        if magic != BLOCK_MAGIC or zlib.crc32(payload) != checksum:
+            raise ValueError("Corrupt transcript block")
+        return json.loads(zstd.ZstdDecompressor().decompress(payload))
+
+    def _path(self, segment: str, suffix: str) -> str:
+        return os.path.join(self.directory, segment + suffix)
+
+
+async def run_compaction(store: "TranscriptSegmentStore", interval: float = TRANSCRIPT_COMPACTION_INTERVAL) -> None:
+    """
+    Periodically compact closed segments in a worker thread.
+
+    Args:
+        store: The segment store to compact
+        interval: Seconds between compaction runs
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(store.compact_closed_segments)
+        except Exception as e:
+            logger.error(f"Error compacting transcript segments: {str(e)}")
+
+
+# Shared store instance
+transcript_segments = TranscriptSegmentStore()
@@ -0,0 +1,214 @@
+"""
+Tenant-fair scheduling of upstream Ultravox requests.
+
+Every request to the Ultravox API takes one of a bounded number of upstream
+slots. When the slots are busy, requests wait in one queue per priority
+class: interactive requests (creating and joining calls) are always served
+before background ones (account syncs, status polls, results). Within a
+class, tenants (companies) share the slots by weighted fair queueing, so a
+bulk drive by one company only delays its own requests. The tenant and
+priority class of a request come from the context it runs in, set with
+upstream_context, so the Ultravox client functions keep their signatures.
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Tuple, Optional, Callable, Iterator, AsyncIterator
+
+# Priority classes, served in this order
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Tenant of requests made outside any company's context
+DEFAULT_TENANT = "default"
+
+# Maximum number of concurrent upstream requests
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "32"))
+
+# Tenant weights as comma-separated company_id:weight pairs; others weigh 1
+UPSTREAM_TENANT_WEIGHTS = {
+    tenant.strip(): float(weight)
+    for tenant, _, weight in (
+        pair.partition(":") for pair in os.getenv("UPSTREAM_TENANT_WEIGHTS", "").split(",") if ":" in pair
+    )
+}
+
+# Weight of each dispatched request in a tenant's running average wait
+UPSTREAM_WAIT_SMOOTHING = 0.2
+
+_tenant: ContextVar[str] = ContextVar("upstream_tenant", default=DEFAULT_TENANT)
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def upstream_context(tenant: Optional[str] = None, priority: Optional[int] = None) -> Iterator[None]:
+    """
+    Attribute the upstream requests made in a block, including in tasks it
+    starts, to a tenant and priority class.
+
+    Args:
+        tenant: The company ID; unchanged if not given
+        priority: INTERACTIVE or BACKGROUND; unchanged if not given
+    """
+    tokens = []
+    if tenant:
+        tokens.append((_tenant, _tenant.set(tenant)))
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class TenantStats:
+    """Queue and wait statistics of one tenant."""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.queued = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.in_flight = 0
+        self.served = 0
+        self.average_wait = 0.0
+        self.max_wait = 0.0
+
+
+class UpstreamScheduler:
+    """Shares a bounded number of upstream slots fairly between tenants."""
+
+    def __init__(
+        self,
+        max_concurrency: int = UPSTREAM_MAX_CONCURRENCY,
+        weights: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.weights = UPSTREAM_TENANT_WEIGHTS if weights is None else weights
+        self.clock = clock
+        self.in_flight = 0
+        # Per class: heap of (finish tag, arrival, tenant, enqueue time, waiter)
+        self.queues: Dict[int, List[Tuple[float, int, str, float, asyncio.Future]]] = {
+            INTERACTIVE: [], BACKGROUND: []
+        }
+        # Per class: finish tag of the request served last
+        self.virtual_time = {INTERACTIVE: 0.0, BACKGROUND: 0.0}
+        # (class, tenant) -> finish tag of the tenant's newest request
+        self.last_finish: Dict[Tuple[int, str], float] = {}
+        self.tenants: Dict[str, TenantStats] = {}
+        self.arrivals = itertools.count()
+
+    def weight(self, tenant: str) -> float:
+        """Get the share weight of a tenant."""
+        return max(self.weights.get(tenant, 1.0), 1e-6)
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None, priority: Optional[int] = None) -> AsyncIterator[None]:
+        """
+        Hold an upstream slot for the duration of a request, waiting for
+        the tenant's turn if all slots are busy.
+
+        Args:
+            tenant: The company ID; the current upstream context's if not given
+            priority: INTERACTIVE or BACKGROUND; the current upstream context's if not given
+        """
+        tenant = tenant or _tenant.get()
+        priority = _priority.get() if priority is None else priority
+        await self._acquire(tenant, priority)
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    def queue_depth(self, priority: Optional[int] = None) -> int:
+        """Get the number of waiting requests, in one class or in all."""
+        classes = self.queues if priority is None else [priority]
+        return sum(stats.queued[cls] for stats in self.tenants.values() for cls in classes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the slot usage and the queue and wait statistics of each tenant."""
+        return {
+            "maxConcurrency": self.max_concurrency,
+            "inFlight": self.in_flight,
+            "tenants": [
+                {
+                    "tenant": tenant,
+                    "weight": stats.weight,
+                    "queued": {PRIORITY_NAMES[cls]: count for cls, count in stats.queued.items()},
+                    "inFlight": stats.in_flight,
+                    "served": stats.served,
+                    "averageWaitSeconds": round(stats.average_wait, 3),
+                    "maxWaitSeconds": round(stats.max_wait, 3),
+                }
+                for tenant, stats in self.tenants.items()
+            ],
+        }
+
+    def _stats(self, tenant: str) -> TenantStats:
+        stats = self.tenants.get(tenant)
+        if stats is None:
+            stats = self.tenants[tenant] = TenantStats(self.weight(tenant))
+        return stats
+
+    def _finish_tag(self, tenant: str, priority: int) -> float:
+        """Stamp a new request with its virtual finish time."""
+        key = (priority, tenant)
+        start = max(self.virtual_time[priority], self.last_finish.get(key, 0.0))
+        finish = start + 1.0 / self.weight(tenant)
+        self.last_finish[key] = finish
+        return finish
+
+    async def _acquire(self, tenant: str, priority: int) -> None:
+        stats = self._stats(tenant)
+        finish = self._finish_tag(tenant, priority)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queues[priority], (finish, next(self.arrivals), tenant, self.clock(), waiter))
+        stats.queued[priority] += 1
+        # Served at once when a slot is free
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the request was abandoned
+                self._release(tenant)
+            else:
+                waiter.cancel()
+                stats.queued[priority] -= 1
+            raise
+
+    def _start(self, stats: TenantStats, wait: float) -> None:
+        self.in_flight += 1
+        stats.in_flight += 1
+        stats.served += 1
+        stats.average_wait += UPSTREAM_WAIT_SMOOTHING * (wait - stats.average_wait)
+        stats.max_wait = max(stats.max_wait, wait)
+
+    def _release(self, tenant: str) -> None:
+        self.in_flight -= 1
+        self.tenants[tenant].in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting requests, interactive first, fairest tag first."""
+        for priority in (INTERACTIVE, BACKGROUND):
+            queue = self.queues[priority]
+            while queue and self.in_flight < self.max_concurrency:
+                finish, _, tenant, enqueued_at, waiter = heapq.heappop(queue)
+                if waiter.done():
+                    # Abandoned while waiting
+                    continue
+                stats = self.tenants[tenant]
+                stats.queued[priority] -= 1
+                self.virtual_time[priority] = finish
+                self._start(stats, self.clock() - enqueued_at)
+                waiter.set_result(None)
+
+
+# Shared scheduler instance
+upstream_scheduler = UpstreamScheduler()
@@ -0,0 +1,76 @@
+"""
+Benchmark of recording analysis.
+
+Writes a synthetic two-channel interview recording with alternating turns and
+runs the chunked voice activity detector over it, reporting throughput and
+peak allocations.
+
+Usage:
+    python -m benchmarks.bench_audio_analysis [--minutes 60] [--rate 16000]
+"""
+import os
+import wave
+import random
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.utils.audio_analysis import analyze_recording
+
+
+def write_interview(path: str, minutes: int, rate: int, seed: int = 7) -> int:
+    """Write a recording of alternating interviewer and candidate turns, one turn at a time."""
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    total = minutes * 60 * rate
+    written = 0
+    turns = 0
+    with wave.open(path, "wb") as recording:
+        recording.setnchannels(2)
+        recording.setsampwidth(2)
+        recording.setframerate(rate)
+        while written < total:
+            speaker = turns % 2
+            for seconds, talking in ((rng.uniform(3, 40), True), (rng.uniform(0.5, 3), False)):
+                length = min(int(seconds * rate), total - written)
+                block = noise.normal(0, 30, size=(length, 2))
+                if talking:
+                    block[:, speaker] += 6000 * np.sin(2 * np.pi * 180 * np.arange(length) / rate)
+                recording.writeframes(block.astype(np.int16).tobytes())
+                written += length
+            turns += 1
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "interview.wav")
+        turns = write_interview(path, args.minutes, args.rate)
+        size = os.path.getsize(path)
+        print(f"recording: {args.minutes} min, {args.rate} Hz stereo, {size / 1024 ** 2:.0f} MiB, {turns} turns")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        analysis = analyze_recording(path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"analysis: {elapsed:.2f}s ({args.minutes * 60 / elapsed:.0f}x real time, {size / 1024 ** 2 / elapsed:.0f} MiB/s)")
+    print(f"peak allocations: {peak / 1024 ** 2:.1f} MiB")
+    print(
+        f"talk time {analysis['talkTime']:.0f}s, candidate {analysis['candidateTalkTime']:.0f}s, "
+        f"silence {analysis['silence']:.0f}s, {len(analysis['answerDurations'])} answers"
+    )
+
+
+if __name__ == "__main__":
+    main()
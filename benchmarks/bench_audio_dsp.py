@@ -0,0 +1,95 @@
+"""
+Benchmark of the audio DSP module.
+
+Measures 20 ms frames per second on one core for each stage of a bridged
+telephony leg, processing one call per frame and a batch of calls per frame,
+and the number of concurrent calls that throughput carries.
+
+Usage:
+    python -m benchmarks.bench_audio_dsp [--calls 256] [--seconds 1.0]
+"""
+import time
+import argparse
+
+import numpy as np
+
+from app.utils.audio_dsp import (
+    Resampler, ulaw_to_pcm16, pcm16_to_ulaw, apply_gain, mix
+)
+
+FRAME_MS = 20
+TELEPHONY_RATE = 8000
+CALL_RATE = 16000
+
+# A bridged call moves this many frames per second in each direction
+FRAMES_PER_SECOND = 1000 // FRAME_MS
+
+
+def samples(rate: int, batch: int = 0) -> np.ndarray:
+    """A frame of noise at the given rate, optionally for a batch of calls."""
+    shape = (batch, rate * FRAME_MS // 1000) if batch else (rate * FRAME_MS // 1000,)
+    return np.random.default_rng(7).integers(-8000, 8000, size=shape, dtype=np.int16)
+
+
+def measure(stage, seconds: float) -> float:
+    """Run a stage repeatedly and get its calls per second."""
+    runs = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            stage()
+        runs += 50
+    return runs / (time.perf_counter() - start)
+
+
+def stages(batch: int):
+    """Build the stages of both directions of a bridged call."""
+    ulaw = pcm16_to_ulaw(samples(TELEPHONY_RATE, batch))
+    call_audio = samples(CALL_RATE, batch)
+    prompt = samples(CALL_RATE, batch)
+    upsampler = Resampler(TELEPHONY_RATE, CALL_RATE)
+    downsampler = Resampler(CALL_RATE, TELEPHONY_RATE)
+
+    def inbound():
+        return upsampler.process(ulaw_to_pcm16(ulaw))
+
+    def outbound():
+        mixed = mix([call_audio, apply_gain(prompt, -12.0)])
+        return pcm16_to_ulaw(downsampler.process(mixed))
+
+    return {
+        "mu-law decode": lambda: ulaw_to_pcm16(ulaw),
+        "mu-law encode": lambda: pcm16_to_ulaw(call_audio),
+        "resample 8k->16k": lambda: upsampler.process(call_audio[..., :TELEPHONY_RATE * FRAME_MS // 1000]),
+        "resample 16k->8k": lambda: downsampler.process(call_audio),
+        "gain + mix": lambda: mix([call_audio, apply_gain(prompt, -12.0)]),
+        "inbound leg": inbound,
+        "outbound leg": outbound,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=256, help="calls per batched frame")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    args = parser.parse_args()
+
+    print(f"{'stage':<18} {'frames/s (1 call)':>18} {f'frames/s ({args.calls} calls)':>22}")
+    single = stages(0)
+    batched = stages(args.calls)
+    leg_rates = {}
+    for name in single:
+        one = measure(single[name], args.seconds)
+        many = measure(batched[name], args.seconds) * args.calls
+        leg_rates[name] = (one, many)
+        print(f"{name:<18} {one:>18,.0f} {many:>22,.0f}")
+
+    for label, index in (("one call per frame", 0), (f"{args.calls} calls per frame", 1)):
+        seconds_per_call = FRAMES_PER_SECOND * (1 / leg_rates["inbound leg"][index] + 1 / leg_rates["outbound leg"][index])
+        calls = 1 / seconds_per_call
+        print(f"concurrent bridged calls per core, {label}: {calls:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
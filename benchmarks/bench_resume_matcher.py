@@ -0,0 +1,90 @@
+"""
+Benchmark of the resume-to-job matcher.
+
+Builds the TF-IDF matrix of a synthetic candidate pool and scores it against
+a job's requirements.
+
+Usage:
+    python -m benchmarks.bench_resume_matcher [--candidates 50000]
+"""
+import random
+import argparse
+import statistics
+import time
+
+from app.models.tezhire import Candidate
+from app.utils.resume_matcher import CandidatePool, ResumeMatcher
+
+SKILLS = [
+    "Python", "Java", "Go", "Rust", "TypeScript", "React", "Node.js", "C++", "Kafka",
+    "PostgreSQL", "MySQL", "Redis", "Kubernetes", "Docker", "AWS", "GCP", "Terraform",
+    "Spark", "Airflow", "GraphQL", "gRPC", "Django", "FastAPI", "Flask", "Elasticsearch",
+]
+WORDS = [
+    "built", "designed", "maintained", "scaled", "services", "pipelines", "platform",
+    "team", "latency", "throughput", "customers", "migration", "distributed", "systems",
+    "testing", "monitoring", "on-call", "architecture", "data", "billing", "search",
+]
+REQUIREMENTS = [
+    "5+ years of Python experience",
+    "Kafka stream processing",
+    "PostgreSQL and Redis",
+    "Kubernetes deployments on AWS",
+]
+
+
+def make_candidates(count: int, seed: int = 7):
+    """Generate a synthetic candidate pool."""
+    rng = random.Random(seed)
+    candidates = []
+    for index in range(count):
+        skills = rng.sample(SKILLS, 6)
+        text = " ".join(rng.choice(WORDS + skills) for _ in range(150))
+        candidates.append(Candidate.model_validate({
+            "candidateId": f"candidate-{index}",
+            "name": f"Candidate {index}",
+            "email": f"candidate{index}@example.com",
+            "resumeData": {
+                "skills": skills,
+                "experience": [],
+                "education": [],
+                "projects": [{"name": "Project", "description": "", "technologies": rng.sample(SKILLS, 3)}],
+                "rawText": text,
+            },
+        }))
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidates)
+
+    start = time.perf_counter()
+    pool = CandidatePool(candidates)
+    build = time.perf_counter() - start
+    print(f"build: {build:.2f}s for {len(pool)} resumes, {pool.matrix.shape[1]} terms, {pool.matrix.nnz} non-zeros")
+
+    timings = []
+    for _ in range(args.queries):
+        start = time.perf_counter()
+        pool.scores(REQUIREMENTS)
+        timings.append(time.perf_counter() - start)
+    print(f"score all: median {1000 * statistics.median(timings):.1f} ms")
+
+    start = time.perf_counter()
+    top = list(pool.matches(REQUIREMENTS, limit=100))
+    print(f"top 100 with matched skills: {1000 * (time.perf_counter() - start):.1f} ms (best {top[0]['score']})")
+
+    matcher = ResumeMatcher()
+    matcher.pool("job-bench", candidates)
+    start = time.perf_counter()
+    matcher.pool("job-bench", candidates)
+    print(f"cached pool lookup: {1000 * (time.perf_counter() - start):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
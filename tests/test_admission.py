@@ -0,0 +1,241 @@
+"""
+Tests for admission control of call creation.
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.admission import AdmissionController, AdmissionTimeout
+from app.utils.interview_tools import ToolPlanRegistry
+from app.utils.session_store import session_store
+from tests.test_interview_tools import SESSION_REQUEST
+
+
+class FakeAccount:
+    """Serves account info with a fixed concurrency limit."""
+
+    def __init__(self, allowed, active=0):
+        self.allowed = allowed
+        self.active = active
+        self.requests = 0
+
+    async def fetch(self, api_key):
+        self.requests += 1
+        return {"activeCalls": self.active, "allowedConcurrentCalls": self.allowed}
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for the AdmissionController class."""
+
+    def test_unknown_capacity_admits(self):
+        """Test that accounts are not limited before their first sync."""
+        account = FakeAccount(allowed=1)
+        controller = AdmissionController(fetch_account=account.fetch)
+
+        async def scenario():
+            for i in range(3):
+                async with controller.reserve("key") as reservation:
+                    reservation.bind(f"call-{i}")
+            self.assertEqual(controller.accounts["key"].active, 3)
+            self.assertEqual(account.requests, 0)
+
+        asyncio.run(scenario())
+
+    def test_fifo_queue(self):
+        """Test that waiting creations are admitted in arrival order."""
+        account = FakeAccount(allowed=1)
+        controller = AdmissionController(fetch_account=account.fetch, queue_timeout=5)
+        admitted = []
+
+        async def create(name):
+            async with controller.reserve("key") as reservation:
+                admitted.append(name)
+                reservation.bind(name)
+
+        async def scenario():
+            await controller.sync("key")
+            await create("first")
+            waiters = [asyncio.create_task(create(name)) for name in ("second", "third")]
+            await asyncio.sleep(0)
+            self.assertEqual(len(controller.accounts["key"].waiters), 2)
+
+            controller.release("first")
+            for _ in range(5):
+                await asyncio.sleep(0)
+            self.assertEqual(admitted, ["first", "second"])
+            controller.release("second")
+            await asyncio.gather(*waiters)
+            self.assertEqual(admitted, ["first", "second", "third"])
+            self.assertFalse(controller.release("second"))
+
+        asyncio.run(scenario())
+
+    def test_failed_creation_frees_slot(self):
+        """Test that a reservation that never became a call is returned."""
+        controller = AdmissionController(fetch_account=FakeAccount(allowed=1).fetch)
+
+        async def failing():
+            raise RuntimeError("upstream error")
+
+        async def scenario():
+            await controller.sync("key")
+            with self.assertRaises(RuntimeError):
+                await controller.admit_call("key", failing)
+            account = controller.accounts["key"]
+            self.assertEqual((account.active, account.reserved), (0, 0))
+
+        asyncio.run(scenario())
+
+    def test_timeout_and_estimate(self):
+        """Test the queue timeout and the estimated wait it reports."""
+        clock = Clock()
+        account = FakeAccount(allowed=2)
+        controller = AdmissionController(fetch_account=account.fetch, queue_timeout=0.05, clock=clock)
+
+        async def scenario():
+            await controller.sync("key")
+            for call_id in ("a", "b"):
+                async with controller.reserve("key") as reservation:
+                    reservation.bind(call_id)
+                clock.now += 100
+            account.active = 2
+
+            # Calls of 900s on average, started 200s and 100s ago
+            self.assertEqual(controller.estimated_wait("key"), 700)
+            self.assertEqual(controller.estimated_wait("key", position=2), 800)
+            self.assertEqual(controller.estimated_wait("key", position=3), 1700)
+
+            with self.assertRaises(AdmissionTimeout) as raised:
+                async with controller.reserve("key"):
+                    pass
+            self.assertEqual(raised.exception.estimated_wait, 700)
+            self.assertEqual(len(controller.accounts["key"].waiters), 0)
+
+        asyncio.run(scenario())
+
+    def test_sync_frees_capacity(self):
+        """Test that a sync showing ended calls admits waiting creations."""
+        account = FakeAccount(allowed=1, active=1)
+        clock = Clock()
+        controller = AdmissionController(fetch_account=account.fetch, queue_timeout=5, clock=clock)
+
+        async def scenario():
+            await controller.sync("key")
+            waiter = asyncio.create_task(controller.admit_call("key", self._created))
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+
+            account.active = 0
+            await controller.sync("key")
+            self.assertEqual((await waiter)["callId"], "call-1")
+
+        asyncio.run(scenario())
+
+    def test_sync_reconciles_calls(self):
+        """Test that a sync drops unreleased calls and releases are not counted twice."""
+        account = FakeAccount(allowed=3)
+        clock = Clock()
+        controller = AdmissionController(fetch_account=account.fetch, queue_timeout=5, clock=clock)
+
+        async def scenario():
+            await controller.sync("key")
+            for call_id in ("old", "mid", "new"):
+                async with controller.reserve("key") as reservation:
+                    reservation.bind(call_id)
+                clock.now += 10
+
+            # "old" ended without being released
+            account.active = 2
+            await controller.sync("key")
+            capacity = controller.accounts["key"]
+            self.assertEqual(sorted(capacity.calls), ["mid", "new"])
+            self.assertNotIn("old", controller.call_accounts)
+
+            # "mid" ended; the upstream count may already show it, so the
+            # release waits for a fresh count instead of decrementing
+            self.assertTrue(controller.release("mid"))
+            self.assertEqual(capacity.active, 2)
+            async with controller.reserve("key") as reservation:
+                reservation.bind("extra")
+            self.assertEqual(capacity.active, 3)
+
+            # With a creation queued, a synced call's release fetches that count
+            blocked = asyncio.create_task(controller.admit_call("key", self._created))
+            await asyncio.sleep(0)
+            self.assertFalse(blocked.done())
+            account.active = 1
+            controller.release("new")
+            self.assertEqual((await blocked)["callId"], "call-1")
+            self.assertEqual(capacity.active, 2)
+
+        asyncio.run(scenario())
+
+    def test_full_queue(self):
+        """Test that creations are turned away when the queue is full."""
+        controller = AdmissionController(fetch_account=FakeAccount(allowed=0).fetch, max_queue=0)
+
+        async def scenario():
+            await controller.sync("key")
+            with self.assertRaises(AdmissionTimeout):
+                async with controller.reserve("key"):
+                    pass
+
+        asyncio.run(scenario())
+
+    async def _created(self):
+        return {"callId": "call-1"}
+
+
+class TestAdmissionEndpoints(unittest.TestCase):
+    """Test cases for admission control of session creation."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.controller = AdmissionController(fetch_account=FakeAccount(allowed=0).fetch, queue_timeout=0.01)
+        asyncio.run(self.controller.sync("test-api-key"))
+        patcher = patch("app.routers.tezhire.admission_controller", self.controller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("app.routers.tezhire.tool_plans", ToolPlanRegistry(base_url=""))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def test_full_account_returns_503(self):
+        """Test that a creation over capacity never reaches Ultravox."""
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(201, json={"callId": "call-1", "joinUrl": "wss://example.com/join"})
+
+        real_client = httpx.AsyncClient
+        with patch("app.routers.tezhire.httpx.AsyncClient",
+                   lambda *args, **kwargs: real_client(transport=httpx.MockTransport(handler))):
+            response = self.client.post("/api/tezhire/interview-sessions", json=SESSION_REQUEST,
+                                        headers={"X-API-Key": "test-api-key"})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(sent, [])
+
+        status = self.client.get("/api/tezhire/admission", headers={"X-API-Key": "test-api-key"}).json()
+        self.assertEqual(status["accounts"][0]["account"], "...-key")
+        self.assertEqual(status["accounts"][0]["allowedConcurrentCalls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests for the answer similarity index.
+"""
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.answer_similarity import AnswerSimilarityIndex, MinHasher, similarity_index
+from app.utils.session_store import session_store
+from tests.test_results_builder import FakeUltravox, make_record
+
+
+ANSWER = (
+    "We partitioned the payment events by account so every consumer owned a "
+    "slice of the ledger and retries could never reorder two transfers"
+)
+
+
+def make_results(session_id, candidate_id, answers, job_id="job-456"):
+    """Create a materialized results payload for tests."""
+    return {
+        "sessionId": session_id,
+        "candidateId": candidate_id,
+        "jobId": job_id,
+        "questions": [
+            {"questionId": f"q{i + 1}", "question": "How do you keep ordering?", "answerTranscript": answer}
+            for i, answer in enumerate(answers)
+        ],
+    }
+
+
+class TestMinHasher(unittest.TestCase):
+    """Test cases for MinHash signatures."""
+
+    def test_signature_estimates_similarity(self):
+        """Test that similar texts agree on most signature positions."""
+        hasher = MinHasher()
+        words = ANSWER.lower().split()
+        same = hasher.signature(words)
+        near = hasher.signature(words[:-1] + ["payments"])
+        other = hasher.signature("i mostly build react front ends with typescript and storybook every day".split())
+
+        self.assertEqual(same.shape, (128,))
+        self.assertGreater((same == near).mean(), 0.7)
+        self.assertLess((same == other).mean(), 0.2)
+
+
+class TestAnswerSimilarityIndex(unittest.TestCase):
+    """Test cases for the AnswerSimilarityIndex class."""
+
+    def setUp(self):
+        """Build a small index."""
+        self.index = AnswerSimilarityIndex()
+        self.index.index_results(make_results("session-1", "candidate-1", [ANSWER, "Mostly Python."]))
+
+    def test_near_duplicates_are_flagged(self):
+        """Test that a copied answer from another candidate is flagged on both sessions."""
+        self.index.index_results(make_results("session-2", "candidate-2", ["No idea.", ANSWER + " again"]))
+
+        flags = self.index.flags_for("session-2")
+        self.assertEqual(len(flags), 1)
+        self.assertEqual(flags[0]["questionId"], "q2")
+        self.assertEqual(flags[0]["otherSessionId"], "session-1")
+        self.assertEqual(flags[0]["otherQuestionId"], "q1")
+        self.assertGreaterEqual(flags[0]["similarity"], 0.7)
+        self.assertEqual(self.index.flags_for("session-1")[0]["otherSessionId"], "session-2")
+
+        pairs = self.index.pairs_for_job("job-456")
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual({answer["candidateId"] for answer in pairs[0]["answers"]}, {"candidate-1", "candidate-2"})
+
+    def test_unrelated_and_same_candidate_are_not_flagged(self):
+        """Test that other jobs, other texts and the same candidate are ignored."""
+        self.index.index_results(make_results("session-2", "candidate-1", [ANSWER]))
+        self.index.index_results(make_results("session-3", "candidate-3", [ANSWER], job_id="job-other"))
+        self.index.index_results(make_results("session-4", "candidate-4", [
+            "I would use a single writer per aggregate and let the database enforce ordering with versions"
+        ]))
+        self.assertEqual(self.index.pairs_for_job("job-456"), [])
+        self.assertEqual(self.index.flags_for("session-1"), [])
+
+    def test_remove_session(self):
+        """Test that removing a session drops its answers and flags."""
+        self.index.index_results(make_results("session-2", "candidate-2", [ANSWER]))
+        self.index.remove_session("session-2")
+        self.assertEqual(self.index.flags_for("session-1"), [])
+        self.assertEqual(self.index.pairs, {})
+        self.assertTrue(all(key[0] == "session-1" for bucket in self.index.buckets.values() for key in bucket))
+
+
+class TestSimilarAnswersEndpoints(unittest.TestCase):
+    """Test cases for the similar answers in results and the review endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+        session_store.clear()
+
+    def tearDown(self):
+        """Remove indexed test sessions."""
+        similarity_index.remove_session("similar-1")
+        similarity_index.remove_session("session-1")
+
+    def test_similar_answers(self):
+        """Test that flags show up in results and in the job review."""
+        similarity_index.index_results(make_results("session-1", "candidate-123", [ANSWER]))
+        similarity_index.index_results(make_results("similar-1", "candidate-other", [ANSWER]))
+
+        session_store["session-1"] = make_record()
+        with patch("app.routers.tezhire.results_builder", FakeUltravox().builder()):
+            response = self.client.get(
+                "/api/tezhire/interview-sessions/session-1/results",
+                headers={"X-API-Key": "test-api-key"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["similarAnswers"][0]["otherSessionId"], "similar-1")
+
+        response = self.client.get(
+            "/api/tezhire/jobs/job-456/similar-answers",
+            params={"minSimilarity": 0.5},
+            headers={"X-API-Key": "test-api-key"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Tests for recording analysis.
+"""
+import os
+import wave
+import asyncio
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from app.utils.audio_analysis import (
+    SpeechTracker, AudioAnalyzer, analyze_recording, answer_durations, apply_analysis
+)
+
+
+RATE = 8000
+
+# (channel, start, end) of speech in seconds: the interviewer on channel 1
+# asks two questions and the candidate on channel 0 answers both, with a
+# short pause in the first answer
+SPEECH = [(1, 0.0, 2.0), (0, 2.5, 3.5), (0, 3.7, 5.0), (1, 5.5, 6.5), (0, 7.0, 9.0)]
+
+
+def write_recording(path, channels=2, duration=10.0):
+    """Write a WAV file with tones where SPEECH says someone talks."""
+    samples = np.zeros((int(duration * RATE), channels), dtype=np.int16)
+    for channel, start, end in SPEECH:
+        time = np.arange(int(start * RATE), int(end * RATE))
+        samples[time, channel % channels] = (8000 * np.sin(2 * np.pi * 220 * time / RATE)).astype(np.int16)
+    with wave.open(path, "wb") as recording:
+        recording.setnchannels(channels)
+        recording.setsampwidth(2)
+        recording.setframerate(RATE)
+        recording.writeframes(samples.tobytes())
+
+
+class FakeRecordings:
+    """Recording proxy that serves a local file, once it is ready."""
+
+    def __init__(self, path, ready_after=0):
+        self.path = path
+        self.ready_after = ready_after
+        self.requests = 0
+
+    @asynccontextmanager
+    async def local_copy(self, api_key, call_id):
+        self.requests += 1
+        yield None if self.requests <= self.ready_after else self.path
+
+
+class TestSpeechTracker(unittest.TestCase):
+    """Test cases for the SpeechTracker class."""
+
+    def test_segments_across_chunks(self):
+        """Test that runs are merged across short pauses and chunk boundaries."""
+        tracker = SpeechTracker(0.1, min_silence_frames=3, min_speech_frames=2)
+        tracker.feed(np.array([0, 1, 1, 1, 0, 0], dtype=bool), 0)
+        tracker.feed(np.array([1, 1, 0, 0, 0, 0], dtype=bool), 6)
+        tracker.feed(np.array([0, 0, 1, 0, 0, 0], dtype=bool), 12)
+        segments = tracker.finish()
+        self.assertEqual(len(segments), 1)
+        self.assertAlmostEqual(segments[0][0], 0.1)
+        self.assertAlmostEqual(segments[0][1], 0.8)
+
+
+class TestAnalyzeRecording(unittest.TestCase):
+    """Test cases for recording analysis."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "call.wav")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stereo(self):
+        """Test talk time, silences and answers of a two-channel recording."""
+        write_recording(self.path)
+        analysis = analyze_recording(self.path, candidate_channel=0, chunk_seconds=1)
+        self.assertEqual(analysis["duration"], 10.0)
+        self.assertAlmostEqual(analysis["candidateTalkTime"], 4.5, delta=0.1)
+        self.assertAlmostEqual(analysis["interviewerTalkTime"], 3.0, delta=0.1)
+        self.assertAlmostEqual(analysis["talkTime"], 7.5, delta=0.1)
+        self.assertAlmostEqual(analysis["silence"], 2.5, delta=0.1)
+        self.assertAlmostEqual(analysis["longestSilence"], 1.0, delta=0.1)
+        self.assertEqual(len(analysis["answerDurations"]), 2)
+        self.assertEqual([turn for turn, _ in analysis["answerDurations"]], [0, 1])
+        self.assertAlmostEqual(analysis["answerDurations"][0][1], 2.5, delta=0.1)
+        self.assertAlmostEqual(analysis["answerDurations"][1][1], 2.0, delta=0.1)
+
+    def test_mono(self):
+        """Test that mono recordings only report overall talk time."""
+        write_recording(self.path, channels=1)
+        analysis = analyze_recording(self.path)
+        self.assertAlmostEqual(analysis["talkTime"], 7.5, delta=0.1)
+        self.assertIsNone(analysis["candidateTalkTime"])
+        self.assertEqual(analysis["answerDurations"], [])
+
+    def test_answers_need_a_question(self):
+        """Test that candidate speech before the first question is not an answer."""
+        durations = answer_durations([(0.0, 1.0), (3.0, 4.0)], [(1.5, 2.5)])
+        self.assertEqual(durations, [(0, 1.0)])
+
+    def test_unanswered_turns_keep_their_index(self):
+        """Test that an unanswered question does not shift later answers."""
+        durations = answer_durations([(3.0, 5.0)], [(0.0, 1.0), (1.2, 2.0), (5.5, 6.0)])
+        self.assertEqual(durations, [(0, 2.0)])
+
+        # The second question went unanswered in the recording
+        results = {"audio": {}, "questions": [{"answerDuration": 0, "interviewerTurn": turn} for turn in range(3)]}
+        analysis = dict.fromkeys(["duration", "talkTime", "silence", "longestSilence"], 0.0)
+        analysis.update(candidateTalkTime=7.0, interviewerTalkTime=3.0, answerDurations=[(0, 4.0), (2, 3.0)])
+        apply_analysis(results, analysis)
+        self.assertEqual([question["answerDuration"] for question in results["questions"]], [4, 0, 3])
+
+
+class TestAudioAnalyzer(unittest.TestCase):
+    """Test cases for the AudioAnalyzer class."""
+
+    def test_fills_results(self):
+        """Test that the analysis replaces the durations of the results."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "call.wav")
+            write_recording(path)
+            analyzer = AudioAnalyzer(recordings=FakeRecordings(path))
+            results = {
+                "audio": {"url": "", "duration": 0},
+                "questions": [{"answerDuration": 0, "interviewerTurn": 0}, {"answerDuration": 0, "interviewerTurn": 1}],
+            }
+            try:
+                self.assertTrue(asyncio.run(analyzer.analyze("test-api-key", {"call_id": "call-1"}, results)))
+            finally:
+                analyzer.shutdown()
+
+        self.assertEqual(results["audio"]["duration"], 10)
+        self.assertEqual([question["answerDuration"] for question in results["questions"]], [2, 2])
+        self.assertAlmostEqual(results["audio"]["candidateTalkTime"], 4.5, delta=0.1)
+
+    def test_missing_recording(self):
+        """Test that results are unchanged when the recording is unavailable."""
+        analyzer = AudioAnalyzer(recordings=FakeRecordings(None))
+        results = {"audio": {"url": "", "duration": 7}, "questions": []}
+        self.assertFalse(asyncio.run(analyzer.analyze("test-api-key", {"call_id": "call-1"}, results)))
+        self.assertEqual(results["audio"], {"url": "", "duration": 7})
+
+    def test_retries_until_ready(self):
+        """Test that enrichment retries until the recording becomes available."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "call.wav")
+            write_recording(path)
+            recordings = FakeRecordings(path, ready_after=2)
+            analyzer = AudioAnalyzer(recordings=recordings, attempts=3, retry_seconds=0)
+            results = {"audio": {"url": "", "duration": 0}, "questions": []}
+            try:
+                self.assertTrue(asyncio.run(analyzer.enrich("test-api-key", {"call_id": "call-1"}, results)))
+            finally:
+                analyzer.shutdown()
+
+        self.assertEqual(recordings.requests, 3)
+        self.assertEqual(results["audio"]["duration"], 10)
+
+    def test_unreadable_recording(self):
+        """Test that any failure to read the recording leaves the results unchanged."""
+        analyzer = AudioAnalyzer(recordings=FakeRecordings("/nonexistent/call.wav"), attempts=2, retry_seconds=0)
+        results = {"audio": {"url": "", "duration": 7}, "questions": []}
+        try:
+            self.assertFalse(asyncio.run(analyzer.enrich("test-api-key", {"call_id": "call-1"}, results)))
+        finally:
+            analyzer.shutdown()
+        self.assertEqual(results["audio"], {"url": "", "duration": 7})
+
+
+if __name__ == "__main__":
+    unittest.main()
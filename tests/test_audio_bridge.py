@@ -0,0 +1,266 @@
+"""
+Tests for the server-side audio bridge.
+"""
+import json
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app
+from app.utils.audio_bridge import (
+    AudioSocket, AudioBridge, DirectionMetrics, FrameRing, JitterBuffer, audio_bridges, MULAW
+)
+
+
+RATE = 8000
+FRAME_BYTES = RATE * 20 // 1000 * 2
+
+
+def frame(value):
+    """An audio frame filled with one byte value."""
+    return bytes([value]) * FRAME_BYTES
+
+
+class FakeUltravoxEndpoint(AudioSocket):
+    """
+    Local stand-in for an Ultravox serverWebSocket call. Audio sent to the
+    call is echoed back as agent audio, a text message is answered with a
+    transcript message, and "hangup" ends the call.
+    """
+
+    def __init__(self):
+        self.received = []
+        self.outgoing = asyncio.Queue()
+        self.closed = False
+
+    async def receive(self):
+        return await self.outgoing.get()
+
+    async def send_bytes(self, data):
+        self.received.append(bytes(data))
+        await self.outgoing.put(bytes(data))
+
+    async def send_text(self, text):
+        if text == "hangup":
+            await self.outgoing.put(None)
+            return
+        await self.outgoing.put(json.dumps({"type": "transcript", "role": "agent", "text": text, "final": True}))
+
+    async def close(self):
+        self.closed = True
+
+
+class ScriptedClient(AudioSocket):
+    """A gateway that sends scripted messages and records what it gets."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.audio = []
+        self.texts = []
+        self.closed = False
+
+    async def receive(self):
+        if not self.script:
+            await asyncio.Event().wait()
+        delay, message = self.script.pop(0)
+        await asyncio.sleep(delay)
+        return message
+
+    async def send_bytes(self, data):
+        self.audio.append(bytes(data))
+
+    async def send_text(self, text):
+        self.texts.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestFrameRing(unittest.TestCase):
+    """Test cases for the FrameRing class."""
+
+    def test_reframes_chunks(self):
+        """Test that audio arriving in odd chunk sizes comes out as whole frames."""
+        ring = FrameRing(4, capacity=4)
+        self.assertEqual(ring.write(b"abc", 1.0), (0, 0))
+        self.assertEqual(ring.write(b"defgh", 2.0), (2, 0))
+        view, arrival = ring.pop()
+        self.assertEqual(bytes(view), b"abcd")
+        self.assertEqual(arrival, 2.0)
+        self.assertEqual(bytes(ring.pop()[0]), b"efgh")
+        self.assertIsNone(ring.pop())
+
+    def test_overflow(self):
+        """Test that overflow drops the oldest frame but never the frame being sent."""
+        ring = FrameRing(2, capacity=3)
+        self.assertEqual(ring.write(b"aabbccdd", 0.0), (4, 1))
+        self.assertEqual(bytes(ring.pop()[0]), b"bb")
+
+        sending, _ = ring.pop()
+        self.assertEqual(ring.write(b"eeff", 0.0), (1, 1))
+        self.assertEqual(bytes(sending), b"cc")
+        self.assertEqual(bytes(ring.pop()[0]), b"dd")
+        self.assertEqual(ring.clear(), 1)
+        self.assertEqual(len(ring), 0)
+
+
+class TestJitterBuffer(unittest.TestCase):
+    """Test cases for the JitterBuffer class."""
+
+    def test_paced_playout(self):
+        """Test that frames are held until the target depth and then paced."""
+        metrics = DirectionMetrics()
+
+        async def scenario():
+            buffer = JitterBuffer(FrameRing(4, 10), 0.01, metrics, target_frames=3)
+            sent = []
+            loop = asyncio.get_running_loop()
+
+            async def send(view):
+                sent.append((loop.time(), bytes(view)))
+
+            player = asyncio.create_task(buffer.play(send))
+            buffer.push(b"aaaabbbb")
+            await asyncio.sleep(0.03)
+            self.assertEqual(sent, [])
+
+            buffer.push(b"cccc")
+            await asyncio.sleep(0.05)
+            self.assertEqual([data for _, data in sent], [b"aaaa", b"bbbb", b"cccc"])
+            self.assertGreaterEqual(sent[-1][0] - sent[0][0], 0.015)
+            self.assertEqual(metrics.underruns, 1)
+
+            buffer.push(b"dddd")
+            buffer.close()
+            await asyncio.wait_for(player, 1)
+            self.assertEqual(sent[-1][1], b"dddd")
+
+        asyncio.run(scenario())
+        self.assertEqual(metrics.frames_out, 4)
+        self.assertEqual(metrics.latency.count, 4)
+
+
+class TestAudioBridge(unittest.TestCase):
+    """Test cases for the AudioBridge class."""
+
+    def test_relay_both_ways(self):
+        """Test audio and text relaying against the fake endpoint."""
+        upstream = FakeUltravoxEndpoint()
+        client = ScriptedClient(
+            [(0.0, frame(i)) for i in range(5)]
+            + [(0.0, "Hello"), (0.2, "hangup")]
+        )
+
+        async def scenario():
+            bridge = AudioBridge("call-1", client, upstream, RATE, RATE, jitter_frames=2)
+            await asyncio.wait_for(bridge.run(), 5)
+            return bridge.metrics()
+
+        metrics = asyncio.run(scenario())
+        self.assertEqual(upstream.received, [frame(i) for i in range(5)])
+        self.assertEqual(client.audio, [frame(i) for i in range(5)])
+        self.assertEqual(json.loads(client.texts[0])["text"], "Hello")
+        self.assertTrue(upstream.closed and client.closed)
+        self.assertEqual(metrics["inbound"]["framesOut"], 5)
+        self.assertEqual(metrics["outbound"]["framesOut"], 5)
+        self.assertGreater(metrics["inbound"]["latency"]["maxMs"], 0)
+
+    def test_mulaw_client(self):
+        """Test that a μ-law telephony leg is converted to and from the call's sample rate."""
+        upstream = FakeUltravoxEndpoint()
+        ulaw_frame = bytes([0xFF]) * (8000 * 20 // 1000)
+        client = ScriptedClient([(0.0, ulaw_frame) for _ in range(3)] + [(0.2, "hangup")])
+
+        async def scenario():
+            bridge = AudioBridge("call-1", client, upstream, 16000, 16000, jitter_frames=1,
+                                 client_sample_rate=8000, client_encoding=MULAW)
+            await asyncio.wait_for(bridge.run(), 5)
+
+        asyncio.run(scenario())
+        # 20 ms of PCM16 at 16 kHz towards Ultravox, 20 ms of μ-law at 8 kHz back
+        self.assertEqual([len(data) for data in upstream.received], [640] * 3)
+        self.assertEqual([len(data) for data in client.audio], [160] * 3)
+        self.assertEqual(client.audio[0], ulaw_frame)
+
+    def test_clear_buffer(self):
+        """Test that Ultravox can drop audio buffered for the client."""
+        upstream = FakeUltravoxEndpoint()
+        client = ScriptedClient([])
+
+        async def scenario():
+            bridge = AudioBridge("call-1", client, upstream, RATE, RATE, jitter_frames=10)
+            runner = asyncio.create_task(bridge.run())
+            for i in range(3):
+                await upstream.outgoing.put(frame(i))
+            await upstream.outgoing.put(json.dumps({"type": "playback_clear_buffer"}))
+            await upstream.outgoing.put(None)
+            await asyncio.wait_for(runner, 5)
+            return bridge.metrics()
+
+        metrics = asyncio.run(scenario())
+        self.assertEqual(client.audio, [])
+        self.assertEqual(metrics["outbound"]["dropped"], 3)
+
+
+class TestAudioBridgeEndpoint(unittest.TestCase):
+    """Test cases for the audio bridge WebSocket endpoint."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.endpoint = FakeUltravoxEndpoint()
+
+    def call_details(self, medium):
+        async def details(api_key, call_id):
+            if api_key != "test-api-key":
+                raise HTTPException(status_code=404, detail="Failed to get call details: Not found")
+            return {"callId": call_id, "joinUrl": "wss://example.test/join", "medium": medium}
+        return details
+
+    def test_bridge(self):
+        """Test relaying audio through the endpoint."""
+        async def connect(join_url):
+            return self.endpoint
+
+        medium = {"serverWebSocket": {"inputSampleRate": RATE, "outputSampleRate": RATE}}
+        with patch("app.routers.ultravox.controller_get_call_details", self.call_details(medium)), \
+                patch.object(audio_bridges, "connect", connect):
+            with self.client.websocket_connect("/api/ultravox/ultravox/calls/call-1/audio?apiKey=test-api-key") as websocket:
+                for i in range(4):
+                    websocket.send_bytes(frame(i))
+                echoed = [websocket.receive_bytes() for _ in range(4)]
+                self.assertEqual(echoed, [frame(i) for i in range(4)])
+
+                metrics = self.client.get("/api/ultravox/ultravox/calls/call-1/audio/metrics?apiKey=test-api-key").json()
+                self.assertEqual(len(metrics["bridges"]), 1)
+                websocket.send_text("hangup")
+                with self.assertRaises(WebSocketDisconnect):
+                    websocket.receive_bytes()
+
+            metrics_url = "/api/ultravox/ultravox/calls/call-1/audio/metrics"
+            self.assertEqual(self.client.get(f"{metrics_url}?apiKey=test-api-key").json()["bridges"], [])
+            self.assertEqual(self.client.get(metrics_url).status_code, 401)
+            self.assertEqual(self.client.get(f"{metrics_url}?apiKey=other-key").status_code, 404)
+
+    def test_rejects_other_keys(self):
+        """Test that a key that cannot read the call gets no audio."""
+        medium = {"serverWebSocket": {"inputSampleRate": RATE, "outputSampleRate": RATE}}
+        with patch("app.routers.ultravox.controller_get_call_details", self.call_details(medium)):
+            with self.assertRaises(WebSocketDisconnect) as raised:
+                with self.client.websocket_connect("/api/ultravox/ultravox/calls/call-1/audio?apiKey=other-key"):
+                    pass
+        self.assertEqual(raised.exception.code, 1008)
+
+    def test_rejects_other_media(self):
+        """Test that calls without the serverWebSocket medium are rejected."""
+        with patch("app.routers.ultravox.controller_get_call_details", self.call_details({"webRtc": {}})):
+            with self.assertRaises(WebSocketDisconnect):
+                with self.client.websocket_connect("/api/ultravox/ultravox/calls/call-1/audio?apiKey=test-api-key"):
+                    pass
+
+
+if __name__ == "__main__":
+    unittest.main()
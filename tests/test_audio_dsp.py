@@ -0,0 +1,112 @@
+"""
+Tests for the audio DSP module.
+"""
+import unittest
+
+import numpy as np
+
+from app.utils.audio_dsp import (
+    Resampler, ulaw_to_pcm16, pcm16_to_ulaw, apply_gain, mix
+)
+
+
+def tone(frequency, rate, seconds=1.0, amplitude=8000):
+    time = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * time)).astype(np.int16)
+
+
+def peak_frequency(samples, rate):
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    return np.argmax(spectrum) * rate / len(samples)
+
+
+class TestMuLaw(unittest.TestCase):
+    """Test cases for μ-law conversion."""
+
+    def test_reference_codes(self):
+        """Test codes at the ends of the range and at zero."""
+        self.assertEqual(ulaw_to_pcm16(bytes([0xFF, 0x7F, 0x00, 0x80])).tolist(), [0, 0, -32124, 32124])
+        self.assertEqual(pcm16_to_ulaw(np.array([0, 32767, -32768], dtype=np.int16)).tolist(), [0xFF, 0x80, 0x00])
+
+    def test_round_trip(self):
+        """Test that quantization error stays within the segment step size."""
+        samples = np.arange(-32768, 32768, dtype=np.int16)
+        decoded = ulaw_to_pcm16(pcm16_to_ulaw(samples)).astype(np.int32)
+        error = np.abs(decoded - samples)
+        self.assertLessEqual(error.max(), 1024)
+        small = np.abs(samples.astype(np.int32)) < 100
+        self.assertLessEqual(error[small].max(), 8)
+
+    def test_batches_and_bytes(self):
+        """Test that batched arrays and raw bytes give the same codes."""
+        frames = tone(440, 8000, 0.04).reshape(2, 160)
+        codes = pcm16_to_ulaw(frames)
+        self.assertEqual(codes.shape, (2, 160))
+        self.assertTrue(np.array_equal(codes[1], pcm16_to_ulaw(frames[1].tobytes())))
+
+
+class TestResampler(unittest.TestCase):
+    """Test cases for the Resampler class."""
+
+    def test_streaming_matches_one_shot(self):
+        """Test that resampling frame by frame equals resampling the whole signal."""
+        signal = tone(440, 8000)
+        whole = Resampler(8000, 16000).process(signal)
+        streaming = Resampler(8000, 16000)
+        frames = np.concatenate([streaming.process(signal[i:i + 160]) for i in range(0, len(signal), 160)])
+        self.assertTrue(np.array_equal(whole, frames))
+
+    def test_keeps_frequency(self):
+        """Test that a tone keeps its pitch when up- and downsampled."""
+        up = Resampler(8000, 24000).process(tone(440, 8000))
+        self.assertEqual(len(up), 24000)
+        self.assertAlmostEqual(peak_frequency(up, 24000), 440, delta=2)
+
+        down = Resampler(16000, 8000).process(tone(1000, 16000))
+        self.assertEqual(len(down), 8000)
+        self.assertAlmostEqual(peak_frequency(down, 8000), 1000, delta=2)
+
+    def test_removes_aliases(self):
+        """Test that content above the new Nyquist frequency is filtered out."""
+        down = Resampler(16000, 8000).process(tone(6000, 16000))
+        self.assertLess(np.abs(down[100:]).max(), 200)
+
+    def test_fractional_ratio(self):
+        """Test frame lengths when the ratio does not divide the frame."""
+        resampler = Resampler(44100, 8000)
+        lengths = [len(resampler.process(np.zeros(441, dtype=np.int16))) for _ in range(10)]
+        self.assertEqual(sum(lengths), 800)
+        self.assertEqual(set(lengths), {80})
+
+    def test_batch_rows_are_independent(self):
+        """Test that a batch of calls resamples like each call on its own."""
+        calls = np.stack([tone(300, 8000, 0.1), tone(700, 8000, 0.1)])
+        batched = Resampler(8000, 16000)
+        single = [Resampler(8000, 16000), Resampler(8000, 16000)]
+        for start in range(0, calls.shape[1], 160):
+            together = batched.process(calls[:, start:start + 160])
+            for row, resampler in enumerate(single):
+                self.assertTrue(np.array_equal(together[row], resampler.process(calls[row, start:start + 160])))
+
+
+class TestGainAndMix(unittest.TestCase):
+    """Test cases for gain and mixing."""
+
+    def test_gain_saturates(self):
+        """Test that gain scales samples and clips instead of wrapping."""
+        samples = np.array([1000, -1000, 30000, -30000], dtype=np.int16)
+        self.assertEqual(apply_gain(samples, -6.0206).tolist(), [500, -500, 15000, -15000])
+        self.assertEqual(apply_gain(samples, 6.0206).tolist(), [2000, -2000, 32767, -32768])
+
+    def test_mix(self):
+        """Test mixing with and without gains."""
+        voice = np.array([20000, -20000, 100], dtype=np.int16)
+        prompt = np.array([20000, -20000, 100], dtype=np.int16)
+        self.assertEqual(mix([voice, prompt]).tolist(), [32767, -32768, 200])
+        self.assertEqual(mix([voice, prompt.tobytes()], gains_db=[0.0, -6.0206]).tolist(), [30000, -30000, 150])
+        with self.assertRaises(ValueError):
+            mix([voice, prompt], gains_db=[0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
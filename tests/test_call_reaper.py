@@ -0,0 +1,226 @@
+"""
+Tests for the abandoned call reaper.
+"""
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.admission import AdmissionController
+from app.utils.call_reaper import CallReaper, UNJOINED, IDLE
+from app.utils.message_cache import MessageCache
+from app.utils.results_builder import ResultsBuilder
+from app.utils.session_store import session_store
+from tests.test_admission import FakeAccount
+
+
+class FakeUltravox:
+    """Serves calls like Ultravox does; deleted calls lose all their data."""
+
+    def __init__(self):
+        self.joined = {}
+        self.ended = {}
+        self.messages = {}
+        self.deleted = []
+        self.detail_requests = 0
+
+    def check(self, call_id):
+        if call_id in self.deleted:
+            raise HTTPException(status_code=404, detail="Call not found")
+
+    async def get_call_details(self, api_key, call_id):
+        self.check(call_id)
+        self.detail_requests += 1
+        return {"callId": call_id, "joined": self.joined.get(call_id), "ended": self.ended.get(call_id)}
+
+    async def list_call_messages(self, api_key, call_id, cursor=None):
+        self.check(call_id)
+        return {"results": self.messages.get(call_id, []), "next": None}
+
+    async def list_call_stages(self, api_key, call_id, cursor=None):
+        self.check(call_id)
+        return {"results": [{"callStageId": "stage-1"}], "next": None}
+
+    async def delete_call(self, api_key, call_id):
+        self.deleted.append(call_id)
+
+    def reaper(self, **kwargs):
+        cache = MessageCache(fetch_messages=self.list_call_messages)
+        self.results = ResultsBuilder(cache=cache, fetch_call_details=self.get_call_details,
+                                      fetch_stages=self.list_call_stages, store={})
+        return CallReaper(self.get_call_details, self.delete_call, cache=cache, **kwargs)
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime.now().timestamp()
+
+    def __call__(self):
+        return self.now
+
+
+def live_record(call_id, created_ago=0.0, started=False):
+    created_at = datetime.now() - timedelta(seconds=created_ago)
+    record = {
+        "call_id": call_id,
+        "api_key": "key",
+        "created_at": created_at.isoformat(),
+        "status": "in_progress" if started else "created",
+        "job_id": "job-1",
+    }
+    if started:
+        record["start_time"] = created_at.isoformat()
+    return record
+
+
+class TestCallReaper(unittest.TestCase):
+    """Test cases for the CallReaper class."""
+
+    def setUp(self):
+        self.ultravox = FakeUltravox()
+        self.clock = Clock()
+        self.admission = AdmissionController(fetch_account=FakeAccount(allowed=1).fetch)
+        self.reaper = self.ultravox.reaper(admission=self.admission, idle_seconds=300, batch_size=2, clock=self.clock)
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def hold_slot(self, call_id):
+        async def scenario():
+            async with self.admission.reserve("key") as reservation:
+                reservation.bind(call_id)
+
+        asyncio.run(scenario())
+
+    def test_unjoined_calls(self):
+        """Test that calls past their join deadline are ended unless they were joined."""
+        session_store["fresh"] = live_record("call-1", created_ago=5)
+        session_store["late"] = live_record("call-2", created_ago=120)
+        session_store["stale"] = live_record("call-3", created_ago=120)
+        session_store["scheduled"] = dict(live_record("call-4", created_ago=3600),
+                                          join_expires_at=(datetime.now() + timedelta(minutes=5)).isoformat())
+        session_store["done"] = dict(live_record("call-5", created_ago=120), status="completed")
+        self.ultravox.joined["call-3"] = "2030-01-01T00:00:00Z"
+        self.hold_slot("call-2")
+
+        ended = asyncio.run(self.reaper.sweep())
+
+        self.assertEqual(ended, ["late"])
+        self.assertEqual(self.ultravox.deleted, ["call-2"])
+        # Checked before ending, and once more when ending
+        self.assertEqual(self.ultravox.detail_requests, 3)
+        record = session_store["late"]
+        self.assertEqual((record["status"], record["end_reason"], record["phase"]), ("ended", UNJOINED, "ended"))
+        self.assertEqual(self.admission.accounts["key"].active, 0)
+        self.assertEqual(session_store["stale"]["status"], "in_progress")
+
+    def test_idle_calls(self):
+        """Test that joined calls are ended after going quiet for the idle period."""
+        session_store["quiet"] = live_record("call-1", started=True)
+        session_store["talking"] = live_record("call-2", started=True)
+        self.ultravox.joined.update({"call-1": "2030-01-01T00:00:00Z", "call-2": "2030-01-01T00:00:00Z"})
+        self.ultravox.messages["call-1"] = [{"role": "MESSAGE_ROLE_AGENT", "text": "Tell me about yourself."},
+                                            {"role": "MESSAGE_ROLE_USER", "text": "I build APIs."}]
+
+        async def scenario():
+            self.assertEqual(await self.reaper.sweep(), [])
+            self.clock.now += 200
+            self.ultravox.messages["call-2"] = [{"role": "USER", "text": "Hello"}]
+            self.assertEqual(await self.reaper.sweep(), [])
+            self.clock.now += 200
+            self.assertEqual(await self.reaper.sweep(), ["quiet"])
+
+        asyncio.run(scenario())
+        self.assertEqual(session_store["quiet"]["end_reason"], IDLE)
+        self.assertEqual(session_store["talking"]["status"], "in_progress")
+        self.assertEqual(self.reaper.snapshot(), {"watchedCalls": 1, "reapedCalls": 1})
+
+        # The joined call is not deleted, so its results and recording are
+        # complete once it ends upstream
+        self.assertEqual(self.ultravox.deleted, [])
+        self.ultravox.ended["call-1"] = "2030-01-01T00:10:00Z"
+        results = asyncio.run(self.ultravox.results.get_results("quiet", session_store["quiet"], "key"))
+        self.assertTrue(results["complete"])
+        self.assertTrue(results["audio"]["url"])
+        self.assertEqual(results["questions"][0]["answerTranscript"], "I build APIs.")
+
+    def test_ended_upstream_is_not_deleted(self):
+        """Test that a call that already ended upstream keeps its data."""
+        session_store["done"] = live_record("call-1", started=True)
+        self.ultravox.joined["call-1"] = "2030-01-01T00:00:00Z"
+        self.ultravox.ended["call-1"] = "2030-01-01T00:10:00Z"
+
+        asyncio.run(self.reaper.end("done", session_store["done"], IDLE))
+
+        self.assertEqual(self.ultravox.deleted, [])
+        self.assertEqual(session_store["done"]["status"], "completed")
+        results = asyncio.run(self.ultravox.results.get_results("done", session_store["done"], "key"))
+        self.assertTrue(results["audio"]["url"])
+
+    def test_failed_end_keeps_session_live(self):
+        """Test that a call that could not be ended is retried on the next sweep."""
+        session_store["late"] = live_record("call-1", created_ago=120)
+
+        async def failing(api_key, call_id):
+            raise RuntimeError("upstream unavailable")
+
+        self.reaper.delete_call = failing
+        self.assertEqual(asyncio.run(self.reaper.sweep()), [])
+        self.assertEqual(session_store["late"]["status"], "created")
+
+
+class TestEndSessionEndpoint(unittest.TestCase):
+    """Test cases for ending a session through the API."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.ultravox = FakeUltravox()
+        patcher = patch("app.routers.tezhire.call_reaper", self.ultravox.reaper())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def test_end_session(self):
+        """Test that ending a session keeps the joined call and its recording."""
+        session_store["session-1"] = live_record("call-1", created_ago=1200, started=True)
+        self.ultravox.joined["call-1"] = session_store["session-1"]["start_time"]
+
+        response = self.client.post("/api/tezhire/interview-sessions/session-1/end",
+                                    json={"reason": "Interview completed"}, headers={"X-API-Key": "test-api-key"})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "ended")
+        self.assertGreaterEqual(data["duration"], 1200)
+        self.assertEqual(self.ultravox.deleted, [])
+        self.assertEqual(session_store["session-1"]["end_reason"], "Interview completed")
+
+        # Ending again does not go upstream
+        requests = self.ultravox.detail_requests
+        self.client.post("/api/tezhire/interview-sessions/session-1/end", headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(self.ultravox.detail_requests, requests)
+
+    def test_end_unjoined_session(self):
+        """Test that ending a session nobody joined deletes its call."""
+        session_store["session-1"] = live_record("call-1", created_ago=10)
+
+        response = self.client.post("/api/tezhire/interview-sessions/session-1/end",
+                                    headers={"X-API-Key": "test-api-key"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ultravox.deleted, ["call-1"])
+        self.assertEqual(session_store["session-1"]["end_reason"], "ended_by_api")
+
+    def test_unknown_session(self):
+        """Test ending a session that does not exist."""
+        response = self.client.post("/api/tezhire/interview-sessions/missing/end",
+                                    headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
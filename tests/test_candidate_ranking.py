@@ -0,0 +1,100 @@
+"""
+Tests for the candidate ranking index.
+"""
+import unittest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.candidate_ranking import CandidateRankingIndex, ranking_index
+
+
+def make_results(session_id, candidate_id, overall_score, fit_score, job_id="job-456"):
+    """Create a scored results payload for tests."""
+    return {
+        "sessionId": session_id,
+        "candidateId": candidate_id,
+        "companyId": "company-789",
+        "jobId": job_id,
+        "overallScore": overall_score,
+        "feedback": {"fitScore": fit_score, "recommendation": "Pending review"},
+    }
+
+
+class TestCandidateRankingIndex(unittest.TestCase):
+    """Test cases for the CandidateRankingIndex class."""
+
+    def setUp(self):
+        """Build a small index."""
+        self.index = CandidateRankingIndex()
+        self.index.index_results(make_results("session-1", "candidate-1", 80, 60))
+        self.index.index_results(make_results("session-2", "candidate-2", 90, 40))
+        self.index.index_results(make_results("session-3", "candidate-3", 80, 70))
+        self.index.index_results(make_results("session-4", "candidate-4", 95, 95, job_id="job-other"))
+
+    def test_top_candidates(self):
+        """Test ordering by score with ties broken by the other score."""
+        top = self.index.top("job-456")
+        self.assertEqual([entry["sessionId"] for entry in top], ["session-2", "session-3", "session-1"])
+        self.assertEqual([entry["rank"] for entry in top], [1, 2, 3])
+
+        by_fit = self.index.top("job-456", limit=2, sort_by="fitScore")
+        self.assertEqual([entry["sessionId"] for entry in by_fit], ["session-3", "session-1"])
+
+    def test_filters(self):
+        """Test the minimum score filters."""
+        top = self.index.top("job-456", min_overall_score=85)
+        self.assertEqual([entry["sessionId"] for entry in top], ["session-2"])
+        top = self.index.top("job-456", min_overall_score=80, min_fit_score=65)
+        self.assertEqual([entry["sessionId"] for entry in top], ["session-3"])
+        self.assertEqual(self.index.top("unknown"), [])
+
+    def test_reinterview_replaces_candidate(self):
+        """Test that a candidate is ranked by their latest interview."""
+        self.index.index_results(make_results("session-5", "candidate-1", 99, 99))
+        top = self.index.top("job-456")
+        self.assertEqual(top[0]["sessionId"], "session-5")
+        self.assertEqual(self.index.count("job-456"), 3)
+
+        self.index.remove_session("session-1")
+        self.assertEqual(self.index.count("job-456"), 3)
+        self.index.remove_session("session-5")
+        self.assertEqual(self.index.count("job-456"), 2)
+
+
+class TestRankingEndpoint(unittest.TestCase):
+    """Test cases for the candidate ranking endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+
+    def test_rank_candidates(self):
+        """Test ranking candidates through the API."""
+        ranking_index.index_results(make_results("ranking-1", "candidate-1", 70, 90, job_id="ranking-job"))
+        ranking_index.index_results(make_results("ranking-2", "candidate-2", 85, 50, job_id="ranking-job"))
+        response = self.client.get(
+            "/api/tezhire/jobs/ranking-job/rankings",
+            params={"sortBy": "fitScore", "limit": 1},
+            headers={"X-API-Key": "test-api-key"}
+        )
+        ranking_index.remove_session("ranking-1")
+        ranking_index.remove_session("ranking-2")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(len(data["results"]), 1)
+        self.assertEqual(data["results"][0]["candidateId"], "candidate-1")
+
+    def test_rank_candidates_invalid_sort(self):
+        """Test ranking by an unknown score."""
+        response = self.client.get(
+            "/api/tezhire/jobs/ranking-job/rankings",
+            params={"sortBy": "name"},
+            headers={"X-API-Key": "test-api-key"}
+        )
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,302 @@
+"""
+Tests for interview scheduling.
+"""
+import asyncio
+import copy
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.tezhire import parse_slot_time
+from app.utils.interview_scheduler import TimerWheel, InterviewScheduler, SessionAlreadyJoined
+from app.utils.session_store import session_store
+from tests.test_interview_tools import SESSION_REQUEST
+
+
+class FakeUltravox:
+    """Records created and deleted calls."""
+
+    def __init__(self):
+        self.created = []
+        self.deleted = []
+        self.joined = {}
+        self.fail = False
+
+    async def create_call(self, api_key, call_config):
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        self.created.append(call_config)
+        call_id = f"call-{len(self.created)}"
+        return {"callId": call_id, "joinUrl": f"wss://example.com/{call_id}"}
+
+    async def delete_call(self, api_key, call_id):
+        self.deleted.append(call_id)
+
+    async def get_call_details(self, api_key, call_id):
+        return {"callId": call_id, "joined": self.joined.get(call_id)}
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimerWheel(unittest.TestCase):
+    """Test cases for the TimerWheel class."""
+
+    def test_due_timers(self):
+        """Test that timers fire at their tick, across wheel turns."""
+        wheel = TimerWheel(tick=1.0, size=8, now=100.0)
+        wheel.schedule("soon", 103.0)
+        wheel.schedule("later", 120.5)
+        self.assertEqual(wheel.advance(102.0), [])
+        self.assertEqual(wheel.advance(103.0), ["soon"])
+        # "later" shares a slot with tick 113 but is a turn further out
+        self.assertEqual(wheel.advance(113.0), [])
+        self.assertEqual(wheel.advance(121.0), ["later"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel_and_reschedule(self):
+        """Test that cancelled timers never fire and moved timers fire once."""
+        wheel = TimerWheel(tick=1.0, size=8, now=0.0)
+        wheel.schedule("a", 2.0)
+        wheel.schedule("b", 2.0)
+        self.assertTrue(wheel.cancel("a"))
+        self.assertFalse(wheel.cancel("a"))
+        wheel.schedule("b", 5.0)
+        self.assertEqual(wheel.advance(4.0), [])
+        self.assertEqual(wheel.advance(5.0), ["b"])
+
+    def test_long_pause(self):
+        """Test that a pause longer than a wheel turn fires everything due."""
+        wheel = TimerWheel(tick=1.0, size=4, now=0.0)
+        for i in range(10):
+            wheel.schedule(f"t{i}", i + 1.0)
+        self.assertEqual(sorted(wheel.advance(50.0)), sorted(f"t{i}" for i in range(10)))
+
+    def test_past_deadline(self):
+        """Test that timers in the past fire on the next tick."""
+        wheel = TimerWheel(tick=1.0, size=8, now=10.0)
+        wheel.schedule("late", 3.0)
+        self.assertEqual(wheel.advance(11.0), ["late"])
+
+
+class TestInterviewScheduler(unittest.TestCase):
+    """Test cases for the InterviewScheduler class."""
+
+    def setUp(self):
+        self.ultravox = FakeUltravox()
+        self.clock = Clock()
+        self.scheduler = InterviewScheduler(
+            self.ultravox.create_call, self.ultravox.delete_call, self.ultravox.get_call_details,
+            lead_seconds=120, grace_seconds=600, clock=self.clock,
+        )
+        session_store.clear()
+        session_store["session-1"] = {"status": "scheduled", "call_id": None, "join_url": None}
+        self.addCleanup(session_store.clear)
+
+    def test_precreated_call(self):
+        """Test that the call is created at the lead time and joined instantly."""
+        start = self.clock.now + 3600
+
+        async def scenario():
+            create_at = self.scheduler.schedule("session-1", "key", {"systemPrompt": "Hi"}, start)
+            self.assertEqual(create_at, start - 120)
+            self.assertEqual(self.scheduler.fire_due(create_at - 1), [])
+            self.assertEqual(self.scheduler.fire_due(create_at), ["session-1"])
+            await asyncio.sleep(0)
+
+            record = session_store["session-1"]
+            self.assertEqual(record["status"], "created")
+            self.assertEqual(self.ultravox.created[0]["joinTimeout"], "720s")
+
+            self.clock.now = start
+            self.assertEqual(await self.scheduler.join("session-1"), "wss://example.com/call-1")
+            self.assertEqual(len(self.ultravox.created), 1)
+
+        asyncio.run(scenario())
+
+    def test_early_join_creates_on_demand(self):
+        """Test joining before the call was pre-created."""
+        async def scenario():
+            self.scheduler.schedule("session-1", "key", {}, self.clock.now + 3600)
+            self.assertEqual(await self.scheduler.join("session-1"), "wss://example.com/call-1")
+            self.assertNotIn("session-1", self.scheduler.wheel)
+            # Capped at the longest joinTimeout Ultravox accepts
+            self.assertEqual(self.ultravox.created[0]["joinTimeout"], "3600s")
+
+        asyncio.run(scenario())
+
+    def test_expired_call_is_recreated(self):
+        """Test joining after the pre-created call expired unjoined."""
+        async def scenario():
+            start = self.clock.now + 60
+            self.scheduler.schedule("session-1", "key", {}, start)
+            self.scheduler.fire_due(self.clock.now + 1)
+            await asyncio.sleep(0)
+
+            self.clock.now = start + 601
+            self.assertEqual(await self.scheduler.join("session-1"), "wss://example.com/call-2")
+            self.assertEqual(self.ultravox.created[1]["joinTimeout"], "600s")
+            self.assertEqual(self.ultravox.deleted, ["call-1"])
+
+        asyncio.run(scenario())
+
+    def test_rejoin_after_deadline(self):
+        """Test that a candidate reconnecting after the join deadline keeps their call."""
+        async def scenario():
+            start = self.clock.now + 60
+            self.scheduler.schedule("session-1", "key", {}, start)
+            self.scheduler.fire_due(self.clock.now + 1)
+            await asyncio.sleep(0)
+            # Joined upstream, but no status poll has seen it yet
+            self.ultravox.joined["call-1"] = "2030-01-01T09:00:00Z"
+
+            self.clock.now = start + 700
+            self.assertEqual(await self.scheduler.join("session-1"), "wss://example.com/call-1")
+            self.assertEqual(len(self.ultravox.created), 1)
+            self.assertEqual(self.ultravox.deleted, [])
+            record = session_store["session-1"]
+            self.assertEqual((record["call_id"], record["status"]), ("call-1", "in_progress"))
+
+        asyncio.run(scenario())
+
+    def test_failed_creation(self):
+        """Test that a failed pre-creation is retried when the candidate joins."""
+        async def scenario():
+            self.scheduler.schedule("session-1", "key", {}, self.clock.now)
+            self.ultravox.fail = True
+            self.scheduler.fire_due(self.clock.now + 1)
+            await asyncio.sleep(0)
+            with self.assertRaises(RuntimeError):
+                await self.scheduler.join("session-1")
+
+            self.ultravox.fail = False
+            self.assertEqual(await self.scheduler.join("session-1"), "wss://example.com/call-1")
+
+        asyncio.run(scenario())
+
+    def test_cancel(self):
+        """Test that cancelling removes the timer or deletes the created call."""
+        async def scenario():
+            self.scheduler.schedule("session-1", "key", {}, self.clock.now + 3600)
+            self.assertTrue(await self.scheduler.cancel("session-1"))
+            self.assertNotIn("session-1", self.scheduler.wheel)
+            self.assertEqual(self.scheduler.fire_due(self.clock.now + 7200), [])
+            self.assertFalse(await self.scheduler.cancel("session-1"))
+
+            self.clock.now += 7200
+            self.scheduler.schedule("session-1", "key", {}, self.clock.now)
+            self.assertEqual(self.scheduler.fire_due(self.clock.now + 1), ["session-1"])
+            # Cancelled while the call is still being created
+            self.assertTrue(await self.scheduler.cancel("session-1"))
+            self.assertEqual(self.ultravox.deleted, ["call-1"])
+            self.assertIsNone(session_store["session-1"]["call_id"])
+
+        asyncio.run(scenario())
+
+    def test_cancel_keeps_joined_call(self):
+        """Test that a call the candidate already joined is not cancelled."""
+        async def scenario():
+            self.scheduler.schedule("session-1", "key", {}, self.clock.now + 60)
+            self.scheduler.fire_due(self.clock.now + 1)
+            await asyncio.sleep(0)
+            self.ultravox.joined["call-1"] = "2030-01-01T09:00:00Z"
+
+            with self.assertRaises(SessionAlreadyJoined):
+                await self.scheduler.cancel("session-1")
+            self.assertEqual(self.ultravox.deleted, [])
+            self.assertIn("session-1", self.scheduler.entries)
+            self.assertEqual(session_store["session-1"]["status"], "in_progress")
+
+        asyncio.run(scenario())
+
+
+class TestSchedulingEndpoints(unittest.TestCase):
+    """Test cases for the scheduling endpoints."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.ultravox = FakeUltravox()
+        self.scheduler = InterviewScheduler(self.ultravox.create_call, self.ultravox.delete_call,
+                                            self.ultravox.get_call_details, lead_seconds=120)
+        patcher = patch("app.routers.tezhire.interview_scheduler", self.scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def schedule(self, scheduled_at, time_zone="UTC"):
+        payload = copy.deepcopy(SESSION_REQUEST)
+        payload["scheduledAt"] = scheduled_at
+        payload["configuration"]["timeZone"] = time_zone
+        return self.client.post("/api/tezhire/interview-sessions/scheduled", json=payload,
+                                headers={"X-API-Key": "test-api-key"})
+
+    def test_parse_slot_time(self):
+        """Test that times without an offset use the session's time zone."""
+        slot = parse_slot_time("2030-06-01T09:00:00", "Europe/Berlin")
+        self.assertEqual(slot.astimezone(timezone.utc).hour, 7)
+        self.assertEqual(parse_slot_time("2030-06-01T09:00:00Z", "Europe/Berlin").hour, 9)
+        with self.assertRaises(ValueError):
+            parse_slot_time("2030-06-01T09:00:00", "Mars/Olympus")
+
+    def test_schedule_join_cancel(self):
+        """Test scheduling a session, joining it and cancelling another."""
+        start = datetime.now(timezone.utc) + timedelta(hours=1)
+        response = self.schedule(start.isoformat())
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "scheduled")
+        self.assertAlmostEqual(
+            datetime.fromisoformat(body["callCreatedAt"]).timestamp(), start.timestamp() - 120, delta=1
+        )
+        status = self.client.get("/api/tezhire/interview-sessions/session-1", headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(status.json()["status"], "scheduled")
+        # Nothing to read before the call exists
+        for path in ("results", "recording"):
+            response = self.client.get(f"/api/tezhire/interview-sessions/session-1/{path}",
+                                       headers={"X-API-Key": "test-api-key"})
+            self.assertEqual(response.status_code, 409)
+
+        response = self.client.get("/api/tezhire/interview-sessions/session-1/join")
+        self.assertEqual(response.json()["joinUrl"], "wss://example.com/call-1")
+
+        # Only the key that scheduled the session can cancel it
+        response = self.client.delete("/api/tezhire/interview-sessions/session-1/schedule",
+                                      headers={"X-API-Key": "other-key"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.ultravox.deleted, [])
+
+        response = self.client.delete("/api/tezhire/interview-sessions/session-1/schedule",
+                                      headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(response.json()["status"], "cancelled")
+        self.assertEqual(self.ultravox.deleted, ["call-1"])
+        self.assertEqual(self.client.get("/api/tezhire/interview-sessions/session-1/join").status_code, 404)
+
+    def test_joined_session_is_not_cancelled(self):
+        """Test that cancelling a session the candidate joined answers 409."""
+        self.schedule((datetime.now(timezone.utc) + timedelta(hours=1)).isoformat())
+        self.client.get("/api/tezhire/interview-sessions/session-1/join")
+        self.ultravox.joined["call-1"] = "2030-01-01T09:00:00Z"
+
+        response = self.client.delete("/api/tezhire/interview-sessions/session-1/schedule",
+                                      headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.ultravox.deleted, [])
+        self.assertEqual(session_store["session-1"]["status"], "in_progress")
+
+    def test_invalid_slot(self):
+        """Test rejecting an unparseable slot time."""
+        self.assertEqual(self.schedule("next tuesday").status_code, 400)
+        self.assertEqual(self.schedule("2030-06-01T09:00:00", "Mars/Olympus").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Tests for staged interview prompts.
+"""
+import copy
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.tezhire import SessionRequest
+from app.routers.tezhire import generate_system_prompt
+from app.utils.interview_stages import (
+    StagePlan, stage_context, stage_prompt, render_stage_prompt, STAGE_FIELDS, STAGE_RESPONSE_HEADER
+)
+from app.utils.interview_tools import ToolPlanRegistry, TOOL_TOKEN_HEADER, TOOL_INSTRUCTIONS
+from app.utils.session_progress import SessionProgress
+from app.utils.session_store import session_store
+from tests.test_interview_tools import SESSION_REQUEST
+
+
+def make_request(name="Jane Doe"):
+    payload = copy.deepcopy(SESSION_REQUEST)
+    payload["candidate"]["name"] = name
+    return SessionRequest(**payload)
+
+
+class TestStagePrompts(unittest.TestCase):
+    """Test cases for stage prompt rendering and caching."""
+
+    def test_stage_prompts_are_small(self):
+        """Test that every stage prompt is smaller than the full prompt."""
+        request = make_request()
+        full = generate_system_prompt(request)
+        plan = StagePlan(stage_context(request), [])
+        for phase, prompt in plan.prompts.items():
+            self.assertLess(len(prompt), len(full), phase)
+        self.assertIn("Jane Doe", plan.initial_prompt)
+        self.assertIn("Kafka, System design", plan.prompts["technical"])
+
+    def test_prompts_shared_across_candidates(self):
+        """Test that stages without candidate fields are rendered once per job."""
+        self.assertNotIn("candidate_name", STAGE_FIELDS["technical"])
+        render_stage_prompt.cache_clear()
+        first = stage_prompt("technical", stage_context(make_request("Jane Doe")))
+        second = stage_prompt("technical", stage_context(make_request("John Roe")))
+        self.assertIs(first, second)
+        self.assertEqual(render_stage_prompt.cache_info().hits, 1)
+        self.assertNotEqual(stage_prompt("intro", stage_context(make_request("Jane Doe"))),
+                            stage_prompt("intro", stage_context(make_request("John Roe"))))
+
+    def test_new_stage(self):
+        """Test the encoded new-stage configuration."""
+        plan = StagePlan(stage_context(make_request()), [{"toolName": "hangUp"}], TOOL_INSTRUCTIONS)
+        stage = json.loads(plan.new_stage("wrap_up", b'{"question":"Why \\"this\\" role?"}'))
+        self.assertEqual(stage["systemPrompt"], plan.prompts["wrap_up"])
+        self.assertTrue(stage["systemPrompt"].endswith(TOOL_INSTRUCTIONS))
+        self.assertEqual(stage["selectedTools"], [{"toolName": "hangUp"}])
+        self.assertEqual(json.loads(stage["toolResultText"]), {"question": 'Why "this" role?'})
+        self.assertIsNone(plan.new_stage("ended", b"{}"))
+
+
+class TestStagedSession(unittest.TestCase):
+    """Test cases for staged sessions end to end."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.registry = ToolPlanRegistry(base_url="https://tezhire.example.com")
+        patcher = patch("app.routers.tezhire.tool_plans", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def create_session(self):
+        """Create a session and return the call configurations sent upstream."""
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(201, json={"callId": "call-1", "joinUrl": "wss://example.com/join"})
+
+        real_client = httpx.AsyncClient
+        with patch("app.routers.tezhire.httpx.AsyncClient",
+                   lambda *args, **kwargs: real_client(transport=httpx.MockTransport(handler))):
+            self.client.post("/api/tezhire/interview-sessions", json=SESSION_REQUEST,
+                             headers={"X-API-Key": "test-api-key"})
+        return sent
+
+    def test_tool_call_starts_new_stage(self):
+        """Test that a session starts in the intro stage and moves on from a tool call."""
+        sent = self.create_session()
+
+        plan = self.registry.get("session-1")
+        self.assertEqual(sent[0]["systemPrompt"], plan.stages.initial_prompt)
+        self.assertEqual(sent[0]["initialState"], {"phase": "intro"})
+
+        response = self.client.post("/api/tezhire/interview-sessions/session-1/tools/nextQuestion",
+                                    headers={TOOL_TOKEN_HEADER: plan.token})
+        self.assertEqual(response.headers[STAGE_RESPONSE_HEADER.lower()], "new-stage")
+        stage = response.json()
+        self.assertEqual(stage["systemPrompt"], plan.stages.prompts["technical"])
+        self.assertEqual(json.loads(stage["toolResultText"])["question"], "Why this role?")
+
+        # Staying in the same phase answers with the plain tool result
+        response = self.client.post("/api/tezhire/interview-sessions/session-1/tools/nextQuestion",
+                                    headers={TOOL_TOKEN_HEADER: plan.token})
+        self.assertNotIn(STAGE_RESPONSE_HEADER.lower(), response.headers)
+        self.assertEqual(response.json()["topic"], "Kafka")
+
+    def test_stage_follows_phase_from_messages(self):
+        """Test that a phase reached through call messages still moves the call to its stage."""
+        self.create_session()
+        plan = self.registry.get("session-1")
+        record = session_store["session-1"]
+
+        # The greeting, then a background question moves the phase on
+        progress = SessionProgress([], [])
+        progress.fold([
+            {"ordinal": 0, "role": "ASSISTANT", "text": "Hi, how are you today?"},
+            {"ordinal": 1, "role": "USER", "text": "Good, thanks."},
+            {"ordinal": 2, "role": "ASSISTANT", "text": "What is your background?"},
+        ], "")
+        progress.apply(record)
+        self.assertEqual(record["phase"], "technical")
+
+        response = self.client.post("/api/tezhire/interview-sessions/session-1/tools/nextQuestion",
+                                    headers={TOOL_TOKEN_HEADER: plan.token})
+        self.assertEqual(response.headers[STAGE_RESPONSE_HEADER.lower()], "new-stage")
+        self.assertEqual(response.json()["systemPrompt"], plan.stages.prompts["technical"])
+        self.assertEqual(plan.stages.phase, "technical")
+
+
+if __name__ == "__main__":
+    unittest.main()
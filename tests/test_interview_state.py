@@ -0,0 +1,141 @@
+"""
+Tests for the interview state machine.
+"""
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.interview_state import (
+    advance, message_event, debug_view, next_prompt, PHASE_HISTORY_SIZE, PHASE_PROMPTS,
+    QUESTION_ASKED, TECHNICAL_QUESTION, BEHAVIORAL_QUESTION, WRAP_UP_CUE, TIME_LOW, CALL_ENDED
+)
+from app.utils.interview_tools import ToolPlanRegistry, TOOL_TOKEN_HEADER
+from app.utils.session_progress import SessionProgress
+from app.utils.session_store import session_store, live_progress
+
+
+class TestStateMachine(unittest.TestCase):
+    """Test cases for phase transitions."""
+
+    def test_transitions(self):
+        """Test a full interview from intro to ended."""
+        record = {}
+        self.assertEqual(advance(record, TECHNICAL_QUESTION), "technical")
+        self.assertEqual(advance(record, BEHAVIORAL_QUESTION), "behavioral")
+        self.assertEqual(advance(record, TECHNICAL_QUESTION), "technical")
+        self.assertEqual(advance(record, TIME_LOW), "wrap_up")
+        self.assertEqual(advance(record, CALL_ENDED), "ended")
+        self.assertEqual([step["to"] for step in record["phase_history"]],
+                         ["technical", "behavioral", "technical", "wrap_up", "ended"])
+        self.assertEqual(next_prompt(record), "")
+
+    def test_ignored_events(self):
+        """Test that events without a transition leave the state alone."""
+        record = {"phase": "wrap_up"}
+        self.assertIsNone(advance(record, BEHAVIORAL_QUESTION))
+        self.assertIsNone(advance({"phase": "ended"}, CALL_ENDED))
+        self.assertIsNone(advance({}, "unknown"))
+        self.assertNotIn("phase_history", record)
+
+    def test_history_is_bounded(self):
+        """Test that only the latest transitions are kept."""
+        record = {"phase": "technical"}
+        for _ in range(PHASE_HISTORY_SIZE):
+            advance(record, BEHAVIORAL_QUESTION)
+            advance(record, TECHNICAL_QUESTION)
+        self.assertEqual(len(record["phase_history"]), PHASE_HISTORY_SIZE)
+
+    def test_message_events(self):
+        """Test the events signalled by agent messages."""
+        self.assertEqual(message_event("Tell me about a time you disagreed with a colleague."), BEHAVIORAL_QUESTION)
+        self.assertEqual(message_event("Do you have any questions for me?"), WRAP_UP_CUE)
+        self.assertEqual(message_event("How does Kafka partition a topic?"), QUESTION_ASKED)
+        self.assertIsNone(message_event("Thanks, that makes sense."))
+
+    def test_progress_floor(self):
+        """Test that the phase sets a floor under the progress estimate."""
+        record = {"interview_duration": 30, "phase": "wrap_up"}
+        self.assertEqual(live_progress(record, 60), 90)
+        self.assertEqual(live_progress(dict(record, phase="intro"), 60), 3)
+
+    def test_messages_advance_state(self):
+        """Test that folded messages advance the session's phase."""
+        progress = SessionProgress([], [])
+        record = {}
+        progress.fold([
+            {"role": "ASSISTANT", "text": "Hi, how are you today?", "ordinal": 0},
+            {"role": "USER", "text": "Good, thanks.", "ordinal": 1},
+        ], "2024-01-01T00:00:00")
+        progress.apply(record)
+        self.assertNotIn("phase", record)
+
+        progress.fold([
+            {"role": "ASSISTANT", "text": "How would you design a rate limiter?", "ordinal": 2},
+            {"role": "USER", "text": "With a token bucket.", "ordinal": 3},
+            {"role": "ASSISTANT", "text": "Tell me about a time you missed a deadline.", "ordinal": 4},
+        ], "2024-01-01T00:05:00")
+        progress.apply(record)
+        self.assertEqual(record["phase"], "behavioral")
+        self.assertEqual([step["event"] for step in record["phase_history"]],
+                         [QUESTION_ASKED, BEHAVIORAL_QUESTION])
+
+
+class TestStateEndpoints(unittest.TestCase):
+    """Test cases for tool-driven transitions and the debug view."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.registry = ToolPlanRegistry(base_url="https://tezhire.example.com")
+        patcher = patch("app.routers.tezhire.tool_plans", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_store.clear()
+        session_store["session-1"] = {"call_id": "call-1", "status": "in_progress", "job_id": "job-1"}
+        self.addCleanup(session_store.clear)
+
+    def call(self, tool, token):
+        return self.client.post(
+            f"/api/tezhire/interview-sessions/session-1/tools/{tool}", headers={TOOL_TOKEN_HEADER: token}
+        )
+
+    def test_tools_advance_state(self):
+        """Test that served questions move the phase and update the call state."""
+        plan = self.registry.create("session-1", ["Tell me about a time you led a project."], ["Kafka"], [], 30)
+
+        response = self.call("nextQuestion", plan.token)
+        self.assertEqual(response.json()["phase"], "behavioral")
+        self.assertEqual(json.loads(response.headers["x-ultravox-update-call-state"]), {"phase": "behavioral"})
+
+        response = self.call("nextQuestion", plan.token)
+        self.assertEqual(response.json()["phase"], "technical")
+        self.assertEqual(session_store["session-1"]["phase"], "technical")
+
+        # Same phase again, so the call state is left alone
+        self.assertNotIn("x-ultravox-update-call-state", self.call("nextQuestion", plan.token).headers)
+
+        self.call("nextQuestion", plan.token)
+        self.assertEqual(session_store["session-1"]["phase"], "wrap_up")
+
+    def test_debug_view(self):
+        """Test the debug view of a session's state machine."""
+        advance(session_store["session-1"], TECHNICAL_QUESTION, now="2024-01-01T00:01:00")
+        response = self.client.get("/api/tezhire/interview-sessions/session-1/state",
+                                   headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(response.status_code, 200)
+        view = response.json()
+        self.assertEqual(view["phase"], "technical")
+        self.assertEqual(view["phaseStartedAt"], "2024-01-01T00:01:00")
+        self.assertEqual(view["nextPrompt"], PHASE_PROMPTS["technical"])
+        self.assertIn({"event": "behavioral_question", "to": "behavioral"}, view["acceptedEvents"])
+        self.assertEqual(view, debug_view("session-1", session_store["session-1"]))
+
+        response = self.client.get("/api/tezhire/interview-sessions/missing/state",
+                                   headers={"X-API-Key": "test-api-key"})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Tests for the in-call interview tools.
+"""
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.interview_tools import (
+    QuestionPlan, ToolPlanRegistry, TOOL_TOKEN_HEADER, TOOLS_WRAP_UP_MINUTES
+)
+from app.utils.session_store import session_store
+
+
+SESSION_REQUEST = {
+    "session": {"sessionId": "session-1", "callbackUrl": "https://example.com/callback"},
+    "candidate": {
+        "candidateId": "candidate-1",
+        "name": "Jane Doe",
+        "email": "jane@example.com",
+        "resumeData": {"skills": ["Python"], "experience": [], "education": [], "projects": [], "rawText": "Jane Doe"},
+    },
+    "job": {
+        "jobId": "job-1", "companyId": "company-1", "recruiterUserId": "recruiter-1",
+        "title": "Backend Engineer", "department": "Engineering", "description": "Build services",
+        "requirements": ["Python"], "responsibilities": ["Build services"], "location": "Remote",
+        "employmentType": "Full-time", "experienceLevel": "Senior",
+    },
+    "interview": {
+        "duration": 30, "difficultyLevel": "Medium", "topicsToFocus": ["Kafka", "System design"],
+        "topicsToAvoid": [], "customQuestions": ["Why this role?"], "interviewStyle": "Conversational",
+        "feedbackDetail": "Comprehensive",
+    },
+    "configuration": {
+        "language": "en-US", "voiceId": "echo", "enableTranscription": True,
+        "audioQuality": "high", "timeZone": "UTC",
+    },
+}
+
+
+def make_plan():
+    return QuestionPlan("session-1", ["Why this role?"], ["Kafka", "System design"], ["5 years of Python"], 30, token="secret")
+
+
+class TestQuestionPlan(unittest.TestCase):
+    """Test cases for the QuestionPlan class."""
+
+    def test_question_order(self):
+        """Test that custom questions come first, then topics, then requirements."""
+        plan = make_plan()
+        questions = [json.loads(plan.next_question()) for _ in range(len(plan))]
+        self.assertEqual([question["topic"] for question in questions],
+                         ["Custom questions", "Kafka", "Kafka", "System design", "System design", "Requirements"])
+        self.assertEqual(questions[0]["question"], "Why this role?")
+        self.assertEqual(questions[-1]["questionsRemaining"], 0)
+        self.assertIsNone(json.loads(plan.next_question())["question"])
+
+    def test_switch_topic(self):
+        """Test switching to the next topic and to a named topic."""
+        plan = make_plan()
+        plan.next_question()
+        plan.next_question()
+        self.assertEqual(json.loads(plan.switch_topic())["topic"], "System design")
+        self.assertEqual(json.loads(plan.switch_topic("kafka"))["questionNumber"], 2)
+        self.assertEqual(json.loads(plan.next_question())["questionNumber"], 3)
+
+    def test_time_check(self):
+        """Test the time check before and near the end of the interview."""
+        plan = make_plan()
+        plan.time_check(now=1000.0)
+        check = json.loads(plan.time_check(now=1000.0 + 10 * 60))
+        self.assertEqual(check["elapsedMinutes"], 10.0)
+        self.assertEqual(check["remainingMinutes"], 20.0)
+        self.assertIn("Continue", check["instructions"])
+
+        check = json.loads(plan.time_check(now=1000.0 + (30 - TOOLS_WRAP_UP_MINUTES / 2) * 60))
+        self.assertIn("nearly up", check["instructions"])
+
+    def test_authorize(self):
+        """Test that only the session's tool token is accepted, whatever is sent."""
+        plan = make_plan()
+        self.assertTrue(plan.authorize("secret"))
+        self.assertFalse(plan.authorize("Secret"))
+        self.assertFalse(plan.authorize("sécret"))
+        self.assertFalse(plan.authorize(None))
+
+    def test_tool_calls_are_fast(self):
+        """Test that serving a tool call stays well under a millisecond."""
+        plan = QuestionPlan("session-1", [f"Question {i}?" for i in range(50)], ["Kafka"] * 20, [], 60)
+        start = time.perf_counter()
+        for _ in range(1000):
+            plan.next_question()
+            plan.time_check()
+        self.assertLess((time.perf_counter() - start) / 2000, 0.0002)
+
+
+class TestToolEndpoints(unittest.TestCase):
+    """Test cases for the tool endpoints and tool registration."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.registry = ToolPlanRegistry(base_url="https://tezhire.example.com")
+        patcher = patch("app.routers.tezhire.tool_plans", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_store.clear()
+
+    def call(self, tool, token, body=None):
+        return self.client.post(
+            f"/api/tezhire/interview-sessions/session-1/tools/{tool}",
+            headers={TOOL_TOKEN_HEADER: token},
+            json=body,
+        )
+
+    def test_tool_calls(self):
+        """Test serving tool calls from the session's plan."""
+        plan = self.registry.create("session-1", ["Why this role?"], ["Kafka"], [], 30)
+        response = self.call("nextQuestion", plan.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["question"], "Why this role?")
+        self.assertIn("server-timing", response.headers)
+
+        self.assertEqual(self.call("switchTopic", plan.token, {"topic": "Kafka"}).json()["topic"], "Kafka")
+        self.assertEqual(self.call("timeCheck", plan.token).json()["remainingMinutes"], 30.0)
+        self.assertEqual(self.call("nextQuestion", "wrong").status_code, 401)
+        self.assertEqual(self.call("sing", plan.token).status_code, 404)
+
+    def test_unknown_session(self):
+        """Test a tool call for a session without a plan."""
+        self.assertEqual(self.call("nextQuestion", "token").status_code, 404)
+
+    def test_session_registers_tools(self):
+        """Test that new sessions send their tool definitions to Ultravox."""
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(201, json={"callId": "call-1", "joinUrl": "wss://example.com/join"})
+
+        real_client = httpx.AsyncClient
+        with patch("app.routers.tezhire.httpx.AsyncClient",
+                   lambda *args, **kwargs: real_client(transport=httpx.MockTransport(handler))):
+            response = self.client.post(
+                "/api/tezhire/interview-sessions", json=SESSION_REQUEST, headers={"X-API-Key": "test-api-key"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        tools = sent[0]["selectedTools"]
+        self.assertEqual([tool["temporaryTool"]["modelToolName"] for tool in tools],
+                         ["nextQuestion", "switchTopic", "timeCheck"])
+        plan = self.registry.get("session-1")
+        self.assertEqual(tools[0]["temporaryTool"]["staticParameters"][0]["value"], plan.token)
+        self.assertEqual(
+            tools[0]["temporaryTool"]["http"]["baseUrlPattern"],
+            "https://tezhire.example.com/api/tezhire/interview-sessions/session-1/tools/nextQuestion"
+        )
+        self.assertIn("nextQuestion", sent[0]["systemPrompt"])
+
+        self.registry.remove_results({"sessionId": "session-1"})
+        self.assertIsNone(self.registry.get("session-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
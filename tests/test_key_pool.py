@@ -0,0 +1,113 @@
+"""
+Tests for the Ultravox API key pool.
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi import Request, HTTPException
+
+from app.utils.admission import AdmissionController
+from app.utils.api import select_api_key
+from app.utils.key_pool import KeyPool, KEY_POOL_FAILURE_THRESHOLD, KEY_POOL_COOLDOWN_SECONDS
+from app.utils.session_store import session_store
+from tests.test_admission import FakeAccount, Clock
+
+
+def make_request(headers):
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+class TestKeyPool(unittest.TestCase):
+    """Test cases for the KeyPool class."""
+
+    def setUp(self):
+        self.clock = Clock()
+        self.admission = AdmissionController(fetch_account=FakeAccount(allowed=4).fetch, clock=self.clock)
+        self.pool = KeyPool(["key-a", "key-b", "key-a"], admission=self.admission, clock=self.clock)
+        session_store.clear()
+        self.addCleanup(session_store.clear)
+
+    def create(self, key, call_id):
+        async def scenario():
+            async with self.admission.reserve(key) as reservation:
+                reservation.bind(call_id)
+
+        asyncio.run(scenario())
+
+    def test_least_loaded(self):
+        """Test that new calls go to the key with the most spare capacity."""
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(self.pool.pick(), "key-a")
+        self.create("key-a", "call-1")
+        self.assertEqual(self.pool.pick(), "key-b")
+        self.create("key-b", "call-2")
+        self.create("key-b", "call-3")
+        self.assertEqual(self.pool.pick(), "key-a")
+
+        # A larger account takes more calls before it counts as busier
+        asyncio.run(self.admission.sync("key-b"))
+        self.admission.accounts["key-b"].allowed = 40
+        self.admission.accounts["key-b"].active = 2
+        self.assertEqual(self.pool.pick(), "key-b")
+
+    def test_failing_key_is_benched(self):
+        """Test that repeated failures bench a key until the cooldown ends."""
+        for _ in range(KEY_POOL_FAILURE_THRESHOLD - 1):
+            self.pool.report_status("key-a", 503)
+        self.pool.report_status("key-a", 201)
+        self.assertTrue(self.pool.healthy("key-a"))
+
+        self.create("key-b", "call-1")
+        for _ in range(KEY_POOL_FAILURE_THRESHOLD):
+            self.pool.report_status("key-a", 401)
+        self.assertFalse(self.pool.healthy("key-a"))
+        self.assertEqual(self.pool.pick(), "key-b")
+        # Client errors are not the key's fault
+        self.pool.report_status("key-b", 400)
+        self.assertTrue(self.pool.healthy("key-b"))
+
+        self.clock.now += KEY_POOL_COOLDOWN_SECONDS
+        self.assertEqual(self.pool.pick(), "key-a")
+
+    def test_route_call_to_creating_key(self):
+        """Test that reads about a call use the key that created it."""
+        self.create("key-b", "call-1")
+        session_store["session-1"] = {"call_id": "call-2", "api_key": "key-b"}
+
+        self.assertEqual(self.pool.route_call("key-a", "call-1"), "key-b")
+        self.assertEqual(self.pool.route_call("key-a", "call-2"), "key-b")
+        self.assertEqual(self.pool.route_call("key-a", "call-3"), "key-a")
+        # Keys outside the pool are left alone
+        self.assertEqual(self.pool.route_call("own-key", "call-1"), "own-key")
+        self.assertEqual(self.pool.route_new("own-key"), "own-key")
+        self.assertEqual(self.pool.route_new("key-b"), "key-a")
+
+    def test_snapshot_masks_keys(self):
+        """Test that the snapshot never exposes a full key."""
+        self.create("key-a", "call-1")
+        snapshot = self.pool.snapshot()
+        self.assertEqual(snapshot[0], {"account": "...ey-a", "load": 0.1, "healthy": True})
+
+
+class TestSelectApiKey(unittest.TestCase):
+    """Test cases for choosing the key of a new call."""
+
+    def test_pool_keys_are_routed(self):
+        """Test that only requests made with a pool key are routed within the pool."""
+        pool = KeyPool(["key-a", "key-b"], admission=AdmissionController(fetch_account=FakeAccount(allowed=1).fetch))
+        with patch("app.utils.api.key_pool", pool), patch.dict("os.environ", {"ULTRAVOX_API_KEY": ""}):
+            self.assertEqual(select_api_key(make_request({"X-API-Key": "key-b"})), "key-a")
+            self.assertEqual(select_api_key(make_request({"X-API-Key": "own-key"})), "own-key")
+            with self.assertRaises(HTTPException):
+                select_api_key(make_request({}))
+
+        with patch("app.utils.api.key_pool", KeyPool([])), patch.dict("os.environ", {"ULTRAVOX_API_KEY": ""}):
+            self.assertEqual(select_api_key(make_request({"X-API-Key": "own-key"})), "own-key")
+
+
+if __name__ == "__main__":
+    unittest.main()
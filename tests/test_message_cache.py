@@ -0,0 +1,133 @@
+"""
+Tests for the call message cache.
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.message_cache import MessageCache, extract_cursor
+from tests.test_transcript_relay import FakeMessagesApi
+
+
+class TestMessageCache(unittest.TestCase):
+    """Test cases for the MessageCache class."""
+
+    def test_extract_cursor(self):
+        """Test extracting cursors from next links."""
+        self.assertEqual(extract_cursor("https://api.ultravox.ai/api/calls/c/messages?cursor=abc"), "abc")
+        self.assertEqual(extract_cursor("abc"), "abc")
+        self.assertIsNone(extract_cursor(None))
+
+    def test_refresh_resumes_from_checkpoint(self):
+        """Test that refreshing only fetches pages after the checkpoint."""
+        api = FakeMessagesApi()
+        cache = MessageCache(fetch_messages=api)
+
+        async def scenario():
+            api.add("a", "b", "c")
+            first = await cache.refresh("test-api-key", "call-1")
+            self.assertEqual([m["text"] for m in first], ["a", "b", "c"])
+            self.assertEqual([m["ordinal"] for m in first], [0, 1, 2])
+
+            api.add("d", "e")
+            calls_before = api.calls
+            second = await cache.refresh("test-api-key", "call-1")
+            self.assertEqual([m["text"] for m in second], ["d", "e"])
+            self.assertEqual(second[-1]["ordinal"], 4)
+            # Only the newest pages are fetched again
+            self.assertEqual(api.calls - calls_before, 2)
+
+            self.assertEqual(await cache.refresh("test-api-key", "call-1"), [])
+
+        asyncio.run(scenario())
+
+    def test_since_ordinal(self):
+        """Test getting messages after an ordinal."""
+        api = FakeMessagesApi()
+        cache = MessageCache(fetch_messages=api)
+        api.add("a", "b", "c", "d")
+
+        messages = asyncio.run(cache.since("test-api-key", "call-1", 1))
+        self.assertEqual([m["ordinal"] for m in messages], [2, 3])
+        self.assertEqual(len(asyncio.run(cache.since("test-api-key", "call-1", -1))), 4)
+        self.assertEqual(asyncio.run(cache.since("test-api-key", "call-1", 3)), [])
+
+    def test_ended_calls_are_not_refreshed(self):
+        """Test that ended calls are served from the cache only."""
+        api = FakeMessagesApi()
+        cache = MessageCache(fetch_messages=api)
+        api.add("a")
+        asyncio.run(cache.refresh("test-api-key", "call-1"))
+        cache.mark_ended("call-1")
+
+        calls_before = api.calls
+        asyncio.run(cache.refresh("test-api-key", "call-1"))
+        self.assertEqual(api.calls, calls_before)
+
+        # Other keys are checked upstream before the cache serves them
+        with self.assertRaises(HTTPException):
+            asyncio.run(cache.since("other-key", "call-1", -1))
+        self.assertEqual(api.calls, calls_before + 1)
+
+    def test_evicts_least_recently_used_calls(self):
+        """Test that the cache is bounded by the number of calls."""
+        cache = MessageCache(fetch_messages=FakeMessagesApi(), max_calls=2)
+        cache.get("call-1")
+        cache.get("call-2")
+        cache.get("call-1")
+        cache.get("call-3")
+        self.assertEqual(list(cache.calls), ["call-1", "call-3"])
+
+
+class TestCallMessagesSince(unittest.TestCase):
+    """Test cases for the messages since ordinal endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+
+    def test_list_call_messages_since(self):
+        """Test getting messages after an ordinal through the API."""
+        api = FakeMessagesApi()
+        api.add("a", "b", "c")
+
+        with patch("app.routers.ultravox.message_cache", MessageCache(fetch_messages=api)):
+            response = self.client.post(
+                "/api/ultravox/ultravox/call-messages/since",
+                json={"apiKey": "test-api-key", "callId": "call-1", "sinceOrdinal": 0}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([m["text"] for m in data["results"]], ["b", "c"])
+        self.assertEqual(data["lastOrdinal"], 2)
+        self.assertFalse(data["ended"])
+
+    def test_ended_call_needs_owner_key(self):
+        """Test that the cached transcript of an ended call is not served to other keys."""
+        api = FakeMessagesApi()
+        api.add("a", "b")
+        cache = MessageCache(fetch_messages=api)
+        asyncio.run(cache.refresh("test-api-key", "call-1"))
+        cache.mark_ended("call-1")
+
+        with patch("app.routers.ultravox.message_cache", cache):
+            response = self.client.post(
+                "/api/ultravox/ultravox/call-messages/since",
+                json={"apiKey": "other-key", "callId": "call-1", "sinceOrdinal": -1}
+            )
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn("results", response.json())
+
+            response = self.client.post(
+                "/api/ultravox/ultravox/call-messages/since",
+                json={"apiKey": "test-api-key", "callId": "call-1", "sinceOrdinal": -1}
+            )
+            self.assertEqual(len(response.json()["results"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
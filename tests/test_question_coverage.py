@@ -0,0 +1,113 @@
+"""
+Tests for custom question coverage.
+"""
+import asyncio
+import unittest
+
+from app.utils.question_coverage import QuestionCoverage, split_sentences, trigram_matrix
+from tests.test_results_builder import FakeUltravox, make_record
+
+
+QUESTIONS = [
+    "Tell me about a time you handled a production outage.",
+    "How do you use Kafka in your projects?",
+    "What is your favourite sorting algorithm?",
+]
+
+
+def assistant(ordinal, text):
+    return {"ordinal": ordinal, "role": "ASSISTANT", "text": text}
+
+
+def user(ordinal, text):
+    return {"ordinal": ordinal, "role": "USER", "text": text}
+
+
+class TestTrigrams(unittest.TestCase):
+    """Test cases for sentence splitting and trigram vectors."""
+
+    def test_split_sentences(self):
+        """Test that questions and statements are split apart."""
+        self.assertEqual(
+            split_sentences("Thanks. How do you use Kafka? Take your time"),
+            ["Thanks.", "How do you use Kafka?", "Take your time"]
+        )
+
+    def test_similarity(self):
+        """Test that paraphrases are closer than unrelated sentences."""
+        matrix = trigram_matrix([
+            "How do you use Kafka in your projects?",
+            "How do you use Kafka in projects",
+            "Describe your favourite holiday.",
+        ])
+        similarity = (matrix @ matrix.T).toarray()
+        self.assertAlmostEqual(similarity[0, 0], 1.0)
+        self.assertGreater(similarity[0, 1], 0.8)
+        self.assertLess(similarity[0, 2], 0.3)
+
+
+class TestQuestionCoverage(unittest.TestCase):
+    """Test cases for the QuestionCoverage class."""
+
+    def test_incremental_coverage(self):
+        """Test that questions are matched as message batches arrive."""
+        coverage = QuestionCoverage(QUESTIONS)
+
+        asked = coverage.fold([
+            assistant(0, "Hi, welcome! Can you tell me about a time you handled a production outage?"),
+            user(1, "Sure, our database went down."),
+        ], "2024-01-01T10:01:00")
+        self.assertEqual(asked, [0])
+        self.assertEqual(coverage.asked_count, 1)
+
+        asked = coverage.fold([
+            user(1, "Sure, our database went down."),
+            assistant(2, "Great. How do you use Kafka in projects?"),
+        ], "2024-01-01T10:05:00")
+        self.assertEqual(asked, [1])
+        self.assertEqual(coverage.last_ordinal, 2)
+
+        report = coverage.report()
+        self.assertTrue(report[0]["asked"])
+        self.assertEqual(report[0]["askedAt"], "2024-01-01T10:01:00")
+        self.assertEqual(report[1]["ordinal"], 2)
+        self.assertEqual(report[1]["matchedText"], "How do you use Kafka in projects?")
+        self.assertFalse(report[2]["asked"])
+        self.assertIsNone(report[2]["askedAt"])
+        self.assertLess(report[2]["similarity"], 0.6)
+
+    def test_asked_match_is_kept(self):
+        """Test that a closer match after a question was asked does not change its match."""
+        coverage = QuestionCoverage(QUESTIONS)
+        coverage.fold([assistant(0, "How do you use Kafka in projects?")], "2024-01-01T10:01:00")
+        before = coverage.report()[1]
+        self.assertTrue(before["asked"])
+
+        self.assertEqual(coverage.fold([assistant(1, "How do you use Kafka in your projects?")], "2024-01-01T10:05:00"), [])
+        self.assertEqual(coverage.report()[1], before)
+
+    def test_user_messages_are_ignored(self):
+        """Test that the candidate repeating a question does not count."""
+        coverage = QuestionCoverage(QUESTIONS)
+        coverage.fold([user(0, "How do you use Kafka in your projects?")], "")
+        self.assertEqual(coverage.asked_count, 0)
+
+    def test_no_questions(self):
+        """Test coverage without custom questions."""
+        coverage = QuestionCoverage([])
+        self.assertEqual(coverage.fold([assistant(0, "Hello?")], ""), [])
+        self.assertEqual(coverage.report(), [])
+
+
+class TestResultsCoverage(unittest.TestCase):
+    """Test cases for custom question coverage in interview results."""
+
+    def test_results_report_coverage(self):
+        """Test that results list which custom questions were asked."""
+        record = dict(make_record(), custom_questions=["How do you use Kafka?", "Why do you want this job?"])
+        results = asyncio.run(FakeUltravox().builder().get_results("session-1", record, "test-api-key"))
+        self.assertEqual([item["asked"] for item in results["customQuestions"]], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""
+Tests for the interview recording proxy.
+"""
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.recordings import (
+    RecordingCache, RecordingProxy, RangeNotSatisfiable, parse_range
+)
+from app.utils.session_store import session_store
+from tests.test_results_builder import make_record
+
+
+RECORDING = bytes(range(256)) * 1024
+
+
+async def stream_bytes(data, chunk_size=10000):
+    """Stream a body in chunks, like a real upstream response."""
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+class FakeRecordingServer:
+    """Fake Ultravox recording endpoint with Range support, optionally redirecting to storage."""
+
+    def __init__(self, storage_url=None):
+        self.storage_url = storage_url
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        if self.storage_url and request.url.host == "api.ultravox.ai":
+            return httpx.Response(302, headers={"location": self.storage_url})
+        range_header = request.headers.get("range")
+        if range_header:
+            start, end = parse_range(range_header, len(RECORDING))
+            return httpx.Response(206, content=stream_bytes(RECORDING[start:end + 1]), headers={
+                "content-type": "audio/wav",
+                "content-range": f"bytes {start}-{end}/{len(RECORDING)}",
+            })
+        return httpx.Response(200, content=stream_bytes(RECORDING), headers={"content-type": "audio/wav"})
+
+    def proxy(self, directory, **kwargs):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return RecordingProxy(cache=RecordingCache(directory), client=client, **kwargs)
+
+
+class TestParseRange(unittest.TestCase):
+    """Test cases for Range header parsing."""
+
+    def test_ranges(self):
+        """Test closed, open and suffix ranges."""
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=990-2000", 1000), (990, 999))
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range("bytes=0-1,5-9", 1000))
+
+    def test_unsatisfiable(self):
+        """Test ranges outside the file."""
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range("bytes=1000-", 1000)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range("bytes=-0", 1000)
+
+
+class TestRecordingCache(unittest.TestCase):
+    """Test cases for the RecordingCache class."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used recording is evicted."""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RecordingCache(directory, max_bytes=250)
+            for call_id in ("call-1", "call-2"):
+                with open(cache.temporary_path(call_id), "wb") as recording_file:
+                    recording_file.write(b"x" * 100)
+                cache.admit(call_id, cache.temporary_path(call_id))
+            cache.get("call-1")
+
+            with open(cache.temporary_path("call-3"), "wb") as recording_file:
+                recording_file.write(b"x" * 100)
+            cache.admit("call-3", cache.temporary_path("call-3"))
+
+            self.assertIsNone(cache.get("call-2"))
+            self.assertFalse(os.path.exists(os.path.join(directory, "call-2.wav")))
+            self.assertIsNotNone(cache.get("call-1"))
+            self.assertEqual(cache.total_bytes, 200)
+
+            # A new cache picks up the files on disk
+            reloaded = RecordingCache(directory, max_bytes=250)
+            self.assertIsNotNone(reloaded.get("call-3"))
+            self.assertEqual(reloaded.total_bytes, 200)
+
+
+class TestRecordingProxy(unittest.TestCase):
+    """Test cases for the RecordingProxy class."""
+
+    def test_relay_then_cache(self):
+        """Test that recordings are relayed until played often enough to be cached."""
+        server = FakeRecordingServer()
+
+        async def scenario(directory):
+            proxy = server.proxy(directory, cache_after_plays=2, chunk_size=4096)
+            first = await proxy.open("test-api-key", "call-1", "bytes=100-199")
+            self.assertEqual(first.status_code, 206)
+            self.assertEqual(first.headers["content-range"], f"bytes 100-199/{len(RECORDING)}")
+            body = b"".join([chunk async for chunk in first.body_iterator])
+            self.assertEqual(body, RECORDING[100:200])
+            self.assertEqual(server.requests[0].headers["x-api-key"], "test-api-key")
+
+            second = await proxy.open("test-api-key", "call-1")
+            await second.body_iterator.aclose()
+            await asyncio.gather(*proxy.downloads.values())
+            self.assertIsNotNone(proxy.cache.get("call-1"))
+
+            requests = len(server.requests)
+            third = await proxy.open("test-api-key", "call-1", "bytes=-10")
+            self.assertEqual(third.status_code, 206)
+            self.assertEqual((third.start, third.end), (len(RECORDING) - 10, len(RECORDING) - 1))
+            self.assertEqual(len(server.requests), requests)
+            await proxy.aclose()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(scenario(directory))
+
+    def test_eviction_while_serving(self):
+        """Test that a cached recording evicted while it is sent is still sent in full."""
+        async def scenario(directory):
+            proxy = FakeRecordingServer().proxy(directory)
+            proxy.cache.max_bytes = len(RECORDING)
+            with open(proxy.cache.temporary_path("call-1"), "wb") as recording_file:
+                recording_file.write(RECORDING)
+            proxy.cache.admit("call-1", proxy.cache.temporary_path("call-1"))
+            response = await proxy.open("test-api-key", "call-1")
+
+            # Caching another recording evicts the one about to be sent
+            with open(proxy.cache.temporary_path("call-2"), "wb") as recording_file:
+                recording_file.write(RECORDING)
+            proxy.cache.admit("call-2", proxy.cache.temporary_path("call-2"))
+            self.assertIsNone(proxy.cache.get("call-1"))
+
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            await response({"type": "http", "method": "GET"}, None, send)
+            self.assertEqual(b"".join(message.get("body", b"") for message in messages[1:]), RECORDING)
+            self.assertTrue(response.file.closed)
+            await proxy.aclose()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(scenario(directory))
+
+    def test_local_copy_is_not_cached(self):
+        """Test that a local copy of a recording stays out of the cache."""
+        server = FakeRecordingServer()
+
+        async def scenario(directory):
+            proxy = server.proxy(directory)
+            async with proxy.local_copy("test-api-key", "call-1") as path:
+                with open(path, "rb") as recording_file:
+                    self.assertEqual(recording_file.read(), RECORDING)
+            self.assertFalse(os.path.exists(path))
+            self.assertIsNone(proxy.cache.get("call-1"))
+            self.assertEqual(proxy.plays, {})
+            await proxy.aclose()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(scenario(directory))
+
+    def test_redirect_drops_api_key(self):
+        """Test that the API key is not sent on to the storage host."""
+        server = FakeRecordingServer(storage_url="https://storage.example.com/call-1.wav?signature=abc")
+
+        async def scenario(directory):
+            proxy = server.proxy(directory, cache_after_plays=10)
+            response = await proxy.open("test-api-key", "call-1", "bytes=0-9")
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            self.assertEqual(body, RECORDING[:10])
+            async with proxy.local_copy("test-api-key", "call-2") as path:
+                self.assertIsNotNone(path)
+            await proxy.aclose()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(scenario(directory))
+
+        self.assertEqual([request.url.host for request in server.requests],
+                         ["api.ultravox.ai", "storage.example.com"] * 2)
+        self.assertEqual(server.requests[0].headers["x-api-key"], "test-api-key")
+        self.assertNotIn("x-api-key", server.requests[1].headers)
+        self.assertEqual(server.requests[1].headers["range"], "bytes=0-9")
+        self.assertNotIn("x-api-key", server.requests[3].headers)
+
+    def test_play_counts_are_bounded(self):
+        """Test that only the most recently played uncached recordings are counted."""
+        server = FakeRecordingServer()
+
+        async def scenario(directory):
+            proxy = server.proxy(directory, cache_after_plays=10, max_tracked_plays=2)
+            for call_id in ("call-1", "call-2", "call-1", "call-3"):
+                response = await proxy.open("test-api-key", call_id, "bytes=0-9")
+                await response.body_iterator.aclose()
+            self.assertEqual(dict(proxy.plays), {"call-1": 2, "call-3": 1})
+            await proxy.aclose()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(scenario(directory))
+
+
+class TestRecordingEndpoint(unittest.TestCase):
+    """Test cases for the recording endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+        session_store.clear()
+        session_store["session-1"] = make_record()
+
+    def test_cached_recording_range(self):
+        """Test seeking in a cached recording."""
+        with tempfile.TemporaryDirectory() as directory:
+            proxy = FakeRecordingServer().proxy(directory)
+            with open(proxy.cache.temporary_path("test-call-id"), "wb") as recording_file:
+                recording_file.write(RECORDING)
+            proxy.cache.admit("test-call-id", proxy.cache.temporary_path("test-call-id"))
+
+            with patch("app.routers.tezhire.recording_proxy", proxy):
+                response = self.client.get(
+                    "/api/tezhire/interview-sessions/session-1/recording",
+                    headers={"X-API-Key": "test-api-key", "Range": "bytes=1000-1999"}
+                )
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response.content, RECORDING[1000:2000])
+                self.assertEqual(response.headers["accept-ranges"], "bytes")
+
+                response = self.client.get(
+                    "/api/tezhire/interview-sessions/session-1/recording",
+                    headers={"X-API-Key": "test-api-key", "Range": f"bytes={len(RECORDING)}-"}
+                )
+                self.assertEqual(response.status_code, 416)
+
+    def test_streamed_recording(self):
+        """Test relaying a recording that is not cached."""
+        with tempfile.TemporaryDirectory() as directory:
+            proxy = FakeRecordingServer().proxy(directory, cache_after_plays=10)
+            with patch("app.routers.tezhire.recording_proxy", proxy):
+                response = self.client.get(
+                    "/api/tezhire/interview-sessions/session-1/recording",
+                    headers={"X-API-Key": "test-api-key"}
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, RECORDING)
+
+    def test_recording_not_found(self):
+        """Test getting the recording of an unknown session."""
+        response = self.client.get(
+            "/api/tezhire/interview-sessions/missing/recording",
+            headers={"X-API-Key": "test-api-key"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
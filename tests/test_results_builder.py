@@ -0,0 +1,235 @@
+"""
+Tests for the interview results builder.
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.message_cache import MessageCache
+from app.utils.results_builder import ResultsBuilder, segment_questions, format_transcript
+from app.utils.session_store import session_store
+
+
+MESSAGES = [
+    {"role": "ASSISTANT", "text": "Hello, welcome to the interview."},
+    {"role": "ASSISTANT", "text": "Can you tell me about yourself?"},
+    {"role": "USER", "text": "I am a backend developer."},
+    {"role": "USER", "text": "I mostly work with Python."},
+    {"role": "TOOL_CALL", "text": "{}"},
+    {"role": "ASSISTANT", "text": "How do you use Kafka?"},
+    {"role": "USER", "text": "For exactly-once event processing."},
+    {"role": "ASSISTANT", "text": "Thanks, that is all."},
+]
+
+
+class FakeUltravox:
+    """Fake Ultravox endpoints used by the results builder."""
+
+    def __init__(self, ended=True):
+        self.ended = ended
+        self.details_calls = 0
+
+    async def call_details(self, api_key, call_id):
+        self.details_calls += 1
+        await asyncio.sleep(0)
+        details = {"callId": call_id, "joined": "2024-01-01T10:00:00", "summary": "Went well."}
+        if self.ended:
+            details["ended"] = "2024-01-01T10:20:00"
+        return details
+
+    async def messages(self, api_key, call_id, cursor=None):
+        return {"results": MESSAGES, "next": None}
+
+    async def stages(self, api_key, call_id, cursor=None):
+        return {"results": [{"callId": call_id, "callStageId": "stage-1"}], "next": None}
+
+    def builder(self):
+        return ResultsBuilder(
+            cache=MessageCache(fetch_messages=self.messages),
+            fetch_call_details=self.call_details,
+            fetch_stages=self.stages,
+            store={},
+        )
+
+
+def make_record():
+    """Create a stored session record for tests."""
+    return {
+        "call_id": "test-call-id",
+        "created_at": "2024-01-01T09:59:00",
+        "status": "created",
+        "candidate_id": "candidate-123",
+        "job_id": "job-456",
+        "company_id": "company-789",
+        "api_key": "test-api-key",
+    }
+
+
+class TestSegmentation(unittest.TestCase):
+    """Test cases for transcript segmentation."""
+
+    def test_segment_questions(self):
+        """Test that assistant turns and following user turns form questions."""
+        questions = segment_questions(MESSAGES, "2024-01-01T10:00:00")
+        self.assertEqual(len(questions), 2)
+        self.assertEqual(questions[0]["questionId"], "q1")
+        self.assertEqual(
+            questions[0]["question"],
+            "Hello, welcome to the interview. Can you tell me about yourself?"
+        )
+        self.assertEqual(questions[0]["answerTranscript"], "I am a backend developer. I mostly work with Python.")
+        self.assertEqual(questions[1]["question"], "How do you use Kafka?")
+        self.assertEqual([question["interviewerTurn"] for question in questions], [0, 1])
+
+    def test_format_transcript(self):
+        """Test the plain-text transcript format."""
+        transcript = format_transcript(MESSAGES)
+        self.assertTrue(transcript.startswith("Interviewer: Hello"))
+        self.assertIn("Candidate: For exactly-once event processing.", transcript)
+        self.assertNotIn("{}", transcript)
+
+
+class TestResultsBuilder(unittest.TestCase):
+    """Test cases for the ResultsBuilder class."""
+
+    def test_results_are_materialized_once(self):
+        """Test that concurrent reads share one build and later reads hit the store."""
+        fake = FakeUltravox()
+        builder = fake.builder()
+
+        async def scenario():
+            first, second = await asyncio.gather(
+                builder.get_results("session-1", make_record(), "test-api-key"),
+                builder.get_results("session-1", make_record(), "test-api-key"),
+            )
+            self.assertIs(first, second)
+            await builder.get_results("session-1", make_record(), "test-api-key")
+            return first
+
+        results = asyncio.run(scenario())
+        self.assertEqual(fake.details_calls, 1)
+        self.assertEqual(results["candidateId"], "candidate-123")
+        self.assertEqual(len(results["questions"]), 2)
+        self.assertEqual(results["feedback"]["summary"], "Went well.")
+        self.assertEqual(results["audio"]["duration"], 1200)
+        self.assertEqual(results["callStageIds"], ["stage-1"])
+
+    def test_recording_is_analyzed_after_storing(self):
+        """Test that results are served before the recording analysis fills them in."""
+        fake = FakeUltravox()
+        builder = fake.builder()
+
+        class FakeAnalyzer:
+            def __init__(self):
+                self.ready = asyncio.Event()
+
+            async def enrich(self, api_key, record, results):
+                await self.ready.wait()
+                results["audio"]["talkTime"] = 600.0
+                return True
+
+        builder.analyzer = FakeAnalyzer()
+
+        async def scenario():
+            results = await builder.get_results("session-1", make_record(), "test-api-key")
+            self.assertNotIn("talkTime", results["audio"])
+            self.assertEqual(len(builder.enrichments), 1)
+            builder.analyzer.ready.set()
+            await asyncio.gather(*builder.enrichments)
+            return await builder.get_results("session-1", make_record(), "test-api-key")
+
+        results = asyncio.run(scenario())
+        self.assertEqual(results["audio"]["talkTime"], 600.0)
+        self.assertEqual(builder.enrichments, set())
+
+    def test_partial_results_are_incremental(self):
+        """Test that running calls fold in only new messages and are not stored."""
+        fake = FakeUltravox(ended=False)
+        visible = []
+
+        async def messages(api_key, call_id, cursor=None):
+            return {"results": list(visible), "next": None}
+
+        builder = ResultsBuilder(
+            cache=MessageCache(fetch_messages=messages),
+            fetch_call_details=fake.call_details,
+            fetch_stages=fake.stages,
+            store={},
+        )
+
+        async def scenario():
+            visible.extend(MESSAGES[:3])
+            first = await builder.get_results("session-1", make_record(), "test-api-key")
+            self.assertFalse(first["complete"])
+            self.assertEqual(len(first["questions"]), 1)
+            self.assertEqual(builder.segmenters["session-1"].last_ordinal, 2)
+
+            visible.extend(MESSAGES[3:7])
+            second = await builder.get_results("session-1", make_record(), "test-api-key")
+            self.assertEqual(len(second["questions"]), 2)
+            self.assertEqual(second["questions"][0]["answerTranscript"], "I am a backend developer. I mostly work with Python.")
+            self.assertEqual(builder.segmenters["session-1"].last_ordinal, 6)
+            self.assertEqual(builder.store, {})
+
+            visible.append(MESSAGES[7])
+            fake.ended = True
+            final = await builder.get_results("session-1", make_record(), "test-api-key")
+            self.assertTrue(final["complete"])
+            self.assertEqual(final["transcript"]["full"], format_transcript(MESSAGES))
+            self.assertIs(builder.store["session-1"], final)
+            self.assertNotIn("session-1", builder.segmenters)
+
+        asyncio.run(scenario())
+
+
+class TestResultsEndpoint(unittest.TestCase):
+    """Test cases for the interview results endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+        session_store.clear()
+
+    def test_get_interview_results(self):
+        """Test getting materialized results through the API."""
+        session_store["session-1"] = make_record()
+        with patch("app.routers.tezhire.results_builder", FakeUltravox().builder()):
+            response = self.client.get(
+                "/api/tezhire/interview-sessions/session-1/results",
+                headers={"X-API-Key": "test-api-key"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["sessionId"], "session-1")
+        self.assertEqual(data["questions"][1]["answerTranscript"], "For exactly-once event processing.")
+        self.assertTrue(data["complete"])
+        self.assertEqual(data["callStageIds"], ["stage-1"])
+
+    def test_get_interview_results_active_session(self):
+        """Test getting partial results of a session that is still running."""
+        session_store["session-1"] = make_record()
+        with patch("app.routers.tezhire.results_builder", FakeUltravox(ended=False).builder()):
+            response = self.client.get(
+                "/api/tezhire/interview-sessions/session-1/results",
+                headers={"X-API-Key": "test-api-key"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data["complete"])
+        self.assertEqual(len(data["questions"]), 2)
+
+    def test_get_interview_results_not_found(self):
+        """Test getting results of an unknown session."""
+        response = self.client.get(
+            "/api/tezhire/interview-sessions/missing/results",
+            headers={"X-API-Key": "test-api-key"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
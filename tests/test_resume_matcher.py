@@ -0,0 +1,125 @@
+"""
+Tests for the resume-to-job matcher.
+"""
+import json
+import unittest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.tezhire import Candidate
+from app.utils.resume_matcher import CandidatePool, ResumeMatcher
+
+
+REQUIREMENTS = ["5+ years of Python experience", "Kafka stream processing"]
+
+
+def make_candidate(candidate_id, skills, raw_text, technologies=()):
+    """Create a candidate payload for tests."""
+    return {
+        "candidateId": candidate_id,
+        "name": f"Name {candidate_id}",
+        "email": f"{candidate_id}@example.com",
+        "resumeData": {
+            "skills": skills,
+            "experience": [],
+            "education": [],
+            "projects": [{"name": "Project", "description": "", "technologies": list(technologies)}],
+            "rawText": raw_text,
+        },
+    }
+
+
+CANDIDATES = [
+    make_candidate("candidate-1", ["Java"], "Spring services and Oracle databases."),
+    make_candidate("candidate-2", ["Python", "Kafka"], "Built Kafka stream processing in Python."),
+    make_candidate("candidate-3", ["Python"], "Django web apps.", technologies=["Celery"]),
+]
+
+
+def make_job():
+    """Create a job payload for tests."""
+    return {
+        "jobId": "job-456",
+        "companyId": "company-789",
+        "recruiterUserId": "recruiter-1",
+        "title": "Backend Engineer",
+        "department": "Engineering",
+        "description": "Backend work.",
+        "requirements": REQUIREMENTS,
+        "responsibilities": [],
+        "location": "Remote",
+        "employmentType": "Full-time",
+        "experienceLevel": "Senior",
+    }
+
+
+class TestCandidatePool(unittest.TestCase):
+    """Test cases for the CandidatePool class."""
+
+    def setUp(self):
+        """Build a small pool."""
+        self.pool = CandidatePool([Candidate.model_validate(candidate) for candidate in CANDIDATES])
+
+    def test_scores(self):
+        """Test that candidates covering the requirements score higher."""
+        scores = self.pool.scores(REQUIREMENTS)
+        self.assertEqual(scores.shape, (3,))
+        self.assertGreater(scores[1], scores[2])
+        self.assertGreater(scores[2], scores[0])
+        self.assertEqual(scores[0], 0)
+        self.assertNotIn("years", self.pool.vocabulary)
+
+    def test_matches(self):
+        """Test ordering, limits and matched skills."""
+        matches = list(self.pool.matches(REQUIREMENTS))
+        self.assertEqual([match["candidateId"] for match in matches], ["candidate-2", "candidate-3", "candidate-1"])
+        self.assertEqual(matches[0]["rank"], 1)
+        self.assertEqual(matches[0]["matchedSkills"], ["Python", "Kafka"])
+
+        self.assertEqual(len(list(self.pool.matches(REQUIREMENTS, limit=1))), 1)
+        self.assertEqual(len(list(self.pool.matches(REQUIREMENTS, min_score=1))), 2)
+
+    def test_empty_pool(self):
+        """Test matching against an empty pool."""
+        self.assertEqual(list(CandidatePool([]).matches(REQUIREMENTS)), [])
+
+
+class TestResumeMatcher(unittest.TestCase):
+    """Test cases for the ResumeMatcher class."""
+
+    def test_pools_are_cached(self):
+        """Test that a pool is built once and rebuilt when a resume changes."""
+        matcher = ResumeMatcher()
+        candidates = [Candidate.model_validate(candidate) for candidate in CANDIDATES]
+        pool = matcher.pool("job-456", candidates)
+        self.assertIs(matcher.pool("job-456", candidates), pool)
+
+        changed = candidates[:2] + [Candidate.model_validate(make_candidate("candidate-3", ["Go"], "Go services."))]
+        self.assertIsNot(matcher.pool("job-456", changed), pool)
+        self.assertEqual(len(matcher.pools), 1)
+
+
+class TestResumeMatchesEndpoint(unittest.TestCase):
+    """Test cases for the resume matches endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+
+    def test_match_resumes(self):
+        """Test streaming matches through the API."""
+        response = self.client.post(
+            "/api/tezhire/resume-matches",
+            params={"minScore": 1},
+            json={"job": make_job(), "candidates": CANDIDATES},
+            headers={"X-API-Key": "test-api-key"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        matches = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([match["candidateId"] for match in matches], ["candidate-2", "candidate-3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for the answer scoring engine.
+"""
+import asyncio
+import unittest
+
+from app.utils.scoring import AnswerScorer, score_interview, profile_items
+
+
+RECORD = {
+    "requirements": ["5+ years of Python experience", "Kafka stream processing"],
+    "topics_to_focus": ["System design"],
+    "skills": ["PostgreSQL"],
+}
+
+
+class TestScoreInterview(unittest.TestCase):
+    """Test cases for the score_interview function."""
+
+    def test_coverage_scores(self):
+        """Test that answers covering the profile score higher."""
+        scores = score_interview([
+            "I build Kafka stream processing jobs in Python.",
+            "I like hiking on weekends.",
+            "Our system design relies on PostgreSQL replicas.",
+        ], profile_items(RECORD))
+
+        first, second, third = scores["questions"]
+        self.assertGreater(first["score"], second["score"])
+        self.assertGreater(third["score"], second["score"])
+        self.assertEqual(second["score"], 0)
+        self.assertIn("Kafka stream processing", first["covered"])
+        self.assertEqual(scores["fitScore"], 100)
+        self.assertEqual(scores["overallScore"], 100)
+        self.assertIn("System design", scores["strengths"])
+        self.assertEqual(scores["areasForImprovement"], [])
+
+    def test_missing_requirements_are_areas_for_improvement(self):
+        """Test that uncovered requirements are reported."""
+        scores = score_interview(["I mostly write Python."], profile_items(RECORD))
+        self.assertEqual(scores["areasForImprovement"], ["Kafka stream processing"])
+        self.assertLess(scores["overallScore"], 50)
+
+    def test_empty_profile(self):
+        """Test scoring without any profile items."""
+        scores = score_interview(["Anything."], [])
+        self.assertEqual(scores["questions"], [{"score": 0, "covered": []}])
+        self.assertEqual(scores["overallScore"], 0)
+
+
+class TestAnswerScorer(unittest.TestCase):
+    """Test cases for the AnswerScorer class."""
+
+    def test_score_results_in_process_pool(self):
+        """Test that results are scored in place."""
+        results = {
+            "overallScore": 0,
+            "feedback": {"fitScore": 0, "strengths": [], "areasForImprovement": []},
+            "questions": [
+                {"answerTranscript": "Kafka stream processing with Python.", "evaluation": {}},
+            ],
+        }
+        scorer = AnswerScorer(workers=1)
+        try:
+            asyncio.run(scorer.score(RECORD, results))
+        finally:
+            scorer.shutdown()
+
+        evaluation = results["questions"][0]["evaluation"]
+        self.assertGreater(evaluation["score"], 0)
+        self.assertIn("Kafka stream processing", evaluation["keyInsights"])
+        self.assertGreater(results["overallScore"], 0)
+        self.assertEqual(results["feedback"]["fitScore"], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests for the transcript search index.
+"""
+import unittest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.search_index import TranscriptSearchIndex, tokenize, parse_query, search_index
+
+
+def make_results(session_id, answers, job_id="job-456", company_id="company-789"):
+    """Create a materialized results payload for tests."""
+    questions = [
+        {"questionId": f"q{i + 1}", "question": "Question?", "answerTranscript": answer}
+        for i, answer in enumerate(answers)
+    ]
+    return {
+        "sessionId": session_id,
+        "companyId": company_id,
+        "jobId": job_id,
+        "questions": questions,
+        "transcript": {"full": "\n".join(f"Candidate: {answer}" for answer in answers)},
+    }
+
+
+class TestTokenizer(unittest.TestCase):
+    """Test cases for tokenization and query parsing."""
+
+    def test_tokenize(self):
+        """Test that technical terms survive tokenization."""
+        self.assertEqual(tokenize("Kafka exactly-once, C++ and Node.js"), ["kafka", "exactly", "once", "c++", "and", "node.js"])
+
+    def test_parse_query(self):
+        """Test that quoted text and hyphenated words become phrases."""
+        self.assertEqual(parse_query('"event sourcing" exactly-once python'), [
+            ["event", "sourcing"], ["exactly", "once"], ["python"]
+        ])
+
+
+class TestTranscriptSearchIndex(unittest.TestCase):
+    """Test cases for the TranscriptSearchIndex class."""
+
+    def setUp(self):
+        """Build a small index."""
+        self.index = TranscriptSearchIndex()
+        self.index.index_results(make_results("session-1", [
+            "I used Kafka exactly-once semantics for payments.",
+            "Mostly Python.",
+        ]))
+        self.index.index_results(make_results("session-2", [
+            "Exactly once delivery is hard, we used Kafka with idempotent consumers.",
+        ]))
+        self.index.index_results(make_results("session-3", [
+            "Kafka exactly-once in our billing system.",
+        ], job_id="job-other", company_id="company-other"))
+
+    def test_phrase_query(self):
+        """Test that phrases require adjacent tokens."""
+        hits = self.index.search('"kafka exactly-once"')
+        self.assertEqual({hit["sessionId"] for hit in hits}, {"session-1", "session-3"})
+
+        session_1 = next(hit for hit in hits if hit["sessionId"] == "session-1")
+        self.assertEqual(session_1["matches"][0]["questionId"], "q1")
+        self.assertIn("Kafka exactly-once", session_1["matches"][0]["snippet"])
+
+    def test_terms_query(self):
+        """Test that unquoted terms match anywhere in the document."""
+        hits = self.index.search("kafka idempotent")
+        self.assertEqual([hit["sessionId"] for hit in hits], ["session-2"])
+
+    def test_filters(self):
+        """Test filtering by job and company."""
+        self.assertEqual(
+            [hit["sessionId"] for hit in self.index.search("kafka exactly-once", job_id="job-other")],
+            ["session-3"]
+        )
+        self.assertEqual(
+            {hit["sessionId"] for hit in self.index.search("kafka", company_id="company-789")},
+            {"session-1", "session-2"}
+        )
+        self.assertEqual(self.index.search("kafka", company_id="unknown"), [])
+
+    def test_reindexing_replaces_documents(self):
+        """Test that re-indexing a session removes its previous postings."""
+        self.index.index_results(make_results("session-1", ["Only Go now."]))
+        self.assertEqual({hit["sessionId"] for hit in self.index.search('"kafka exactly-once"')}, {"session-3"})
+        self.assertEqual([hit["sessionId"] for hit in self.index.search("go")], ["session-1"])
+        self.assertNotIn("payments", self.index.postings)
+
+    def test_only_answer_texts_are_kept(self):
+        """Test that full transcripts are indexed without keeping their text."""
+        self.assertEqual(len(self.index.texts), sum(
+            document.question_id is not None for document in self.index.documents.values()
+        ))
+        self.assertNotIn("Candidate:", "".join(self.index.texts.values()))
+
+
+class TestSearchEndpoint(unittest.TestCase):
+    """Test cases for the transcript search endpoint."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+        search_index.remove_session("search-session")
+
+    def test_search_transcripts(self):
+        """Test searching through the API."""
+        search_index.index_results(make_results("search-session", ["We rely on Kafka exactly-once."]))
+        response = self.client.get(
+            "/api/tezhire/search",
+            params={"q": '"kafka exactly-once"', "jobId": "job-456"},
+            headers={"X-API-Key": "test-api-key"}
+        )
+        search_index.remove_session("search-session")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["results"][0]["sessionId"], "search-session")
+        self.assertEqual(data["results"][0]["matches"][0]["questionId"], "q1")
+
+
+if __name__ == "__main__":
+    unittest.main()
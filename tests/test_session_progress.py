@@ -0,0 +1,110 @@
+"""
+Tests for live session progress.
+"""
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from app.utils.message_cache import MessageCache
+from app.utils.session_progress import SessionProgress, ProgressTracker
+from app.utils.session_store import build_status_snapshot, live_progress
+
+
+MESSAGES = [
+    {"role": "ASSISTANT", "text": "Hello, welcome to the interview."},
+    {"role": "ASSISTANT", "text": "How do you use Kafka in your projects?"},
+    {"role": "USER", "text": "For event streaming between services."},
+    {"role": "ASSISTANT", "text": "Great. Tell me about system design?"},
+    {"role": "ASSISTANT", "text": "Anything at all?"},
+    {"role": "USER", "text": "I designed our payment system."},
+]
+
+
+def number(messages, start=0):
+    return [dict(message, ordinal=start + i) for i, message in enumerate(messages)]
+
+
+class TestSessionProgress(unittest.TestCase):
+    """Test cases for the SessionProgress class."""
+
+    def test_running_counters(self):
+        """Test that counters only grow with new messages."""
+        progress = SessionProgress(["System design", "Kubernetes"], ["How do you use Kafka in your projects?"])
+        progress.fold(number(MESSAGES[:3]), "")
+        self.assertEqual(progress.questions_asked, 1)
+        self.assertEqual(progress.coverage.asked_count, 1)
+        self.assertEqual(progress.topics_covered, 0)
+
+        # Already folded messages are skipped
+        progress.fold(number(MESSAGES), "")
+        self.assertEqual(progress.questions_asked, 2)
+        self.assertEqual(progress.topics_covered, 1)
+
+        record = {}
+        progress.apply(record)
+        self.assertEqual({key: value for key, value in record.items() if not key.startswith("phase")}, {
+            "questions_asked": 2,
+            "topics_covered": 1,
+            "planned_topics": 2,
+            "custom_questions_asked": 1,
+            "planned_custom_questions": 1,
+        })
+        self.assertEqual(record["phase"], "technical")
+
+
+class TestLiveProgress(unittest.TestCase):
+    """Test cases for the progress estimate of the status snapshot."""
+
+    def test_time_and_coverage(self):
+        """Test that progress combines elapsed time and coverage."""
+        record = {"interview_duration": 10, "planned_topics": 2, "topics_covered": 1,
+                  "planned_custom_questions": 2, "custom_questions_asked": 1}
+        self.assertEqual(live_progress(record, 300), 50)
+        self.assertEqual(live_progress(record, 600), 75)
+        self.assertEqual(live_progress(dict(record, topics_covered=2, custom_questions_asked=2), 900), 99)
+
+    def test_time_only(self):
+        """Test progress without planned topics or custom questions."""
+        self.assertEqual(live_progress({"interview_duration": 10}, 150), 25)
+        self.assertEqual(live_progress({}, 150), 0)
+
+    def test_snapshot(self):
+        """Test that the snapshot reads the running counters."""
+        start = (datetime.now() - timedelta(minutes=5)).isoformat()
+        snapshot = build_status_snapshot("session-1", {
+            "status": "in_progress", "start_time": start, "interview_duration": 10, "questions_asked": 3,
+        })
+        self.assertEqual(snapshot["questionsAsked"], 3)
+        self.assertEqual(snapshot["progress"], 50)
+
+
+class TestProgressTracker(unittest.TestCase):
+    """Test cases for the ProgressTracker class."""
+
+    def test_refresh_and_finish(self):
+        """Test that refreshes fold in new upstream messages and ended sessions are dropped."""
+        visible = []
+
+        async def messages(api_key, call_id, cursor=None):
+            return {"results": list(visible), "next": None}
+
+        tracker = ProgressTracker(cache=MessageCache(fetch_messages=messages))
+        record = {"call_id": "call-1", "status": "in_progress", "topics_to_focus": ["System design"]}
+
+        async def scenario():
+            visible.extend(MESSAGES[:3])
+            await tracker.update("session-1", record, "test-api-key")
+            self.assertEqual(record["questions_asked"], 1)
+
+            visible.extend(MESSAGES[3:])
+            record["status"] = "completed"
+            await tracker.update("session-1", record, "test-api-key")
+            self.assertEqual(record["questions_asked"], 2)
+            self.assertEqual(record["topics_covered"], 1)
+            self.assertNotIn("session-1", tracker.sessions)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
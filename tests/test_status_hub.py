@@ -0,0 +1,189 @@
+"""
+Tests for the session status hub.
+"""
+import asyncio
+import unittest
+from datetime import datetime
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.tezhire import stream_status_events
+from app.utils.session_store import session_store
+from app.utils.status_hub import StatusHub, Subscription
+
+
+def make_record(job_id="job-456", status="created"):
+    """Create a stored session record for tests."""
+    return {
+        "call_id": "test-call-id",
+        "join_url": "https://example.com/join/test-call-id",
+        "created_at": datetime.now().isoformat(),
+        "status": status,
+        "candidate_id": "candidate-123",
+        "job_id": job_id,
+        "company_id": "company-789",
+        "interview_duration": 30,
+        "api_key": "test-api-key",
+    }
+
+
+class TestStatusHub(unittest.TestCase):
+    """Test cases for the StatusHub class."""
+
+    def setUp(self):
+        """Reset the session store before each test."""
+        session_store.clear()
+        self.fetch_count = 0
+
+    async def fake_fetch(self, api_key, call_id):
+        """Fake Ultravox call details lookup counting upstream calls."""
+        self.fetch_count += 1
+        return {"callId": call_id, "joined": datetime.now().isoformat()}
+
+    def test_single_watcher_for_many_subscribers(self):
+        """Test that N subscribers to one session share one upstream watcher."""
+        session_store["session-1"] = make_record()
+
+        async def scenario():
+            hub = StatusHub(fetch_call_details=self.fake_fetch, poll_interval=60)
+            subscriptions = [hub.subscribe_session("session-1") for _ in range(5)]
+            subscriptions.append(hub.subscribe_job("job-456"))
+            self.assertEqual(len(hub.watchers), 1)
+
+            events = [await subscription.get(1) for subscription in subscriptions]
+            self.assertEqual(self.fetch_count, 1)
+            for event in events:
+                self.assertEqual(event["status"], "in_progress")
+
+            for subscription in subscriptions:
+                hub.unsubscribe(subscription)
+            for watcher in list(hub.watchers.values()):
+                watcher.cancel()
+
+        asyncio.run(scenario())
+
+    def test_snapshots_are_forgotten(self):
+        """Test that no snapshot is kept once a session is no longer watched."""
+        session_store["session-1"] = make_record()
+        session_store["session-2"] = make_record()
+
+        async def ended(api_key, call_id):
+            return {"callId": call_id, "joined": datetime.now().isoformat(), "ended": datetime.now().isoformat()}
+
+        async def scenario():
+            hub = StatusHub(fetch_call_details=ended, poll_interval=60)
+            hub.publish("session-2")
+            self.assertEqual(hub.last_snapshots, {})
+
+            subscription = hub.subscribe_session("session-1")
+            self.assertEqual((await subscription.get(1))["status"], "completed")
+            await asyncio.gather(*hub.watchers.values())
+            self.assertEqual(hub.last_snapshots, {})
+            self.assertEqual(hub.watchers, {})
+
+        asyncio.run(scenario())
+
+    def test_job_subscription_receives_new_sessions(self):
+        """Test that sessions created after a job subscription are published."""
+        async def scenario():
+            hub = StatusHub(fetch_call_details=self.fake_fetch, poll_interval=60)
+            subscription = hub.subscribe_job("job-456")
+            session_store["session-2"] = make_record()
+            hub.session_created("session-2")
+
+            event = await subscription.get(1)
+            self.assertEqual(event["sessionId"], "session-2")
+            hub.unsubscribe(subscription)
+            for watcher in list(hub.watchers.values()):
+                watcher.cancel()
+
+        asyncio.run(scenario())
+
+    def test_refresh_is_throttled(self):
+        """Test that status reads refresh a session in the background at most once per interval."""
+        session_store["session-1"] = make_record()
+        now = [0.0]
+
+        async def scenario():
+            hub = StatusHub(fetch_call_details=self.fake_fetch, poll_interval=10, clock=lambda: now[0])
+            hub.refresh("session-1")
+            hub.refresh("session-1")
+            # Nothing is fetched inline
+            self.assertEqual(self.fetch_count, 0)
+            await asyncio.gather(*hub.refreshes.values())
+            self.assertEqual(self.fetch_count, 1)
+            self.assertEqual(session_store["session-1"]["status"], "in_progress")
+
+            now[0] += 5
+            hub.refresh("session-1")
+            self.assertEqual(hub.refreshes, {})
+            now[0] += 5
+            hub.refresh("session-1")
+            await asyncio.gather(*hub.refreshes.values())
+            self.assertEqual(self.fetch_count, 2)
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_keeps_latest_events(self):
+        """Test that a full queue drops the oldest events."""
+        async def scenario():
+            subscription = Subscription("session:session-3", queue_size=2)
+            for progress in range(5):
+                subscription.offer({"progress": progress})
+            self.assertEqual(subscription.dropped, 3)
+            self.assertEqual((await subscription.get(1))["progress"], 3)
+            self.assertEqual((await subscription.get(1))["progress"], 4)
+
+        asyncio.run(scenario())
+
+
+class TestStatusEvents(unittest.TestCase):
+    """Test cases for the status event stream endpoints."""
+
+    def setUp(self):
+        """Set up the test client."""
+        self.client = TestClient(app)
+        session_store.clear()
+
+    def test_stream_unknown_session(self):
+        """Test streaming an unknown session."""
+        response = self.client.get(
+            "/api/tezhire/interview-sessions/missing/events",
+            headers={"X-API-Key": "test-api-key"}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"], "Session not found")
+
+    def test_stream_ended_session_closes(self):
+        """Test that a client connecting after the end gets the final status and a close event."""
+        session_store["session-1"] = make_record(status="completed")
+        with self.client.stream(
+            "GET",
+            "/api/tezhire/interview-sessions/session-1/events",
+            headers={"X-API-Key": "test-api-key"}
+        ) as response:
+            body = "".join(response.iter_text())
+
+        events = [block.split("\n")[0] for block in body.strip().split("\n\n")]
+        self.assertEqual(events, ["event: status", "event: close"])
+        self.assertIn('"status": "completed"', body)
+        self.assertIn('"reason": "session ended"', body)
+
+    def test_stream_closes_when_session_ends(self):
+        """Test that a live session stream closes after the terminal update."""
+        class ConnectedRequest:
+            async def is_disconnected(self):
+                return False
+
+        async def scenario():
+            subscription = Subscription("session:session-1")
+            subscription.offer({"sessionId": "session-1", "status": "in_progress"})
+            subscription.offer({"sessionId": "session-1", "status": "ended"})
+            stream = stream_status_events(ConnectedRequest(), subscription, [], close_when_ended=True)
+            return [event.split("\n")[0] async for event in stream]
+
+        self.assertEqual(asyncio.run(scenario()), ["event: status", "event: status", "event: close"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for the live transcript relay.
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app
+from app.utils.message_cache import MessageCache
+from app.utils.transcript_relay import TranscriptRelay, TranscriptObserver
+
+
+class FakeMessagesApi:
+    """
+    Fake paginated Ultravox messages endpoint with two messages per page.
+    Calls are only readable with the owner's key.
+    """
+
+    def __init__(self, owner="test-api-key"):
+        self.messages = []
+        self.owner = owner
+        self.calls = 0
+
+    def add(self, *texts):
+        for text in texts:
+            self.messages.append({"role": "USER", "text": text})
+
+    async def __call__(self, api_key, call_id, cursor=None):
+        self.calls += 1
+        if api_key != self.owner:
+            raise HTTPException(status_code=404, detail="Failed to list call messages: Not found")
+        start = int(cursor or 0)
+        page = self.messages[start:start + 2]
+        next_url = None
+        if start + 2 < len(self.messages):
+            next_url = f"https://api.ultravox.ai/api/calls/{call_id}/messages?cursor={start + 2}"
+        return {"results": page, "next": next_url}
+
+
+class TestTranscriptRelay(unittest.TestCase):
+    """Test cases for the TranscriptRelay class."""
+
+    def test_broadcast_to_observers(self):
+        """Test that one watcher serves several observers."""
+        api = FakeMessagesApi()
+        relay = TranscriptRelay(cache=MessageCache(fetch_messages=api), poll_interval=60)
+
+        async def scenario():
+            api.add("hello")
+            first = await relay.subscribe("call-1", "test-api-key")
+            second = await relay.subscribe("call-1", "test-api-key")
+            self.assertEqual(len(relay.watchers), 1)
+            self.assertEqual(relay.watcher_keys, {"call-1": "test-api-key"})
+
+            for observer in (first, second):
+                event = await asyncio.wait_for(observer.next_event(), 1)
+                self.assertEqual(event["type"], "messages")
+                self.assertEqual(event["messages"][0]["text"], "hello")
+            # The first key check and at most one watcher poll; the second
+            # observer's key is already known
+            self.assertLessEqual(api.calls, 2)
+
+            relay.unsubscribe(first)
+            relay.unsubscribe(second)
+            for watcher in list(relay.watchers.values()):
+                watcher.cancel()
+
+        asyncio.run(scenario())
+
+    def test_unknown_keys_are_rejected(self):
+        """Test that an observer with a key that cannot read the call gets nothing."""
+        api = FakeMessagesApi()
+        relay = TranscriptRelay(cache=MessageCache(fetch_messages=api), poll_interval=60)
+
+        async def scenario():
+            api.add("hello")
+            with self.assertRaises(HTTPException):
+                await relay.subscribe("call-1", "other-key")
+            self.assertEqual(relay.watchers, {})
+
+            observer = await relay.subscribe("call-1", "test-api-key")
+            self.assertEqual(relay.watcher_keys["call-1"], "test-api-key")
+            with self.assertRaises(HTTPException):
+                await relay.subscribe("call-1", "other-key")
+            self.assertEqual(len(relay.observers["call-1"]), 1)
+
+            relay.unsubscribe(observer)
+            for watcher in list(relay.watchers.values()):
+                watcher.cancel()
+
+        asyncio.run(scenario())
+
+    def test_slow_observer_gets_resync_marker(self):
+        """Test that a lagging observer drops the oldest messages."""
+        async def scenario():
+            observer = TranscriptObserver("call-1", queue_size=3)
+            observer.offer([{"ordinal": i, "text": str(i)} for i in range(5)])
+
+            resync = await observer.next_event()
+            self.assertEqual(resync, {"type": "resync", "dropped": 2, "nextOrdinal": 2})
+            delta = await observer.next_event()
+            self.assertEqual([m["ordinal"] for m in delta["messages"]], [2, 3, 4])
+
+            observer.end()
+            self.assertEqual((await observer.next_event())["type"], "ended")
+            self.assertIsNone(await observer.next_event())
+
+        asyncio.run(scenario())
+
+
+class TestLiveTranscriptEndpoint(unittest.TestCase):
+    """Test cases for the live transcript WebSocket."""
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.api = FakeMessagesApi()
+        self.api.add("hello", "world")
+        # An ended call whose transcript is already cached
+        cache = MessageCache(fetch_messages=self.api)
+        asyncio.run(cache.refresh("test-api-key", "call-1"))
+        cache.mark_ended("call-1")
+        patcher = patch("app.routers.ultravox.transcript_relay", TranscriptRelay(cache=cache, poll_interval=60))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_owner_key_gets_transcript(self):
+        """Test that an observer with the call's key receives its messages."""
+        with self.client.websocket_connect("/api/ultravox/ultravox/call-messages/call-1/live?apiKey=test-api-key") as websocket:
+            event = websocket.receive_json()
+            self.assertEqual([message["text"] for message in event["messages"]], ["hello", "world"])
+            self.assertEqual(websocket.receive_json()["type"], "ended")
+
+    def test_wrong_key_is_refused(self):
+        """Test that an observer with another key is refused before anything is sent."""
+        with self.assertRaises(WebSocketDisconnect) as raised:
+            with self.client.websocket_connect("/api/ultravox/ultravox/call-messages/call-1/live?apiKey=other-key") as websocket:
+                websocket.receive_json()
+        self.assertEqual(raised.exception.code, 1008)
+
+
+if __name__ == "__main__":
+    unittest.main()
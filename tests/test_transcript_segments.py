@@ -0,0 +1,92 @@
+"""
+Tests for the transcript segment storage.
+"""
+import os
+import asyncio
+import tempfile
+import unittest
+
+from app.utils.message_cache import MessageCache
+from app.utils.results_builder import ResultsBuilder
+from app.utils.transcript_segments import TranscriptSegmentStore, SEGMENT_SUFFIX
+from tests.test_results_builder import FakeUltravox, make_record
+
+
+class TestTranscriptSegmentStore(unittest.TestCase):
+    """Test cases for the TranscriptSegmentStore class."""
+
+    def setUp(self):
+        """Create a temporary segment directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = TranscriptSegmentStore(self.directory.name)
+
+    def tearDown(self):
+        """Remove the temporary segment directory."""
+        for segment_map in self.store.maps.values():
+            segment_map.close()
+        self.directory.cleanup()
+
+    def test_append_and_read(self):
+        """Test reading single transcripts back from a shared segment."""
+        self.store.append("session-1", "Interviewer: Hello\nCandidate: Hi", day="2024-01-01")
+        self.store.append("session-2", "Interviewer: Welcome" * 100, day="2024-01-01")
+
+        self.assertEqual(self.store.read("session-1"), "Interviewer: Hello\nCandidate: Hi")
+        self.assertEqual(self.store.read("session-2"), "Interviewer: Welcome" * 100)
+        self.assertIsNone(self.store.read("missing"))
+        self.assertEqual(self.store.segments(), ["2024-01-01"])
+
+        # Repetitive transcripts are stored compressed
+        segment_size = os.path.getsize(os.path.join(self.directory.name, "2024-01-01" + SEGMENT_SUFFIX))
+        self.assertLess(segment_size, len("Interviewer: Welcome" * 100))
+
+    def test_index_is_reloaded(self):
+        """Test that a new store instance finds existing transcripts."""
+        self.store.append("session-1", "first", day="2024-01-01")
+        self.store.append("session-1", "second", day="2024-01-02")
+
+        reopened = TranscriptSegmentStore(self.directory.name)
+        self.assertEqual(reopened.read("session-1"), "second")
+
+    def test_compaction_drops_superseded_blocks(self):
+        """Test that compaction rewrites a segment with only live blocks."""
+        for version in range(5):
+            self.store.append("session-1", f"version {version} " * 50, day="2024-01-01")
+        self.store.append("session-2", "kept", day="2024-01-01")
+        path = os.path.join(self.directory.name, "2024-01-01" + SEGMENT_SUFFIX)
+        size_before = os.path.getsize(path)
+        self.assertEqual(self.store.read("session-1"), "version 4 " * 50)
+
+        self.assertEqual(self.store.compact_closed_segments(), 1)
+        self.assertLess(os.path.getsize(path), size_before)
+        self.assertEqual(self.store.read("session-1"), "version 4 " * 50)
+        self.assertEqual(self.store.read("session-2"), "kept")
+        self.assertFalse(self.store.compact("2024-01-01"))
+
+        reopened = TranscriptSegmentStore(self.directory.name)
+        self.assertEqual(reopened.read("session-1"), "version 4 " * 50)
+
+    def test_results_builder_keeps_transcripts_in_segments(self):
+        """Test that materialized results store their transcript in segments."""
+        fake = FakeUltravox()
+        builder = ResultsBuilder(
+            cache=MessageCache(fetch_messages=fake.messages),
+            fetch_call_details=fake.call_details,
+            fetch_stages=fake.stages,
+            store={},
+            transcripts=self.store,
+        )
+
+        async def scenario():
+            first = await builder.get_results("session-1", make_record(), "test-api-key")
+            again = await builder.get_results("session-1", make_record(), "test-api-key")
+            return first, again
+
+        first, again = asyncio.run(scenario())
+        self.assertIsNone(builder.store["session-1"]["transcript"]["full"])
+        self.assertEqual(again["transcript"]["full"], first["transcript"]["full"])
+        self.assertIn("session-1", self.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for tenant-fair scheduling of upstream requests.
+"""
+import asyncio
+import unittest
+
+from app.utils.upstream_scheduler import UpstreamScheduler, upstream_context, INTERACTIVE, BACKGROUND
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestUpstreamScheduler(unittest.TestCase):
+    """Test cases for the UpstreamScheduler class."""
+
+    def run_queued(self, scheduler, requests):
+        """
+        Queue requests behind one holding the only slot, then release it and
+        return the order the requests were served in.
+        """
+        served = []
+
+        async def request(name, tenant, priority):
+            async with scheduler.slot(tenant, priority):
+                served.append(name)
+
+        async def scenario():
+            async with scheduler.slot("holder", INTERACTIVE):
+                tasks = [asyncio.create_task(request(*args)) for args in requests]
+                await asyncio.sleep(0)
+                self.assertEqual(scheduler.queue_depth(), len(requests))
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        return served
+
+    def test_interactive_first(self):
+        """Test that interactive requests overtake queued background ones."""
+        served = self.run_queued(UpstreamScheduler(max_concurrency=1), [
+            ("poll-1", "acme", BACKGROUND),
+            ("poll-2", "acme", BACKGROUND),
+            ("join", "globex", INTERACTIVE),
+        ])
+        self.assertEqual(served, ["join", "poll-1", "poll-2"])
+
+    def test_bulk_tenant_does_not_starve_others(self):
+        """Test that tenants take turns instead of first come, first served."""
+        requests = [(f"bulk-{i}", "bulk", INTERACTIVE) for i in range(6)]
+        requests += [(f"small-{i}", "small", INTERACTIVE) for i in range(2)]
+        served = self.run_queued(UpstreamScheduler(max_concurrency=1), requests)
+        self.assertEqual(served[:4], ["bulk-0", "small-0", "bulk-1", "small-1"])
+
+    def test_weights(self):
+        """Test that a heavier tenant gets a proportionally larger share."""
+        requests = [(f"big-{i}", "big", INTERACTIVE) for i in range(4)]
+        requests += [(f"small-{i}", "small", INTERACTIVE) for i in range(4)]
+        served = self.run_queued(UpstreamScheduler(max_concurrency=1, weights={"big": 2}), requests)
+        self.assertEqual([name.split("-")[0] for name in served[:6]], ["big", "big", "small", "big", "big", "small"])
+
+    def test_context_and_stats(self):
+        """Test that requests take tenant and class from context and report waits."""
+        clock = Clock()
+        scheduler = UpstreamScheduler(max_concurrency=1, clock=clock)
+
+        async def request():
+            async with scheduler.slot():
+                pass
+
+        async def scenario():
+            async with scheduler.slot("acme"):
+                with upstream_context("globex", BACKGROUND):
+                    waiting = asyncio.create_task(request())
+                    cancelled = asyncio.create_task(request())
+                await asyncio.sleep(0)
+                tenants = {stats["tenant"]: stats for stats in scheduler.snapshot()["tenants"]}
+                self.assertEqual(tenants["globex"]["queued"], {"interactive": 0, "background": 2})
+
+                cancelled.cancel()
+                await asyncio.sleep(0)
+                self.assertEqual(scheduler.queue_depth(BACKGROUND), 1)
+                clock.now += 2
+            await waiting
+
+        asyncio.run(scenario())
+        snapshot = scheduler.snapshot()
+        self.assertEqual(snapshot["inFlight"], 0)
+        globex = next(stats for stats in snapshot["tenants"] if stats["tenant"] == "globex")
+        self.assertEqual((globex["served"], globex["maxWaitSeconds"]), (1, 2.0))
+        self.assertEqual(globex["queued"]["background"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()